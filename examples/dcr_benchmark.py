@@ -0,0 +1,27 @@
+import os
+import tempfile
+
+from pm4py.algo.evaluation.dcr import benchmark
+
+
+def execute_script():
+    logs = {"running-example": os.path.join("..", "tests", "input_data", "running-example.xes"),
+            "receipt": os.path.join("..", "tests", "compressed_input_data", "08_receipt.xes.gz")}
+    configs = [{"alg_name": "basic"}, {"alg_name": "no_additional_conditions", "findAdditionalConditions": False}]
+    variants = ["DCR_BASIC", "DCR_N", "DCR_ME", "DCR_NME"]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        results_path = os.path.join(tmp_dir, "results.csv")
+        # every log is parsed once, the train / test split is shared by all the jobs of the log
+        results = benchmark.run_benchmark(logs, configs, results_path, variants=variants, cores=4,
+                                          test_fraction=0.3, seed=0)
+        print(results[["log", "config", "variant", "mining_time", "mining_peak_memory", "size",
+                       "training_fitness"]])
+        # running it again on the same results table runs only the missing jobs (none here)
+        results = benchmark.run_benchmark(logs, configs, results_path, variants=variants, cores=4,
+                                          test_fraction=0.3, seed=0)
+        print(f'[i] {len(results)} jobs in the results table')
+
+
+if __name__ == "__main__":
+    execute_script()
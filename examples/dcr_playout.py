@@ -0,0 +1,34 @@
+import os
+import tempfile
+import time
+
+import pm4py
+from pm4py.algo.discovery.dcr_discover import algorithm as dcr_discovery
+from pm4py.algo.simulation.playout.dcr import algorithm as dcr_playout
+
+
+def execute_script(no_traces=5000):
+    log = pm4py.read_xes(os.path.join("..", "tests", "compressed_input_data", "08_receipt.xes.gz"), return_legacy_log_object=True)
+    dcr, _ = dcr_discovery.apply(log)
+
+    # stochastic playout, the weights of the events are their frequencies in the log
+    for cores in [1, 4]:
+        start = time.time()
+        df = dcr_playout.apply(dcr, variant=dcr_playout.Variants.STOCHASTIC_PLAYOUT,
+                               parameters={"log": log, "noTraces": no_traces, "random_seed": 0, "cores": cores,
+                                           "add_only_if_accepting": True, "return_dataframe": True})
+        print(f'[i] {cores} process(es): {len(df)} events in {no_traces} cases, {time.time() - start:.2f}s')
+
+    # the traces are written to the XES file while they are generated
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = dcr_playout.apply(dcr, parameters={"noTraces": no_traces, "random_seed": 0, "cores": 4,
+                                                  "xes_output_path": os.path.join(tmp_dir, "simulated.xes.gz")})
+        print(f'[i] XES log of {os.path.getsize(path)} bytes written to {path}')
+
+    # all the accepting traces with at most 4 events
+    log = dcr_playout.apply(dcr, variant=dcr_playout.Variants.EXTENSIVE, parameters={"maxTraceLength": 4})
+    print(f'[i] {len(log)} traces with at most 4 events')
+
+
+if __name__ == "__main__":
+    execute_script()
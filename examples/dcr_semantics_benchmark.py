@@ -0,0 +1,50 @@
+import os
+import time
+
+import pm4py
+from pm4py.algo.discovery.dcr_discover import algorithm as dcr_discover
+from pm4py.objects.dcr.semantics import DcrSemantics
+from pm4py.objects.dcr.compiled_semantics import CompiledDcrGraph, CompiledDcrSemantics
+
+
+def replay(traces, new_semantics):
+    accepted = []
+    for trace in traces:
+        semantics = new_semantics()
+        can_execute = True
+        for activity in trace:
+            executed, _ = semantics.execute(activity)
+            if not executed:
+                can_execute = False
+                break
+        accepted.append(can_execute and semantics.is_accepting())
+    return accepted
+
+
+def execute_script(repetitions=5):
+    """
+    Benchmarks the replay of an event log on a mined DCR graph with the dict-of-sets engine (DcrSemantics)
+    against the compiled bitset engine (CompiledDcrSemantics)
+    """
+    log = pm4py.read_xes(os.path.join("..", "tests", "compressed_input_data", "08_receipt.xes.gz"), return_legacy_log_object=True)
+    dcr, _ = dcr_discover.apply(log)
+    traces = [[event['concept:name'] for event in trace] for trace in log] * repetitions
+    print(f'[i] replaying {len(traces)} traces on a graph with {len(dcr["events"])} events')
+
+    start = time.time()
+    res_dict = replay(traces, lambda: DcrSemantics(dcr, cmd_print=False))
+    time_dict = time.time() - start
+    print(f'[i] DcrSemantics: {time_dict:.3f}s')
+
+    start = time.time()
+    graph = CompiledDcrGraph(dcr)
+    res_compiled = replay(traces, lambda: CompiledDcrSemantics(graph, cmd_print=False))
+    time_compiled = time.time() - start
+    print(f'[i] CompiledDcrSemantics: {time_compiled:.3f}s (speedup {time_dict / max(time_compiled, 1e-9):.1f}x)')
+
+    assert res_dict == res_compiled
+    print(f'[i] accepted traces: {sum(res_compiled)}/{len(res_compiled)}')
+
+
+if __name__ == "__main__":
+    execute_script()
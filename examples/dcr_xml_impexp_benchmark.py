@@ -0,0 +1,80 @@
+import multiprocessing
+import os
+import random
+import resource
+import tempfile
+import time
+
+from pm4py.objects.dcr.exporter import exporter as dcr_exporter
+from pm4py.objects.dcr.importer import importer as dcr_importer
+
+
+def generate_dcr(n_events, rules_per_event=3, seed=0):
+    """
+    Random DCR graph with n_events events and about rules_per_event rules (of every type) per event
+    """
+    rnd = random.Random(seed)
+    events = [f'event {i}' for i in range(n_events)]
+    dcr = {'events': set(events), 'marking': {'executed': set(), 'included': set(events), 'pending': set()}}
+    for relation in ['conditionsFor', 'responseTo', 'includesTo', 'excludesTo', 'milestonesFor', 'noResponseTo']:
+        dcr[relation] = {}
+        for _ in range(n_events * rules_per_event // 6):
+            dcr[relation].setdefault(rnd.choice(events), set()).add(rnd.choice(events))
+    return dcr
+
+
+def run_export(variant_name, n_events, path, parameters):
+    # the variants are passed by name to the measuring process
+    variant = dcr_exporter.Variants[variant_name]
+    dcr = generate_dcr(n_events)
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.time()
+    dcr_exporter.apply(dcr, path, variant=variant, **parameters)
+    elapsed = time.time() - start
+    return elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before
+
+
+def run_import(variant_name, path):
+    variant = dcr_importer.Variants[variant_name]
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.time()
+    dcr = dcr_importer.apply(path, variant=variant)
+    elapsed = time.time() - start
+    assert len(dcr['events']) > 0
+    return elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before
+
+
+def measure(function, *args):
+    # every measure runs in a fresh process, so that the peak RSS of the previous runs does not hide the current one
+    with multiprocessing.get_context("spawn").Pool(1, maxtasksperchild=1) as pool:
+        return pool.apply(function, args)
+
+
+def execute_script(n_events=5000):
+    """
+    Compares time and peak RSS (increase of the maximum resident set size, in KB on Linux) of the streaming
+    DCR XML exporters and of the iterparse importers against the tree based variants
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for name, variant, stream_variant, parameters in [
+            ("simple", dcr_exporter.XML_SIMPLE, dcr_exporter.XML_SIMPLE_STREAM, {'dcr_title': 'benchmark'}),
+            ("dcr portal", dcr_exporter.XML_DCR_PORTAL, dcr_exporter.XML_DCR_PORTAL_STREAM, {'dcr_title': 'benchmark'})]:
+            path = os.path.join(tmp_dir, "tree.xml")
+            stream_path = os.path.join(tmp_dir, "stream.xml")
+            elapsed, rss = measure(run_export, variant.name, n_events, path, parameters)
+            print(f'[i] export {name} ({n_events} events), tree: {elapsed:.2f}s, peak RSS +{rss} KB')
+            elapsed, rss = measure(run_export, stream_variant.name, n_events, stream_path, parameters)
+            print(f'[i] export {name} ({n_events} events), stream: {elapsed:.2f}s, peak RSS +{rss} KB')
+
+            if name == "simple":
+                import_variants = [dcr_importer.Variants.XML_SIMPLE, dcr_importer.Variants.XML_SIMPLE_ITERPARSE]
+            else:
+                import_variants = [dcr_importer.Variants.XML_DCR_PORTAL,
+                                   dcr_importer.Variants.XML_DCR_PORTAL_ITERPARSE]
+            for import_variant in import_variants:
+                elapsed, rss = measure(run_import, import_variant.name, path)
+                print(f'[i] import {name}, {import_variant.name}: {elapsed:.2f}s, peak RSS +{rss} KB')
+
+
+if __name__ == "__main__":
+    execute_script()
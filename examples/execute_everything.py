@@ -10,6 +10,12 @@ def declare_simple():
     declare_simple.execute_script()
 
 
+def dcr_playout():
+    from examples import dcr_playout
+    print("\n\ndcr_playout")
+    dcr_playout.execute_script()
+
+
 def variants_paths_duration():
     from examples import variants_paths_duration
     print("\n\nvariants_paths_duration")
@@ -741,6 +747,12 @@ def streaming_discovery_dfg():
     streaming_discovery_dfg.execute_script()
 
 
+def streaming_discovery_dcr():
+    from examples import streaming_discovery_dcr
+    print("\n\nstreaming_discovery_dcr")
+    streaming_discovery_dcr.execute_script()
+
+
 def streaming_xes_reader_event_stream():
     from examples import streaming_xes_reader_event_stream
     print("\n\nstreaming_xes_reader_event_stream")
@@ -950,6 +962,7 @@ def main():
     execute_script(visualization_processtree)
     execute_script(visualization_align_table)
     execute_script(declare_simple)
+    execute_script(dcr_playout)
     execute_script(variants_paths_duration)
     execute_script(feature_extraction_case_loc)
     execute_script(log_skeleton_manual_constraints)
@@ -958,6 +971,7 @@ def main():
     execute_script(streaming_conformance_tbr)
     execute_script(streaming_csv_reader_event_stream)
     execute_script(streaming_discovery_dfg)
+    execute_script(streaming_discovery_dcr)
     execute_script(streaming_xes_reader_event_stream)
     execute_script(streaming_xes_reader_trace_stream)
     execute_script(monte_carlo_dfg)
@@ -0,0 +1,40 @@
+import os
+
+import pm4py
+from pm4py.streaming.algo.discovery.dcr import algorithm as dcr_discovery
+from pm4py.streaming.stream.live_event_stream import LiveEventStream
+
+
+def execute_script():
+    # imports a XES event log
+    log = pm4py.read_xes(os.path.join("..", "tests", "input_data", "running-example.xes"))
+    # converts the log into a list of events (not anymore grouped in cases)
+    event_stream = pm4py.convert_to_event_stream(log)
+    # creates a live event stream (an object that distributes the messages to the algorithm).
+    # DisCoveR depends on the order of the events inside a case, hence a single delivery thread is used
+    live_stream = LiveEventStream(parameters={"thread_pool_size": 1})
+    # creates the streaming DCR discovery object: a case is completed by one of its end activities,
+    # and at most 100 running cases are kept in memory
+    stream_dcr_disc = dcr_discovery.apply(parameters={"end_activities": {"pay compensation", "reject request"},
+                                                      "max_open_cases": 100})
+    # register the discovery algorithm to the stream
+    live_stream.register(stream_dcr_disc)
+    # start the recording of events from the live event stream
+    live_stream.start()
+    # append each event of the original log to the live event stream
+    # (so it is sent to the discovery algorithm)
+    for index, event in enumerate(event_stream):
+        live_stream.append(event)
+    # stops the live event stream
+    live_stream.stop()
+    # completes the cases that are still running
+    stream_dcr_disc.terminate_all()
+    # gets the DCR graph mined from the current log abstraction
+    dcr = stream_dcr_disc.get()
+    print(dcr['events'])
+    print(dcr['conditionsFor'])
+    print(dcr['responseTo'])
+
+
+if __name__ == "__main__":
+    execute_script()
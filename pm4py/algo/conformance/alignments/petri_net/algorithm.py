@@ -22,8 +22,9 @@ from pm4py.objects.conversion.log import converter as log_converter
 from pm4py.util.xes_constants import DEFAULT_NAME_KEY, DEFAULT_TRACEID_KEY
 from pm4py.objects.log.obj import Trace, Event
 import time
+import warnings
 from pm4py.util.lp import solver
-from pm4py.util import exec_utils
+from pm4py.util import exec_utils, chunking
 from enum import Enum
 import sys
 from pm4py.util.constants import PARAMETER_CONSTANT_ACTIVITY_KEY, PARAMETER_CONSTANT_CASEID_KEY, CASE_CONCEPT_NAME
@@ -41,6 +42,7 @@ class Variants(Enum):
     VERSION_DIJKSTRA_NO_HEURISTICS = variants.dijkstra_no_heuristics
     VERSION_DIJKSTRA_LESS_MEMORY = variants.dijkstra_less_memory
     VERSION_DISCOUNTED_A_STAR = variants.discounted_a_star
+    VERSION_TRIE_DIJKSTRA = variants.trie_dijkstra
 
 class Parameters(Enum):
     PARAM_TRACE_COST_FUNCTION = 'trace_cost_function'
@@ -52,6 +54,7 @@ class Parameters(Enum):
     TRACE_NET_COST_AWARE_CONSTR_FUNCTION = "trace_net_cost_aware_constr_function"
     PARAM_MAX_ALIGN_TIME_TRACE = "max_align_time_trace"
     PARAM_MAX_ALIGN_TIME = "max_align_time"
+    PARAM_MAX_STATES_TRACE = "max_states_trace"
     PARAMETER_VARIANT_DELIMITER = "variant_delimiter"
     CASE_ID_KEY = PARAMETER_CONSTANT_CASEID_KEY
     ACTIVITY_KEY = PARAMETER_CONSTANT_ACTIVITY_KEY
@@ -62,6 +65,13 @@ class Parameters(Enum):
     FITNESS_ROUND_DIGITS = "fitness_round_digits"
     SYNCHRONOUS = "synchronous_dijkstra"
     EXPONENT="theta"
+    POOL = "alignments_pool"
+
+
+# parameters bound to the model: the ones given when an AlignmentsPool is created are used by its workers
+MODEL_PARAMETERS = {Parameters.PARAM_MODEL_COST_FUNCTION, Parameters.PARAM_SYNC_COST_FUNCTION}
+# model of the worker processes of an AlignmentsPool (see initialize_pool_worker)
+_pool_worker_model = None
 
 
 def __variant_mapper(variant):
@@ -93,6 +103,7 @@ VERSIONS = {Variants.VERSION_DIJKSTRA_NO_HEURISTICS, Variants.VERSION_DIJKSTRA_N
 def apply(obj: Union[EventLog, EventStream, pd.DataFrame, Trace], petri_net: PetriNet, initial_marking: Marking, final_marking: Marking, parameters: Optional[Dict[Any, Any]] = None, variant=DEFAULT_VARIANT) -> Union[typing.AlignmentResult, typing.ListAlignments]:
     if parameters is None:
         parameters = {}
+    __warn_unsupported_max_states_trace(variant, parameters)
     if isinstance(obj, Trace):
         return apply_trace(obj, petri_net, initial_marking, final_marking, parameters=parameters, variant=variant)
     else:
@@ -145,6 +156,15 @@ def apply_trace(trace, petri_net, initial_marking, final_marking, parameters=Non
                                                  parameters=parameters)
 
     trace_cost_function = exec_utils.get_param_value(Parameters.PARAM_TRACE_COST_FUNCTION, parameters, [])
+    __add_fitness(ali, best_worst_cost, trace_cost_function)
+
+    return ali
+
+
+def __add_fitness(ali, best_worst_cost, trace_cost_function):
+    """
+    Adds the fitness (and the best worst cost of the trace) to the alignment of a trace
+    """
     # Instead of using the length of the trace, use the sum of the trace cost function
     trace_cost_function_sum = sum(trace_cost_function)
 
@@ -175,8 +195,6 @@ def apply_trace(trace, petri_net, initial_marking, final_marking, parameters=Non
         # returning also the best worst cost, for log fitness computation
         ali["bwc"] = ltrace_bwc
 
-    return ali
-
 
 def apply_log(log, petri_net, initial_marking, final_marking, parameters=None, variant=DEFAULT_VARIANT):
     """
@@ -225,6 +243,12 @@ def apply_log(log, petri_net, initial_marking, final_marking, parameters=None, v
     parameters[Parameters.BEST_WORST_COST_INTERNAL] = best_worst_cost
 
     all_alignments = []
+    if hasattr(exec_utils.get_variant(variant), "apply_traces"):
+        # the variant aligns all the traces together, within the time limits of the log and of the traces
+        all_alignments = __align_traces_together(one_tr_per_var, petri_net, initial_marking, final_marking,
+                                                 parameters, variant, max_align_time=max_align_time,
+                                                 progress=progress)
+        one_tr_per_var = []
     for trace in one_tr_per_var:
         this_max_align_time = min(max_align_time_case, (max_align_time - (time.time() - start_time)) * 0.5)
         parameters[Parameters.PARAM_MAX_ALIGN_TIME_TRACE] = this_max_align_time
@@ -235,13 +259,15 @@ def apply_log(log, petri_net, initial_marking, final_marking, parameters=None, v
 
     alignments = __form_alignments(variants_idxs, all_alignments)
     __close_progress_bar(progress)
+    __warn_approximate_alignments(alignments)
 
     return alignments
 
 
 def apply_multiprocessing(log, petri_net, initial_marking, final_marking, parameters=None, variant=DEFAULT_VARIANT):
     """
-    Applies the alignments using a process pool (multiprocessing)
+    Applies the alignments using a process pool (multiprocessing): the AlignmentsPool of the model passed in the
+    parameters if there is one, otherwise a pool started for this call
 
     Parameters
     ---------------
@@ -254,7 +280,9 @@ def apply_multiprocessing(log, petri_net, initial_marking, final_marking, parame
     final_marking
         Final marking
     parameters
-        Parameters of the algorithm
+        Parameters of the algorithm, including:
+            Parameters.CORES -> number of worker processes
+            Parameters.POOL -> (optional) AlignmentsPool of the model to use
 
     Returns
     ----------------
@@ -264,43 +292,224 @@ def apply_multiprocessing(log, petri_net, initial_marking, final_marking, parame
     if parameters is None:
         parameters = {}
 
-    import multiprocessing
-
     variant = __variant_mapper(variant)
+    __warn_unsupported_max_states_trace(variant, parameters)
 
-    num_cores = exec_utils.get_param_value(Parameters.CORES, parameters, multiprocessing.cpu_count() - 2)
-
-    best_worst_cost = __get_best_worst_cost(petri_net, initial_marking, final_marking, variant, parameters)
     variants_idxs, one_tr_per_var = __get_variants_structure(log, parameters)
-    parameters[Parameters.BEST_WORST_COST_INTERNAL] = best_worst_cost
-
-    all_alignments = []
+    progress = __get_progress_bar(len(one_tr_per_var), parameters)
 
-    from concurrent.futures import ProcessPoolExecutor
-    with ProcessPoolExecutor(max_workers=num_cores) as executor:
-        futures = []
-        for trace in one_tr_per_var:
-            futures.append(executor.submit(apply_trace, trace, petri_net, initial_marking, final_marking, parameters, str(variant)))
-        progress = __get_progress_bar(len(one_tr_per_var), parameters)
-        if progress is not None:
-            alignments_ready = 0
-            while alignments_ready != len(futures):
-                current = 0
-                for index, variant in enumerate(futures):
-                    current = current + 1 if futures[index].done() else current
-                if current > alignments_ready:
-                    for i in range(0, current - alignments_ready):
-                        progress.update()
-                alignments_ready = current
-        for index, variant in enumerate(futures):
-            all_alignments.append(futures[index].result())
-        __close_progress_bar(progress)
+    # the pool passed as parameter is reused, the net is not sent again
+    pool = exec_utils.get_param_value(Parameters.POOL, parameters, None)
+    if pool is not None:
+        pool.check_model(petri_net, initial_marking, final_marking, variant)
+        all_alignments = list(pool.imap(one_tr_per_var, parameters=parameters, progress=progress))
+    else:
+        with AlignmentsPool(petri_net, initial_marking, final_marking, parameters=parameters, variant=variant,
+                            num_workers=len(one_tr_per_var)) as pool:
+            all_alignments = list(pool.imap(one_tr_per_var, parameters=parameters, progress=progress))
+    __close_progress_bar(progress)
 
     alignments = __form_alignments(variants_idxs, all_alignments)
+    __warn_approximate_alignments(alignments)
 
     return alignments
 
 
+def __align_traces_together(traces, petri_net, initial_marking, final_marking, parameters, variant,
+                             max_align_time=None, progress=None):
+    """
+    Aligns the traces with a variant aligning several traces at once (having an apply_traces method), adding the
+    fitness to the alignments
+    """
+    best_worst_cost = exec_utils.get_param_value(Parameters.BEST_WORST_COST_INTERNAL, parameters, None)
+    trace_cost_function = exec_utils.get_param_value(Parameters.PARAM_TRACE_COST_FUNCTION, parameters, None)
+    alignments = exec_utils.get_variant(variant).apply_traces(traces, petri_net, initial_marking, final_marking,
+                                                               parameters=copy(parameters),
+                                                               max_align_time=max_align_time, progress=progress)
+    for trace, ali in zip(traces, alignments):
+        if trace_cost_function is None:
+            __add_fitness(ali, best_worst_cost, [align_utils.STD_MODEL_LOG_MOVE_COST] * len(trace))
+        else:
+            __add_fitness(ali, best_worst_cost, trace_cost_function)
+    return alignments
+
+
+def get_call_parameters(parameters):
+    """
+    Parameters of a call sent to the workers of an AlignmentsPool along with the traces (without the parameters
+    bound to the model)
+    """
+    model_keys = MODEL_PARAMETERS | {Parameters.BEST_WORST_COST_INTERNAL, Parameters.POOL}
+    model_keys = model_keys | {k.value for k in model_keys}
+    return {k: v for k, v in parameters.items() if k not in model_keys}
+
+
+def initialize_pool_worker(petri_net, initial_marking, final_marking, parameters, variant):
+    """
+    Stores the model in the worker process of an AlignmentsPool (received once per worker)
+    """
+    global _pool_worker_model
+    _pool_worker_model = (petri_net, initial_marking, final_marking, parameters, variant)
+
+
+def align_pool_chunk(traces, parameters):
+    """
+    Aligns a chunk of traces against the model of the worker process
+    """
+    petri_net, initial_marking, final_marking, model_parameters, variant = _pool_worker_model
+    if isinstance(variant, str) and variant in Variants.__members__:
+        variant = Variants[variant]
+    parameters = dict(parameters)
+    parameters.update(model_parameters)
+    if hasattr(exec_utils.get_variant(variant), "apply_traces"):
+        # the traces of the chunk share the search of their prefixes
+        return __align_traces_together(traces, petri_net, initial_marking, final_marking, parameters, variant)
+    return [apply_trace(trace, petri_net, initial_marking, final_marking, parameters=copy(parameters),
+                        variant=variant) for trace in traces]
+
+
+class AlignmentsPool(object):
+    """
+    Pool of worker processes aligning traces against a Petri net. The net (with the parameters bound to it: the
+    cost functions of the model and the best worst cost) is sent once to every worker when the pool is created,
+    then only the traces and the other parameters of the calls travel. The traces are dispatched longest first, in
+    chunks whose size shrinks as the remaining work decreases, so that the workers finish at about the same time.
+
+    While the pool is open (until close(), or the end of the with block), it can be passed to apply_multiprocessing
+    with Parameters.POOL, so several logs are aligned without restarting the processes nor sending the net again.
+    """
+
+    def __init__(self, petri_net, initial_marking, final_marking, parameters=None, variant=DEFAULT_VARIANT,
+                 num_workers=None):
+        """
+        Parameters
+        ---------------
+        petri_net
+            Petri net
+        initial_marking
+            Initial marking
+        final_marking
+            Final marking
+        parameters
+            Parameters of the algorithm (Parameters.CORES: number of worker processes)
+        variant
+            Variant of the alignments
+        num_workers
+            (optional) maximum number of worker processes to start
+        """
+        if parameters is None:
+            parameters = {}
+
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+
+        self.petri_net = petri_net
+        self.initial_marking = initial_marking
+        self.final_marking = final_marking
+        if isinstance(variant, str):
+            variant = Variants[variant.split(".")[-1]]
+        self.variant = variant
+        self.cores = max(1, exec_utils.get_param_value(Parameters.CORES, parameters, multiprocessing.cpu_count() - 2))
+        if num_workers is not None:
+            self.cores = max(1, min(self.cores, num_workers))
+
+        model_keys = MODEL_PARAMETERS | {k.value for k in MODEL_PARAMETERS}
+        self.model_parameters = {k: v for k, v in parameters.items() if k in model_keys}
+        model_parameters = dict(self.model_parameters)
+        model_parameters[Parameters.BEST_WORST_COST_INTERNAL] = exec_utils.get_variant(self.variant).\
+            get_best_worst_cost(petri_net, initial_marking, final_marking, parameters=copy(parameters))
+        # the variants are sent by name (the modules of the variants cannot be pickled)
+        variant = self.variant.name if isinstance(self.variant, Variants) else self.variant
+        self.executor = ProcessPoolExecutor(max_workers=self.cores, initializer=initialize_pool_worker,
+                                            initargs=(petri_net, initial_marking, final_marking, model_parameters,
+                                                      variant))
+
+    def check_model(self, petri_net, initial_marking, final_marking, variant=None):
+        """
+        Raises an exception if the pool does not align against the given net, markings and (if provided) variant
+        """
+        if isinstance(variant, str):
+            variant = Variants[variant.split(".")[-1]]
+        if petri_net is not self.petri_net or initial_marking != self.initial_marking or \
+                final_marking != self.final_marking:
+            raise Exception("the alignments pool was created for a different Petri net or markings")
+        if variant is not None and variant != self.variant:
+            raise Exception("the alignments pool was created for the variant " + str(self.variant))
+
+    def check_model_parameters(self, parameters):
+        """
+        Raises an exception if the parameters bound to the model (cost functions of the model) given to a call differ
+        from the ones the pool was created with
+        """
+        for key in MODEL_PARAMETERS:
+            value = exec_utils.get_param_value(key, parameters, None)
+            if value is not None and value != exec_utils.get_param_value(key, self.model_parameters, None):
+                raise Exception("the parameter " + key.value + " differs from the one the alignments pool was "
+                                "created with: create a pool with the cost functions of the model of the call")
+
+    def imap(self, traces, parameters=None, progress=None):
+        """
+        Aligns the traces, yielding the alignments in the order of the traces as soon as they are available
+
+        Parameters
+        ---------------
+        traces
+            List of traces
+        parameters
+            Parameters of the call (the parameters bound to the model are the ones of the creation of the pool, an
+            exception is raised if the call provides different ones)
+        progress
+            (optional) progress bar, updated when a chunk of traces is aligned
+
+        Returns
+        ---------------
+        generator of the alignments
+        """
+        if parameters is None:
+            parameters = {}
+
+        from concurrent.futures import FIRST_COMPLETED, wait
+
+        self.check_model_parameters(parameters)
+        traces = list(traces)
+        call_parameters = get_call_parameters(parameters)
+        futures = {}
+        for chunk in chunking.get_longest_first_chunks(traces, self.cores):
+            futures[self.executor.submit(align_pool_chunk, [traces[i] for i in chunk], call_parameters)] = chunk
+
+        alignments = {}
+        next_index = 0
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                for i, alignment in zip(futures[future], future.result()):
+                    alignments[i] = alignment
+                if progress is not None:
+                    progress.update(len(futures[future]))
+            while next_index in alignments:
+                yield alignments.pop(next_index)
+                next_index += 1
+
+    def apply(self, traces, parameters=None, progress=None):
+        """
+        Aligns the traces (list of the alignments, see imap)
+        """
+        return list(self.imap(traces, parameters=parameters, progress=progress))
+
+    def close(self):
+        """
+        Stops the worker processes
+        """
+        self.executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
 def __get_best_worst_cost(petri_net, initial_marking, final_marking, variant, parameters):
     parameters_best_worst = copy(parameters)
 
@@ -366,6 +575,28 @@ def __form_alignments(variants_idxs, all_alignments):
     return alignments
 
 
+def __warn_unsupported_max_states_trace(variant, parameters):
+    """
+    Warns that Parameters.PARAM_MAX_STATES_TRACE is ignored by the variants other than the state equation A*
+    """
+    variant = __variant_mapper(variant)
+    if exec_utils.get_param_value(Parameters.PARAM_MAX_STATES_TRACE, parameters, None) is not None and \
+            variant not in (Variants.VERSION_STATE_EQUATION_A_STAR, variants.state_equation_a_star):
+        warnings.warn("the state budget of the traces (max_states_trace) is supported only by the state equation "
+                      "A* variant, it is ignored by %s" % str(variant))
+
+
+def __warn_approximate_alignments(alignments):
+    """
+    Reports the number of traces whose alignment is approximate (the search reached its state budget,
+    Parameters.PARAM_MAX_STATES_TRACE)
+    """
+    approximate = sum(1 for ali in alignments if ali is not None and ali.get("approximate", False))
+    if approximate > 0:
+        warnings.warn("%d of %d traces have an approximate alignment (the state budget of their search was reached)"
+                      % (approximate, len(alignments)))
+
+
 def __close_progress_bar(progress):
     if progress is not None:
         progress.close()
@@ -404,6 +635,9 @@ def get_diagnostics_dataframe(log, align_output, parameters=None):
         fitness = align_output[index]["fitness"]
         is_fit = fitness == 1.0
 
-        diagn_stream.append({"case_id": case_id, "cost": cost, "fitness": fitness, "is_fit": is_fit})
+        is_approximate = align_output[index].get("approximate", False)
+
+        diagn_stream.append({"case_id": case_id, "cost": cost, "fitness": fitness, "is_fit": is_fit,
+                             "is_approximate": is_approximate})
 
     return pd.DataFrame(diagn_stream)
@@ -29,25 +29,28 @@ References
 
 """
 import heapq
+import math
 import sys
 import time
+from collections import OrderedDict
 from copy import copy
 from enum import Enum
 
 import numpy as np
 
 from pm4py.objects.log import obj as log_implementation
+from pm4py.objects.petri_net import properties
 from pm4py.objects.petri_net.utils import align_utils as utils
 from pm4py.objects.petri_net.utils.incidence_matrix import construct as inc_mat_construct
 from pm4py.objects.petri_net.utils.synchronous_product import construct_cost_aware, construct
 from pm4py.objects.petri_net.utils.petri_utils import construct_trace_net_cost_aware, decorate_places_preset_trans, \
-    decorate_transitions_prepostset
+    decorate_transitions_prepostset, add_arc_from_to
 from pm4py.util import exec_utils
 from pm4py.util.constants import PARAMETER_CONSTANT_ACTIVITY_KEY
 from pm4py.util.lp import solver as lp_solver
 from pm4py.util.xes_constants import DEFAULT_NAME_KEY
 from pm4py.util import variants_util
-from typing import Optional, Dict, Any, Union
+from typing import Optional, Dict, Any, Union, List
 from pm4py.objects.log.obj import Trace
 from pm4py.objects.petri_net.obj import PetriNet, Marking
 from pm4py.util import typing
@@ -63,16 +66,23 @@ class Parameters(Enum):
     TRACE_NET_COST_AWARE_CONSTR_FUNCTION = "trace_net_cost_aware_constr_function"
     PARAM_MAX_ALIGN_TIME_TRACE = "max_align_time_trace"
     PARAM_MAX_ALIGN_TIME = "max_align_time"
+    PARAM_MAX_STATES_TRACE = "max_states_trace"
     PARAMETER_VARIANT_DELIMITER = "variant_delimiter"
     ACTIVITY_KEY = PARAMETER_CONSTANT_ACTIVITY_KEY
     VARIANTS_IDX = "variants_idx"
     RETURN_SYNC_COST_FUNCTION = "return_sync_cost_function"
+    HEURISTICS_CACHE = "heuristics_cache"
+    RETURN_SEARCH_COUNTERS = "return_search_counters"
 
 
 PARAM_TRACE_COST_FUNCTION = Parameters.PARAM_TRACE_COST_FUNCTION.value
 PARAM_MODEL_COST_FUNCTION = Parameters.PARAM_MODEL_COST_FUNCTION.value
 PARAM_SYNC_COST_FUNCTION = Parameters.PARAM_SYNC_COST_FUNCTION.value
 
+# maximum number of exact heuristics memoized by a state equation (or shared by the traces aligned with a
+# HeuristicsCache), the least recently used ones are evicted first
+DEFAULT_MAX_HEURISTICS_MEMO = 10000
+
 
 def get_best_worst_cost(petri_net, initial_marking, final_marking, parameters=None):
     """
@@ -122,10 +132,19 @@ def apply(trace: Trace, petri_net: PetriNet, initial_marking: Marking, final_mar
         Parameters.PARAM_SYNC_COST_FUNCTION: :class:`dict` (parameter) mapping of each transition in the model to corresponding
         synchronous costs
         Parameters.ACTIVITY_KEY: :class:`str` (parameter) key to use to identify the activity described by the events
+        Parameters.HEURISTICS_CACHE: :class:`HeuristicsCache` (parameter) cache of the net shared by the alignments of
+        several traces (used when the trace net is constructed by the default function)
+        Parameters.PARAM_MAX_STATES_TRACE: :class:`int` (parameter) maximum number of states kept in memory by the
+        search of the trace; when it is reached, the search continues with a bounded beam and the alignment is
+        approximate
+        Parameters.RETURN_SEARCH_COUNTERS: :class:`bool` (parameter) adds the counters of the search
+        (**heuristics_memo_hits**, **construction_time**, **lp_time** and **queue_time**) to the alignment
 
     Returns
     -------
-    dictionary: `dict` with keys **alignment**, **cost**, **visited_states**, **queued_states** and **traversed_arcs**
+    dictionary: `dict` with keys **alignment**, **cost**, **visited_states**, **queued_states**, **traversed_arcs**
+    and **lp_solved**. The alignments found after the state budget was reached have the key **approximate** set to
+    True
     """
     if parameters is None:
         parameters = {}
@@ -156,6 +175,17 @@ def apply(trace: Trace, petri_net: PetriNet, initial_marking: Marking, final_mar
         parameters[Parameters.PARAM_MODEL_COST_FUNCTION] = model_cost_function
         parameters[Parameters.PARAM_SYNC_COST_FUNCTION] = sync_cost_function
 
+    sync_cost_function = exec_utils.get_param_value(Parameters.PARAM_SYNC_COST_FUNCTION, parameters, None)
+    if trace_net_constr_function is None and trace_net_cost_aware_constr_function is construct_trace_net_cost_aware \
+            and sync_cost_function is not None:
+        # the synchronous product and its state equation are assembled from the parts of the net compiled once
+        heuristics_cache = exec_utils.get_param_value(Parameters.HEURISTICS_CACHE, parameters, None)
+        if heuristics_cache is None or not heuristics_cache.is_compiled_for(petri_net, initial_marking, final_marking,
+                                                                             model_cost_function, sync_cost_function):
+            heuristics_cache = HeuristicsCache(petri_net, initial_marking, final_marking, model_cost_function,
+                                               sync_cost_function)
+        return __apply_heuristics_cache(trace, heuristics_cache, trace_cost_function, parameters)
+
     if trace_net_constr_function is not None:
         # keep the possibility to pass TRACE_NET_CONSTR_FUNCTION in this old version
         trace_net, trace_im, trace_fm = trace_net_constr_function(trace, activity_key=activity_key)
@@ -170,6 +200,132 @@ def apply(trace: Trace, petri_net: PetriNet, initial_marking: Marking, final_mar
     return alignment
 
 
+def apply_traces(traces: List[Trace], petri_net: PetriNet, initial_marking: Marking, final_marking: Marking, parameters: Optional[Dict[Union[str, Parameters], Any]] = None, max_align_time=None, progress=None) -> List[typing.AlignmentResult]:
+    """
+    Aligns several traces against a Petri net, one search per trace. The searches share a HeuristicsCache of the
+    net: the net part of the incidence matrix is compiled once, and the exact heuristics computed for a trace are
+    reused by the traces having the same suffixes.
+
+    Parameters
+    ----------
+    traces
+        List of traces
+    petri_net
+        Petri net
+    initial_marking
+        Initial marking
+    final_marking
+        Final marking
+    parameters
+        Parameters of the algorithm (same as 'apply' method)
+    max_align_time
+        (optional) maximum time (in seconds) of the alignment of all the traces, overriding
+        Parameters.PARAM_MAX_ALIGN_TIME
+    progress
+        (optional) progress bar, updated when a trace is aligned
+
+    Returns
+    -------
+    list of the alignments of the traces (None for the traces not aligned within the time limits)
+    """
+    if parameters is None:
+        parameters = {}
+    parameters = copy(parameters)
+
+    model_cost_function = exec_utils.get_param_value(Parameters.PARAM_MODEL_COST_FUNCTION, parameters, None)
+    sync_cost_function = exec_utils.get_param_value(Parameters.PARAM_SYNC_COST_FUNCTION, parameters, None)
+    if max_align_time is None:
+        max_align_time = exec_utils.get_param_value(Parameters.PARAM_MAX_ALIGN_TIME, parameters, sys.maxsize)
+    max_align_time_trace = exec_utils.get_param_value(Parameters.PARAM_MAX_ALIGN_TIME_TRACE, parameters,
+                                                      sys.maxsize)
+
+    if model_cost_function is None:
+        model_cost_function = dict()
+        sync_cost_function = dict()
+        for t in petri_net.transitions:
+            if t.label is not None:
+                model_cost_function[t] = utils.STD_MODEL_LOG_MOVE_COST
+                sync_cost_function[t] = utils.STD_SYNC_COST
+            else:
+                model_cost_function[t] = utils.STD_TAU_COST
+        parameters[Parameters.PARAM_MODEL_COST_FUNCTION] = model_cost_function
+        parameters[Parameters.PARAM_SYNC_COST_FUNCTION] = sync_cost_function
+
+    heuristics_cache = exec_utils.get_param_value(Parameters.HEURISTICS_CACHE, parameters, None)
+    if sync_cost_function is not None and (heuristics_cache is None or not heuristics_cache.is_compiled_for(
+            petri_net, initial_marking, final_marking, model_cost_function, sync_cost_function)):
+        parameters[Parameters.HEURISTICS_CACHE] = HeuristicsCache(petri_net, initial_marking, final_marking,
+                                                                  model_cost_function, sync_cost_function)
+
+    start_time = time.time()
+    alignments = []
+    for trace in traces:
+        trace_parameters = copy(parameters)
+        trace_parameters[Parameters.PARAM_MAX_ALIGN_TIME_TRACE] = min(max_align_time_trace, (
+                max_align_time - (time.time() - start_time)) * 0.5)
+        alignments.append(apply(trace, petri_net, initial_marking, final_marking, parameters=trace_parameters))
+        if progress is not None:
+            progress.update()
+    return alignments
+
+
+def __apply_heuristics_cache(trace, heuristics_cache, trace_cost_function, parameters):
+    """
+    Aligns a trace on the synchronous product assembled by a HeuristicsCache
+    """
+    activity_key = exec_utils.get_param_value(Parameters.ACTIVITY_KEY, parameters, DEFAULT_NAME_KEY)
+    ret_tuple_as_trans_desc = exec_utils.get_param_value(Parameters.PARAM_ALIGNMENT_RESULT_IS_SYNC_PROD_AWARE,
+                                                         parameters, False)
+    max_align_time_trace = exec_utils.get_param_value(Parameters.PARAM_MAX_ALIGN_TIME_TRACE, parameters,
+                                                      sys.maxsize)
+    max_states_trace = exec_utils.get_param_value(Parameters.PARAM_MAX_STATES_TRACE, parameters, sys.maxsize)
+    return_sync_cost = exec_utils.get_param_value(Parameters.RETURN_SYNC_COST_FUNCTION, parameters, False)
+    return_counters = exec_utils.get_param_value(Parameters.RETURN_SEARCH_COUNTERS, parameters, False)
+
+    sync_prod, sync_initial_marking, sync_final_marking, cost_function, state_equation = heuristics_cache.construct(
+        trace, trace_cost_function, activity_key=activity_key)
+    alignment = apply_sync_prod(sync_prod, sync_initial_marking, sync_final_marking, cost_function, utils.SKIP,
+                                ret_tuple_as_trans_desc=ret_tuple_as_trans_desc,
+                                max_align_time_trace=max_align_time_trace, state_equation=state_equation,
+                                max_states_trace=max_states_trace, return_counters=return_counters)
+    heuristics_cache.add_counters(state_equation.counters)
+
+    if alignment is None and state_equation.budget_reached and len(trace) > 0:
+        # last resort: the log moves of all the events, then the cheapest run of the net
+        model_run = __get_model_run(heuristics_cache, parameters)
+        if model_run is not None:
+            moves = [(("t_" + event[activity_key] + "_" + str(i), utils.SKIP), (event[activity_key], utils.SKIP))
+                     for i, event in enumerate(trace)] + model_run["alignment"]
+            alignment = {"alignment": moves if ret_tuple_as_trans_desc else [move[1] for move in moves],
+                         "cost": sum(trace_cost_function) + model_run["cost"], "visited_states": 0,
+                         "queued_states": 0, "traversed_arcs": 0, "lp_solved": state_equation.counters["lp_solved"]}
+            if return_counters:
+                alignment.update(state_equation.counters)
+            alignment["approximate"] = True
+    if alignment is not None and alignment.get("approximate", False):
+        heuristics_cache.approximate_alignments += 1
+
+    if return_sync_cost:
+        return alignment, cost_function
+
+    return alignment
+
+
+def __get_model_run(heuristics_cache, parameters):
+    """
+    Cheapest run of the net (the alignment of the empty trace, with the names of the transitions), computed once per
+    HeuristicsCache
+    """
+    if not heuristics_cache.model_run_computed:
+        parameters = copy(parameters)
+        parameters[Parameters.PARAM_ALIGNMENT_RESULT_IS_SYNC_PROD_AWARE] = True
+        parameters[Parameters.RETURN_SYNC_COST_FUNCTION] = False
+        heuristics_cache.model_run = __apply_heuristics_cache(log_implementation.Trace(), heuristics_cache, [],
+                                                              parameters)
+        heuristics_cache.model_run_computed = True
+    return heuristics_cache.model_run
+
+
 def apply_from_variant(variant, petri_net, initial_marking, final_marking, parameters=None):
     """
     Apply the alignments from the specification of a single variant
@@ -376,9 +532,14 @@ def apply_trace_net(petri_net, initial_marking, final_marking, trace_net, trace_
     max_align_time_trace = exec_utils.get_param_value(Parameters.PARAM_MAX_ALIGN_TIME_TRACE, parameters,
                                                       sys.maxsize)
 
+    max_states_trace = exec_utils.get_param_value(Parameters.PARAM_MAX_STATES_TRACE, parameters, sys.maxsize)
+
+    return_counters = exec_utils.get_param_value(Parameters.RETURN_SEARCH_COUNTERS, parameters, False)
+
     alignment = apply_sync_prod(sync_prod, sync_initial_marking, sync_final_marking, cost_function,
                            utils.SKIP, ret_tuple_as_trans_desc=ret_tuple_as_trans_desc,
-                           max_align_time_trace=max_align_time_trace)
+                           max_align_time_trace=max_align_time_trace, max_states_trace=max_states_trace,
+                           return_counters=return_counters)
 
     return_sync_cost = exec_utils.get_param_value(Parameters.RETURN_SYNC_COST_FUNCTION, parameters, False)
     if return_sync_cost:
@@ -389,7 +550,8 @@ def apply_trace_net(petri_net, initial_marking, final_marking, trace_net, trace_
 
 
 def apply_sync_prod(sync_prod, initial_marking, final_marking, cost_function, skip, ret_tuple_as_trans_desc=False,
-                    max_align_time_trace=sys.maxsize):
+                    max_align_time_trace=sys.maxsize, state_equation=None, max_states_trace=sys.maxsize,
+                    return_counters=False):
     """
     Performs the basic alignment search on top of the synchronous product net, given a cost function and skip-symbol
 
@@ -400,57 +562,72 @@ def apply_sync_prod(sync_prod, initial_marking, final_marking, cost_function, sk
     final_marking: :class:`pm4py.objects.petri.net.Marking` final marking in the synchronous product net
     cost_function: :class:`dict` cost function mapping transitions to the synchronous product net
     skip: :class:`Any` symbol to use for skips in the alignment
+    state_equation: :class:`StateEquation` (optional) state equation of the synchronous product net (constructed
+    from the net if not provided)
+    max_states_trace: :class:`int` maximum number of states kept in memory by the search (see __beam_search for
+    what happens when it is reached)
+    return_counters: :class:`bool` adds the counters of the search (see StateEquation) to the alignment
 
     Returns
     -------
-    dictionary : :class:`dict` with keys **alignment**, **cost**, **visited_states**, **queued_states**
-    and **traversed_arcs**
+    dictionary : :class:`dict` with keys **alignment**, **cost**, **visited_states**, **queued_states**,
+    **traversed_arcs** and **lp_solved**
     """
-    return __search(sync_prod, initial_marking, final_marking, cost_function, skip,
-                    ret_tuple_as_trans_desc=ret_tuple_as_trans_desc, max_align_time_trace=max_align_time_trace)
+    if state_equation is None:
+        state_equation = __construct_state_equation(sync_prod, final_marking, cost_function)
+    alignment = __search(sync_prod, initial_marking, final_marking, cost_function, skip,
+                         ret_tuple_as_trans_desc=ret_tuple_as_trans_desc, max_align_time_trace=max_align_time_trace,
+                         state_equation=state_equation, max_states_trace=max_states_trace)
+    if return_counters and alignment is not None:
+        alignment.update(state_equation.counters)
+    return alignment
+
+
+def __construct_state_equation(sync_net, fin, cost_function):
+    start_time = time.perf_counter()
+    incidence_matrix = inc_mat_construct(sync_net)
+    ini_vec, fin_vec, cost_vec = utils.__vectorize_initial_final_cost(incidence_matrix, fin, fin, cost_function)
+    state_equation = StateEquation(incidence_matrix.a_matrix, incidence_matrix.places, incidence_matrix.transitions,
+                                   cost_vec, fin_vec)
+    state_equation.counters["construction_time"] += time.perf_counter() - start_time
+    return state_equation
+
+
+def __get_moves(marking, trans_empty_preset, cost_function, skip):
+    enabled_trans = copy(trans_empty_preset)
+    for p in marking:
+        for t in p.ass_trans:
+            if t.sub_marking <= marking:
+                enabled_trans.add(t)
+
+    return [(t, cost_function[t]) for t in enabled_trans if not (
+            t is not None and utils.__is_log_move(t, skip) and utils.__is_model_move(t, skip))]
 
 
 def __search(sync_net, ini, fin, cost_function, skip, ret_tuple_as_trans_desc=False,
-             max_align_time_trace=sys.maxsize):
+             max_align_time_trace=sys.maxsize, state_equation=None, max_states_trace=sys.maxsize):
     start_time = time.time()
 
     decorate_transitions_prepostset(sync_net)
     decorate_places_preset_trans(sync_net)
 
-    incidence_matrix = inc_mat_construct(sync_net)
-    ini_vec, fin_vec, cost_vec = utils.__vectorize_initial_final_cost(incidence_matrix, ini, fin, cost_function)
+    if state_equation is None:
+        state_equation = __construct_state_equation(sync_net, fin, cost_function)
+    if max_states_trace < state_equation.max_solutions:
+        # the memo of the heuristics (shared by the traces aligned with a HeuristicsCache) stays within the budget
+        state_equation.max_solutions = max_states_trace
+    cost_vec = state_equation.cost_vec
+    counters = state_equation.counters
 
     closed = set()
 
-    a_matrix = np.asmatrix(incidence_matrix.a_matrix).astype(np.float64)
-    g_matrix = -np.eye(len(sync_net.transitions))
-    h_cvx = np.matrix(np.zeros(len(sync_net.transitions))).transpose()
-    cost_vec = [x * 1.0 for x in cost_vec]
-
-    use_cvxopt = False
-    if lp_solver.DEFAULT_LP_SOLVER_VARIANT == lp_solver.CVXOPT_SOLVER_CUSTOM_ALIGN or lp_solver.DEFAULT_LP_SOLVER_VARIANT == lp_solver.CVXOPT_SOLVER_CUSTOM_ALIGN_ILP:
-        use_cvxopt = True
-
-    if use_cvxopt:
-        # not available in the latest version of PM4Py
-        from cvxopt import matrix
-
-        a_matrix = matrix(a_matrix)
-        g_matrix = matrix(g_matrix)
-        h_cvx = matrix(h_cvx)
-        cost_vec = matrix(cost_vec)
-
-    h, x = utils.__compute_exact_heuristic_new_version(sync_net, a_matrix, h_cvx, g_matrix, cost_vec, incidence_matrix,
-                                                       ini,
-                                                       fin_vec, lp_solver.DEFAULT_LP_SOLVER_VARIANT,
-                                                       use_cvxopt=use_cvxopt)
+    h, x = state_equation.compute_heuristic(ini)
     ini_state = utils.SearchTuple(0 + h, 0, h, ini, None, None, x, True)
     open_set = [ini_state]
     heapq.heapify(open_set)
     visited = 0
     queued = 0
     traversed = 0
-    lp_solved = 1
 
     trans_empty_preset = set(t for t in sync_net.transitions if len(t.in_arcs) == 0)
 
@@ -458,7 +635,9 @@ def __search(sync_net, ini, fin, cost_function, skip, ret_tuple_as_trans_desc=Fa
         if (time.time() - start_time) > max_align_time_trace:
             return None
 
+        queue_start = time.perf_counter()
         curr = heapq.heappop(open_set)
+        counters["queue_time"] += time.perf_counter() - queue_start
 
         current_marking = curr.m
 
@@ -468,22 +647,22 @@ def __search(sync_net, ini, fin, cost_function, skip, ret_tuple_as_trans_desc=Fa
 
             already_closed = current_marking in closed
             if already_closed:
+                queue_start = time.perf_counter()
                 curr = heapq.heappop(open_set)
+                counters["queue_time"] += time.perf_counter() - queue_start
                 current_marking = curr.m
                 continue
 
-            h, x = utils.__compute_exact_heuristic_new_version(sync_net, a_matrix, h_cvx, g_matrix, cost_vec,
-                                                               incidence_matrix, curr.m,
-                                                               fin_vec, lp_solver.DEFAULT_LP_SOLVER_VARIANT,
-                                                               use_cvxopt=use_cvxopt)
-            lp_solved += 1
+            h, x = state_equation.compute_heuristic(curr.m)
 
             # 11/10/19: shall not a state for which we compute the exact heuristics be
             # by nature a trusted solution?
             tp = utils.SearchTuple(curr.g + h, curr.g, h, curr.m, curr.p, curr.t, x, True)
             # 11/10/2019 (optimization ZA) heappushpop is slightly more efficient than pushing
             # and popping separately
+            queue_start = time.perf_counter()
             curr = heapq.heappushpop(open_set, tp)
+            counters["queue_time"] += time.perf_counter() - queue_start
             current_marking = curr.m
 
         # max allowed heuristics value (27/10/2019, due to the numerical instability of some of our solvers)
@@ -499,21 +678,15 @@ def __search(sync_net, ini, fin, cost_function, skip, ret_tuple_as_trans_desc=Fa
         # (underestimation of the remaining cost) is 0. Low-hanging fruits
         if curr.h < 0.01:
             if current_marking == fin:
-                return utils.__reconstruct_alignment(curr, visited, queued, traversed,
-                                                     ret_tuple_as_trans_desc=ret_tuple_as_trans_desc,
-                                                     lp_solved=lp_solved)
+                alignment = utils.__reconstruct_alignment(curr, visited, queued, traversed,
+                                                          ret_tuple_as_trans_desc=ret_tuple_as_trans_desc,
+                                                          lp_solved=counters["lp_solved"])
+                return alignment
 
         closed.add(current_marking)
         visited += 1
 
-        enabled_trans = copy(trans_empty_preset)
-        for p in current_marking:
-            for t in p.ass_trans:
-                if t.sub_marking <= current_marking:
-                    enabled_trans.add(t)
-
-        trans_to_visit_with_cost = [(t, cost_function[t]) for t in enabled_trans if not (
-                t is not None and utils.__is_log_move(t, skip) and utils.__is_model_move(t, skip))]
+        trans_to_visit_with_cost = __get_moves(current_marking, trans_empty_preset, cost_function, skip)
 
         for t, cost in trans_to_visit_with_cost:
             traversed += 1
@@ -524,9 +697,456 @@ def __search(sync_net, ini, fin, cost_function, skip, ret_tuple_as_trans_desc=Fa
             g = curr.g + cost
 
             queued += 1
-            h, x = utils.__derive_heuristic(incidence_matrix, cost_vec, curr.x, t, curr.h)
+            h, x = utils.__derive_heuristic(state_equation, cost_vec, curr.x, t, curr.h)
             trustable = utils.__trust_solution(x)
             new_f = g + h
 
             tp = utils.SearchTuple(new_f, g, h, new_marking, curr, t, x, trustable)
+            queue_start = time.perf_counter()
             heapq.heappush(open_set, tp)
+            counters["queue_time"] += time.perf_counter() - queue_start
+
+        if len(open_set) + len(closed) > max_states_trace:
+            # the memory of the search is bounded: it continues on a beam of the best states of the open set
+            state_equation.budget_reached = True
+            beam = heapq.nsmallest(max(1, int(math.sqrt(max_states_trace))), open_set)
+            del open_set
+            del closed
+            return __beam_search(beam, fin, cost_function, skip, state_equation, trans_empty_preset,
+                                 max_states_trace, start_time, max_align_time_trace, visited, queued, traversed,
+                                 ret_tuple_as_trans_desc=ret_tuple_as_trans_desc)
+
+
+def __beam_search(beam, fin, cost_function, skip, state_equation, trans_empty_preset, max_states_trace, start_time,
+                  max_align_time_trace, visited, queued, traversed, ret_tuple_as_trans_desc=False):
+    """
+    Continues a search that reached its state budget with a beam search of bounded memory: at every step, the beam
+    is replaced by the best successors (by f, then h) of its states. The states kept (the beams and their ancestors)
+    are bounded by the budget: the beam starts as wide as the square root of the budget, and its width is halved
+    every time the states kept exceed half of the remaining budget. The search stops when no state of the beam can
+    improve the best alignment found, or when the budget is exhausted. The alignment found is not guaranteed to be
+    optimal, and is marked as approximate; None is returned if no alignment was found.
+    """
+    beam_width = len(beam)
+    cost_vec = state_equation.cost_vec
+    counters = state_equation.counters
+    best = None
+    kept = beam_width
+    threshold = max_states_trace // 2
+
+    while beam and kept <= max_states_trace:
+        if (time.time() - start_time) > max_align_time_trace:
+            return None
+
+        successors = {}
+        for curr in beam:
+            if not curr.trust:
+                h, x = state_equation.compute_heuristic(curr.m)
+                curr = utils.SearchTuple(curr.g + h, curr.g, h, curr.m, curr.p, curr.t, x, True)
+            if curr.h > lp_solver.MAX_ALLOWED_HEURISTICS or (best is not None and curr.f >= best.g):
+                continue
+            if curr.m == fin:
+                best = curr
+                continue
+            visited += 1
+
+            for t, cost in __get_moves(curr.m, trans_empty_preset, cost_function, skip):
+                traversed += 1
+                new_marking = utils.add_markings(curr.m, t.add_marking)
+                g = curr.g + cost
+                if new_marking in successors and successors[new_marking].g <= g:
+                    continue
+                queued += 1
+                h, x = utils.__derive_heuristic(state_equation, cost_vec, curr.x, t, curr.h)
+                successors[new_marking] = utils.SearchTuple(g + h, g, h, new_marking, curr, t, x,
+                                                            utils.__trust_solution(x))
+
+        # the next beam: the best successors, the ones with an untrusted heuristics are taken after computing it
+        candidates = list(successors.values())
+        del successors
+        heapq.heapify(candidates)
+        beam = []
+        while candidates and len(beam) < beam_width:
+            queue_start = time.perf_counter()
+            curr = heapq.heappop(candidates)
+            counters["queue_time"] += time.perf_counter() - queue_start
+            if curr.trust:
+                beam.append(curr)
+            else:
+                h, x = state_equation.compute_heuristic(curr.m)
+                queue_start = time.perf_counter()
+                heapq.heappush(candidates, utils.SearchTuple(curr.g + h, curr.g, h, curr.m, curr.p, curr.t, x, True))
+                counters["queue_time"] += time.perf_counter() - queue_start
+        del candidates
+        kept += len(beam)
+        if kept > threshold and beam_width > 1:
+            beam_width = beam_width // 2
+            threshold = (threshold + max_states_trace) // 2
+
+    if best is None:
+        return None
+
+    alignment = utils.__reconstruct_alignment(best, visited, queued, traversed,
+                                              ret_tuple_as_trans_desc=ret_tuple_as_trans_desc,
+                                              lp_solved=counters["lp_solved"])
+    alignment["approximate"] = True
+    return alignment
+
+
+class StateEquation(object):
+    """
+    State equation of a synchronous product net. Gives the exact heuristics of the markings (the cost of the
+    solution of the LP relaxation of the state equation, memoized by marking) and keeps the counters of the search:
+    LPs solved, heuristics read from the memo, time spent constructing the synchronous product, solving the LPs and
+    handling the queue.
+    """
+
+    def __init__(self, a_matrix, places, transitions, cost_vec, fin_vec):
+        """
+        Parameters
+        ----------
+        a_matrix
+            Incidence matrix (places x transitions)
+        places
+            Index of every place in the rows of the matrix
+        transitions
+            Index of every transition in the columns of the matrix
+        cost_vec
+            Cost of every transition
+        fin_vec
+            Final marking (as a vector)
+        """
+        self.places = places
+        self.transitions = transitions
+        self.cost_vec = [x * 1.0 for x in cost_vec]
+        self.fin_vec = np.asarray(fin_vec, dtype=np.float64)
+        self.solutions = OrderedDict()
+        # maximum number of memoized heuristics, the least recently used ones are evicted first
+        self.max_solutions = DEFAULT_MAX_HEURISTICS_MEMO
+        self.counters = {"lp_solved": 0, "heuristics_memo_hits": 0, "construction_time": 0.0, "lp_time": 0.0,
+                         "queue_time": 0.0}
+        # set when the search reaches its state budget
+        self.budget_reached = False
+
+        self.lp_variant = lp_solver.DEFAULT_LP_SOLVER_VARIANT
+        self.use_cvxopt = self.lp_variant == lp_solver.CVXOPT_SOLVER_CUSTOM_ALIGN or \
+                          self.lp_variant == lp_solver.CVXOPT_SOLVER_CUSTOM_ALIGN_ILP
+        n = len(transitions)
+        if self.use_cvxopt:
+            # not available in the latest version of PM4Py
+            from cvxopt import matrix, spmatrix, sparse
+
+            # the matrices are sparse (a synchronous product has few arcs per transition)
+            self.a_matrix = sparse(matrix(np.asarray(a_matrix, dtype=np.float64)))
+            self.g_matrix = spmatrix(-1.0, range(n), range(n))
+            self.h_cvx = matrix(0.0, (n, 1))
+            self.c_vec = matrix(self.cost_vec)
+        else:
+            self.a_matrix = np.asmatrix(a_matrix).astype(np.float64)
+            self.g_matrix = -np.eye(n)
+            self.h_cvx = np.matrix(np.zeros(n)).transpose()
+            self.c_vec = self.cost_vec
+
+    def encode_marking(self, marking):
+        m_vec = np.zeros(len(self.places))
+        for p, n in marking.items():
+            m_vec[self.places[p]] = n
+        return m_vec
+
+    def get_key(self, marking):
+        """
+        Key of the memo of the heuristics of a marking (None if the heuristics of the marking are not memoized)
+        """
+        return marking
+
+    def pack(self, key, h, x):
+        # the solutions are memoized as arrays (compact), and returned as lists (faster to iterate in the search)
+        return h, np.asarray(x, dtype=np.float64)
+
+    def unpack(self, key, solution):
+        return solution[0], solution[1].tolist()
+
+    def compute_heuristic(self, marking):
+        """
+        Exact heuristics of a marking, and the solution of the LP (the number of firings of every transition)
+        """
+        key = self.get_key(marking)
+        if key is not None and key in self.solutions:
+            self.counters["heuristics_memo_hits"] += 1
+            self.solutions.move_to_end(key)
+            return self.unpack(key, self.solutions[key])
+
+        start_time = time.perf_counter()
+        b_term = self.fin_vec - self.encode_marking(marking)
+        if self.use_cvxopt:
+            from cvxopt import matrix
+
+            b_term = matrix(b_term)
+        else:
+            b_term = np.matrix(b_term).transpose()
+
+        sol = lp_solver.apply(self.c_vec, self.g_matrix, self.h_cvx, self.a_matrix, b_term,
+                              parameters={"solver": "glpk"}, variant=self.lp_variant)
+        prim_obj = lp_solver.get_prim_obj_from_sol(sol, variant=self.lp_variant)
+        points = lp_solver.get_points_from_sol(sol, variant=self.lp_variant)
+
+        h = prim_obj if prim_obj is not None else sys.maxsize
+        x = points if points is not None else [0.0] * len(self.transitions)
+        self.counters["lp_time"] += time.perf_counter() - start_time
+        self.counters["lp_solved"] += 1
+
+        if key is not None and self.max_solutions > 0:
+            while len(self.solutions) >= self.max_solutions:
+                self.solutions.popitem(last=False)
+            self.solutions[key] = self.pack(key, h, x)
+        return h, x
+
+
+class TraceStateEquation(StateEquation):
+    """
+    State equation of the synchronous product of a trace and a net, assembled by a HeuristicsCache. The rows are the
+    places of the net, then the places of the trace; the columns are the model moves, then for every event of the
+    trace its log move and its synchronous moves. The heuristics are memoized in the cache by the remaining suffix of
+    the trace and the marking of the net: since the moves of the events already replayed cannot fire, the solutions
+    for a suffix do not depend on the events before it, and are shared by the traces having the same suffix.
+    """
+
+    def __init__(self, heuristics_cache, a_matrix, places, transitions, cost_vec, fin_vec, offsets, suffix_ids):
+        """
+        Parameters
+        ----------
+        heuristics_cache
+            HeuristicsCache of the net
+        a_matrix, places, transitions, cost_vec, fin_vec
+            Incidence matrix, indexes of the places and transitions, costs and final marking (see StateEquation)
+        offsets
+            First column of the moves of every event of the trace (the last offset is the number of columns)
+        suffix_ids
+            Identifier (in the cache) of the suffix of the trace starting at every position
+        """
+        StateEquation.__init__(self, a_matrix, places, transitions, cost_vec, fin_vec)
+        self.solutions = heuristics_cache.solutions
+        self.max_solutions = heuristics_cache.max_solutions
+        self.n_model_places = len(heuristics_cache.places)
+        self.n_model_transitions = len(heuristics_cache.transitions)
+        self.offsets = offsets
+        self.position_of_suffix = {suffix_id: i for i, suffix_id in enumerate(suffix_ids)}
+        self.suffix_ids = suffix_ids
+
+    def get_key(self, marking):
+        position = None
+        model_marking = []
+        for p, n in marking.items():
+            row = self.places[p]
+            if row < self.n_model_places:
+                model_marking.append((row, n))
+            elif position is None and n == 1:
+                position = row - self.n_model_places
+            else:
+                return None
+        if position is None:
+            return None
+        return self.suffix_ids[position], tuple(sorted(model_marking))
+
+    def pack(self, key, h, x):
+        offset = self.offsets[self.position_of_suffix[key[0]]]
+        return h, np.asarray(x[:self.n_model_transitions], dtype=np.float64), np.asarray(x[offset:], dtype=np.float64)
+
+    def unpack(self, key, solution):
+        h, x_model, x_suffix = solution
+        # the moves of the events before the suffix do not fire
+        return h, x_model.tolist() + [0.0] * (self.offsets[-1] - len(x_model) - len(x_suffix)) + x_suffix.tolist()
+
+
+class HeuristicsCache(object):
+    """
+    Parts of the alignments against a net that do not depend on the trace, shared by the alignments of several
+    traces: the net part of the incidence matrix of the synchronous products is compiled once (the columns of the
+    moves of the events of every trace are appended to it), and the exact heuristics are memoized by the remaining
+    suffix of the trace and the marking of the net. The counters are the sums of the counters of the searches.
+    """
+
+    def __init__(self, net, im, fm, model_cost_function, sync_cost_function, max_solutions=DEFAULT_MAX_HEURISTICS_MEMO):
+        self.net = net
+        self.im = im
+        self.fm = fm
+        self.model_cost_function = model_cost_function
+        self.sync_cost_function = sync_cost_function
+
+        self.places = sorted(net.places, key=lambda x: (str(x.name), id(x)))
+        self.transitions = sorted(net.transitions, key=lambda x: (str(x.name), id(x)))
+        place_index = {p: i for i, p in enumerate(self.places)}
+        self.model_matrix = np.zeros((len(self.places), len(self.transitions)))
+        for j, t in enumerate(self.transitions):
+            for a in t.in_arcs:
+                self.model_matrix[place_index[a.source], j] -= 1
+            for a in t.out_arcs:
+                self.model_matrix[place_index[a.target], j] += 1
+        self.model_costs = [model_cost_function[t] for t in self.transitions]
+        self.fin_model = [fm[p] for p in self.places]
+
+        # activity -> indexes of the transitions having it as label, their columns and the costs of the sync moves
+        self.transitions_of_label = {}
+        for j, t in enumerate(self.transitions):
+            if t.label is not None:
+                self.transitions_of_label.setdefault(t.label, []).append(j)
+        self.sync_columns = {}
+        self.sync_costs = {}
+
+        # (activity, cost of the log move, identifier of the next suffix) -> identifier of the suffix (0 is empty)
+        self.suffixes = {}
+        # (identifier of the suffix, marking of the net) -> exact heuristics and solution, for at most max_solutions
+        # keys (the least recently used ones are evicted first)
+        self.solutions = OrderedDict()
+        self.max_solutions = max_solutions
+        self.counters = {"lp_solved": 0, "heuristics_memo_hits": 0, "construction_time": 0.0, "lp_time": 0.0,
+                         "queue_time": 0.0}
+        # number of alignments found after the state budget of their search was reached
+        self.approximate_alignments = 0
+        # cheapest run of the net, used by the alignments for which the beam search found nothing
+        self.model_run = None
+        self.model_run_computed = False
+
+    def is_compiled_for(self, net, im, fm, model_cost_function, sync_cost_function):
+        return net is self.net and im == self.im and fm == self.fm and \
+               model_cost_function == self.model_cost_function and sync_cost_function == self.sync_cost_function
+
+    def add_counters(self, counters):
+        for k in self.counters:
+            self.counters[k] += counters[k]
+
+    def get_sync_moves(self, label):
+        if label not in self.sync_columns:
+            indexes = self.transitions_of_label.get(label, [])
+            self.sync_columns[label] = self.model_matrix[:, indexes]
+            self.sync_costs[label] = [self.sync_cost_function[self.transitions[j]] for j in indexes]
+        return self.transitions_of_label.get(label, []), self.sync_columns[label], self.sync_costs[label]
+
+    def construct(self, trace, trace_cost_function, activity_key=DEFAULT_NAME_KEY):
+        """
+        Constructs the synchronous product of a trace and the net (the same net as
+        pm4py.objects.petri_net.utils.synchronous_product.construct_cost_aware on the trace net of the trace) along
+        with its state equation
+
+        Parameters
+        ----------
+        trace
+            Trace
+        trace_cost_function
+            Cost of the log move of every event of the trace
+        activity_key
+            Attribute of the events that is the activity
+
+        Returns
+        -------
+        sync_net
+            Synchronous product net
+        sync_im
+            Initial marking of the synchronous product
+        sync_fm
+            Final marking of the synchronous product
+        cost_function
+            Cost of every transition of the synchronous product
+        state_equation
+            TraceStateEquation of the synchronous product
+        """
+        start_time = time.perf_counter()
+        skip = utils.SKIP
+        activities = [event[activity_key] for event in trace]
+        n_places = len(self.places)
+        n_transitions = len(self.transitions)
+
+        trace_net_name = 'trace net of %s' % trace.attributes[
+            DEFAULT_NAME_KEY] if DEFAULT_NAME_KEY in trace.attributes else ' '
+        sync_net = PetriNet('synchronous_product_net of %s and %s' % (trace_net_name, self.net.name))
+        sync_net.properties[properties.IS_SYNC_NET] = True
+        place_indexes = {}
+        transition_indexes = {}
+        cost_function = {}
+
+        place_map = {}
+        for i, p in enumerate(self.places):
+            place_map[p] = PetriNet.Place((skip, p.name))
+            sync_net.places.add(place_map[p])
+            place_indexes[place_map[p]] = i
+        for j, t in enumerate(self.transitions):
+            model_move = PetriNet.Transition((skip, t.name), (skip, t.label))
+            sync_net.transitions.add(model_move)
+            for a in t.in_arcs:
+                add_arc_from_to(place_map[a.source], model_move, sync_net)
+            for a in t.out_arcs:
+                add_arc_from_to(model_move, place_map[a.target], sync_net)
+            transition_indexes[model_move] = j
+            cost_function[model_move] = self.model_costs[j]
+
+        trace_places = [PetriNet.Place(('p_0', skip))]
+        for i in range(len(activities)):
+            place = PetriNet.Place(('p_' + str(i + 1), skip))
+            place.properties[properties.TRACE_NET_PLACE_INDEX] = i + 1
+            trace_places.append(place)
+        for i, place in enumerate(trace_places):
+            sync_net.places.add(place)
+            place_indexes[place] = n_places + i
+
+        # the columns of the moves of every event are appended to the ones of the model moves
+        offsets = [n_transitions]
+        blocks = []
+        for i, activity in enumerate(activities):
+            indexes, columns, sync_costs = self.get_sync_moves(activity)
+            blocks.append((indexes, columns, sync_costs))
+            offsets.append(offsets[-1] + 1 + len(indexes))
+        a_matrix = np.zeros((n_places + len(trace_places), offsets[-1]))
+        a_matrix[:n_places, :n_transitions] = self.model_matrix
+        cost_vec = self.model_costs + [0] * (offsets[-1] - n_transitions)
+
+        for i, activity in enumerate(activities):
+            indexes, columns, sync_costs = blocks[i]
+            offset = offsets[i]
+            name = 't_' + activity + '_' + str(i)
+            log_move = PetriNet.Transition((name, skip), (activity, skip))
+            log_move.properties[properties.TRACE_NET_TRANS_INDEX] = i
+            sync_net.transitions.add(log_move)
+            add_arc_from_to(trace_places[i], log_move, sync_net)
+            add_arc_from_to(log_move, trace_places[i + 1], sync_net)
+            transition_indexes[log_move] = offset
+            cost_function[log_move] = trace_cost_function[i]
+            cost_vec[offset] = trace_cost_function[i]
+            for k, j in enumerate(indexes):
+                t = self.transitions[j]
+                sync = PetriNet.Transition((name, t.name), (activity, t.label))
+                sync.properties[properties.TRACE_NET_TRANS_INDEX] = i
+                for prop in t.properties:
+                    sync.properties[prop] = t.properties[prop]
+                sync_net.transitions.add(sync)
+                add_arc_from_to(trace_places[i], sync, sync_net)
+                for a in t.in_arcs:
+                    add_arc_from_to(place_map[a.source], sync, sync_net)
+                add_arc_from_to(sync, trace_places[i + 1], sync_net)
+                for a in t.out_arcs:
+                    add_arc_from_to(sync, place_map[a.target], sync_net)
+                transition_indexes[sync] = offset + 1 + k
+                cost_function[sync] = sync_costs[k]
+                cost_vec[offset + 1 + k] = sync_costs[k]
+            a_matrix[n_places + i, offset:offsets[i + 1]] = -1
+            a_matrix[n_places + i + 1, offset:offsets[i + 1]] = 1
+            a_matrix[:n_places, offset + 1:offsets[i + 1]] = columns
+
+        sync_im = Marking({trace_places[0]: 1})
+        sync_fm = Marking({trace_places[-1]: 1})
+        for p in self.im:
+            sync_im[place_map[p]] = self.im[p]
+        for p in self.fm:
+            sync_fm[place_map[p]] = self.fm[p]
+        fin_vec = self.fin_model + [0] * len(activities) + [1]
+
+        suffix_ids = [0]
+        for i in range(len(activities) - 1, -1, -1):
+            suffix = (activities[i], trace_cost_function[i], suffix_ids[0])
+            if suffix not in self.suffixes:
+                self.suffixes[suffix] = len(self.suffixes) + 1
+            suffix_ids.insert(0, self.suffixes[suffix])
+
+        state_equation = TraceStateEquation(self, a_matrix, place_indexes, transition_indexes, cost_vec, fin_vec,
+                                            offsets, suffix_ids)
+        state_equation.counters["construction_time"] += time.perf_counter() - start_time
+        return sync_net, sync_im, sync_fm, cost_function, state_equation
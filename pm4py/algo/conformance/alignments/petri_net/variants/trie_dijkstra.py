@@ -0,0 +1,382 @@
+'''
+    This file is part of PM4Py (More Info: https://pm4py.fit.fraunhofer.de).
+
+    PM4Py is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    PM4Py is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with PM4Py.  If not, see <https://www.gnu.org/licenses/>.
+'''
+import heapq
+import sys
+import time
+from enum import Enum
+from typing import Optional, Dict, Any, Union, List
+
+from pm4py.algo.transformation.log_to_trie.algorithm import build_trie
+from pm4py.objects.log import obj as log_implementation
+from pm4py.objects.log.obj import Trace
+from pm4py.objects.petri_net.obj import PetriNet, Marking
+from pm4py.objects.petri_net.utils import align_utils
+from pm4py.util import exec_utils
+from pm4py.util import typing
+from pm4py.util.constants import PARAMETER_CONSTANT_ACTIVITY_KEY
+from pm4py.util.xes_constants import DEFAULT_NAME_KEY
+
+'''
+Alignments of several traces at once, sharing the search of their common prefixes.
+
+The traces are stored in a prefix tree (see pm4py.algo.transformation.log_to_trie) and a single Dijkstra search is
+run on the product of the Petri net with the tree: a state is a marking of the net and a node of the tree (the
+prefix aligned so far). A path from the initial marking and the root to the final marking and the node of a trace
+is an alignment of the trace, so the first time such a state is reached its cost is the optimal cost of the
+alignment of the trace. The states of a common prefix are visited once for all the traces sharing it, and the
+subtrees whose traces are all aligned are not expanded anymore.
+The costs are the standard ones (model and log moves: 10000, moves on invisible transitions: 1, sync moves: 0)
+unless cost functions are provided, so the costs of the alignments are the ones of the other optimal variants.
+'''
+
+
+class Parameters(Enum):
+    PARAM_TRACE_COST_FUNCTION = 'trace_cost_function'
+    PARAM_MODEL_COST_FUNCTION = 'model_cost_function'
+    PARAM_SYNC_COST_FUNCTION = 'sync_cost_function'
+    PARAM_MAX_ALIGN_TIME_TRACE = "max_align_time_trace"
+    PARAM_MAX_ALIGN_TIME = "max_align_time"
+    PARAM_ALIGNMENT_RESULT_IS_SYNC_PROD_AWARE = 'ret_tuple_as_trans_desc'
+    ACTIVITY_KEY = PARAMETER_CONSTANT_ACTIVITY_KEY
+
+
+IS_SYNC_MOVE = 0
+IS_LOG_MOVE = 1
+IS_MODEL_MOVE = 2
+
+
+def get_best_worst_cost(petri_net, initial_marking, final_marking, parameters=None):
+    """
+    Gets the best worst cost of an alignment
+
+    Parameters
+    -----------
+    petri_net
+        Petri net
+    initial_marking
+        Initial marking
+    final_marking
+        Final marking
+
+    Returns
+    -----------
+    best_worst_cost
+        Best worst cost of alignment
+    """
+    if parameters is None:
+        parameters = {}
+    trace = log_implementation.Trace()
+
+    best_worst = apply(trace, petri_net, initial_marking, final_marking, parameters=parameters)
+
+    if best_worst is not None:
+        return best_worst['cost']
+
+    return None
+
+
+def apply(trace: Trace, net: PetriNet, im: Marking, fm: Marking, parameters: Optional[Dict[Union[str, Parameters], Any]] = None) -> typing.AlignmentResult:
+    """
+    Aligns a trace against a Petri net (see apply_traces)
+
+    Parameters
+    ----------
+    trace
+        Trace
+    net
+        Petri net
+    im
+        Initial marking
+    fm
+        Final marking
+    parameters
+        Parameters of the algorithm (see apply_traces)
+
+    Returns
+    -------
+    dictionary: `dict` with keys **alignment**, **cost**, **visited_states**, **queued_states**
+    """
+    if parameters is None:
+        parameters = {}
+
+    if exec_utils.get_param_value(Parameters.PARAM_TRACE_COST_FUNCTION, parameters, None) is None:
+        # as the other variants, provides the costs of the log moves to the computation of the fitness
+        parameters[Parameters.PARAM_TRACE_COST_FUNCTION] = [align_utils.STD_MODEL_LOG_MOVE_COST] * len(trace)
+    max_align_time_trace = exec_utils.get_param_value(Parameters.PARAM_MAX_ALIGN_TIME_TRACE, parameters,
+                                                      sys.maxsize)
+    return apply_traces([trace], net, im, fm, parameters=parameters, max_align_time=max_align_time_trace)[0]
+
+
+def apply_traces(traces: List[Trace], net: PetriNet, im: Marking, fm: Marking, parameters: Optional[Dict[Union[str, Parameters], Any]] = None, max_align_time=None, progress=None) -> List[typing.AlignmentResult]:
+    """
+    Aligns several traces against a Petri net with a single search over the prefix tree of the traces
+
+    Parameters
+    ----------
+    traces
+        List of traces
+    net
+        Petri net
+    im
+        Initial marking
+    fm
+        Final marking
+    parameters
+        Parameters of the algorithm, including:
+            Parameters.ACTIVITY_KEY -> attribute of the events that is the activity
+            Parameters.PARAM_TRACE_COST_FUNCTION -> cost of a log move at every position of the traces
+            Parameters.PARAM_MODEL_COST_FUNCTION -> cost of the model move of every transition
+            Parameters.PARAM_SYNC_COST_FUNCTION -> cost of the sync move of every visible transition
+            Parameters.PARAM_MAX_ALIGN_TIME -> maximum time (in seconds) of the search
+            Parameters.PARAM_MAX_ALIGN_TIME_TRACE -> maximum time (in seconds) spent by the search without aligning
+            a further trace
+            Parameters.PARAM_ALIGNMENT_RESULT_IS_SYNC_PROD_AWARE -> includes the names of the transitions in the
+            moves of the alignments
+    max_align_time
+        (optional) maximum time (in seconds) of the search, overriding Parameters.PARAM_MAX_ALIGN_TIME
+    progress
+        (optional) progress bar, updated when a trace is aligned
+
+    Returns
+    -------
+    list of the alignments of the traces (None for the traces not aligned within the time limit)
+    """
+    if parameters is None:
+        parameters = {}
+
+    activity_key = exec_utils.get_param_value(Parameters.ACTIVITY_KEY, parameters, DEFAULT_NAME_KEY)
+    trace_cost_function = exec_utils.get_param_value(Parameters.PARAM_TRACE_COST_FUNCTION, parameters, None)
+    model_cost_function = exec_utils.get_param_value(Parameters.PARAM_MODEL_COST_FUNCTION, parameters, None)
+    sync_cost_function = exec_utils.get_param_value(Parameters.PARAM_SYNC_COST_FUNCTION, parameters, None)
+    if max_align_time is None:
+        max_align_time = exec_utils.get_param_value(Parameters.PARAM_MAX_ALIGN_TIME, parameters, sys.maxsize)
+    max_align_time_trace = exec_utils.get_param_value(Parameters.PARAM_MAX_ALIGN_TIME_TRACE, parameters,
+                                                      sys.maxsize)
+    ret_tuple_as_trans_desc = exec_utils.get_param_value(Parameters.PARAM_ALIGNMENT_RESULT_IS_SYNC_PROD_AWARE,
+                                                         parameters, False)
+
+    if model_cost_function is None:
+        model_cost_function = {t: align_utils.STD_MODEL_LOG_MOVE_COST if t.label is not None
+                               else align_utils.STD_TAU_COST for t in net.transitions}
+    if sync_cost_function is None:
+        sync_cost_function = {t: align_utils.STD_SYNC_COST for t in net.transitions if t.label is not None}
+
+    variants = [tuple(event[activity_key] for event in trace) for trace in traces]
+    search = TrieSearch(net, im, fm, variants, model_cost_function, sync_cost_function, trace_cost_function)
+    results = search.run(max_align_time=max_align_time, max_align_time_trace=max_align_time_trace,
+                         progress=progress)
+    return [search.reconstruct_alignment(results[v], ret_tuple_as_trans_desc=ret_tuple_as_trans_desc)
+            if results[v] is not None else None for v in variants]
+
+
+class TrieSearch(object):
+    """
+    Dijkstra search over the product of a Petri net and the prefix tree of a set of variants
+    """
+
+    def __init__(self, net, im, fm, variants, model_cost_function, sync_cost_function, trace_cost_function=None):
+        self.places = {place: index for index, place in enumerate(net.places)}
+        self.transitions = list(net.transitions)
+        self.pre = [[(self.places[a.source], a.weight) for a in t.in_arcs] for t in self.transitions]
+        self.delta = []
+        for t in self.transitions:
+            delta = {}
+            for a in t.in_arcs:
+                delta[self.places[a.source]] = delta.get(self.places[a.source], 0) - a.weight
+            for a in t.out_arcs:
+                delta[self.places[a.target]] = delta.get(self.places[a.target], 0) + a.weight
+            self.delta.append([(p, d) for p, d in delta.items() if d != 0])
+        self.labels = [t.label for t in self.transitions]
+        self.model_costs = [model_cost_function[t] for t in self.transitions]
+        self.sync_costs = [sync_cost_function.get(t, align_utils.STD_SYNC_COST) for t in self.transitions]
+        # transitions having a given place in their preset (the transitions without inputs are always enabled)
+        self.consumers = [[] for _ in self.places]
+        self.always_enabled = []
+        for i, pre in enumerate(self.pre):
+            if pre:
+                for p, _ in pre:
+                    self.consumers[p].append(i)
+            else:
+                self.always_enabled.append(i)
+        self.im = self.encode_marking(im)
+        self.fm = self.encode_marking(fm)
+        self.trace_cost_function = trace_cost_function
+
+        # nodes of the prefix tree, as integers (the root is 0)
+        root = build_trie(variants)
+        self.node_labels = []
+        self.node_parents = []
+        self.node_depths = []
+        self.node_children = []
+        self.node_final = []
+        stack = [(root, -1)]
+        while stack:
+            node, parent = stack.pop()
+            index = len(self.node_labels)
+            self.node_labels.append(node.label)
+            self.node_parents.append(parent)
+            self.node_depths.append(node.depth)
+            self.node_children.append({})
+            self.node_final.append(node.final)
+            if parent >= 0:
+                self.node_children[parent][node.label] = index
+            for child in node.children:
+                stack.append((child, index))
+        # node of every variant, and number of variants still to align in the subtree of every node
+        self.variant_nodes = {}
+        self.pending = [0] * len(self.node_labels)
+        for variant in variants:
+            if variant in self.variant_nodes:
+                continue
+            node = 0
+            for activity in variant:
+                node = self.node_children[node][activity]
+            self.variant_nodes[variant] = node
+        for node in range(len(self.node_labels)):
+            if self.node_final[node]:
+                ancestor = node
+                while ancestor >= 0:
+                    self.pending[ancestor] += 1
+                    ancestor = self.node_parents[ancestor]
+        self.visited = 0
+        self.queued = 0
+        self.closed = {}
+        self.successors_cache = {}
+
+    def encode_marking(self, marking):
+        m = [0] * len(self.places)
+        for p, n in marking.items():
+            m[self.places[p]] = n
+        return tuple(m)
+
+    def enabled(self, m):
+        candidates = set(self.always_enabled)
+        for p, n in enumerate(m):
+            if n:
+                candidates.update(self.consumers[p])
+        return [t for t in candidates if all(m[p] >= w for p, w in self.pre[t])]
+
+    def successors(self, m):
+        """
+        Enabled transitions of a marking and markings reached firing them (the markings are shared by the nodes of
+        the prefix tree, so they are computed once)
+        """
+        if m not in self.successors_cache:
+            self.successors_cache[m] = [(t, self.fire(m, t)) for t in self.enabled(m)]
+        return self.successors_cache[m]
+
+    def fire(self, m, t):
+        m = list(m)
+        for p, d in self.delta[t]:
+            m[p] += d
+        return tuple(m)
+
+    def log_move_cost(self, depth):
+        if self.trace_cost_function is None or depth >= len(self.trace_cost_function):
+            return align_utils.STD_MODEL_LOG_MOVE_COST
+        return self.trace_cost_function[depth]
+
+    def run(self, max_align_time=sys.maxsize, max_align_time_trace=sys.maxsize, progress=None):
+        """
+        Runs the search until every variant is aligned (or the time limit of the search is reached, or no further
+        variant is aligned within the time limit of a trace), updating the progress bar (if provided) when a
+        variant is aligned
+
+        Returns
+        -------
+        dict variant -> final state of its alignment (marking, node), None if not reached
+        """
+        start_time = time.time()
+        last_aligned_time = start_time
+        node_results = {}
+        to_align = self.pending[0]
+        counter = 0
+        # entries: (cost, insertion counter, marking, node, parent state, move type, transition)
+        open_set = [(0, counter, self.im, 0, None, None, None)]
+        closed = self.closed
+        while open_set and to_align > 0:
+            current_time = time.time()
+            if (current_time - start_time) > max_align_time or (current_time - last_aligned_time) > \
+                    max_align_time_trace:
+                break
+            cost, _, m, node, parent, move, t = heapq.heappop(open_set)
+            state = (m, node)
+            if state in closed:
+                continue
+            closed[state] = (cost, parent, move, t)
+            self.visited += 1
+            if m == self.fm and self.node_final[node] and node not in node_results:
+                node_results[node] = state
+                to_align -= 1
+                last_aligned_time = time.time()
+                if progress is not None:
+                    progress.update()
+                ancestor = node
+                while ancestor >= 0:
+                    self.pending[ancestor] -= 1
+                    ancestor = self.node_parents[ancestor]
+            if self.pending[node] == 0:
+                # every variant of the subtree is aligned
+                continue
+            children = self.node_children[node]
+            for t, new_m in self.successors(m):
+                label = self.labels[t]
+                if label is not None and label in children:
+                    child = children[label]
+                    if self.pending[child] > 0 and (new_m, child) not in closed:
+                        counter += 1
+                        heapq.heappush(open_set, (cost + self.sync_costs[t], counter, new_m, child, state,
+                                                  IS_SYNC_MOVE, t))
+                if (new_m, node) not in closed:
+                    counter += 1
+                    heapq.heappush(open_set, (cost + self.model_costs[t], counter, new_m, node, state,
+                                              IS_MODEL_MOVE, t))
+            if move == IS_MODEL_MOVE and self.model_costs[t] > 0:
+                # a log move after a (costly) model move reaches a state reached at a lower cost by the log move
+                # followed by the model move
+                continue
+            log_cost = self.log_move_cost(self.node_depths[node])
+            for child in children.values():
+                if self.pending[child] > 0 and (m, child) not in closed:
+                    counter += 1
+                    heapq.heappush(open_set, (cost + log_cost, counter, m, child, state, IS_LOG_MOVE, None))
+        self.queued = counter + 1
+        return {variant: node_results.get(node) for variant, node in self.variant_nodes.items()}
+
+    def reconstruct_alignment(self, state, ret_tuple_as_trans_desc=False):
+        """
+        Alignment ending in the given (final) state of the search
+        """
+        cost = self.closed[state][0]
+        alignment = []
+        while True:
+            _, parent, move, t = self.closed[state]
+            if parent is None:
+                break
+            m_name, m_label, t_name, t_label = ">>", ">>", ">>", ">>"
+            if move == IS_SYNC_MOVE or move == IS_LOG_MOVE:
+                t_name = t_label = self.node_labels[state[1]]
+            if move == IS_SYNC_MOVE or move == IS_MODEL_MOVE:
+                m_name, m_label = self.transitions[t].name, self.transitions[t].label
+            if ret_tuple_as_trans_desc:
+                alignment.append(((t_name, m_name), (t_label, m_label)))
+            else:
+                alignment.append((t_label, m_label))
+            state = parent
+        alignment.reverse()
+        return {"alignment": alignment, "cost": cost, "queued_states": self.queued, "visited_states": self.visited,
+                "closed_set_length": len(self.closed), "lp_solved": 0}
@@ -0,0 +1,296 @@
+'''
+    This file is part of PM4Py (More Info: https://pm4py.fit.fraunhofer.de).
+
+    PM4Py is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    PM4Py is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with PM4Py.  If not, see <https://www.gnu.org/licenses/>.
+'''
+
+from enum import Enum
+from datetime import timedelta
+from typing import Union, Dict, Optional, Any, List, Tuple
+
+import pandas as pd
+
+from pm4py.objects.log.obj import EventLog
+from pm4py.objects.dcr.obj import Relations
+from pm4py.objects.dcr.compiled_semantics import CompiledDcrGraph, iter_bits
+from pm4py.util import exec_utils, constants, xes_constants
+
+CONDITION = Relations.C.value
+MILESTONE = Relations.M.value
+RESPONSE = Relations.R.value
+EXCLUDE = Relations.E.value
+DELAY = 'conditionsForDelays'
+DEADLINE = 'responseToDeadlines'
+
+
+class Parameters(Enum):
+    CASE_ID_KEY = constants.PARAMETER_CONSTANT_CASEID_KEY
+    ACTIVITY_KEY = constants.PARAMETER_CONSTANT_ACTIVITY_KEY
+    TIMESTAMP_KEY = constants.PARAMETER_CONSTANT_TIMESTAMP_KEY
+    ENABLE_MULTIPROCESSING = "enable_multiprocessing"
+    CORES = "cores"
+    CHUNK_SIZE = "chunk_size"
+
+
+def __count_constraints(graph: CompiledDcrGraph) -> int:
+    total = 0
+    for relation in [graph.conditions, graph.milestones, graph.responses, graph.excludes]:
+        for mask in relation:
+            total += bin(mask).count("1")
+    for i in range(graph.n_events):
+        total += len(graph.delays[i]) + len(graph.deadlines[i])
+    return total
+
+
+def __is_timed(graph: CompiledDcrGraph) -> bool:
+    return graph.timed_mask != 0 or any(len(d) > 0 for d in graph.deadlines)
+
+
+def check_trace(graph: CompiledDcrGraph, trace: Tuple[Any, ...]) -> List[List[Any]]:
+    """
+    Replays a single trace on a compiled (flattened) DCR graph, without stopping at the first violation:
+    when an event is not enabled, the reasons are recorded and the event is executed anyway.
+
+    Parameters
+    --------------
+    graph
+        Compiled DCR graph
+    trace
+        Tuple of activities, or tuple of (activity, time elapsed since the previous event) if the graph is timed
+
+    Returns
+    --------------
+    deviations
+        List of the violated relations, every violation is reported once as [relation, (source, target)].
+        The source is None when the violation is caused by the initial marking.
+    """
+    events = graph.events
+    executed = graph.initial_executed
+    included = graph.initial_included
+    pending = graph.initial_pending
+    executed_time = {}
+    pending_deadline = {}
+    # remembers which event last excluded / made pending another event, to report the responsible relation
+    last_excluder = {}
+    last_responder = {}
+    deadline_source = {}
+    timed = __is_timed(graph)
+
+    deviations = []
+    seen = set()
+
+    def report(relation, source, target):
+        key = (relation, source, target)
+        if key not in seen:
+            seen.add(key)
+            deviations.append([relation, (events[source] if source is not None else None, events[target])])
+
+    for step in trace:
+        if timed:
+            activity, elapsed = step
+            if elapsed is not None and elapsed > timedelta(0):
+                for j in list(pending_deadline):
+                    if (included >> j) & 1 and pending_deadline[j] < elapsed:
+                        report(DEADLINE, deadline_source.get(j), j)
+                    pending_deadline[j] = max(pending_deadline[j] - elapsed, timedelta(0))
+                for j in executed_time:
+                    executed_time[j] = min(executed_time[j] + elapsed, graph.max_executed_time[j])
+        else:
+            activity = step
+
+        i = graph.event_ids.get(activity)
+        if i is None:
+            # activities unknown to the graph are not constrained by it
+            continue
+
+        bit = 1 << i
+        if not included & bit:
+            report(EXCLUDE, last_excluder.get(i), i)
+        for j in iter_bits(graph.conditions[i] & included & ~executed):
+            report(CONDITION, j, i)
+        for j in iter_bits(graph.milestones[i] & included & pending):
+            report(MILESTONE, j, i)
+        for (j, k) in graph.delays[i]:
+            if (included >> j) & 1 and (executed >> j) & 1 and executed_time[j] < k:
+                report(DELAY, j, i)
+
+        pending &= ~bit
+        executed |= bit
+        executed_time[i] = timedelta(0)
+        pending_deadline.pop(i, None)
+        for j in iter_bits(graph.excludes[i] & ~graph.includes[i]):
+            last_excluder[j] = i
+        included = (included & ~graph.excludes[i]) | graph.includes[i]
+        for j in iter_bits(graph.responses[i]):
+            last_responder[j] = i
+        pending |= graph.responses[i]
+        for (j, k) in graph.deadlines[i]:
+            pending_deadline[j] = k
+            deadline_source[j] = i
+            last_responder[j] = i
+            pending |= 1 << j
+
+    for j in iter_bits(pending & included):
+        report(RESPONSE, last_responder.get(j), j)
+
+    return deviations
+
+
+def check_variants(graph: CompiledDcrGraph, variants: List[Tuple[Any, ...]]) -> List[List[List[Any]]]:
+    """
+    Checks a list of variants against the compiled graph (unit of work of the process pool)
+    """
+    return [check_trace(graph, variant) for variant in variants]
+
+
+def __get_variants_structure(log: Union[EventLog, pd.DataFrame], timed: bool, parameters: Dict[Any, Any]):
+    activity_key = exec_utils.get_param_value(Parameters.ACTIVITY_KEY, parameters, xes_constants.DEFAULT_NAME_KEY)
+    case_id_key = exec_utils.get_param_value(Parameters.CASE_ID_KEY, parameters, constants.CASE_CONCEPT_NAME)
+    timestamp_key = exec_utils.get_param_value(Parameters.TIMESTAMP_KEY, parameters,
+                                               xes_constants.DEFAULT_TIMESTAMP_KEY)
+
+    import pm4py
+
+    projected_log = pm4py.project_on_event_attribute(log, activity_key, case_id_key=case_id_key)
+    if timed:
+        projected_times = pm4py.project_on_event_attribute(log, timestamp_key, case_id_key=case_id_key)
+        keys = []
+        for activities, times in zip(projected_log, projected_times):
+            elapsed = [None] + [times[i] - times[i - 1] for i in range(1, len(times))]
+            keys.append(tuple(zip(activities, elapsed)))
+    else:
+        keys = [tuple(activities) for activities in projected_log]
+
+    variants_idxs = {}
+    for idx, key in enumerate(keys):
+        if key not in variants_idxs:
+            variants_idxs[key] = []
+        variants_idxs[key].append(idx)
+    return variants_idxs, len(keys)
+
+
+def apply(log: Union[EventLog, pd.DataFrame], dcr: Union[Dict[str, Any], CompiledDcrGraph],
+          parameters: Optional[Dict[Any, Any]] = None) -> List[Dict[str, Any]]:
+    """
+    Rule-based conformance checking of an event log against a DCR graph.
+    Every case is replayed on the graph; instead of stopping at the first event which is not enabled,
+    all the relations that are violated are reported (condition, milestone, exclusion, response, delay, deadline).
+    Each distinct variant is checked only once and the result is shared by all its cases.
+
+    Parameters
+    --------------
+    log
+        Event log / Pandas dataframe
+    dcr
+        DCR graph (or an already compiled and flattened CompiledDcrGraph)
+    parameters
+        Possible parameters of the algorithm, including:
+        - Parameters.ACTIVITY_KEY => the attribute to be used as activity
+        - Parameters.CASE_ID_KEY => the attribute to be used as case identifier
+        - Parameters.TIMESTAMP_KEY => the attribute to be used as timestamp (only for timed graphs)
+        - Parameters.ENABLE_MULTIPROCESSING => checks the variants using a process pool
+        - Parameters.CORES => number of processes of the pool
+        - Parameters.CHUNK_SIZE => number of variants sent to a process at once
+
+    Returns
+    -------------
+    lst_conf_res
+        List containing for every case a dictionary with different keys:
+        - no_constr_total => the total number of relations of the DCR graph that can be violated
+        - deviations => a list of violated relations [relation, (source, target)]
+        - no_dev_total => the total number of deviations
+        - dev_fitness => the fitness (1 - no_dev_total / no_constr_total)
+        - is_fit => True if the case is perfectly fit
+    """
+    if parameters is None:
+        parameters = {}
+
+    import multiprocessing
+
+    enable_multiprocessing = exec_utils.get_param_value(Parameters.ENABLE_MULTIPROCESSING, parameters,
+                                                        constants.ENABLE_MULTIPROCESSING_DEFAULT)
+    num_cores = max(1, exec_utils.get_param_value(Parameters.CORES, parameters, multiprocessing.cpu_count() - 2))
+
+    graph = dcr if isinstance(dcr, CompiledDcrGraph) else CompiledDcrGraph(dcr, flatten=True)
+    variants_idxs, num_cases = __get_variants_structure(log, __is_timed(graph), parameters)
+    variants = list(variants_idxs)
+
+    if enable_multiprocessing and num_cores > 1 and len(variants) > 1:
+        chunk_size = exec_utils.get_param_value(Parameters.CHUNK_SIZE, parameters,
+                                                max(1, len(variants) // (4 * num_cores)))
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=num_cores) as executor:
+            futures = [executor.submit(check_variants, graph, variants[i:i + chunk_size])
+                       for i in range(0, len(variants), chunk_size)]
+            all_deviations = []
+            for future in futures:
+                all_deviations.extend(future.result())
+    else:
+        all_deviations = check_variants(graph, variants)
+
+    total_num_constraints = __count_constraints(graph)
+
+    conf_cases = [None] * num_cases
+    for variant, deviations in zip(variants, all_deviations):
+        for idx in variants_idxs[variant]:
+            ret = {}
+            ret["no_constr_total"] = total_num_constraints
+            ret["deviations"] = list(deviations)
+            ret["no_dev_total"] = len(deviations)
+            if total_num_constraints > 0:
+                ret["dev_fitness"] = max(0.0, 1 - ret["no_dev_total"] / total_num_constraints)
+            else:
+                ret["dev_fitness"] = 1.0 if ret["no_dev_total"] == 0 else 0.0
+            ret["is_fit"] = ret["no_dev_total"] == 0
+            conf_cases[idx] = ret
+
+    return conf_cases
+
+
+def get_diagnostics_dataframe(log: EventLog, conf_result: List[Dict[str, Any]],
+                              parameters: Optional[Dict[Any, Any]] = None) -> pd.DataFrame:
+    """
+    Gets the diagnostics dataframe from a log and the results
+    of DCR-based conformance checking
+
+    Parameters
+    --------------
+    log
+        Event log
+    conf_result
+        Results of conformance checking
+
+    Returns
+    --------------
+    diagn_dataframe
+        Diagnostics dataframe
+    """
+    if parameters is None:
+        parameters = {}
+
+    case_id_key = exec_utils.get_param_value(Parameters.CASE_ID_KEY, parameters, xes_constants.DEFAULT_TRACEID_KEY)
+
+    diagn_stream = []
+
+    for index in range(len(log)):
+        case_id = log[index].attributes[case_id_key]
+
+        no_dev_total = conf_result[index]["no_dev_total"]
+        no_constr_total = conf_result[index]["no_constr_total"]
+        dev_fitness = conf_result[index]["dev_fitness"]
+
+        diagn_stream.append({"case_id": case_id, "no_dev_total": no_dev_total, "no_constr_total": no_constr_total,
+                             "dev_fitness": dev_fitness})
+
+    return pd.DataFrame(diagn_stream)
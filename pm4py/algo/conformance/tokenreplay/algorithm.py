@@ -14,7 +14,7 @@
     You should have received a copy of the GNU General Public License
     along with PM4Py.  If not, see <https://www.gnu.org/licenses/>.
 '''
-from pm4py.algo.conformance.tokenreplay.variants import token_replay, backwards
+from pm4py.algo.conformance.tokenreplay.variants import token_replay, backwards, compiled_token_replay
 from enum import Enum
 from pm4py.util import exec_utils
 from typing import Optional, Dict, Any, Union
@@ -27,8 +27,9 @@ from pm4py.util import typing
 class Variants(Enum):
     TOKEN_REPLAY = token_replay
     BACKWARDS = backwards
+    COMPILED_TOKEN_REPLAY = compiled_token_replay
 
-VERSIONS = {Variants.TOKEN_REPLAY, Variants.BACKWARDS}
+VERSIONS = {Variants.TOKEN_REPLAY, Variants.BACKWARDS, Variants.COMPILED_TOKEN_REPLAY}
 DEFAULT_VARIANT = Variants.TOKEN_REPLAY
 
 
@@ -53,6 +54,9 @@ def apply(log: Union[EventLog, EventStream, pd.DataFrame], net: PetriNet, initia
         Variant of the algorithm to use:
             - Variants.TOKEN_REPLAY
             - Variants.BACKWARDS
+            - Variants.COMPILED_TOKEN_REPLAY (the replay of Variants.TOKEN_REPLAY on a compiled net, memoizing the
+            hidden transitions fired across the log; the variants are replayed in a pool of worker processes if
+            the multiprocessing parameter is enabled)
     """
     if parameters is None:
         parameters = {}
@@ -74,6 +78,7 @@ def get_diagnostics_dataframe(log: Union[EventLog, EventStream, pd.DataFrame], t
         Variant of the algorithm to use:
             - Variants.TOKEN_REPLAY
             - Variants.BACKWARDS
+            - Variants.COMPILED_TOKEN_REPLAY
 
     Returns
     --------------
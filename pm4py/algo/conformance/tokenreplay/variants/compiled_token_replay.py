@@ -0,0 +1,779 @@
+'''
+    This file is part of PM4Py (More Info: https://pm4py.fit.fraunhofer.de).
+
+    PM4Py is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    PM4Py is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with PM4Py.  If not, see <https://www.gnu.org/licenses/>.
+'''
+from pm4py.util import xes_constants as xes_util
+from pm4py.objects.petri_net.utils.petri_utils import get_places_shortest_path_by_hidden, get_s_components_from_petri
+from pm4py.algo.conformance.tokenreplay.variants import token_replay
+from pm4py.algo.conformance.tokenreplay.variants.token_replay import TechnicalParameters
+from enum import Enum
+from pm4py.util import exec_utils, constants, chunking
+from pm4py.util import variants_util
+import importlib.util
+from typing import Optional, Dict, Any, Union
+from pm4py.objects.log.obj import EventLog
+import pandas as pd
+from pm4py.objects.petri_net.obj import PetriNet, Marking
+from pm4py.util import typing
+from collections import Counter
+from pm4py.objects.conversion.log import converter as log_converter
+
+
+class Parameters(Enum):
+    CASE_ID_KEY = constants.PARAMETER_CONSTANT_CASEID_KEY
+    ACTIVITY_KEY = constants.PARAMETER_CONSTANT_ACTIVITY_KEY
+    PLACES_SHORTEST_PATH_BY_HIDDEN = "places_shortest_path_by_hidden"
+    CLEANING_TOKEN_FLOOD = "cleaning_token_flood"
+    WALK_THROUGH_HIDDEN_TRANS = "walk_through_hidden_trans"
+    RETURN_NAMES = "return_names"
+    STOP_IMMEDIATELY_UNFIT = "stop_immediately_unfit"
+    TRY_TO_REACH_FINAL_MARKING_THROUGH_HIDDEN = "try_to_reach_final_marking_through_hidden"
+    CONSIDER_REMAINING_IN_FITNESS = "consider_remaining_in_fitness"
+    CONSIDER_ACTIVITIES_NOT_IN_MODEL_IN_FITNESS = "consider_activities_not_in_model_in_fitness"
+    ENABLE_PLTR_FITNESS = "enable_pltr_fitness"
+    SHOW_PROGRESS_BAR = "show_progress_bar"
+    MULTIPROCESSING = "multiprocessing"
+    CORES = "cores"
+
+
+# replay engine of the worker processes (see initialize_pool_worker)
+_pool_worker_engine = None
+
+
+class TokenReplayEngine(object):
+    """
+    Token-based replay of the variants of a log against a Petri net compiled once: the places are numbered in the
+    order of their names, the transitions in the order of the net, the markings are tuples of token counts indexed
+    by the place ids and the presets/postsets of the transitions are tuples of (place id, weight) couples.
+
+    The replay is the one of the token_replay variant. The hidden transitions fired to enable a transition are
+    memoized per (marking, transition), as well as the visible transitions eventually enabled by the reached
+    markings, for all the variants replayed by the engine.
+    """
+
+    def __init__(self, net, initial_marking, final_marking, places_shortest_path_by_hidden=None,
+                 enable_pltr_fitness=False, consider_remaining_in_fitness=False, reach_mark_through_hidden=True,
+                 stop_immediately_unfit=False, walk_through_hidden_trans=True, cleaning_token_flood=False):
+        """
+        Parameters
+        ------------
+        net
+            Petri net
+        initial_marking
+            Initial marking
+        final_marking
+            Final marking
+        places_shortest_path_by_hidden
+            Shortest paths between places by hidden transitions
+        enable_pltr_fitness
+            Enable fitness retrieval at place/transition level
+        consider_remaining_in_fitness
+            Boolean value telling if the remaining tokens should be considered in fitness evaluation
+        reach_mark_through_hidden
+            Boolean value that decides if we shall try to reach the final marking through hidden transitions
+        stop_immediately_unfit
+            Boolean value that decides if we shall stop immediately when a non-conformance is detected
+        walk_through_hidden_trans
+            Boolean value that decides if we shall walk through hidden transitions in order to enable visible
+            transitions
+        cleaning_token_flood
+            Decides if a cleaning of the token flood shall be operated
+        """
+        if places_shortest_path_by_hidden is None:
+            places_shortest_path_by_hidden = get_places_shortest_path_by_hidden(net,
+                                                                                TechnicalParameters.MAX_REC_DEPTH.value)
+        self.places = sorted(net.places, key=lambda x: x.name)
+        self.transitions = list(net.transitions)
+        place_ids = {p: i for i, p in enumerate(self.places)}
+        self.transition_ids = {t: i for i, t in enumerate(self.transitions)}
+        self.transitions_by_name = sorted(range(len(self.transitions)), key=lambda i: str(self.transitions[i].name))
+
+        self.pre = [tuple((place_ids[a.source], a.weight) for a in t.in_arcs) for t in self.transitions]
+        self.post = [tuple((place_ids[a.target], a.weight) for a in t.out_arcs) for t in self.transitions]
+        self.consumed = [sum(w for p, w in pre) for pre in self.pre]
+        self.produced = [sum(w for p, w in post) for post in self.post]
+
+        # transitions per label in the order of the net: the transition of the label in the transitions map of
+        # token_replay is the last one
+        self.label_transitions = {}
+        for i, t in enumerate(self.transitions):
+            if t.label not in self.label_transitions:
+                self.label_transitions[t.label] = []
+            self.label_transitions[t.label].append(i)
+
+        self.shortest_paths = {}
+        for p1 in places_shortest_path_by_hidden:
+            if p1 in place_ids:
+                self.shortest_paths[place_ids[p1]] = {
+                    place_ids[p2]: tuple(self.transition_ids[t] for t in path) for p2, path in
+                    places_shortest_path_by_hidden[p1].items() if p2 in place_ids}
+
+        self.initial_marking = self.get_marking(initial_marking)
+        self.final_marking = self.get_marking(final_marking)
+        self.final_places = tuple(p for p in range(len(self.places)) if self.final_marking[p] > 0)
+
+        self.s_components = []
+        if cleaning_token_flood:
+            self.s_components = [frozenset(i for i, p in enumerate(self.places) if p.name in comp) for comp in
+                                 get_s_components_from_petri(net, initial_marking, final_marking)]
+
+        self.enable_pltr_fitness = enable_pltr_fitness
+        self.consider_remaining_in_fitness = consider_remaining_in_fitness
+        self.reach_mark_through_hidden = reach_mark_through_hidden
+        self.stop_immediately_unfit = stop_immediately_unfit
+        self.walk_through_hidden_trans = walk_through_hidden_trans
+        self.cleaning_token_flood = cleaning_token_flood
+
+        self.hidden_closures = {}
+        self.eventually_enabled = {}
+
+    def get_marking(self, marking):
+        """
+        Gets the tuple of token counts of a marking
+        """
+        place_ids = {p: i for i, p in enumerate(self.places)}
+        vector = [0] * len(self.places)
+        for p, count in marking.items():
+            vector[place_ids[p]] = count
+        return tuple(vector)
+
+    def get_petri_marking(self, marking):
+        """
+        Gets the marking (object of the net) of a tuple of token counts
+        """
+        return Marking({self.places[p]: count for p, count in enumerate(marking) if count > 0})
+
+    def is_enabled(self, t, marking):
+        for p, w in self.pre[t]:
+            if marking[p] < w:
+                return False
+        return True
+
+    def fire(self, t, marking):
+        marking = list(marking)
+        for p, w in self.pre[t]:
+            marking[p] -= w
+        for p, w in self.post[t]:
+            marking[p] += w
+        return tuple(marking)
+
+    def get_paths_by_hidden(self, marking, target_places):
+        """
+        Shortest paths by hidden transitions from the marked places to the target places, the shortest first
+        """
+        paths = []
+        for p1 in range(len(marking)):
+            if marking[p1] > 0 and p1 in self.shortest_paths:
+                for p2 in target_places:
+                    if p2 in self.shortest_paths[p1]:
+                        paths.append(self.shortest_paths[p1][p2])
+        return sorted(paths, key=lambda x: len(x))
+
+    def enable_hidden_transitions(self, marking, activated_transitions, visited_transitions, paths, t):
+        """
+        Fires the hidden transitions of the paths, in turn, until t is enabled (see
+        token_replay.enable_hidden_transitions)
+        """
+        j_indexes = [0] * len(paths)
+        for z in range(10000000):
+            something_changed = False
+            i = z % len(paths)
+            for k in range(j_indexes[i], len(paths[i])):
+                t3 = paths[i][j_indexes[i]]
+                if t3 != t and t3 not in visited_transitions and self.is_enabled(t3, marking):
+                    marking = self.fire(t3, marking)
+                    activated_transitions.append(t3)
+                    visited_transitions.add(t3)
+                    something_changed = True
+                j_indexes[i] = j_indexes[i] + 1
+                if self.is_enabled(t, marking):
+                    break
+            if self.is_enabled(t, marking):
+                break
+            if not something_changed:
+                break
+        return marking
+
+    def apply_hidden_trans(self, t, marking, activated_transitions, rec_depth, visited_transitions):
+        """
+        Fires hidden transitions in order to enable t (see token_replay.apply_hidden_trans)
+        """
+        if rec_depth >= TechnicalParameters.MAX_REC_DEPTH_HIDTRANSENABL.value or t in visited_transitions:
+            return marking
+        visited_transitions.add(t)
+        marking_at_start = marking
+        places_with_missing = sorted(p for p, w in self.pre[t] if marking[p] < w)
+        paths = self.get_paths_by_hidden(marking, places_with_missing)
+
+        if paths:
+            marking = self.enable_hidden_transitions(marking, activated_transitions, visited_transitions, paths, t)
+            if not self.is_enabled(t, marking):
+                for path in self.get_paths_by_hidden(marking, places_with_missing):
+                    for t4 in path:
+                        if t4 != t and t4 not in visited_transitions:
+                            if not self.is_enabled(t4, marking):
+                                marking = self.apply_hidden_trans(t4, marking, activated_transitions,
+                                                                  rec_depth + 1, visited_transitions)
+                            if self.is_enabled(t4, marking):
+                                marking = self.fire(t4, marking)
+                                activated_transitions.append(t4)
+                                visited_transitions.add(t4)
+            if not self.is_enabled(t, marking) and marking != marking_at_start:
+                marking = self.apply_hidden_trans(t, marking, activated_transitions, rec_depth + 1,
+                                                  visited_transitions)
+
+        return marking
+
+    def get_hidden_closure(self, t, marking):
+        """
+        Marking reached, and hidden transitions fired, trying to enable t from the given marking (memoized)
+        """
+        key = (t, marking)
+        if key not in self.hidden_closures:
+            activated_transitions = []
+            reached_marking = self.apply_hidden_trans(t, marking, activated_transitions, 0, set())
+            self.hidden_closures[key] = (reached_marking, tuple(activated_transitions))
+        return self.hidden_closures[key]
+
+    def get_visible_transitions_eventually_enabled(self, marking):
+        """
+        Ids of the visible transitions eventually enabled by the marking, passing possibly through hidden
+        transitions (see align_utils.get_visible_transitions_eventually_enabled_by_marking), memoized
+        """
+        if marking not in self.eventually_enabled:
+            transitions = [t for t in self.transitions_by_name if self.is_enabled(t, marking)]
+            transitions_marking = {t: marking for t in transitions}
+            visible_transitions = set()
+            visited = set()
+            i = 0
+            while i < len(transitions):
+                t = transitions[i]
+                t_marking = transitions_marking[t]
+                if (t, t_marking) not in visited:
+                    if self.transitions[t].label is not None:
+                        visible_transitions.add(t)
+                    elif self.is_enabled(t, t_marking):
+                        new_marking = self.fire(t, t_marking)
+                        for t2 in self.transitions_by_name:
+                            if self.is_enabled(t2, new_marking):
+                                transitions.append(t2)
+                                transitions_marking[t2] = new_marking
+                    visited.add((t, t_marking))
+                i = i + 1
+            self.eventually_enabled[marking] = tuple(sorted(visible_transitions))
+        return self.eventually_enabled[marking]
+
+    def is_final_marking_covered(self, marking):
+        for p in self.final_places:
+            if marking[p] <= 0:
+                return False
+        return True
+
+    def replay(self, activities, trace_occurrences=1):
+        """
+        Replays a variant (see token_replay.apply_trace)
+
+        Parameters
+        -------------
+        activities
+            Activities of the variant
+        trace_occurrences
+            Number of occurrences of the variant
+
+        Returns
+        -------------
+        result
+            Result of the replay, referring to the places and transitions by their ids
+        """
+        pltr = self.enable_pltr_fitness
+        place_stats = {}
+
+        def add_place_stat(p, key, value):
+            if p not in place_stats:
+                place_stats[p] = {"m": 0, "r": 0, "c": 0, "p": 0}
+            place_stats[p][key] += value
+
+        def fire_counting(t, marking):
+            if pltr:
+                for p, w in self.pre[t]:
+                    add_place_stat(p, "c", w * trace_occurrences)
+                for p, w in self.post[t]:
+                    add_place_stat(p, "p", w * trace_occurrences)
+            return self.fire(t, marking)
+
+        marking = self.initial_marking
+        activated_transitions = []
+        transitions_with_problems = []
+        underfed_places = set()
+        transition_events = []
+        not_existing_activities = []
+        current_remaining = {}
+        missing = 0
+        consumed = 0
+        produced = sum(self.initial_marking)
+        processed_events = 0
+
+        for activity in activities:
+            processed_events += 1
+            if activity not in self.label_transitions:
+                not_existing_activities.append(activity)
+                continue
+            candidates = self.label_transitions[activity]
+            t = candidates[-1]
+            if len(candidates) > 1:
+                for t2 in candidates:
+                    if self.is_enabled(t2, marking):
+                        t = t2
+                        break
+            if self.walk_through_hidden_trans and not self.is_enabled(t, marking):
+                marking, hidden_transitions = self.get_hidden_closure(t, marking)
+                for t5 in hidden_transitions:
+                    consumed += self.consumed[t5]
+                    produced += self.produced[t5]
+                    if pltr:
+                        for p, w in self.pre[t5]:
+                            add_place_stat(p, "c", w * trace_occurrences)
+                        for p, w in self.post[t5]:
+                            add_place_stat(p, "p", w * trace_occurrences)
+                activated_transitions.extend(hidden_transitions)
+            old_marking = marking
+            is_initially_enabled = self.is_enabled(t, marking)
+            if not is_initially_enabled:
+                transitions_with_problems.append(t)
+                if self.stop_immediately_unfit:
+                    missing += 1
+                    break
+                marking = list(marking)
+                for p, w in self.pre[t]:
+                    if marking[p] < w:
+                        missing += w - marking[p]
+                        if pltr:
+                            underfed_places.add(p)
+                            add_place_stat(p, "m", w - marking[p])
+                        # as in token_replay.add_missing_tokens, the weight of the arc is added
+                        marking[p] += w
+                marking = tuple(marking)
+            if pltr:
+                transition_events.append((t, not is_initially_enabled))
+            consumed += self.consumed[t]
+            produced += self.produced[t]
+            marking = fire_counting(t, marking)
+            activated_transitions.append(t)
+            if not is_initially_enabled and self.cleaning_token_flood:
+                new_places = [p for p in range(len(marking)) if marking[p] > 0 and old_marking[p] <= 0]
+                marking = list(marking)
+                for p1 in range(len(marking)):
+                    if marking[p1] > 0 and old_marking[p1] > 0:
+                        if any(p1 in comp and p2 in comp for p2 in new_places for comp in self.s_components):
+                            marking[p1] = 0
+                            current_remaining[p1] = current_remaining.get(p1, 0) + 1
+                marking = tuple(marking)
+
+        if self.reach_mark_through_hidden:
+            for i in range(TechnicalParameters.MAX_IT_FINAL1.value):
+                if self.is_final_marking_covered(marking):
+                    break
+                for path in self.get_paths_by_hidden(marking, self.final_places):
+                    for t in path:
+                        if self.is_enabled(t, marking):
+                            marking = fire_counting(t, marking)
+                            activated_transitions.append(t)
+                            consumed += self.consumed[t]
+                            produced += self.produced[t]
+                    if self.is_final_marking_covered(marking):
+                        break
+
+            # try to reach the final marking in a different fashion, if not already reached
+            if not self.is_final_marking_covered(marking) and len(self.final_places) == 1:
+                sink_place = self.final_places[0]
+                connections_to_sink = [self.shortest_paths[p][sink_place] for p in range(len(marking)) if
+                                       marking[p] > 0 and p in self.shortest_paths and
+                                       sink_place in self.shortest_paths[p]]
+                connections_to_sink = sorted(connections_to_sink, key=lambda x: len(x))
+                for i in range(TechnicalParameters.MAX_IT_FINAL2.value):
+                    for path in connections_to_sink:
+                        for t in path:
+                            if not self.is_enabled(t, marking):
+                                break
+                            marking = fire_counting(t, marking)
+                            activated_transitions.append(t)
+                            consumed += self.consumed[t]
+                            produced += self.produced[t]
+
+        reached_marking = marking
+
+        remaining = 0
+        overfed_places = set()
+        for p in range(len(marking)):
+            if marking[p] > 0:
+                place_remaining = max(0, marking[p] - self.final_marking[p])
+                if pltr and place_remaining > 0:
+                    if p not in underfed_places:
+                        overfed_places.add(p)
+                    add_place_stat(p, "r", place_remaining * trace_occurrences)
+                remaining += place_remaining
+        for p, count in current_remaining.items():
+            if pltr:
+                if p not in underfed_places:
+                    overfed_places.add(p)
+                add_place_stat(p, "r", count * trace_occurrences)
+            remaining += count
+
+        if self.consider_remaining_in_fitness:
+            is_fit = (missing == 0) and (remaining == 0)
+        else:
+            is_fit = (missing == 0)
+
+        consumed += sum(self.final_marking)
+        for p in self.final_places:
+            diff = self.final_marking[p] - reached_marking[p]
+            if diff > 0:
+                missing += diff
+                if pltr:
+                    add_place_stat(p, "m", diff * trace_occurrences)
+
+        if pltr:
+            for p in range(len(self.places)):
+                if self.initial_marking[p] > 0:
+                    add_place_stat(p, "p", self.initial_marking[p] * trace_occurrences)
+                if self.final_marking[p] > 0:
+                    add_place_stat(p, "c", self.final_marking[p] * trace_occurrences)
+
+        if consumed > 0 and produced > 0:
+            trace_fitness = 0.5 * (1.0 - float(missing) / float(consumed)) + 0.5 * (
+                    1.0 - float(remaining) / float(produced))
+        else:
+            trace_fitness = 1.0
+
+        result = {"trace_is_fit": is_fit, "trace_fitness": trace_fitness,
+                  "activated_transitions": activated_transitions,
+                  "reached_marking": reached_marking,
+                  "enabled_transitions_in_marking": self.get_visible_transitions_eventually_enabled(reached_marking),
+                  "transitions_with_problems": transitions_with_problems, "missing_tokens": missing,
+                  "consumed_tokens": consumed, "remaining_tokens": remaining, "produced_tokens": produced,
+                  "not_existing_activities": not_existing_activities}
+        if pltr:
+            result["place_stats"] = place_stats
+            result["underfed_places"] = underfed_places
+            result["overfed_places"] = overfed_places
+            result["transition_events"] = transition_events
+            result["processed_events"] = processed_events
+        return result
+
+
+def initialize_pool_worker(engine):
+    """
+    Stores the replay engine in the worker process (received once per worker)
+    """
+    global _pool_worker_engine
+    _pool_worker_engine = engine
+
+
+def replay_pool_chunk(variants):
+    """
+    Replays a chunk of (variant, number of occurrences) couples with the engine of the worker process
+    """
+    return [_pool_worker_engine.replay(variant, trace_occurrences) for variant, trace_occurrences in variants]
+
+
+def replay_variants(engine, vc, cores=1, progress=None):
+    """
+    Replays the variants with the engine, in a pool of worker processes if more than one core is given
+
+    Parameters
+    -------------
+    engine
+        Token-based replay engine
+    vc
+        List of (variant, number of occurrences) couples
+    cores
+        Number of worker processes
+    progress
+        (optional) progress bar, updated when variants are replayed
+
+    Returns
+    -------------
+    results
+        Results of the replay of the variants (in the order of vc)
+    """
+    if cores <= 1 or len(vc) <= 1:
+        results = []
+        for variant, trace_occurrences in vc:
+            results.append(engine.replay(variant, trace_occurrences))
+            if progress is not None:
+                progress.update()
+        return results
+
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    results = [None] * len(vc)
+    chunks = chunking.get_longest_first_chunks([variant for variant, trace_occurrences in vc], cores)
+    with ProcessPoolExecutor(max_workers=min(cores, len(chunks)), initializer=initialize_pool_worker,
+                             initargs=(engine,)) as executor:
+        futures = {executor.submit(replay_pool_chunk, [vc[i] for i in chunk]): chunk for chunk in chunks}
+        for future in as_completed(futures):
+            for i, result in zip(futures[future], future.result()):
+                results[i] = result
+            if progress is not None:
+                progress.update(len(futures[future]))
+    return results
+
+
+def apply_log(log, net, initial_marking, final_marking, enable_pltr_fitness=False, consider_remaining_in_fitness=False,
+              activity_key="concept:name", reach_mark_through_hidden=True, stop_immediately_unfit=False,
+              walk_through_hidden_trans=True, places_shortest_path_by_hidden=None, cleaning_token_flood=False,
+              return_object_names=False, show_progress_bar=True, consider_activities_not_in_model_in_fitness=False,
+              case_id_key=constants.CASE_CONCEPT_NAME, cores=1):
+    """
+    Apply token-based replay to a log (same output as token_replay.apply_log)
+
+    Parameters
+    ----------
+    log
+        Trace log
+    net
+        Petri net
+    initial_marking
+        Initial marking
+    final_marking
+        Final marking
+    enable_pltr_fitness
+        Enable fitness retrieval at place level
+    consider_remaining_in_fitness
+        Boolean value telling if the remaining tokens should be considered in fitness evaluation
+    activity_key
+        Name of the attribute that contains the activity
+    reach_mark_through_hidden
+        Boolean value that decides if we shall try to reach the final marking through hidden transitions
+    stop_immediately_unfit
+        Boolean value that decides if we shall stop immediately when a non-conformance is detected
+    walk_through_hidden_trans
+        Boolean value that decides if we shall walk through hidden transitions in order to enable visible transitions
+    places_shortest_path_by_hidden
+        Shortest paths between places by hidden transitions
+    cleaning_token_flood
+        Decides if a cleaning of the token flood shall be operated
+    return_object_names
+        Decides whether names instead of object pointers shall be returned
+    consider_activities_not_in_model_in_fitness
+        Decides if the traces containing activities not in the model are unfit
+    cores
+        Number of worker processes replaying the variants
+    """
+    engine = TokenReplayEngine(net, initial_marking, final_marking,
+                               places_shortest_path_by_hidden=places_shortest_path_by_hidden,
+                               enable_pltr_fitness=enable_pltr_fitness,
+                               consider_remaining_in_fitness=consider_remaining_in_fitness,
+                               reach_mark_through_hidden=reach_mark_through_hidden,
+                               stop_immediately_unfit=stop_immediately_unfit,
+                               walk_through_hidden_trans=walk_through_hidden_trans,
+                               cleaning_token_flood=cleaning_token_flood)
+
+    place_fitness_per_trace = {}
+    transition_fitness_per_trace = {}
+    notexisting_activities_in_model = {}
+
+    if enable_pltr_fitness:
+        for place in net.places:
+            place_fitness_per_trace[place] = {"underfed_traces": set(), "overfed_traces": set(), "m": 0, "r": 0, "c": 0,
+                                              "p": 0}
+        for transition in net.transitions:
+            if transition.label:
+                transition_fitness_per_trace[transition] = {"underfed_traces": {}, "fit_traces": {}}
+
+    if type(log) is pd.DataFrame:
+        traces = list(log.groupby(case_id_key)[activity_key].apply(tuple))
+    else:
+        traces = [tuple(x[activity_key] for x in trace) for trace in log]
+
+    variants = Counter(traces)
+
+    vc = [(k, v) for k, v in variants.items()]
+    vc = list(sorted(vc, key=lambda x: (x[1], x[0]), reverse=True))
+
+    progress = None
+    if importlib.util.find_spec("tqdm") and show_progress_bar and len(variants) > 1:
+        from tqdm.auto import tqdm
+        progress = tqdm(total=len(variants), desc="replaying log with TBR, completed variants :: ")
+
+    results = replay_variants(engine, vc, cores=cores, progress=progress)
+
+    variants_results = {}
+    met_activities_not_in_model = False
+    for (variant, trace_occurrences), result in zip(vc, results):
+        met_activities_not_in_model = met_activities_not_in_model or bool(result["not_existing_activities"])
+        if consider_activities_not_in_model_in_fitness and met_activities_not_in_model:
+            # as in token_replay, the activities not in the model met by the variants replayed before make
+            # the variant unfit
+            result["trace_is_fit"] = False
+        if enable_pltr_fitness:
+            trace = variants_util.variant_to_trace(variant, parameters={
+                constants.PARAMETER_CONSTANT_ACTIVITY_KEY: activity_key})
+            __add_place_transition_fitness(engine, trace, result, activity_key, place_fitness_per_trace,
+                                           transition_fitness_per_trace, notexisting_activities_in_model)
+        variants_results[variant] = __get_variant_result(engine, result, return_object_names)
+
+    aligned_traces = [variants_results[trace_variant] for trace_variant in traces]
+
+    # gracefully close progress bar
+    if progress is not None:
+        progress.close()
+    del progress
+
+    if enable_pltr_fitness:
+        return aligned_traces, place_fitness_per_trace, transition_fitness_per_trace, notexisting_activities_in_model
+    else:
+        return aligned_traces
+
+
+def __get_variant_result(engine, result, return_object_names):
+    """
+    Result of the replay of a variant in the format of token_replay.apply_log
+    """
+    activated_transitions = [engine.transitions[t] for t in result["activated_transitions"]]
+    reached_marking = engine.get_petri_marking(result["reached_marking"])
+    enabled_transitions_in_marking = set(engine.transitions[t] for t in result["enabled_transitions_in_marking"])
+    transitions_with_problems = [engine.transitions[t] for t in result["transitions_with_problems"]]
+
+    variant_result = {"trace_is_fit": result["trace_is_fit"],
+                      "trace_fitness": float(result["trace_fitness"]),
+                      "activated_transitions": activated_transitions,
+                      "reached_marking": reached_marking,
+                      "enabled_transitions_in_marking": enabled_transitions_in_marking,
+                      "transitions_with_problems": transitions_with_problems,
+                      "missing_tokens": int(result["missing_tokens"]),
+                      "consumed_tokens": int(result["consumed_tokens"]),
+                      "remaining_tokens": int(result["remaining_tokens"]),
+                      "produced_tokens": int(result["produced_tokens"])}
+
+    if return_object_names:
+        variant_result["activated_transitions_labels"] = [x.label for x in activated_transitions]
+        variant_result["activated_transitions"] = [x.name for x in activated_transitions]
+        variant_result["enabled_transitions_in_marking_labels"] = [x.label for x in enabled_transitions_in_marking]
+        variant_result["enabled_transitions_in_marking"] = [x.name for x in enabled_transitions_in_marking]
+        variant_result["transitions_with_problems"] = [x.name for x in transitions_with_problems]
+        variant_result["reached_marking"] = {x.name: y for x, y in reached_marking.items()}
+
+    return variant_result
+
+
+def __add_place_transition_fitness(engine, trace, result, activity_key, place_fitness, transition_fitness,
+                                   notexisting_activities_in_model):
+    """
+    Adds the place/transition level statistics of the replay of a variant
+    """
+    # as in token_replay, the events map of the trace is updated with the events corresponding to a transition
+    current_event_map = {}
+    for event in trace[:result["processed_events"]]:
+        if event[activity_key] in engine.label_transitions:
+            current_event_map.update(event)
+
+    for p, stats in result["place_stats"].items():
+        for key, value in stats.items():
+            place_fitness[engine.places[p]][key] += value
+    for p in result["underfed_places"]:
+        place_fitness[engine.places[p]]["underfed_traces"].add(trace)
+    for p in result["overfed_places"]:
+        place_fitness[engine.places[p]]["overfed_traces"].add(trace)
+
+    # the traces are hashed by their content: they are looked up once per transition
+    transition_events = Counter(result["transition_events"])
+    for (t, is_underfed), count in transition_events.items():
+        traces = transition_fitness[engine.transitions[t]]["underfed_traces" if is_underfed else "fit_traces"]
+        traces.setdefault(trace, list()).extend([current_event_map] * count)
+
+    for activity in result["not_existing_activities"]:
+        if activity not in notexisting_activities_in_model:
+            notexisting_activities_in_model[activity] = {}
+        notexisting_activities_in_model[activity][trace] = current_event_map
+
+
+def apply(log: EventLog, net: PetriNet, initial_marking: Marking, final_marking: Marking, parameters: Optional[Dict[Union[str, Parameters], Any]] = None) -> typing.ListAlignments:
+    """
+    Method to apply token-based replay, compiling the Petri net once and replaying the variants in a pool of
+    worker processes (if multiprocessing is enabled)
+
+    Parameters
+    -----------
+    log
+        Log
+    net
+        Petri net
+    initial_marking
+        Initial marking
+    final_marking
+        Final marking
+    parameters
+        Parameters of the algorithm, including:
+            Parameters.MULTIPROCESSING -> replays the variants in a pool of worker processes
+            Parameters.CORES -> number of worker processes
+    """
+    if parameters is None:
+        parameters = {}
+
+    enable_pltr_fitness = exec_utils.get_param_value(Parameters.ENABLE_PLTR_FITNESS, parameters, False)
+    consider_remaining_in_fitness = exec_utils.get_param_value(Parameters.CONSIDER_REMAINING_IN_FITNESS, parameters,
+                                                               True)
+    try_to_reach_final_marking_through_hidden = exec_utils.get_param_value(
+        Parameters.TRY_TO_REACH_FINAL_MARKING_THROUGH_HIDDEN, parameters, True)
+    stop_immediately_unfit = exec_utils.get_param_value(Parameters.STOP_IMMEDIATELY_UNFIT, parameters, False)
+    walk_through_hidden_trans = exec_utils.get_param_value(Parameters.WALK_THROUGH_HIDDEN_TRANS, parameters, True)
+    cleaning_token_flood = exec_utils.get_param_value(Parameters.CLEANING_TOKEN_FLOOD, parameters, False)
+    return_names = exec_utils.get_param_value(Parameters.RETURN_NAMES, parameters, False)
+    places_shortest_path_by_hidden = exec_utils.get_param_value(Parameters.PLACES_SHORTEST_PATH_BY_HIDDEN, parameters,
+                                                                None)
+    activity_key = exec_utils.get_param_value(Parameters.ACTIVITY_KEY, parameters, xes_util.DEFAULT_NAME_KEY)
+    consider_activities_not_in_model_in_fitness = exec_utils.get_param_value(
+        Parameters.CONSIDER_ACTIVITIES_NOT_IN_MODEL_IN_FITNESS, parameters, False)
+    show_progress_bar = exec_utils.get_param_value(Parameters.SHOW_PROGRESS_BAR, parameters, constants.SHOW_PROGRESS_BAR)
+    case_id_key = exec_utils.get_param_value(Parameters.CASE_ID_KEY, parameters, constants.CASE_CONCEPT_NAME)
+
+    cores = 1
+    if exec_utils.get_param_value(Parameters.MULTIPROCESSING, parameters, constants.ENABLE_MULTIPROCESSING_DEFAULT):
+        import multiprocessing
+        cores = max(1, exec_utils.get_param_value(Parameters.CORES, parameters, multiprocessing.cpu_count() - 2))
+
+    if type(log) is not pd.DataFrame:
+        log = log_converter.apply(log, variant=log_converter.Variants.TO_EVENT_LOG, parameters=parameters)
+
+    return apply_log(log, net, initial_marking, final_marking, enable_pltr_fitness=enable_pltr_fitness,
+                     consider_remaining_in_fitness=consider_remaining_in_fitness,
+                     reach_mark_through_hidden=try_to_reach_final_marking_through_hidden,
+                     stop_immediately_unfit=stop_immediately_unfit,
+                     walk_through_hidden_trans=walk_through_hidden_trans,
+                     places_shortest_path_by_hidden=places_shortest_path_by_hidden, activity_key=activity_key,
+                     cleaning_token_flood=cleaning_token_flood, return_object_names=return_names,
+                     show_progress_bar=show_progress_bar,
+                     consider_activities_not_in_model_in_fitness=consider_activities_not_in_model_in_fitness,
+                     case_id_key=case_id_key, cores=cores)
+
+
+def get_diagnostics_dataframe(log: EventLog, tbr_output: typing.ListAlignments, parameters: Optional[Dict[Union[str, Parameters], Any]] = None) -> pd.DataFrame:
+    """
+    Gets the results of token-based replay in a dataframe
+
+    Parameters
+    --------------
+    log
+        Event log
+    tbr_output
+        Output of the token-based replay technique
+
+    Returns
+    --------------
+    dataframe
+        Diagnostics dataframe
+    """
+    return token_replay.get_diagnostics_dataframe(log, tbr_output, parameters=parameters)
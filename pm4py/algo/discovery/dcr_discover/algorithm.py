@@ -18,10 +18,13 @@ import datetime
 from copy import deepcopy
 
 import pm4py.objects.log.obj
+from pm4py.objects.dcr.obj import to_dcr_dict
 from pm4py.algo.discovery.dcr_discover.variants import dcr_discover
 from pm4py.algo.discovery.dcr_discover.extenstions import time_constraints, initial_pending, mutual_exclusion, nesting
 from enum import Enum
 
+import pandas as pd
+
 
 class Variants(Enum):
     DCR_BASIC = dcr_discover
@@ -43,6 +46,8 @@ def apply(input_log, variant=DCR_BASIC, **parameters):
     Parameters
     -----------
     input_log
+        pandas dataframe, event log or (basic variant only) a variant table: dict activity tuple -> number of cases,
+        as returned by pm4py.get_variants. Every distinct variant is processed only once.
     variant
         Variant of the algorithm to use:
             - BASIC
@@ -56,24 +61,28 @@ def apply(input_log, variant=DCR_BASIC, **parameters):
     -----------
     dcr graph
     """
-    log = deepcopy(input_log)
+    # the miners never modify the log: pandas dataframes are mined directly (no copy, no conversion)
+    log = input_log
     if variant.value == Variants.DCR_BASIC.value:
         print('[i] Mining with basic DisCoveR')
-        if not isinstance(log, pm4py.objects.log.obj.EventLog):
+        if not isinstance(log, (pm4py.objects.log.obj.EventLog, pd.DataFrame, dict)):
             print('[i] Converting to old event log!')
             log = pm4py.convert_to_event_log(log)
         disc_b = dcr_discover.Discover()
         dcr_model, la = disc_b.mine(log, **parameters)
         if 'timed' in parameters.keys() and parameters['timed']:
+            if isinstance(log, dict):
+                raise Exception("timed discovery needs the timestamps of the events, not only a variant table")
             dcr_model = apply_timed(dcr_model, log, None)
         if 'pending' in parameters.keys() and parameters['pending']:
-            dcr_model = initial_pending.apply(dcr_model, log)
+            # the initial pending events only depend on the distinct variants
+            dcr_model = initial_pending.apply(dcr_model, la['traces'])
         return dcr_model, la
     elif variant.value == Variants.DCR_ME.value:
         print('[i] Mining with ME-DisCoveR')
         dcr_model, sp_log = mutual_exclusion.apply(log, **parameters)
         if 'timed' in parameters.keys() and parameters['timed']:
-            dcr_model = apply_timed(dcr_model, deepcopy(input_log), sp_log)
+            dcr_model = apply_timed(dcr_model, input_log, sp_log)
         if 'pending' in parameters.keys() and parameters['pending']:
             dcr_model = initial_pending.apply(dcr_model, sp_log)
         dcr_model = post_processing(dcr_model, **parameters)
@@ -82,7 +91,7 @@ def apply(input_log, variant=DCR_BASIC, **parameters):
         print('[i] Mining with N-DisCoveR')
         dcr_model, sp_log = nesting.apply(log, **parameters)
         if 'timed' in parameters.keys() and parameters['timed']:
-            dcr_model = apply_timed(dcr_model, deepcopy(input_log), sp_log)
+            dcr_model = apply_timed(dcr_model, input_log, sp_log)
         if 'pending' in parameters.keys() and parameters['pending']:
             dcr_model = initial_pending.apply(dcr_model, sp_log)
         dcr_model = post_processing(dcr_model, **parameters)
@@ -90,19 +99,9 @@ def apply(input_log, variant=DCR_BASIC, **parameters):
     elif variant.value == Variants.DCR_NME.value:
         print('[i] Mining with NME-DisCoveR')
         dcr_model, sp_log = mutual_exclusion.apply(log, **parameters)
-        from pm4py.algo.discovery.dcr_discover.extenstions.nesting import Nesting
-        nst = Nesting()
-        nst.create_encoding(dcr_model)
-        all_mes = set()
-        all_me_events = set()
-        for me, me_event in dcr_model['nestings'].items():
-            nst.nest(me_event)
-            all_mes.add(me)
-            all_me_events = all_me_events.union(me_event)
-        nst.nest(dcr_model['events'].union(all_mes).difference(all_me_events))
-        dcr_model = nst.get_nested_dcr_graph(dcr_model['nestings'])
+        dcr_model = nesting.apply_nesting_on_mutual_exclusions(dcr_model)
         if 'timed' in parameters.keys() and parameters['timed']:
-            dcr_model = apply_timed(dcr_model, deepcopy(input_log), sp_log)
+            dcr_model = apply_timed(dcr_model, input_log, sp_log)
         if 'pending' in parameters.keys() and parameters['pending']:
             dcr_model = initial_pending.apply(dcr_model, sp_log)
         dcr_model = post_processing(dcr_model, **parameters)
@@ -153,6 +152,7 @@ def replace_events_ne(dcr, e0, new_sp):
 
 
 def apply_timed(dcr_model, log, sp_log):
+    dcr_model = to_dcr_dict(dcr_model)
     timings = time_constraints.apply(dcr_model=dcr_model, event_log=log, method='standard', sp_log=sp_log)
     # these should be a dict with events as keys and tuples as values
     if 'conditionsForDelays' not in dcr_model:
@@ -1,8 +1,15 @@
 from copy import deepcopy
+import pm4py
 from pm4py.objects.dcr.semantics import DcrSemantics
+from pm4py.objects.dcr.obj import to_dcr_dict
 
 
 def apply(dcr_model, event_log):
+    dcr_model = to_dcr_dict(dcr_model)
+    # works on the activities only: event logs and dataframes are projected, lists of traces
+    # (e.g. the distinct variants of the DisCoveR log abstraction) are used as they are
+    if not isinstance(event_log, list):
+        event_log = pm4py.project_on_event_attribute(event_log, 'concept:name')
     at_least_once_all_traces = set(dcr_model['events'])
     end_excluded_all_traces = set(dcr_model['events'])
 
@@ -13,9 +20,9 @@ def apply(dcr_model, event_log):
         complete = True
         semantics_obj = DcrSemantics(dcr)
         for event in trace:
-            executed = semantics_obj.execute(event['concept:name'])
+            executed = semantics_obj.execute(event)
             if executed:
-                executed_events.add(event['concept:name'])
+                executed_events.add(event)
             # TODO make this a filtering
             # complete = complete and event['lifecycle:transition'] == 'complete'
         if complete:
@@ -1,17 +1,30 @@
+import time
+
 import pm4py
-import pandas as pd
 import networkx as nx
 
 from copy import deepcopy
 from pm4py.algo.discovery.dcr_discover.variants import dcr_discover as alg
+from pm4py.objects.dcr.compiled_semantics import iter_bits
 from pm4py.objects.dcr.obj import dcr_template, Relations
 
+# default time budget (in seconds) of the search of the mutually exclusive subprocesses
+MAX_ELAB_TIME = 5
+
 
-def apply(log, findAdditionalConditions=True, inBetweenRels=True, **kwargs):
+def apply(log, findAdditionalConditions=True, inBetweenRels=True, max_elab_time=MAX_ELAB_TIME, **kwargs):
     event_log = log
     basic_dcr, la = alg.apply(event_log, findAdditionalConditions=findAdditionalConditions)
+    return apply_mutual_exclusion(basic_dcr, max_elab_time=max_elab_time), la
+
+
+def apply_mutual_exclusion(basic_dcr, max_elab_time=MAX_ELAB_TIME):
+    '''
+    Groups the mutually exclusive events of a graph mined by the basic DisCoveR into nestings (the graph is modified).
+    max_elab_time is the time budget (in seconds) of the search of the groups (see get_mutual_exclusions)
+    '''
     # get subprocesses based on mutual exclusion
-    me_nestings = get_mutual_exclusions(basic_dcr)
+    me_nestings = get_mutual_exclusions(basic_dcr, max_elab_time=max_elab_time)
     # create a projected log based on the subprocess events
     # subprocess_log = get_abstracted_log(event_log, subprocesses)
     # now run the dcr graph with the subprocess events replaced as the subprocess
@@ -54,67 +67,150 @@ def apply(log, findAdditionalConditions=True, inBetweenRels=True, **kwargs):
                     basic_dcr[rel][e].add(name)
                     basic_dcr[rel][e] = basic_dcr[rel][e].difference(me_events)
 
-    return basic_dcr, la
+    return basic_dcr
 
-def get_mutual_exclusions(dcr, i=0):
+def get_mutual_exclusions(dcr, i=0, max_elab_time=MAX_ELAB_TIME):
     """
-    Get subprocesses based on cliques. Now we naively get the largest clique.
-    TODO: Get cliques smartly by taking the cliques that jointly use the highest number of events.
-    It should be solved as a search space problem.
+    Get subprocesses based on cliques of mutually excluding events: the largest clique is taken, then the largest
+    clique among the events left, and so on, until no two events left exclude each other.
+    Every clique is found by a branch and bound search (see get_max_clique) on the bitsets of the mutually excluding
+    events, so the cliques of the graph are never enumerated. When the time budget is over, the remaining cliques
+    are built greedily.
+
     Parameters
     ----------
     dcr
+        dcr graph mined by the basic DisCoveR
     i
+        number of the last subprocess (the subprocesses are named Choice{i+1}, Choice{i+2}, ...)
+    max_elab_time
+        maximum time (in seconds) of the search of the cliques (None: no limit)
 
     Returns
     -------
-
+    dict subprocess name -> frozenset of the mutually exclusive events
     """
-
-    graph = get_mutually_excluding_graph(dcr)
-    cliques = list(frozenset(s) for s in nx.enumerate_all_cliques(graph) if len(s) > 1)
-    cliques = sorted(cliques, key=len, reverse=True)
+    events, adjacency = get_mutually_excluding_bitsets(dcr)
+    deadline = time.perf_counter() + max_elab_time if max_elab_time is not None else None
+    remaining = 0
+    for v, neighbours in enumerate(adjacency):
+        if neighbours:
+            remaining |= 1 << v
     sps = {}
-    used_cliques = {}
-    for c in cliques:
-        used_cliques[c] = False
-
-    used_events = set()
-    for clique in cliques:
-        if not used_cliques[clique]:
-            if len(clique.intersection(used_events)) == 0:
-                # any new mutually exclusive subprocess must be disjoint from all existing ones
-                i += 1
-                sps[f'Choice{i}'] = clique
-                used_cliques[clique] = True
-                used_events = used_events.union(clique)
+    while remaining:
+        clique = get_max_clique(adjacency, remaining, deadline=deadline)
+        if clique.bit_count() < 2:
+            break
+        # any new mutually exclusive subprocess must be disjoint from all existing ones
+        i += 1
+        sps[f'Choice{i}'] = frozenset(events[v] for v in iter_bits(clique))
+        remaining &= ~clique
+        for v in iter_bits(remaining):
+            if not adjacency[v] & remaining:
+                remaining &= ~(1 << v)
     return sps
 
 
+def get_mutually_excluding_bitsets(dcr):
+    """
+    Mutually excluding events of a graph (events excluding themselves and each other), in one pass over the
+    exclusions
+
+    Returns
+    -------
+    the sorted self-excluding events, and for every one of them the bitset of the events it mutually excludes
+    (bit j for the j-th event)
+    """
+    excludes = dcr.get(Relations.E.value, {})
+    events = sorted(e for e in dcr['events'] if e in excludes.get(e, ()))
+    index = {e: v for v, e in enumerate(events)}
+    excluded = [0] * len(events)
+    for v, e in enumerate(events):
+        for e_prime in excludes[e]:
+            w = index.get(e_prime)
+            if w is not None and w != v:
+                excluded[v] |= 1 << w
+    adjacency = [0] * len(events)
+    for v in range(len(events)):
+        for w in iter_bits(excluded[v]):
+            if (excluded[w] >> v) & 1:
+                adjacency[v] |= 1 << w
+    return events, adjacency
+
+
+def get_greedy_clique(adjacency, candidates):
+    """
+    Clique among the candidates (bitset) built adding every time the candidate with most neighbours among the
+    candidates left
+    """
+    clique = 0
+    while candidates:
+        v = max(iter_bits(candidates), key=lambda w: (adjacency[w] & candidates).bit_count())
+        clique |= 1 << v
+        candidates &= adjacency[v]
+    return clique
+
+
+def color_sort(adjacency, candidates):
+    """
+    Greedy coloring of the candidates (bitset): the candidates in the order of their colors, and the colors
+    (a clique among the first k candidates has at most colors[k - 1] events)
+    """
+    order = []
+    colors = []
+    color = 0
+    uncolored = candidates
+    while uncolored:
+        color += 1
+        available = uncolored
+        while available:
+            v = (available & -available).bit_length() - 1
+            uncolored &= ~(1 << v)
+            available &= ~(1 << v) & ~adjacency[v]
+            order.append(v)
+            colors.append(color)
+    return order, colors
+
+
+def get_max_clique(adjacency, candidates, deadline=None):
+    """
+    Largest clique among the candidates (bitset), found by a branch and bound search bounded by greedy colorings
+    (MCQ, Tomita and Seki). If the deadline (time.perf_counter) is reached, the largest clique found so far is
+    returned (at least a greedy clique)
+    """
+    best = get_greedy_clique(adjacency, candidates)
+    best_size = best.bit_count()
+    if deadline is not None and time.perf_counter() > deadline:
+        return best
+    # (clique, its size, candidates extending it, their order and colors, position of the next candidate to expand)
+    order, colors = color_sort(adjacency, candidates)
+    stack = [(0, 0, candidates, order, colors, len(order))]
+    while stack:
+        clique, size, candidates, order, colors, pos = stack.pop()
+        # the candidates are expanded from the last colored one
+        if pos == 0 or size + colors[pos - 1] <= best_size:
+            continue
+        if deadline is not None and time.perf_counter() > deadline:
+            break
+        v = order[pos - 1]
+        stack.append((clique, size, candidates & ~(1 << v), order, colors, pos - 1))
+        new_clique = clique | (1 << v)
+        new_candidates = candidates & adjacency[v]
+        if new_candidates:
+            new_order, new_colors = color_sort(adjacency, new_candidates)
+            stack.append((new_clique, size + 1, new_candidates, new_order, new_colors, len(new_order)))
+        elif size + 1 > best_size:
+            best, best_size = new_clique, size + 1
+    return best
+
+
 def get_mutually_excluding_graph(dcr):
-    rel_matrices = {}
-    for rel in ['excludesTo']:
-        ind = pd.Index(sorted(dcr['events']), dtype=str)
-        rel_matrix = pd.DataFrame(0, columns=ind, index=ind, dtype=int)
-        for e in dcr['events']:
-            for e_prime in dcr['events']:
-                if e in dcr[rel] and e_prime in dcr[rel][e]:
-                    rel_matrix.at[e, e_prime] = 1
-        rel_matrices[rel] = rel_matrix
-
-    self_excluding = set()
-    for e in dcr['events']:
-        if rel_matrices['excludesTo'].at[e, e] == 1:
-            self_excluding.add(e)
+    events, adjacency = get_mutually_excluding_bitsets(dcr)
     mutually_excluding = []
-    for e in self_excluding:
-        for e_prime in self_excluding:
-            if e != e_prime and \
-                    rel_matrices['excludesTo'].at[e, e_prime] == 1 and \
-                    rel_matrices['excludesTo'].at[e_prime, e] == 1:
-                if (e, e_prime) not in mutually_excluding and (e_prime, e) not in mutually_excluding:
-                    mutually_excluding.append((e, e_prime))
-
+    for v, neighbours in enumerate(adjacency):
+        for w in iter_bits(neighbours):
+            if v < w:
+                mutually_excluding.append((events[v], events[w]))
     return nx.from_edgelist(mutually_excluding)
 
 
@@ -1,11 +1,11 @@
 from pm4py.objects.dcr.obj import Relations, dcr_template
 from pm4py.algo.discovery.dcr_discover.variants import dcr_discover as alg
+from pm4py.objects.dcr.compiled_semantics import iter_bits
 
 from copy import deepcopy
 
 def apply(log, findAdditionalConditions=True, **kwargs):
-    event_log = deepcopy(log)
-    basic_dcr, la = alg.apply(event_log, findAdditionalConditions=findAdditionalConditions)
+    basic_dcr, la = alg.apply(log, findAdditionalConditions=findAdditionalConditions)
     # nesting = Nesting()
     # nesting.create_encoding(basic_dcr)
     # nesting.nest(basic_dcr['events'])
@@ -21,6 +21,22 @@ def apply_nesting(basic_dcr):
     nested_dcr = nesting.get_nested_dcr_graph()
     return nested_dcr
 
+
+def apply_nesting_on_mutual_exclusions(me_dcr):
+    '''
+    Nests the graph mined by ME-DisCoveR, keeping the mutual exclusion nestings (NME-DisCoveR)
+    '''
+    nst = Nesting()
+    nst.create_encoding(me_dcr)
+    all_mes = set()
+    all_me_events = set()
+    for me, me_event in me_dcr['nestings'].items():
+        nst.nest(me_event)
+        all_mes.add(me)
+        all_me_events = all_me_events.union(me_event)
+    nst.nest(me_dcr['events'].union(all_mes).difference(all_me_events))
+    return nst.get_nested_dcr_graph(me_dcr['nestings'])
+
 # def apply(basic_dcr):
 #     nesting = Nesting()
 #     nesting.create_encoding(basic_dcr)
@@ -33,19 +49,20 @@ def encode(G):
     enc = {}
     for e in G['events']:
         enc[e] = set()
-    for e in G['events']:
-        for e_prime in G['events']:
-            for rel in Relations:
-                if e in G[rel.value] and e_prime in G[rel.value][e]:
-                    if rel in [Relations.C, Relations.M]:
-                        enc[e].add((e_prime, rel.value, 'in'))
-                    else:
-                        enc[e].add((e_prime, rel.value, 'out'))
-                if e_prime in G[rel.value] and e in G[rel.value][e_prime]:
-                    if rel in [Relations.C, Relations.M]:
-                        enc[e].add((e_prime, rel.value, 'out'))
-                    else:
-                        enc[e].add((e_prime, rel.value, 'in'))
+    # every arc e -> e_prime is encoded on both its ends
+    for rel in Relations:
+        for e, targets in G[rel.value].items():
+            if e not in enc:
+                continue
+            for e_prime in targets:
+                if e_prime not in enc:
+                    continue
+                if rel in [Relations.C, Relations.M]:
+                    enc[e].add((e_prime, rel.value, 'in'))
+                    enc[e_prime].add((e, rel.value, 'out'))
+                else:
+                    enc[e].add((e_prime, rel.value, 'out'))
+                    enc[e_prime].add((e, rel.value, 'in'))
     return enc
 
 
@@ -70,67 +87,121 @@ class Nesting(object):
         self.in_rec_step = 0
         self.out_rec_step = 0
         self.debug = False
+        # bitset view of the encoding: events and relation triples are interned to integers,
+        # enc_bits[e] has the bits of the triples of e, index[t] (inverted index) the bits of the events having t
+        self.event_ids = {}
+        self.events = []
+        self.triple_ids = {}
+        self.triples = []
+        self.enc_bits = {}
+        self.index = []
 
     def create_encoding(self, dcr_graph):
         self.enc = encode(dcr_graph)
+        self.event_ids = {}
+        self.events = []
+        self.triple_ids = {}
+        self.triples = []
+        self.enc_bits = {}
+        self.index = []
+        for e in sorted(self.enc, key=str):
+            self.__intern_event(e)
+        for e, triples in self.enc.items():
+            for t in triples:
+                self.__index_add(e, t)
+
+    def __intern_event(self, e):
+        if e not in self.event_ids:
+            self.event_ids[e] = len(self.events)
+            self.events.append(e)
+            self.enc_bits[e] = 0
+
+    def __index_add(self, e, t):
+        if t not in self.triple_ids:
+            self.triple_ids[t] = len(self.triples)
+            self.triples.append(t)
+            self.index.append(0)
+        tid = self.triple_ids[t]
+        self.enc_bits[e] |= 1 << tid
+        self.index[tid] |= 1 << self.event_ids[e]
+
+    def __index_remove(self, e, t):
+        if t in self.triple_ids:
+            tid = self.triple_ids[t]
+            self.enc_bits[e] &= ~(1 << tid)
+            self.index[tid] &= ~(1 << self.event_ids[e])
 
     def find_largest_nesting(self, events_source, parent_nesting=None):
         cands = {}
-        events = deepcopy(events_source)
+        events = set(events_source)
+        events_mask = 0
         for e in events:
-            for j in events:
-                arrow_s = frozenset(self.enc[e].intersection(self.enc[j]))
-                if len(arrow_s) > 0:
-                    if not arrow_s in cands:
-                      cands[arrow_s] = set([])
-                    cands[arrow_s] = cands[arrow_s].union(set([e, j]))
-
-        #for arrow_s in cands.keys():
-        #    for e in events:
-        #        if len(arrow_s) > 0 and arrow_s.issubset(self.enc[e]):
-        #            cands[arrow_s].add(e)
+            events_mask |= 1 << self.event_ids[e]
+        # only the pairs of events sharing at least a relation triple are visited (found with the inverted index),
+        # the shared triples of a pair are the AND of their bitsets, which is also the key of the candidate
+        for i in iter_bits(events_mask):
+            e = self.events[i]
+            e_bits = self.enc_bits[e]
+            partners = 0
+            for t in iter_bits(e_bits):
+                partners |= self.index[t]
+            for j in iter_bits(partners & events_mask):
+                arrow_s = e_bits & self.enc_bits[self.events[j]]
+                if not arrow_s in cands:
+                    cands[arrow_s] = set([])
+                cands[arrow_s].add(e)
+                cands[arrow_s].add(self.events[j])
 
         best_score = 0
-        best = None
+        best_bits = None
         for arrow_s in cands.keys():
-            cand_score = (len(cands[arrow_s]) - 1) * len(arrow_s)
+            cand_score = (len(cands[arrow_s]) - 1) * bin(arrow_s).count('1')
             if cand_score > best_score:
                 best_score = cand_score
-                best = arrow_s
+                best_bits = arrow_s
+        best = frozenset(self.triples[t] for t in iter_bits(best_bits)) if best_bits else None
 
-        if best and len(cands[best]) > 1 and len(best) >= 1:
+        if best and len(cands[best_bits]) > 1 and len(best) >= 1:
+            nested = cands[best_bits]
             if self.debug:
                 print(f'[out]:{self.out_rec_step} [in]:{self.in_rec_step} \n'
                       f'     [events] {events} \n'
-                      f'[cands[best]] {cands[best]} \n'  # these are the events inside the nesting
+                      f'[cands[best]] {nested} \n'  # these are the events inside the nesting
                       f'       [best] {best} \n'
-                      f'        [enc] {self.enc} \n '
-                      f'      [cands] {cands} \n')
+                      f'        [enc] {self.enc} \n ')
 
             self.nest_id += 1
             nest_event = f'Group{self.nest_id}'
             self.nesting_ids.add(nest_event)
             self.enc[nest_event] = set(best)
+            self.__intern_event(nest_event)
+            for t in best:
+                self.__index_add(nest_event, t)
 
             if parent_nesting:
-                parent_nesting['events'] = parent_nesting['events'].difference(cands[best])
+                parent_nesting['events'] = parent_nesting['events'].difference(nested)
                 parent_nesting['events'].add(nest_event)
                 self.nesting_map[nest_event] = parent_nesting['id']
 
-
-            for e in cands[best]:
+            # incremental update of the encoding and of the index: only the nested events
+            # and the events on the other side of the shared relations change
+            for e in nested:
                 self.nesting_map[e] = nest_event
                 self.enc[e] = self.enc[e].difference(best)
+                for t in best:
+                    self.__index_remove(e, t)
                 for (e_prime, rel, direction) in best:
                     op_rel_del, op_rel_add = get_opposite_rel_dict_str(rel, direction, e, nest_event)
                     # TODO: find out why sometimes it tries to remove non-existing encodings
                     self.enc[e_prime].discard(op_rel_del)  # .remove(op_rel_del)
                     self.enc[e_prime].add(op_rel_add)
+                    self.__index_remove(e_prime, op_rel_del)
+                    self.__index_add(e_prime, op_rel_add)
 
-            retval = [{'nestingEvents': cands[best], 'sharedRels': best}]
+            retval = [{'nestingEvents': nested, 'sharedRels': best}]
             found = True
             while found:
-                temp_retval = self.find_largest_nesting(events_source=cands[best], parent_nesting={'id': f'Group{self.nest_id}', 'events': cands[best]})
+                temp_retval = self.find_largest_nesting(events_source=nested, parent_nesting={'id': f'Group{self.nest_id}', 'events': nested})
                 if temp_retval and len(temp_retval) > 0:
                     retval.extend(temp_retval)
                     for tmp in temp_retval:
@@ -142,7 +213,7 @@ class Nesting(object):
 
     def nest(self, events_source):
         nestings_arr = [{'nestingEvents': set(), 'sharedRels': set()}]
-        events = deepcopy(events_source)
+        events = set(events_source)
 
         while True:
             temp_retval = self.find_largest_nesting(events)
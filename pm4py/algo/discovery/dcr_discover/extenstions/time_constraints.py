@@ -1,7 +1,6 @@
 import pm4py
 import numpy as np
 import pandas as pd
-from copy import deepcopy
 from enum import Enum
 
 
@@ -15,189 +14,238 @@ class AggregationMethod(Enum):
 def apply(dcr_model, event_log, method=AggregationMethod.STANDARD, sp_log=None):
     #TODO: add a parameter for the time according to the desired output.
     # Make sure it's in the ISO format in the DCR (then no need to worry in the export function about it)
-    timings = get_timing_values(dcr_model, event_log, sp_log)
-    result_dict = {}
+    if isinstance(method, str):
+        method = AggregationMethod(method)
     if method == AggregationMethod.NONE:
-        return timings
-    else:
-        for k, v in timings.items():
-            if method == AggregationMethod.MEAN:
-                result_dict[k] = np.mean(v)
-            elif method == AggregationMethod.MEDIAN:
-                result_dict[k] = np.median(v)
-            elif len(v) > 0:
-                if k[0] == 'RESPONSE':
-                    # MAX Deadline
-                    result_dict[k] = np.max(v)
-                elif k[0] == 'CONDITION':
-                    # MIN Delay
-                    result_dict[k] = np.min(v)
+        return get_timing_values(dcr_model, event_log, sp_log)
+    timings = get_timing_arrays(dcr_model, event_log, sp_log)
+    result_dict = {}
+    for k, v in timings.items():
+        if method == AggregationMethod.MEAN:
+            result_dict[k] = aggregate_mean(v)
+        elif method == AggregationMethod.MEDIAN:
+            result_dict[k] = aggregate_median(v)
+        elif len(v) > 0:
+            if k[0] == 'RESPONSE':
+                # MAX Deadline
+                result_dict[k] = pd.Timedelta(int(v.max()))
+            elif k[0] == 'CONDITION':
+                # MIN Delay
+                result_dict[k] = pd.Timedelta(int(v.min()))
     return result_dict
 
+
+def aggregate_mean(v):
+    if len(v) == 0:
+        return np.mean(v)
+    # exact sum on python integers, truncated like the mean of the timedeltas
+    return pd.Timedelta(sum(v.tolist()) // len(v))
+
+
+def aggregate_median(v):
+    if len(v) == 0:
+        return np.median(v)
+    v = np.sort(v)
+    mid = len(v) // 2
+    if len(v) % 2 == 1:
+        return pd.Timedelta(int(v[mid]))
+    return pd.Timedelta((int(v[mid - 1]) + int(v[mid])) // 2)
+
+
+def to_timedeltas(v):
+    return list(pd.to_timedelta(v, unit='ns'))
+
+
+class TimingIndex(object):
+    """
+    Timestamps of an event log, sorted by case and time and encoded as integers (nanoseconds),
+    from which the time between the events of any pair of activities is extracted with numpy,
+    without filtering and grouping the dataframe for every pair.
+    """
+
+    def __init__(self, event_log):
+        if not isinstance(event_log, pd.DataFrame):
+            event_log = pm4py.convert_to_dataframe(event_log)
+        # cases are numbered in sorted order, the order in which the deltas of the cases are reported
+        self.case_codes, _ = pd.factorize(event_log['case:concept:name'], sort=True)
+        activity_codes, activities = pd.factorize(event_log['concept:name'])
+        self.activity_ids = {a: i for i, a in enumerate(activities)}
+        self.activity_codes = activity_codes
+        self.timestamps = pd.to_datetime(event_log['time:timestamp'], utc=True).values.astype(np.int64)
+        # events sorted by case, then by time (stable, ties keep the order of the log)
+        self.order = np.lexsort((self.timestamps, self.case_codes))
+        self.sorted_cases = self.case_codes[self.order]
+        self.sorted_timestamps = self.timestamps[self.order]
+        self.sorted_activities = activity_codes[self.order]
+        self.positions = {}
+        self.first_times = {}
+        self.last_times = {}
+
+    def __contains__(self, activity):
+        return activity in self.activity_ids
+
+    def get_positions(self, activity):
+        # positions of the activity in the sorted events
+        a = self.activity_ids[activity]
+        if a not in self.positions:
+            self.positions[a] = np.flatnonzero(self.sorted_activities == a)
+        return self.positions[a]
+
+    def get_first_times(self, activity):
+        # cases of the activity, with the time of its first occurrence in the order of the log
+        a = self.activity_ids[activity]
+        if a not in self.first_times:
+            rows = np.flatnonzero(self.activity_codes == a)
+            cases, first = np.unique(self.case_codes[rows], return_index=True)
+            self.first_times[a] = (cases, self.timestamps[rows[first]])
+        return self.first_times[a]
+
+    def get_last_times(self, activity):
+        # cases of the activity, with the time of its latest occurrence
+        a = self.activity_ids[activity]
+        if a not in self.last_times:
+            pos = self.get_positions(activity)
+            cases = self.sorted_cases[pos]
+            last = np.flatnonzero(np.append(cases[1:] != cases[:-1], True))
+            self.last_times[a] = (cases[last], self.sorted_timestamps[pos[last]])
+        return self.last_times[a]
+
+    def get_cases_with_pair(self, e1, e2):
+        """
+        Cases in which e2 happens after the first occurrence of e1
+        """
+        cases1, first1 = self.get_first_times(e1)
+        cases2, last2 = self.get_last_times(e2)
+        idx = np.searchsorted(cases2, cases1)
+        found = idx < len(cases2)
+        idx[~found] = 0
+        found &= cases2[idx] == cases1
+        found &= last2[idx] > first1
+        return cases1[found]
+
+    def get_deltas(self, e1, e2, rule=None):
+        """
+        Time between e1 and the following e2, for every occurrence of e1 directly followed by e2 when considering
+        only the events of the pair, in the cases returned by get_cases_with_pair.
+        For RESPONSE rules, the time between consecutive occurrences of e1 is also included.
+
+        Returns
+        --------------
+        deltas
+            Numpy array of the deltas in nanoseconds, ordered by case
+        """
+        cases = self.get_cases_with_pair(e1, e2)
+        if len(cases) == 0:
+            return np.zeros(0, dtype=np.int64)
+        pos1 = self.get_positions(e1)
+        pos1 = pos1[np.isin(self.sorted_cases[pos1], cases)]
+        if len(pos1) == 0:
+            return np.zeros(0, dtype=np.int64)
+        case1 = self.sorted_cases[pos1]
+        # next occurrence of e1 in the same case
+        next1 = np.append(pos1[1:], -1)
+        next1[:-1][case1[1:] != case1[:-1]] = -1
+        if e1 == e2:
+            next2 = next1
+        else:
+            pos2 = self.get_positions(e2)
+            idx = np.searchsorted(pos2, pos1)
+            next2 = np.full(len(pos1), -1, dtype=np.int64)
+            found = idx < len(pos2)
+            next2[found] = pos2[idx[found]]
+            next2[found & (self.sorted_cases[next2] != case1)] = -1
+        # e1 -> e2 when e2 comes before the next e1 (or is the next e1, when e1 == e2)
+        follows = (next2 >= 0) & ((next1 < 0) | (next2 <= next1))
+        deltas = [self.sorted_timestamps[next2[follows]] - self.sorted_timestamps[pos1[follows]]]
+        groups = [case1[follows]]
+        kinds = [np.ones(np.count_nonzero(follows), dtype=np.int64)]
+        starts = [pos1[follows]]
+        if rule == 'RESPONSE':
+            # e1 -> e1 when the next e1 comes before the next e2
+            repeats = (next1 >= 0) & ((next2 < 0) | (next1 <= next2))
+            deltas.insert(0, self.sorted_timestamps[next1[repeats]] - self.sorted_timestamps[pos1[repeats]])
+            groups.insert(0, case1[repeats])
+            kinds.insert(0, np.zeros(np.count_nonzero(repeats), dtype=np.int64))
+            starts.insert(0, pos1[repeats])
+        deltas = np.concatenate(deltas)
+        # per case: the repetitions of e1 first, then e1 -> e2, each in order of time
+        sort = np.lexsort((np.concatenate(starts), np.concatenate(kinds), np.concatenate(groups)))
+        return deltas[sort]
+
+
 def get_all_timings(event_log):
-    if isinstance(event_log, pd.DataFrame):
-        event_log = event_log
-    else:
-        event_log = pm4py.convert_to_dataframe(event_log)
-    el_events = sorted(event_log['concept:name'].unique())
+    index = TimingIndex(event_log)
+    el_events = sorted(index.activity_ids)
     event_pairs = set()
     for i, e1 in enumerate(el_events):
-        # TODO: this would be more efficient if you manipulate indexes like in c
         for j, e2 in enumerate(el_events):
             if i < j:
                 event_pairs.add((e1, e2))
-    # TODO: you can run this in multiple threads (that is why you precompute the event pairs)
     res = {}
     for event_pair in event_pairs:
-        filtered_df = get_log_with_pair(event_log, event_pair[0], event_pair[1])
-        data = get_delta_between_events(filtered_df, event_pair)
-        res[event_pair] = data
+        res[event_pair] = to_timedeltas(index.get_deltas(event_pair[0], event_pair[1]))
 
     return res
 
-def get_timing_values(dcr_model, event_log, sp_log):
+
+def get_timing_input(dcr_model):
     timing_input_dict = {}
     timing_input_dict['RESPONSE'] = set()
     timing_input_dict['CONDITION'] = set()
     for e1 in dcr_model['events']:
-        for e2 in dcr_model['events']:
-            if e1 in dcr_model['responseTo'] and e2 in dcr_model['responseTo'][e1]:
+        for e2 in dcr_model['responseTo'].get(e1, set()):
+            if e2 in dcr_model['events']:
                 timing_input_dict['RESPONSE'].add((e1, e2))
-            if e1 in dcr_model['conditionsFor'] and e2 in dcr_model['conditionsFor'][e1]:
+        for e2 in dcr_model['conditionsFor'].get(e1, set()):
+            if e2 in dcr_model['events']:
                 timing_input_dict['CONDITION'].add((e2, e1))
-    if sp_log:
-        return get_timings_subprocess(timing_input_dict, event_log, sp_log, dcr_model['subprocesses'].keys())
-    else:
-        return get_timings(timing_input_dict, event_log)
-
-
-def get_delta_between_events(filtered_df, event_pair, rule=None):
-    e1 = event_pair[0]
-    e2 = event_pair[1]
-    filtered_df = filtered_df[['case:concept:name', 'concept:name', 'time:timestamp']]
-    filtered_df = filtered_df[filtered_df['concept:name'].isin(event_pair)]
-    filtered_df['time:timestamp'] = pd.to_datetime(filtered_df['time:timestamp'], utc=True)
-    deltas = []
-    for idx, g in filtered_df[filtered_df['concept:name'].isin([e1, e2])].groupby('case:concept:name'):
-        g = g.sort_values(by='time:timestamp').reset_index(drop=True)
-        g['time:timestamp:to'] = g['time:timestamp'].shift(-1)
-        g['concept:name:to'] = g['concept:name'].shift(-1)
-        temp_df = deepcopy(g)
-        if rule == 'RESPONSE':
-            g_e1 = deepcopy(g[g['concept:name'] == e1])
-            if len(g_e1) > 1:
-                g_e1 = g_e1.reset_index(drop=False)
-                g_e1['index_below'] = g_e1['index'].shift(-1)
-                g_e1 = g_e1[((g_e1['index_below'] - g_e1['index']) == 1)]
-                g_e1['delta'] = g_e1['time:timestamp:to'] - g_e1['time:timestamp']
-                deltas.extend(g_e1['delta'])
-            temp_df = temp_df[
-                (temp_df['concept:name'] == event_pair[0]) & (temp_df['concept:name:to'] == event_pair[1])]
-            temp_df['delta'] = temp_df['time:timestamp:to'] - temp_df['time:timestamp']
-            deltas.extend(temp_df['delta'])
-        elif rule == 'CONDITION':
-            temp_df = temp_df[
-                (temp_df['concept:name'] == event_pair[0]) & (temp_df['concept:name:to'] == event_pair[1])]
-            temp_df['delta'] = temp_df['time:timestamp:to'] - temp_df['time:timestamp']
-            deltas.extend(temp_df['delta'])
-        else:
-            temp_df = temp_df[
-                (temp_df['concept:name'] == event_pair[0]) & (temp_df['concept:name:to'] == event_pair[1])]
-            temp_df['delta'] = temp_df['time:timestamp:to'] - temp_df['time:timestamp']
-            deltas.extend(temp_df['delta'])
-
-    return deltas
-
-
-def get_log_with_pair(event_log, e1, e2):
-    first_e1 = event_log[event_log['concept:name'] == e1].groupby('case:concept:name')[
-        ['case:concept:name', 'time:timestamp']].first().reset_index(drop=True)
-    subset_is_in = first_e1.merge(event_log, on='case:concept:name', how='inner', suffixes=('_e1', ''))
-    cids = subset_is_in[
-        ((subset_is_in['time:timestamp_e1'] < subset_is_in['time:timestamp']) & (subset_is_in['concept:name'] == e2))][
-        'case:concept:name'].unique()
-    return event_log[event_log['case:concept:name'].isin(cids)].copy(deep=True)
-
-def get_timings(timing_input_dict, log):
-    if isinstance(log, pd.DataFrame):
-        event_log = log
-    else:
-        event_log = pm4py.convert_to_dataframe(log)
-    res = {}
-    el_events = event_log['concept:name'].unique()
-    for rule, event_pairs in timing_input_dict.items():
-        for event_pair in event_pairs:
-            if event_pair[0] in el_events and event_pair[1] in el_events:
-                filtered_df = get_log_with_pair(event_log, event_pair[0], event_pair[1])
-                data = get_delta_between_events(filtered_df, event_pair, rule)
-                res[(rule, event_pair[0], event_pair[1])] = data
+    return timing_input_dict
 
-    return res
-def get_timings_subprocess(timing_input_dict, log, sp_log,sps):
-    if isinstance(log, pd.DataFrame):
-        event_log = log
-    else:
-        event_log = pm4py.convert_to_dataframe(log)
-    # el_events = event_log['concept:name'].unique()
 
-    if isinstance(sp_log, pd.DataFrame):
-        sp_event_log = sp_log
+def get_timing_arrays(dcr_model, event_log, sp_log):
+    """
+    Same as get_timing_values, with the deltas as numpy arrays of nanoseconds
+    """
+    timing_input_dict = get_timing_input(dcr_model)
+    if sp_log is not None:
+        return get_timings_subprocess(timing_input_dict, event_log, sp_log, dcr_model['subprocesses'].keys(),
+                                      as_arrays=True)
     else:
-        sp_event_log = pm4py.convert_to_dataframe(sp_log)
-    # sp_el_events = sp_event_log['concept:name'].unique()
+        return get_timings(timing_input_dict, event_log, as_arrays=True)
+
+
+def get_timing_values(dcr_model, event_log, sp_log):
+    """
+    Time between the events of the pairs of activities in a response or condition relation of the model. The events
+    of a case are sorted by time, the events having the same timestamp keeping the order of the log
+    """
+    return {k: to_timedeltas(v) for k, v in get_timing_arrays(dcr_model, event_log, sp_log).items()}
+
 
+def get_timings(timing_input_dict, log, as_arrays=False):
+    index = TimingIndex(log)
     res = {}
     for rule, event_pairs in timing_input_dict.items():
-        # print(rule)
         for event_pair in event_pairs:
-            if event_pair[0] in sps or event_pair[1] in sps:
-                filtered_df = get_log_with_pair(sp_event_log, event_pair[0], event_pair[1])
-                data = get_delta_between_events(filtered_df, event_pair, rule)
-                # print(event_pair)
-                res[(rule, event_pair[0], event_pair[1])] = data
-            else:
-                filtered_df = get_log_with_pair(event_log, event_pair[0], event_pair[1])
-                data = get_delta_between_events(filtered_df, event_pair, rule)
-                # print(event_pair)
-                res[(rule, event_pair[0], event_pair[1])] = data
+            if event_pair[0] in index and event_pair[1] in index:
+                data = index.get_deltas(event_pair[0], event_pair[1], rule)
+                res[(rule, event_pair[0], event_pair[1])] = data if as_arrays else to_timedeltas(data)
 
     return res
 
 
-def get_timings_subprocess_old(timing_input_dict, log, sp_log):
-    if isinstance(log, pd.DataFrame):
-        event_log = log
-    else:
-        event_log = pm4py.convert_to_dataframe(log)
-    el_events = event_log['concept:name'].unique()
-
-    if isinstance(sp_log, pd.DataFrame):
-        sp_event_log = sp_log
-    else:
-        sp_event_log = pm4py.convert_to_dataframe(sp_log)
-    sp_el_events = sp_event_log['concept:name'].unique()
+def get_timings_subprocess(timing_input_dict, log, sp_log, sps, as_arrays=False):
+    index = TimingIndex(log)
+    sp_index = TimingIndex(sp_log)
 
     res = {}
     for rule, event_pairs in timing_input_dict.items():
-        print(rule)
         for event_pair in event_pairs:
-            if event_pair[0] in el_events and event_pair[1] in el_events:
-                filtered_df = get_log_with_pair(event_log, event_pair[0], event_pair[1])
-                data = get_delta_between_events(filtered_df, event_pair, rule)
-                print(event_pair)
-                res[(rule, event_pair[0], event_pair[1])] = data
-            elif event_pair[0] in sp_el_events and event_pair[1] in sp_el_events:
-                filtered_df = get_log_with_pair(sp_event_log, event_pair[0], event_pair[1])
-                data = get_delta_between_events(filtered_df, event_pair, rule)
-                print(event_pair)
-                res[(rule, event_pair[0], event_pair[1])] = data
-            # elif len(event_pair) >= 2: # in here the in between events end up
-            #     print(f'[inbetween] {event_pair}')
-            #     filtered_df = get_log_with_pair(event_log, event_pair[0], event_pair[1])
-            #     data = get_delta_between_events(filtered_df, event_pair, rule)
-            #     print(event_pair)
-            #     res[(rule, event_pair[0], event_pair[1])] = data
+            pair_index = sp_index if event_pair[0] in sps or event_pair[1] in sps else index
+            if event_pair[0] in pair_index and event_pair[1] in pair_index:
+                data = pair_index.get_deltas(event_pair[0], event_pair[1], rule)
             else:
-                print(f'[fuked_sp] {event_pair}')
+                data = np.zeros(0, dtype=np.int64)
+            res[(rule, event_pair[0], event_pair[1])] = data if as_arrays else to_timedeltas(data)
 
-    return res
\ No newline at end of file
+    return res
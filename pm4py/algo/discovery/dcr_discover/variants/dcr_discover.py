@@ -1,6 +1,14 @@
+from collections import Counter
 from copy import deepcopy
-from pm4py import get_event_attribute_values
+
+import numpy as np
+import pandas as pd
+
 from pm4py.objects.dcr.obj import dcr_template
+from pm4py.util import xes_constants, constants
+
+# maximum number of (activity, activity) pairs materialized at once by the log abstraction
+MAX_PAIRS_PER_CHUNK = 1 << 22
 
 
 def apply(log, findAdditionalConditions=True, **kwargs):
@@ -8,6 +16,97 @@ def apply(log, findAdditionalConditions=True, **kwargs):
     return disc.mine(log, findAdditionalConditions, **kwargs)
 
 
+def get_variants(log, activity_key=xes_constants.DEFAULT_NAME_KEY, case_id_key=constants.CASE_CONCEPT_NAME):
+    '''
+    Builds the variant table (activity tuple -> number of cases) used by DisCoveR
+    :param log: pandas dataframe, EventLog or a variant table (returned as it is)
+    :param activity_key: the attribute to be used as activity
+    :param case_id_key: the attribute to be used as case identifier (dataframes only)
+    :return: dict variant (tuple of activities) -> number of cases
+    '''
+    if isinstance(log, dict):
+        # pm4py.get_variants on event logs gives the list of the traces of the variant instead of the count
+        return {tuple(v): (len(c) if isinstance(c, (list, tuple)) else int(c)) for v, c in log.items()}
+    if isinstance(log, pd.DataFrame):
+        activities, encoded = encode_dataframe_variants(log, activity_key, case_id_key)
+        return {tuple(activities[a] for a in v): c for v, c in encoded.items()}
+    return dict(Counter(tuple(event[activity_key] for event in trace) for trace in log))
+
+
+def encode_dataframe_variants(df, activity_key=xes_constants.DEFAULT_NAME_KEY, case_id_key=constants.CASE_CONCEPT_NAME):
+    '''
+    Integer-encodes the activities of a dataframe and groups the events by case (in the order of the rows)
+    :return: list of the activities (position = code), dict encoded variant -> number of cases
+    '''
+    act_codes, activities = pd.factorize(df[activity_key])
+    case_codes, _ = pd.factorize(df[case_id_key])
+    valid = (act_codes >= 0) & (case_codes >= 0)
+    if not valid.all():
+        act_codes = act_codes[valid]
+        case_codes = case_codes[valid]
+    activities = list(activities)
+    if len(act_codes) == 0:
+        return activities, {}
+    order = np.argsort(case_codes, kind='stable')
+    acts = act_codes[order]
+    cases = case_codes[order]
+    del order
+    bounds = np.flatnonzero(cases[1:] != cases[:-1]) + 1
+    return activities, Counter(tuple(trace.tolist()) for trace in np.split(acts, bounds))
+
+
+def strongly_connected_components(succ):
+    '''
+    Tarjan's algorithm (iterative)
+    :param succ: list, for every node, of the list of its successors
+    :return: list of the strongly connected components (lists of nodes), in reverse topological order
+    '''
+    index = [-1] * len(succ)
+    low = [0] * len(succ)
+    on_stack = [False] * len(succ)
+    stack = []
+    components = []
+    counter = 0
+    for root in range(len(succ)):
+        if index[root] != -1:
+            continue
+        work = [(root, iter(succ[root]))]
+        index[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack[root] = True
+        while work:
+            v, children = work[-1]
+            pushed = False
+            for w in children:
+                if index[w] == -1:
+                    index[w] = low[w] = counter
+                    counter += 1
+                    stack.append(w)
+                    on_stack[w] = True
+                    work.append((w, iter(succ[w])))
+                    pushed = True
+                    break
+                elif on_stack[w]:
+                    low[v] = min(low[v], index[w])
+            if pushed:
+                continue
+            work.pop()
+            if work:
+                u = work[-1][0]
+                low[u] = min(low[u], low[v])
+            if low[v] == index[v]:
+                component = []
+                while True:
+                    w = stack.pop()
+                    on_stack[w] = False
+                    component.append(w)
+                    if w == v:
+                        break
+                components.append(component)
+    return components
+
+
 class Discover:
 
     def __init__(self):
@@ -20,64 +119,215 @@ class Discover:
             'precedenceFor': {},
             'predecessor': {},
             'responseTo': {},
-            'successor': {}
+            'successor': {},
+            'variants': {},
+            'frequencies': {}
         }
 
-    def mine(self, log, findAdditionalConditions=True, **kwargs):
+    def mine(self, log, findAdditionalConditions=True, activity_key=xes_constants.DEFAULT_NAME_KEY,
+             case_id_key=constants.CASE_CONCEPT_NAME, **kwargs):
         '''
         Parameters
         ----------
-        log : the event log loaded using read_xes from pm4py
+        log : the event log loaded using read_xes from pm4py (pandas dataframe or EventLog),
+            or a variant table (dict activity tuple -> number of cases)
         findAdditionalConditions : apply the last step of the algorithm? True (default) or False
+        activity_key : the attribute to be used as activity
+        case_id_key : the attribute to be used as case identifier (dataframes only)
 
         Returns
         -------
         A mined dcr graph with the 4 basic relations: condition, response, include and exclude
         '''
-        self.createLogAbstraction(log)
+        if isinstance(log, pd.DataFrame):
+            self.createLogAbstractionFromDataframe(log, activity_key=activity_key, case_id_key=case_id_key)
+        elif isinstance(log, dict):
+            self.createLogAbstractionFromVariants(log)
+        else:
+            self.createLogAbstraction(log, activity_key=activity_key)
         self.mineFromAbstraction(findAdditionalConditions=findAdditionalConditions)
         # if graph_path:
         #     self.writeGraph(graph_path)
         return self.graph, self.logAbstraction
 
-    def createLogAbstraction(self, log):
+    def createLogAbstraction(self, log, activity_key=xes_constants.DEFAULT_NAME_KEY):
         '''
         Main mining
         :param log: pm4py event log
-        :param graph_path: where to save the log
+        :param activity_key: the attribute to be used as activity
         :return: 0 for success anything else for failure
         '''
-        activities = get_event_attribute_values(log, "concept:name")
+        return self.createLogAbstractionFromVariants(get_variants(log, activity_key=activity_key))
+
+    def createLogAbstractionFromDataframe(self, df, activity_key=xes_constants.DEFAULT_NAME_KEY,
+                                          case_id_key=constants.CASE_CONCEPT_NAME):
+        '''
+        Log abstraction of a pandas dataframe: the dataframe is neither copied nor converted to an EventLog,
+        the activities are integer-encoded and the cases grouped (in the order of the rows) into variants
+        :param df: pandas dataframe
+        :param activity_key: the attribute to be used as activity
+        :param case_id_key: the attribute to be used as case identifier
+        :return: 0 for success anything else for failure
+        '''
+        activities, encoded = encode_dataframe_variants(df, activity_key, case_id_key)
+        return self.__abstract_encoded_variants(activities, list(encoded.keys()), list(encoded.values()))
+
+    def createLogAbstractionFromVariants(self, variants):
+        '''
+        Log abstraction of a variant table. DisCoveR only depends on the order of the activities inside the traces,
+        hence every variant is processed once and its frequency is only used for the frequency annotations.
+        :param variants: dict variant (tuple of activities) -> number of cases
+        :return: 0 for success anything else for failure
+        '''
+        variants = get_variants(variants)
+        activities = []
+        activity_ids = {}
+        encoded = []
+        for variant in variants:
+            for a in variant:
+                if a not in activity_ids:
+                    activity_ids[a] = len(activities)
+                    activities.append(a)
+            encoded.append(tuple(activity_ids[a] for a in variant))
+        return self.__abstract_encoded_variants(activities, encoded, list(variants.values()))
+
+    def __abstract_encoded_variants(self, activities, encoded, frequencies):
+        '''
+        Computes the same log abstraction as parseTrace (applied to every trace) with grouped numpy operations on the
+        integer-encoded variants. For every (variant, activity) pair only the first and last position are needed:
+        - x is a predecessor of e if first(x) < last(e) in some trace
+        - x is in precedenceFor[e] if first(x) < first(e) in all the traces containing e
+        - x is in responseTo[e] if last(x) > last(e) in all the traces containing e
+        Next to the abstraction, logAbstraction['frequencies'] counts, for every relation, the number of cases
+        supporting it, so that noise filtering can be applied later without reading the log again.
+        '''
+        n_act = len(activities)
+        base = max(n_act, 1)
+        lengths = np.array([len(v) for v in encoded], dtype=np.int64)
+        weights = np.array(frequencies, dtype=np.int64)
+        keep = lengths > 0
+        if not keep.all():
+            encoded = [v for v, k in zip(encoded, keep.tolist()) if k]
+            lengths = lengths[keep]
+            weights = weights[keep]
+        n_ev = int(lengths.sum())
+        acts = np.fromiter((a for v in encoded for a in v), dtype=np.int64, count=n_ev)
+        cases = np.repeat(np.arange(len(encoded), dtype=np.int64), lengths)
+        is_start = np.zeros(n_ev, dtype=bool)
+        is_start[np.cumsum(lengths) - lengths] = True
+
+        # first / last position of every (variant, activity) pair, sorted by variant
+        key = cases * base + acts
+        pair_keys, first, counts = np.unique(key, return_index=True, return_counts=True)
+        _, last_rev = np.unique(key[::-1], return_index=True)
+        last = n_ev - 1 - last_rev
+        del key, last_rev
+        pair_case = pair_keys // base
+        pair_act = pair_keys % base
+        pair_weight = weights[pair_case]
+        n_cases_with = np.bincount(pair_act, weights=pair_weight, minlength=n_act).astype(np.int64)
+
+        # atMostOnce: activities never repeated inside a trace
+        repeated = np.bincount(pair_act[counts > 1], weights=pair_weight[counts > 1],
+                               minlength=n_act).astype(np.int64)
+
+        # chainPrecedenceFor: a single activity always immediately before, never the first of a trace
+        follows = ~is_start[1:]
+        chain_keys = cases[1:][follows] * base * base + acts[1:][follows] * base + acts[:-1][follows]
+        chain_keys = np.unique(chain_keys)
+        chain_count = np.bincount(chain_keys % (base * base), weights=weights[chain_keys // (base * base)],
+                                  minlength=n_act * n_act).astype(np.int64).reshape((n_act, n_act))
+        starting = np.bincount(acts[is_start], weights=weights, minlength=n_act).astype(np.int64)
+        n_prev = (chain_count > 0).sum(axis=1)
+
+        # cross product of the activities of every variant, materialized in chunks of variants
+        predecessor_count = np.zeros(n_act * n_act, dtype=np.int64)
+        precedence_count = np.zeros(n_act * n_act, dtype=np.int64)
+        response_count = np.zeros(n_act * n_act, dtype=np.int64)
+        if len(pair_case) > 0:
+            group_start = np.flatnonzero(np.r_[True, pair_case[1:] != pair_case[:-1]])
+        else:
+            group_start = np.zeros(0, dtype=np.int64)
+        group_size = np.diff(np.r_[group_start, len(pair_case)])
+        chunk_bounds = [0]
+        chunk_pairs = 0
+        for g, size in enumerate((group_size * group_size).tolist()):
+            if chunk_pairs > 0 and chunk_pairs + size > MAX_PAIRS_PER_CHUNK:
+                chunk_bounds.append(g)
+                chunk_pairs = 0
+            chunk_pairs += size
+        chunk_bounds.append(len(group_start))
+        for g0, g1 in zip(chunk_bounds[:-1], chunk_bounds[1:]):
+            if g0 == g1:
+                continue
+            sizes = group_size[g0:g1]
+            row_size = np.repeat(sizes, sizes)
+            row_start = np.repeat(group_start[g0:g1], sizes)
+            rows = np.arange(group_start[g0], group_start[g0] + len(row_size))
+            left = np.repeat(rows, row_size)
+            offset = np.cumsum(row_size) - row_size
+            right = np.repeat(row_start, row_size) + np.arange(len(left)) - np.repeat(offset, row_size)
+            e = pair_act[left]
+            x = pair_act[right]
+            w = pair_weight[left]
+            for count, mask in [(predecessor_count, first[right] < last[left]),
+                                (precedence_count, first[right] < first[left]),
+                                (response_count, last[right] > last[left])]:
+                count += np.bincount(e[mask] * n_act + x[mask], weights=w[mask],
+                                     minlength=n_act * n_act).astype(np.int64)
+        predecessor_count = predecessor_count.reshape((n_act, n_act))
+        precedence_count = precedence_count.reshape((n_act, n_act))
+        response_count = response_count.reshape((n_act, n_act))
+        precedence = precedence_count == n_cases_with[:, None]
+        response = response_count == n_cases_with[:, None]
+        np.fill_diagonal(precedence, False)
+        np.fill_diagonal(response, False)
+
+        def to_set(row):
+            return set(activities[j] for j in np.flatnonzero(row).tolist())
+
+        def to_counts(row):
+            return {activities[j]: int(row[j]) for j in np.flatnonzero(row).tolist()}
+
         events = set(activities)
-        self.logAbstraction['events'] = events.copy()
-        self.logAbstraction['traces'] = log
-        self.logAbstraction['atMostOnce'] = events.copy()
+        event_ids = {event: i for i, event in enumerate(activities)}
+        self.logAbstraction['events'] = events
+        self.logAbstraction['atMostOnce'] = set(activities[i] for i in range(n_act) if repeated[i] == 0)
         for event in events:
-            self.logAbstraction['chainPrecedenceFor'][event] = events.copy() - set([event])
-            self.logAbstraction['precedenceFor'][event] = events.copy() - set([event])
-            self.logAbstraction['predecessor'][event] = set()
-            self.logAbstraction['responseTo'][event] = events.copy() - set([event])
-            self.logAbstraction['successor'][event] = set()
-
-        for trace in self.logAbstraction['traces']:
-            self.parseTrace(trace)
+            i = event_ids[event]
+            if n_prev[i] == 1 and starting[i] == 0 and chain_count[i, i] == 0:
+                self.logAbstraction['chainPrecedenceFor'][event] = to_set(chain_count[i])
+            else:
+                self.logAbstraction['chainPrecedenceFor'][event] = set()
+            self.logAbstraction['precedenceFor'][event] = to_set(precedence[i])
+            self.logAbstraction['predecessor'][event] = to_set(predecessor_count[i])
+            self.logAbstraction['responseTo'][event] = to_set(response[i])
+            self.logAbstraction['successor'][event] = to_set(predecessor_count[:, i])
 
-        for i in self.logAbstraction['predecessor']:
-            for j in self.logAbstraction['predecessor'][i]:
-                self.logAbstraction['successor'][j].add(i)
+        variants = {tuple(activities[a] for a in v): int(f) for v, f in zip(encoded, weights.tolist())}
+        self.logAbstraction['traces'] = [list(v) for v in variants]
+        self.logAbstraction['variants'] = variants
+        self.logAbstraction['frequencies'] = {
+            'cases': int(weights.sum()),
+            'events': {activities[i]: int(n_cases_with[i]) for i in range(n_act)},
+            'atMostOnce': {activities[i]: int(n_cases_with[i] - repeated[i]) for i in range(n_act)},
+            'chainPrecedenceFor': {activities[i]: to_counts(chain_count[i]) for i in range(n_act)},
+            'precedenceFor': {activities[i]: to_counts(precedence_count[i]) for i in range(n_act)},
+            'predecessor': {activities[i]: to_counts(predecessor_count[i]) for i in range(n_act)},
+            'responseTo': {activities[i]: to_counts(response_count[i]) for i in range(n_act)}
+        }
 
         return 0
 
     def parseTrace(self, trace):
         '''
-        :param trace: array each trace one row and then events in order
+        :param trace: list of the activities of the trace, in order
         :return: 0 if success anything else for failure
         '''
         localAtLeastOnce = set()
         localSeenOnlyBefore = {}
         lastEvent = ''
-        for event_dict in trace:
-            event = event_dict['concept:name']
+        for event in trace:
             # All events seen before this one must be predecessors
             self.logAbstraction['predecessor'][event] = self.logAbstraction['predecessor'][event].union(
                 localAtLeastOnce)
@@ -131,10 +381,55 @@ class Discover:
         return relation
 
     def optimizeRelationTransitiveReduction(self, relation):
-        # TODO: 1. Adj. List to Adj Matrix, 2. Transive reduction, 3. back to Adj. List
-        for eventA in relation:
-            for eventB in relation[eventA]:
-                print('af')
+        '''
+        Transitive reduction of a relation, computed on bitsets: the events are interned to integers and
+        the successors / reachable events of every event are stored as python ints.
+        An arc A -> C is removed if C can also be reached from A through another event.
+        Cycles are handled on the graph of the strongly connected components: the arcs inside a component are kept,
+        the arcs between components are reduced. For acyclic (transitively closed) relations, as the precedence and
+        response abstractions, the result is the same as optimizeRelation.
+        :param relation: dict event -> set of events
+        :return: the reduced relation (a new dict with the same keys)
+        '''
+        ids = {}
+        for event, targets in relation.items():
+            ids.setdefault(event, len(ids))
+            for target in targets:
+                ids.setdefault(target, len(ids))
+        succ = [[] for _ in range(len(ids))]
+        for event, targets in relation.items():
+            succ[ids[event]] = [ids[target] for target in targets]
+
+        # the components are listed in reverse topological order (a component after all the ones it reaches)
+        components = strongly_connected_components(succ)
+        comp = [0] * len(ids)
+        for c, members in enumerate(components):
+            for v in members:
+                comp[v] = c
+        # reach[c]: components reachable from c with at least one arc
+        # redundant[c]: components reachable from c with at least two arcs
+        reach = [0] * len(components)
+        redundant = [0] * len(components)
+        for c, members in enumerate(components):
+            comp_succ = 0
+            for v in members:
+                for w in succ[v]:
+                    comp_succ |= 1 << comp[w]
+            comp_succ &= ~(1 << c)
+            # components with a higher id come first in topological order and reach more: what they reach
+            # does not need to be visited again
+            while comp_succ:
+                z = comp_succ.bit_length() - 1
+                comp_succ &= ~((1 << z) | reach[z])
+                reach[c] |= (1 << z) | reach[z]
+                redundant[c] |= reach[z]
+
+        reduced = {}
+        for event, targets in relation.items():
+            c = comp[ids[event]]
+            reduced[event] = set(target for target in targets
+                                 if comp[ids[target]] == c or not (redundant[c] >> comp[ids[target]]) & 1)
+        return reduced
 
     def mineFromAbstraction(self, findAdditionalConditions: bool = True):
         '''
@@ -161,11 +456,11 @@ class Discover:
         # Mine responses from logAbstraction
         self.graph['responseTo'] = deepcopy(self.logAbstraction['responseTo'])
         # Remove redundant responses
-        self.graph['responseTo'] = self.optimizeRelation(self.graph['responseTo'])
+        self.graph['responseTo'] = self.optimizeRelationTransitiveReduction(self.graph['responseTo'])
         # Mine conditions from logAbstraction
         self.graph['conditionsFor'] = deepcopy(self.logAbstraction['precedenceFor'])
         # remove redundant conditions
-        self.graph['conditionsFor'] = self.optimizeRelation(self.graph['conditionsFor'])
+        self.graph['conditionsFor'] = self.optimizeRelationTransitiveReduction(self.graph['conditionsFor'])
 
         # For each chainprecedence(i,j) we add: include(i,j) exclude(j,j)
         for j in self.logAbstraction['chainPrecedenceFor']:
@@ -209,8 +504,7 @@ class Discover:
 
                 localSeenBefore = set()
                 included = self.logAbstraction['events'].copy()
-                for event_dict in trace:
-                    event = event_dict['concept:name']
+                for event in trace:
                     # Compute conditions that still allow event to be executed
                     excluded = self.logAbstraction['events'].difference(included)
                     validConditions = localSeenBefore.union(excluded)
@@ -227,6 +521,6 @@ class Discover:
                 self.graph['conditionsFor'][key] = self.graph['conditionsFor'][key].union(possibleConditions[key])
 
             # Removing redundant conditions
-            self.graph['conditionsFor'] = self.optimizeRelation(self.graph['conditionsFor'])
+            self.graph['conditionsFor'] = self.optimizeRelationTransitiveReduction(self.graph['conditionsFor'])
 
         return 0
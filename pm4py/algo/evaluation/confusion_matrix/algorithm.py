@@ -6,10 +6,9 @@ import os
 import pm4py
 import csv
 from math import sqrt
-from copy import deepcopy
 from pm4py.objects.log.importer.xes import importer
 from pm4py.objects.log.obj import EventLog
-from pm4py.objects.dcr import semantics as dcr_semantics
+from pm4py.objects.dcr import compiled_semantics as dcr_semantics
 
 minerPath = "./DisCoveR.jar"
 testDir = "../logs/PDC2020/TestLogs/"
@@ -21,11 +20,11 @@ exportPath = "../results/results-fuzzy-abs"
 def fitness(event_log, dcr_model, cmd_print=False):
     no_traces = len(event_log)
     no_accepting = 0
+    graph = dcr_semantics.CompiledDcrGraph(dcr_model)
     for trace in event_log:
         trace_to_print = []
         can_execute = True
-        dcr = deepcopy(dcr_model)
-        semantics = dcr_semantics.DcrSemantics(dcr, cmd_print=False)
+        semantics = dcr_semantics.CompiledDcrSemantics(graph, cmd_print=False)
         for event in trace:
             (executed, _) = semantics.execute(event['concept:name'])
             trace_to_print.append(event['concept:name'])
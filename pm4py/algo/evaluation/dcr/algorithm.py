@@ -1,7 +1,6 @@
 import os
 import time
 import pandas as pd
-import numpy as np
 import networkx as nx
 
 from math import sqrt
@@ -10,8 +9,9 @@ from pathlib import Path
 from pm4py.algo.discovery.dcr_discover.algorithm import Variants
 from pm4py.util.benchmarking import *
 from pm4py.algo.evaluation.simplicity.variants import dcr_relations as dcr_simplicity
+from pm4py.algo.evaluation.dcr import metrics as dcr_metrics
 from pm4py.algo.evaluation.confusion_matrix.algorithm import fitness
-from pm4py.objects.dcr import semantics as dcr_semantics
+from pm4py.objects.dcr import compiled_semantics as dcr_semantics
 from pm4py.objects.dcr.obj import Relations
 
 '''
@@ -52,43 +52,8 @@ def dcr_rel_relative_freq_in_comp(G, comp):
 
 
 def run_all_dcr_metrics(G):
-    metrics_dict = {}
-    size = len(G['events'])
-    for rel in Relations:
-        for k, v in G[rel.value].items():
-            size += len(v)
-    metrics_dict['size'] = size
-
-    nxG = dcr_to_networkx(G)
-    comps = [c for c in nx.weakly_connected_components(nxG)]
-
-    largest_cc = max(comps, key=len)
-    a_c = len(largest_cc)
-    c_c = 0
-    for rel in Relations:
-        for k, v in G[rel.value].items():
-            if k in largest_cc:
-                for v0 in v:
-                    if v0 in largest_cc:
-                        c_c += 1
-    metrics_dict['density'] = c_c / a_c
-
-    len_cc = nx.number_weakly_connected_components(nxG)
-    metrics_dict['separability'] = len_cc / size
-
-    cv = float('-inf')
-    for comp in comps:
-        pct, rels_in_comp, comp_c_c = dcr_rel_relative_freq_in_comp(G, comp)
-        cv_sum = 0.0
-        if comp_c_c > 0:
-            for rel in Relations:
-                cv_sum += pct[rel.value] * np.emath.logn(rels_in_comp, pct[rel.value])
-            neg_sum = - cv_sum
-            if neg_sum > cv:
-                cv = neg_sum
-    metrics_dict['constraint_variability'] = cv
-
-    return metrics_dict
+    metrics = dcr_metrics.compute_metrics(G)
+    return {k: metrics[k] for k in ['size', 'density', 'separability', 'constraint_variability']}
 
 
 def dcr_size(G):
@@ -100,25 +65,11 @@ def dcr_size(G):
 
 
 def dcr_density(G):
-    nxG = dcr_to_networkx(G)
-    largest_cc = max(nx.weakly_connected_components(nxG), key=len)
-    a_c = len(largest_cc)
-    c_c = 0
-    for rel in Relations:
-        for k, v in G[rel.value].items():
-            if k in largest_cc:
-                for v0 in v:
-                    if v0 in largest_cc:
-                        c_c += 1
-    return c_c / a_c
+    return dcr_metrics.compute_metrics(G)['density']
 
 
 def dcr_separability(G):
-    nxG = dcr_to_networkx(G)
-    len_cc = nx.number_weakly_connected_components(nxG)
-    size_g = dcr_size(G)
-
-    return len_cc / size_g
+    return dcr_metrics.compute_metrics(G)['separability']
 
 
 def dcr_co_separability(G):
@@ -126,20 +77,7 @@ def dcr_co_separability(G):
 
 
 def dcr_constraint_variablity_metric(G):
-    nxG = dcr_to_networkx(G)
-    comps = nx.weakly_connected_components(nxG)
-    cv = float('-inf')
-    for comp in comps:
-        pct, rels_in_comp, comp_c_c = dcr_rel_relative_freq_in_comp(G, comp)
-        cv_sum = 0.0
-        if comp_c_c > 0:
-            for rel in Relations:
-                if pct[rel.value] != 0 and np.log(rels_in_comp) != 0:
-                    cv_sum += pct[rel.value] * np.emath.logn(rels_in_comp, pct[rel.value])
-            neg_sum = - cv_sum
-            if neg_sum > cv:
-                cv = neg_sum
-    return cv
+    return dcr_metrics.compute_metrics(G)['constraint_variability']
 
 
 def pdcFscore(tp, fp, tn, fn):
@@ -196,27 +134,12 @@ def score_one_model(dcr_model, ground_truth_log):
     fp = 0
     tn = 0
     fn = 0
-    for trace in gt:  # the trace is without subprocesses
+    traces = [[event['concept:name'] for event in trace] for trace in gt]  # the traces are without subprocesses
+    # the model is compiled and flattened once, each trace only restores the initial marking
+    replay_results = dcr_semantics.replay_traces(dcr_model, traces)
+    for trace, replay_result in zip(gt, replay_results):
         gt_is_pos = gt_cases[trace.attributes['concept:name']]
-        dcr = deepcopy(dcr_model)
-        semantics = dcr_semantics.DcrSemantics(dcr, cmd_print=False)
-        semantics.flatten_dcr_nestings()
-        can_execute = True
-        events_so_far = []
-        for event in trace:
-            # How to project an execution in a subprocess dcr from an event log without them
-            (executed, _) = semantics.execute(event['concept:name'])  # the graph is with subprocesses
-            events_so_far.append(event['concept:name'])
-            if executed is False:
-                # if gt_is_pos:
-                # print(f"[!] Failing at: {event['concept:name']}")
-                # print(f'[Events so far] {events_so_far}')
-                can_execute = False
-                break
-        accepting = semantics.is_accepting()
-        test_is_pos = False
-        if can_execute and accepting:
-            test_is_pos = True
+        test_is_pos = replay_result['accepted']
         if test_is_pos:
             if gt_is_pos:
                 tp += 1
@@ -234,11 +157,13 @@ def score_one_model(dcr_model, ground_truth_log):
 def compare_two_models(dcr_model_1, dcr_model_2, ground_truth_log):
     gt = ground_truth_log
     gt_df = pm4py.convert_to_dataframe(ground_truth_log)
+    semantics_1 = dcr_semantics.CompiledDcrSemantics(dcr_model_1, cmd_print=False)
+    semantics_2 = dcr_semantics.CompiledDcrSemantics(dcr_model_2, cmd_print=False)
+    initial_marking_1 = semantics_1.snapshot()
+    initial_marking_2 = semantics_2.snapshot()
     for trace in gt:  # the trace is without subprocesses
-        dcr_1 = deepcopy(dcr_model_1)
-        dcr_2 = deepcopy(dcr_model_2)
-        semantics_1 = dcr_semantics.DcrSemantics(dcr_1, cmd_print=False)
-        semantics_2 = dcr_semantics.DcrSemantics(dcr_2, cmd_print=False)
+        semantics_1.restore(initial_marking_1)
+        semantics_2.restore(initial_marking_2)
         events_so_far = []
         no_of_events_until_fail = 0
         dif_in_exec = 0
@@ -279,6 +204,20 @@ def compare_two_models(dcr_model_1, dcr_model_2, ground_truth_log):
             print(gt_df[gt_df['case:concept:name'] == cid]['concept:name'].tolist())
 
 
+def compare_two_models_on_language(dcr_model_1, dcr_model_2, max_depth=None, max_pairs=None, max_elab_time=None):
+    '''
+    Compares two models without a log, on the traces they accept (see language_inclusion.check_equivalence)
+    '''
+    from pm4py.algo.evaluation.dcr import language_inclusion
+    res = language_inclusion.check_equivalence(dcr_model_1, dcr_model_2, max_depth=max_depth, max_pairs=max_pairs,
+                                               max_elab_time=max_elab_time)
+    if res['equivalent'] is False:
+        print(f'[x] Trace accepted only by model {res["accepted_by"]}: {res["counterexample"]}')
+    elif res['equivalent'] is None:
+        print(f'[i] The models accept the same traces up to length {res["depth"]}')
+    return res
+
+
 def score_everything(logs_name_path_dict, configs=None, create_train_test_split=False):
     if configs is None:
         print('[X] MUST PASS A CONFiG!!!!!!')
@@ -337,13 +276,15 @@ def score_based_on_config(train, ground_truth, config, log_name, alg_name='DisCo
     dcr = train_dcr_model(train, config)
     elapsed = time.time() - start_time
 
-    size = dcr_size(dcr)
-    density = dcr_density(dcr)
-    separability = dcr_separability(dcr)
-    co_separability = 1 - separability
-    constraint_variability = dcr_constraint_variablity_metric(dcr)
+    # all the structural metrics (and the relation-based simplicity) in a single pass over the graph
+    metrics = dcr_metrics.compute_metrics(dcr)
+    size = metrics['size']
+    density = metrics['density']
+    separability = metrics['separability']
+    co_separability = metrics['co_separability']
+    constraint_variability = metrics['constraint_variability']
 
-    sim = dcr_simplicity.get_simplicity(dcr)
+    sim = (metrics['relations'], metrics['subprocesses'])
     if ground_truth:
         fit = fitness(train, dcr)
         tp, fp, tn, fn = score_one_model(dcr, ground_truth)
@@ -0,0 +1,305 @@
+import csv
+import os
+import pickle
+import random
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+import pandas as pd
+
+from pm4py.util import constants, xes_constants
+
+'''
+Benchmark runner for the DCR discovery: every (log, configuration, variant) job mines a model from the training
+part of a log and scores it, recording the wall time and the peak memory of every stage. The logs are parsed once
+into a columnar cache, the jobs run on a process pool and every finished job is appended to a CSV results table,
+so an interrupted benchmark is resumed by running it again on the same results file.
+'''
+
+STAGES = ['abstraction', 'mining', 'nesting', 'timing', 'scoring']
+SCORES = ['size', 'density', 'separability', 'co_separability', 'constraint_variability', 'relations', 'nestings',
+          'activities', 'training_fitness', 'tp', 'fp', 'tn', 'fn', 'f1_pdc', 'f1', 'bac', 'mcc']
+RESULT_COLUMNS = ['log', 'config', 'variant', 'train_cases', 'test_cases'] + \
+                 [f'{stage}_{measure}' for stage in STAGES for measure in ['time', 'peak_memory']] + \
+                 ['total_time'] + SCORES + ['error']
+
+CASE_ID_KEY = constants.CASE_CONCEPT_NAME
+ACTIVITY_KEY = xes_constants.DEFAULT_NAME_KEY
+TIMESTAMP_KEY = xes_constants.DEFAULT_TIMESTAMP_KEY
+# attribute of the cases of the ground truth logs (PDC contests) telling if the case should be accepted
+IS_POS_KEY = 'case:pdc:isPos'
+
+
+def cache_log(name, path, cache_dir):
+    '''
+    Parses a XES log once and stores the columns used by the discovery and the scoring as a pickled dataframe.
+    The cache is reused as long as it is newer than the log
+
+    Returns
+    -------
+    path of the cached dataframe
+    '''
+    import pm4py
+    cache_path = os.path.join(cache_dir, f'{name}.pkl')
+    if os.path.exists(cache_path) and os.path.getmtime(cache_path) >= os.path.getmtime(path):
+        return cache_path
+    df = pm4py.read_xes(path, show_progress_bar=False)
+    columns = [c for c in [CASE_ID_KEY, ACTIVITY_KEY, TIMESTAMP_KEY, IS_POS_KEY] if c in df.columns]
+    df = df[columns].reset_index(drop=True)
+    df[CASE_ID_KEY] = df[CASE_ID_KEY].astype(str)
+    df.to_pickle(cache_path)
+    return cache_path
+
+
+def get_split(cache_path, test_fraction, seed):
+    '''
+    Ids of the training and test cases of a cached log. The split is stored next to the cached log, so that every
+    job (and every later benchmark) with the same fraction and seed uses the same split
+    '''
+    split_path = f'{cache_path}.split-{test_fraction}-{seed}.pkl'
+    if os.path.exists(split_path) and os.path.getmtime(split_path) >= os.path.getmtime(cache_path):
+        with open(split_path, 'rb') as f:
+            return pickle.load(f)
+    cases = sorted(pd.read_pickle(cache_path)[CASE_ID_KEY].unique())
+    random.Random(seed).shuffle(cases)
+    n_test = int(round(len(cases) * test_fraction))
+    split = {'train': set(cases[n_test:]), 'test': set(cases[:n_test])}
+    with open(split_path, 'wb') as f:
+        pickle.dump(split, f)
+    return split
+
+
+class StageRecorder(object):
+    '''
+    Records the wall time and the peak memory (of the python allocations, traced with tracemalloc) of the stages
+    '''
+
+    def __init__(self, track_memory=True) -> None:
+        self.track_memory = track_memory
+        self.record = {}
+        # stage running (or that failed)
+        self.current = None
+
+    @contextmanager
+    def stage(self, name):
+        if self.track_memory:
+            tracemalloc.start()
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        self.current = name
+        try:
+            yield
+            self.current = None
+        finally:
+            self.record[f'{name}_time'] = time.perf_counter() - start
+            if self.track_memory:
+                self.record[f'{name}_peak_memory'] = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+
+
+def confusion_matrix(dcr, test):
+    '''
+    Accepted / rejected cases of the test log against the ground truth (IS_POS_KEY attribute of the cases)
+    '''
+    from pm4py.objects.dcr import compiled_semantics
+    is_pos = test.groupby(CASE_ID_KEY, sort=False)[IS_POS_KEY].first()
+    traces = test.groupby(CASE_ID_KEY, sort=False)[ACTIVITY_KEY].agg(list)
+    tp = fp = tn = fn = 0
+    for case_id, replay_result in zip(traces.index, compiled_semantics.replay_traces(dcr, list(traces))):
+        gt_is_pos = str(is_pos[case_id]).lower() == 'true'
+        if replay_result['accepted']:
+            if gt_is_pos:
+                tp += 1
+            else:
+                fp += 1
+        elif gt_is_pos:
+            fn += 1
+        else:
+            tn += 1
+    return tp, fp, tn, fn
+
+
+def run_job(cache_path, log_name, config, variant_name, split=None, ground_truth_path=None, track_memory=True):
+    '''
+    Mines a model from the training cases of a cached log and scores it
+
+    Parameters
+    ----------
+    cache_path: path of the cached training log (see cache_log)
+    log_name: name of the log in the results
+    config: parameters of the discovery (alg_name, if present, is the name of the configuration in the results)
+    variant_name: name of the variant of the discovery (in pm4py.algo.discovery.dcr_discover.algorithm.Variants)
+    split: (optional) training and test case ids (see get_split)
+    ground_truth_path: (optional) path of a cached ground truth log, used as test log
+    track_memory: records the peak memory of the stages (tracing the allocations slows the stages down)
+
+    Returns
+    -------
+    a row of the results table (dict)
+    '''
+    from pm4py.algo.discovery.dcr_discover import algorithm as dcr_discovery
+    from pm4py.algo.discovery.dcr_discover.variants import dcr_discover
+    from pm4py.algo.discovery.dcr_discover.extenstions import initial_pending, mutual_exclusion, nesting
+    from pm4py.algo.evaluation.dcr import algorithm as dcr_evaluation
+    from pm4py.algo.evaluation.dcr import metrics as dcr_metrics
+    from pm4py.objects.dcr import compiled_semantics
+
+    config = dict(config)
+    config_name = config.pop('alg_name', str(config))
+    variant = dcr_discovery.Variants[variant_name]
+    df = pd.read_pickle(cache_path)
+    train, test = df, None
+    if split is not None:
+        train = df[df[CASE_ID_KEY].isin(split['train'])]
+        test = df[df[CASE_ID_KEY].isin(split['test'])]
+    if ground_truth_path is not None:
+        test = pd.read_pickle(ground_truth_path)
+    elif test is None and IS_POS_KEY in df.columns:
+        test = df
+
+    recorder = StageRecorder(track_memory=track_memory)
+    total_start = time.perf_counter()
+    scores = {}
+    error = ''
+    try:
+        # the stages of dcr_discovery.apply, timed one by one
+        disc = dcr_discover.Discover()
+        with recorder.stage('abstraction'):
+            disc.createLogAbstractionFromDataframe(train, activity_key=ACTIVITY_KEY, case_id_key=CASE_ID_KEY)
+        find_additional_conditions = config.get('findAdditionalConditions', True)
+        with recorder.stage('mining'):
+            disc.mineFromAbstraction(findAdditionalConditions=find_additional_conditions)
+            dcr, la = disc.graph, disc.logAbstraction
+        with recorder.stage('nesting'):
+            sp_log = None
+            if variant == dcr_discovery.Variants.DCR_N:
+                dcr, sp_log = nesting.apply_nesting(dcr), train
+            elif variant in [dcr_discovery.Variants.DCR_ME, dcr_discovery.Variants.DCR_NME]:
+                dcr, sp_log = mutual_exclusion.apply_mutual_exclusion(dcr), la
+                if variant == dcr_discovery.Variants.DCR_NME:
+                    dcr = nesting.apply_nesting_on_mutual_exclusions(dcr)
+        with recorder.stage('timing'):
+            # the initial pending events are found after the timed relations, as in dcr_discovery.apply
+            if config.get('timed', False):
+                dcr = dcr_discovery.apply_timed(dcr, train, sp_log)
+            if config.get('pending', False):
+                dcr = initial_pending.apply(dcr, la['traces'] if sp_log is None else sp_log)
+        with recorder.stage('scoring'):
+            scores = dcr_metrics.compute_metrics(dcr)
+            scores['nestings'] = len(dcr.get('nestings', {}))
+            scores['activities'] = len(dcr['events'])
+            replay_results = compiled_semantics.replay_log(dcr, train, activity_key=ACTIVITY_KEY,
+                                                           case_id_key=CASE_ID_KEY)
+            scores['training_fitness'] = sum(r['accepted'] for r in replay_results) / len(replay_results) \
+                if replay_results else ''
+            if test is not None and IS_POS_KEY in test.columns:
+                tp, fp, tn, fn = confusion_matrix(dcr, test)
+                scores.update({'tp': tp, 'fp': fp, 'tn': tn, 'fn': fn,
+                               'f1_pdc': dcr_evaluation.pdcFscore(tp, fp, tn, fn),
+                               'f1': dcr_evaluation.fscore(tp, fp, tn, fn),
+                               'bac': dcr_evaluation.balancedAccuracy(tp, fp, tn, fn),
+                               'mcc': dcr_evaluation.mcc(tp, fp, tn, fn)})
+    except Exception as e:
+        # a failing job is recorded (with the stages completed before the failure) without stopping the benchmark
+        error = f'{recorder.current}: {type(e).__name__}: {e}'
+    total_time = time.perf_counter() - total_start
+
+    row = {'log': log_name, 'config': config_name, 'variant': variant_name,
+           'train_cases': train[CASE_ID_KEY].nunique(),
+           'test_cases': test[CASE_ID_KEY].nunique() if test is not None else '',
+           'total_time': total_time, 'error': error}
+    row.update(recorder.record)
+    row.update({k: scores[k] for k in SCORES if k in scores})
+    return {k: row.get(k, '') for k in RESULT_COLUMNS}
+
+
+def read_completed_jobs(results_path):
+    '''
+    (log, config, variant) of the jobs already in the results table
+    '''
+    if not os.path.exists(results_path):
+        return set()
+    with open(results_path, newline='') as f:
+        return set((row['log'], row['config'], row['variant']) for row in csv.DictReader(f))
+
+
+def run_benchmark(logs, configs, results_path, variants=None, cache_dir=None, cores=1, test_fraction=None, seed=0,
+                  track_memory=True):
+    '''
+    Runs the (log, configuration, variant) jobs that are not yet in the results table, appending a row to the table
+    as soon as a job is completed. A failing job is recorded with its error (and is not run again when resuming,
+    unless its row is removed from the table)
+
+    Parameters
+    ----------
+    logs: dict log name -> path of the XES log, or (path of the training log, path of the ground truth log)
+    configs: list of parameters of the discovery (the key alg_name gives the name of the configuration)
+    results_path: CSV results table (created if missing, resumed otherwise)
+    variants: list of variants of the discovery (names or members of dcr_discover.algorithm.Variants,
+        default: the basic variant)
+    cache_dir: directory of the cached logs and splits (default: a folder next to the results table)
+    cores: number of worker processes
+    test_fraction: if provided (and the log has no ground truth log), fraction of the cases kept as test cases
+    seed: seed of the train / test splits
+    track_memory: records the peak memory of the stages
+
+    Returns
+    -------
+    the results table (dataframe)
+    '''
+    if variants is None:
+        variants = ['DCR_BASIC']
+    variants = [v if isinstance(v, str) else v.name for v in variants]
+    if cache_dir is None:
+        cache_dir = os.path.join(os.path.dirname(os.path.abspath(results_path)), 'dcr_benchmark_cache')
+    os.makedirs(cache_dir, exist_ok=True)
+
+    completed = read_completed_jobs(results_path)
+    jobs = []
+    for log_name, path in logs.items():
+        ground_truth_path = None
+        if isinstance(path, (tuple, list)):
+            path, ground_truth_path = path
+        cache_path = None
+        for i, config in enumerate(configs):
+            config_name = config.get('alg_name', str({k: v for k, v in config.items() if k != 'alg_name'}))
+            for variant_name in variants:
+                if (log_name, config_name, variant_name) in completed:
+                    continue
+                if cache_path is None:
+                    # every log is parsed once (and only if some of its jobs are still to be run)
+                    cache_path = cache_log(log_name, path, cache_dir)
+                    if ground_truth_path is not None:
+                        ground_truth_path = cache_log(f'{log_name}-ground-truth', ground_truth_path, cache_dir)
+                    split = get_split(cache_path, test_fraction, seed) \
+                        if test_fraction is not None and ground_truth_path is None else None
+                jobs.append((cache_path, log_name, dict(config, alg_name=config_name), variant_name, split,
+                             ground_truth_path, track_memory))
+
+    write_header = not os.path.exists(results_path) or os.path.getsize(results_path) == 0
+    with open(results_path, 'a', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=RESULT_COLUMNS)
+        if write_header:
+            writer.writeheader()
+            f.flush()
+        for row in run_jobs(jobs, cores):
+            writer.writerow(row)
+            # a crash loses at most the jobs that are running
+            f.flush()
+    return pd.read_csv(results_path)
+
+
+def run_jobs(jobs, cores):
+    '''
+    Yields the rows of the jobs as soon as they are completed
+    '''
+    if cores > 1 and len(jobs) > 1:
+        from concurrent.futures import ProcessPoolExecutor, as_completed
+        with ProcessPoolExecutor(max_workers=min(cores, len(jobs))) as executor:
+            futures = [executor.submit(run_job, *job) for job in jobs]
+            for future in as_completed(futures):
+                yield future.result()
+    else:
+        for job in jobs:
+            yield run_job(*job)
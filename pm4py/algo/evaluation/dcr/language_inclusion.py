@@ -0,0 +1,214 @@
+import time
+from collections import deque
+
+from pm4py.objects.dcr.compiled_semantics import CompiledDcrGraph, iter_bits
+from pm4py.objects.dcr.state_space import DcrStateSpace
+
+'''
+Model-to-model comparison of DCR graphs on their languages (the sequences of labels of the accepting runs),
+without a log: the product of the state spaces of the two graphs is explored breadth-first, so the first
+counterexample found is one of the shortest.
+The untimed semantics is used (delays and deadlines are not considered), the nestings are flattened.
+'''
+
+
+def get_labels(dcr, graph):
+    '''
+    Label of every event of the compiled graph (the event itself if it is not in the label mapping)
+    '''
+    labels = {}
+    for label, events in dcr.get('labelMapping', {}).items():
+        for event in events:
+            labels[event] = label
+    return [labels.get(e, e) for e in graph.events]
+
+
+class DcrLanguageComparator(object):
+    '''
+    Checks the inclusion and the equivalence of the languages of two DCR graphs.
+    The first graph is explored as it is, the second one is determinized on the fly (a state of the product is an
+    event-level marking of the first graph and a set of markings of the second one, a singleton if the labels of
+    the second graph are unique). The enabled events of the markings and the transitions of the sets of markings
+    are memoized and shared by the two directions of an equivalence check; the visited pairs of each direction are
+    kept, so repeated checks with growing budgets resume the exploration instead of restarting it.
+    '''
+
+    def __init__(self, dcr_model_1, dcr_model_2) -> None:
+        '''
+        Parameters
+        ----------
+        dcr_model_1: first dcr graph (dict, CompactDcrGraph)
+        dcr_model_2: second dcr graph (dict, CompactDcrGraph)
+        '''
+        self.spaces = []
+        self.labels = []
+        self.events_by_label = []
+        for dcr in [dcr_model_1, dcr_model_2]:
+            space = DcrStateSpace(CompiledDcrGraph(dcr, flatten=True), explore=False)
+            labels = get_labels(dcr, space.graph)
+            events_by_label = {}
+            for i, label in enumerate(labels):
+                events_by_label.setdefault(label, []).append(i)
+            self.spaces.append(space)
+            self.labels.append(labels)
+            self.events_by_label.append(events_by_label)
+        # (direction, set of markings, label) -> set of markings
+        self.__transitions = {}
+        # direction -> state of the exploration of the product, and final result
+        self.__explorations = {}
+        self.__results = {}
+
+    def __step(self, direction, states, label):
+        key = (direction, states, label)
+        if key not in self.__transitions:
+            space = self.spaces[1 - direction]
+            res = set()
+            for state in states:
+                enabled = space.enabled(state)
+                for i in self.events_by_label[1 - direction].get(label, ()):
+                    if (enabled >> i) & 1:
+                        res.add(space.execute(state, i))
+            self.__transitions[key] = frozenset(res)
+        return self.__transitions[key]
+
+    def __is_counterexample(self, direction, pair):
+        state, states = pair
+        return self.spaces[direction].is_accepting(state) and \
+            not any(self.spaces[1 - direction].is_accepting(s) for s in states)
+
+    def __trace(self, parents, pair):
+        trace = []
+        while parents[pair] is not None:
+            pair, label = parents[pair]
+            trace.append(label)
+        trace.reverse()
+        return trace
+
+    def check_inclusion(self, direction=0, max_depth=None, max_pairs=None, max_elab_time=None):
+        '''
+        Checks if the language of a graph is included in the language of the other one.
+        A check stopped by a budget can be repeated with larger budgets: the exploration resumes from the pairs
+        it did not expand.
+
+        Parameters
+        ----------
+        direction: 0 to check if the language of the first graph is included in the one of the second graph,
+            1 for the opposite direction
+        max_depth: maximum length of the explored traces (default: no limit)
+        max_pairs: maximum number of reached states of the product (default: no limit)
+        max_elab_time: maximum time (in seconds) of the exploration (default: no limit)
+
+        Returns
+        -------
+        a dict with:
+            - included => True if the inclusion holds, False if a counterexample was found, None if a budget
+              stopped the exploration before (the inclusion holds for the traces up to the verified depth)
+            - counterexample => shortest trace (list of labels) accepted by the first graph of the direction and
+              not by the other one, None if not found
+            - depth => maximum length of the traces for which the inclusion is verified (None if exact)
+            - explored_pairs => number of reached states of the product
+        '''
+        if direction not in self.__explorations:
+            space = self.spaces[direction]
+            initial_pair = (space.initial_state, frozenset([self.spaces[1 - direction].initial_state]))
+            # pair -> (previous pair, label), pair -> depth, pairs to expand, (pair, first unverified depth)
+            # of the pairs not (fully) expanded because of a budget
+            self.__explorations[direction] = ({initial_pair: None}, {initial_pair: 0}, deque([initial_pair]), [])
+        parents, depths, queue, postponed = self.__explorations[direction]
+        if direction in self.__results:
+            return self.__results[direction]
+        if postponed:
+            queue.extend(pair for pair, _ in postponed)
+            postponed.clear()
+            # keeps the breadth-first order, so that the first counterexample is still one of the shortest
+            self.__explorations[direction] = (parents, depths, deque(sorted(queue, key=depths.get)), postponed)
+            queue = self.__explorations[direction][2]
+
+        start_time = time.time()
+        space = self.spaces[direction]
+        labels = self.labels[direction]
+        while queue:
+            if max_elab_time is not None and time.time() - start_time > max_elab_time:
+                break
+            pair = queue.popleft()
+            depth = depths[pair]
+            if self.__is_counterexample(direction, pair):
+                self.__results[direction] = {'included': False, 'counterexample': self.__trace(parents, pair),
+                                             'depth': depth - 1, 'explored_pairs': len(parents)}
+                return self.__results[direction]
+            state, states = pair
+            enabled = space.enabled(state)
+            if not enabled:
+                continue
+            if max_depth is not None and depth >= max_depth:
+                postponed.append((pair, depth + 1))
+                continue
+            for i in iter_bits(enabled):
+                label = labels[i]
+                next_pair = (space.execute(state, i), self.__step(direction, states, label))
+                if next_pair not in parents:
+                    if max_pairs is not None and len(parents) >= max_pairs:
+                        postponed.append((pair, depth + 1))
+                        break
+                    parents[next_pair] = (pair, label)
+                    depths[next_pair] = depth + 1
+                    queue.append(next_pair)
+
+        if not queue and not postponed:
+            self.__results[direction] = {'included': True, 'counterexample': None, 'depth': None,
+                                         'explored_pairs': len(parents)}
+            return self.__results[direction]
+        # every trace shorter than the first unverified depth reaches a pair that was checked
+        first_unverified = min([depths[pair] for pair in queue] + [d for _, d in postponed])
+        return {'included': None, 'counterexample': None, 'depth': first_unverified - 1,
+                'explored_pairs': len(parents)}
+
+    def check_equivalence(self, max_depth=None, max_pairs=None, max_elab_time=None):
+        '''
+        Checks if the two graphs accept the same traces (inclusion in both directions, the second direction is not
+        explored if a counterexample is found in the first one)
+
+        Parameters
+        ----------
+        max_depth, max_pairs, max_elab_time: budgets of each direction (see check_inclusion)
+
+        Returns
+        -------
+        a dict with:
+            - equivalent => True, False, or None if a budget stopped the exploration before a verdict
+            - counterexample => shortest trace accepted by only one of the two graphs found, None if not found
+            - accepted_by => 1 or 2, the graph accepting the counterexample
+            - depth => length of the traces for which the equivalence is verified (None if exact)
+        '''
+        depths = []
+        for direction in [0, 1]:
+            res = self.check_inclusion(direction, max_depth=max_depth, max_pairs=max_pairs,
+                                       max_elab_time=max_elab_time)
+            if res['included'] is False:
+                return {'equivalent': False, 'counterexample': res['counterexample'], 'accepted_by': direction + 1,
+                        'depth': res['depth']}
+            if res['included'] is None:
+                depths.append(res['depth'])
+        if depths:
+            # the second direction is explored anyway, it may find a counterexample within the budgets
+            return {'equivalent': None, 'counterexample': None, 'accepted_by': None, 'depth': min(depths)}
+        return {'equivalent': True, 'counterexample': None, 'accepted_by': None, 'depth': None}
+
+
+def check_inclusion(dcr_model_1, dcr_model_2, max_depth=None, max_pairs=None, max_elab_time=None):
+    '''
+    Checks if every trace accepted by the first graph is accepted by the second one (see
+    DcrLanguageComparator.check_inclusion)
+    '''
+    return DcrLanguageComparator(dcr_model_1, dcr_model_2).check_inclusion(0, max_depth=max_depth,
+                                                                           max_pairs=max_pairs,
+                                                                           max_elab_time=max_elab_time)
+
+
+def check_equivalence(dcr_model_1, dcr_model_2, max_depth=None, max_pairs=None, max_elab_time=None):
+    '''
+    Checks if the two graphs accept the same traces (see DcrLanguageComparator.check_equivalence)
+    '''
+    return DcrLanguageComparator(dcr_model_1, dcr_model_2).check_equivalence(max_depth=max_depth,
+                                                                             max_pairs=max_pairs,
+                                                                             max_elab_time=max_elab_time)
@@ -0,0 +1,156 @@
+from array import array
+
+import numpy as np
+
+from pm4py.objects.dcr.obj import Relations
+
+'''
+Structural metrics of DCR graphs computed in a single pass over the relations:
+https://www.sciencedirect.com/science/article/pii/S0957417423014264
+'''
+
+# relations counted by the relation-based simplicity (pm4py.algo.evaluation.simplicity.variants.dcr_relations)
+SIMPLICITY_RELATIONS = {'conditionsFor', 'milestonesFor', 'responseTo', 'includesTo', 'excludesTo'}
+
+
+class DcrStructure(object):
+    '''
+    Compact adjacency structure of a DCR graph: the nodes (the events, then the other endpoints of the relations, in
+    the order they are met) are interned to integer ids, the relations are stored as arrays of source and target ids,
+    and the weakly connected components are computed with a union-find while the relations are read.
+    '''
+
+    def __init__(self, G) -> None:
+        self.node_ids = {}
+        self.nodes = []
+        # union-find forest of the nodes
+        self.parent = []
+        self.rank = []
+        for e in G['events']:
+            self.__add_node(e)
+        self.n_events = len(self.nodes)
+        # relation -> (source ids, target ids)
+        self.relations = {}
+        for rel in Relations:
+            sources = array('l')
+            targets = array('l')
+            for k, v in G.get(rel.value, {}).items():
+                source = self.__add_node(k)
+                for v0 in v:
+                    target = self.__add_node(v0)
+                    sources.append(source)
+                    targets.append(target)
+                    self.union(source, target)
+            self.relations[rel.value] = (sources, targets)
+
+    def __add_node(self, e):
+        node_id = self.node_ids.get(e)
+        if node_id is None:
+            node_id = len(self.nodes)
+            self.node_ids[e] = node_id
+            self.nodes.append(e)
+            self.parent.append(node_id)
+            self.rank.append(0)
+        return node_id
+
+    def find(self, x):
+        parent = self.parent
+        while parent[x] != x:
+            # path halving
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    def union(self, x, y):
+        x = self.find(x)
+        y = self.find(y)
+        if x == y:
+            return
+        if self.rank[x] < self.rank[y]:
+            x, y = y, x
+        self.parent[y] = x
+        if self.rank[x] == self.rank[y]:
+            self.rank[x] += 1
+
+    def components(self):
+        '''
+        Weakly connected components as lists of node ids, ordered by their first node (as networkx does)
+        '''
+        components = {}
+        for x in range(len(self.nodes)):
+            components.setdefault(self.find(x), []).append(x)
+        return list(components.values())
+
+
+def constraint_variability(rel_counts):
+    '''
+    Constraint variability of a component from the number of constraints of every relation in it
+    '''
+    comp_c_c = sum(rel_counts)
+    if comp_c_c == 0:
+        return None
+    rels_in_comp = sum(1 for c in rel_counts if c > 0)
+    cv_sum = 0.0
+    if rels_in_comp > 1:
+        for c in rel_counts:
+            if c > 0:
+                pct = c / comp_c_c
+                cv_sum += pct * np.emath.logn(rels_in_comp, pct)
+    return - cv_sum
+
+
+def compute_metrics(G):
+    '''
+    Computes all the structural metrics of a DCR graph building its DcrStructure once
+
+    Parameters
+    ----------
+    G: the dcr graph (dict or CompactDcrGraph)
+
+    Returns
+    -------
+    a dict with:
+        - size => number of events and of constraints
+        - density => constraints per node in the largest weakly connected component
+        - separability => weakly connected components per element of the size
+        - co_separability => 1 - separability
+        - constraint_variability => maximum over the components of the entropy of the relation types
+        - relations => number of constraints counted by the relation-based simplicity
+        - subprocesses => number of subprocesses
+    '''
+    structure = DcrStructure(G)
+    n_constraints = sum(len(sources) for sources, _ in structure.relations.values())
+    size = structure.n_events + n_constraints
+
+    components = structure.components()
+    component_of = [0] * len(structure.nodes)
+    for index, component in enumerate(components):
+        for x in component:
+            component_of[x] = index
+    # constraints of every relation in every component (a constraint is in the component of its source)
+    counts = [[0] * len(structure.relations) for _ in components]
+    for r, (sources, _) in enumerate(structure.relations.values()):
+        for source in sources:
+            counts[component_of[source]][r] += 1
+
+    density = 0
+    if components:
+        largest = max(range(len(components)), key=lambda index: len(components[index]))
+        density = sum(counts[largest]) / len(components[largest])
+    separability = len(components) / size if size > 0 else 0
+
+    cv = float('-inf')
+    for rel_counts in counts:
+        comp_cv = constraint_variability(rel_counts)
+        if comp_cv is not None and comp_cv > cv:
+            cv = comp_cv
+
+    return {
+        'size': size,
+        'density': density,
+        'separability': separability,
+        'co_separability': 1 - separability,
+        'constraint_variability': cv,
+        'relations': sum(len(structure.relations[rel][0]) for rel in SIMPLICITY_RELATIONS),
+        'subprocesses': len(G['subprocesses']) if 'subprocesses' in G else 0
+    }
@@ -0,0 +1,55 @@
+'''
+    This file is part of PM4Py (More Info: https://pm4py.fit.fraunhofer.de).
+
+    PM4Py is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    PM4Py is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with PM4Py.  If not, see <https://www.gnu.org/licenses/>.
+'''
+from pm4py.algo.simulation.playout.dcr.variants import extensive
+from pm4py.algo.simulation.playout.dcr.variants import stochastic_playout, basic_playout
+from pm4py.util import exec_utils
+from enum import Enum
+from typing import Optional, Dict, Any, Union
+from pm4py.objects.log.obj import EventLog
+
+
+class Variants(Enum):
+    BASIC_PLAYOUT = basic_playout
+    STOCHASTIC_PLAYOUT = stochastic_playout
+    EXTENSIVE = extensive
+
+
+DEFAULT_VARIANT = Variants.BASIC_PLAYOUT
+VERSIONS = {Variants.BASIC_PLAYOUT, Variants.EXTENSIVE, Variants.STOCHASTIC_PLAYOUT}
+
+
+def apply(dcr, parameters: Optional[Dict[Any, Any]] = None, variant=DEFAULT_VARIANT) -> Union[EventLog, Any, str]:
+    """
+    Do the playout of a DCR graph generating a log (an EventLog, a dataframe or a XES file, depending on the
+    parameters). Delays and deadlines of timed graphs are respected.
+
+    Parameters
+    -----------
+    dcr
+        DCR graph (dict or CompactDcrGraph)
+    parameters
+        Parameters of the algorithm
+    variant
+        Variant of the algorithm to use:
+            - Variants.BASIC_PLAYOUT: selects random traces from the model, without looking at the
+            frequency of the events
+            - Variants.STOCHASTIC_PLAYOUT: selects random traces from the model, looking at the
+            stochastic frequency of the events. Requires the provision of the stochastic map
+            or the log.
+            - Variants.EXTENSIVE: gets all the accepting traces of the model up to a maximum length. can be expensive
+    """
+    return exec_utils.get_variant(variant).apply(dcr, parameters=parameters)
@@ -0,0 +1,272 @@
+'''
+    This file is part of PM4Py (More Info: https://pm4py.fit.fraunhofer.de).
+
+    PM4Py is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    PM4Py is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with PM4Py.  If not, see <https://www.gnu.org/licenses/>.
+'''
+import datetime
+import gzip
+import random
+from copy import deepcopy
+from datetime import timedelta
+
+from pm4py.objects.dcr import semantics as dcr_semantics
+from pm4py.objects.dcr.compiled_semantics import flatten_nestings, iter_timed_relation, to_timedelta
+from pm4py.objects.dcr.obj import CompactDcrGraph
+from pm4py.objects.log import obj as log_instance
+from pm4py.objects.log.exporter.xes.variants.line_by_line import export_trace_line_by_line
+from pm4py.objects.log.util import xes as xes_util
+from pm4py.util import constants
+
+# choices of the playout that are not the execution of an event
+WAIT = "@@wait"
+STOP = None
+
+
+def prepare_graph(dcr):
+    """
+    Copy of the DCR graph in the format read by DcrSemantics: the nestings are pushed down to the atomic events,
+    and the delays / deadlines are stored as sets of (event, number of days) whatever the format of the input
+    (timed discovery, portal importer)
+
+    Parameters
+    ------------
+    dcr
+        DCR graph (dict or CompactDcrGraph)
+
+    Returns
+    ------------
+    dcr
+        Prepared copy of the graph
+    """
+    dcr = dcr.to_dict() if isinstance(dcr, CompactDcrGraph) else deepcopy(dcr)
+    if dcr.get('nestings'):
+        events, marking, relations = flatten_nestings(dcr)
+        dcr.update(relations)
+        dcr['events'] = events
+        dcr['marking'].update(marking)
+        dcr['nestings'] = {}
+        dcr['nestingsMap'] = {}
+    for key in ['conditionsForDelays', 'responseToDeadlines']:
+        dcr[key] = {e: set((e_prime, to_timedelta(k) / timedelta(days=1)) for e_prime, k in iter_timed_relation(rel))
+                    for e, rel in dcr.get(key, {}).items()}
+    return dcr
+
+
+def get_event_labels(dcr):
+    """
+    Activity recorded in the log for every event of the graph (the label of the event, if the graph has a label
+    mapping, otherwise the event itself)
+    """
+    labels = {}
+    for label, events in dcr.get('labelMapping', {}).items():
+        for event in events:
+            labels[event] = label
+    return {e: labels.get(e, e) for e in dcr['events']}
+
+
+def get_semantics(dcr):
+    """
+    Semantics object on a prepared graph, together with the initial marking to give to reset()
+    (initially executed events are considered executed long enough ago to satisfy all their delays)
+    """
+    semantics = dcr_semantics.DcrSemantics(dcr, cmd_print=False)
+    marking = semantics.dcr['marking']
+    for e in marking['executed']:
+        marking['executedTime'].setdefault(e, semantics.dict_exe[e])
+    return semantics, deepcopy(marking)
+
+
+def reset(semantics, initial_marking):
+    semantics.dcr['marking'] = deepcopy(initial_marking)
+
+
+def get_choices(semantics):
+    """
+    Possible moves of the playout in the current marking: the enabled events (sorted, so that a seeded playout is
+    reproducible), WAIT if time can pass until a delay expires without missing a deadline, STOP if the marking
+    is accepting. Returns also the next deadline and the next delay
+    """
+    choices = sorted(semantics.enabled(), key=str)
+    deadline = semantics.find_next_deadline()
+    delay = semantics.find_next_delay()
+    if delay is not None and (deadline is None or delay <= deadline):
+        choices.append(WAIT)
+    if semantics.is_accepting():
+        choices.append(STOP)
+    return choices, deadline, delay
+
+
+def get_time_step(rnd, min_time_step, max_time_step, deadline):
+    """
+    Time elapsing before the execution of an event, never beyond the next deadline
+    """
+    step = min_time_step
+    if max_time_step > min_time_step:
+        step = min_time_step + (max_time_step - min_time_step) * rnd.random()
+    if deadline is not None and step > deadline:
+        step = deadline
+    return step
+
+
+def pick(choices, rnd, weights=None, default_weight=1.0):
+    """
+    Picks one of the choices, with probability proportional to its weight if weights are provided
+    """
+    if weights is None:
+        return rnd.choice(choices)
+    choice_weights = [weights.get(c, default_weight) for c in choices]
+    if sum(choice_weights) <= 0:
+        return rnd.choice(choices)
+    return rnd.choices(choices, weights=choice_weights)[0]
+
+
+def playout_trace(semantics, initial_marking, rnd, max_trace_length, min_time_step, max_time_step, weights=None,
+                  default_weight=1.0):
+    """
+    Random run of the graph from the initial marking
+
+    Returns
+    ------------
+    trace
+        List of (event, time elapsed since the start of the case)
+    accepting
+        Boolean telling if the run ends in an accepting marking
+    """
+    reset(semantics, initial_marking)
+    trace = []
+    elapsed = timedelta(0)
+    while len(trace) < max_trace_length:
+        choices, deadline, delay = get_choices(semantics)
+        if not choices:
+            break
+        choice = pick(choices, rnd, weights=weights, default_weight=default_weight)
+        if choice is STOP:
+            break
+        if choice == WAIT:
+            semantics.time_step(delay)
+            elapsed += delay
+            continue
+        step = get_time_step(rnd, min_time_step, max_time_step, deadline)
+        if step > timedelta(0):
+            semantics.time_step(step)
+            elapsed += step
+        semantics.execute(choice)
+        trace.append((choice, elapsed))
+    return trace, semantics.is_accepting()
+
+
+def playout_chunk(dcr, first_case, no_traces, seed, max_trace_length, min_time_step, max_time_step,
+                  add_only_if_accepting, weights=None, default_weight=1.0):
+    """
+    Plays out no_traces traces of a prepared graph (a unit of work of the worker processes).
+    Every chunk has its own random generator, seeded with the seed and the index of its first case, so that the
+    generated log does not depend on the number of processes
+    """
+    rnd = random.Random(f"{seed}-{first_case}") if seed is not None else random.Random()
+    semantics, initial_marking = get_semantics(dcr)
+    traces = []
+    attempts = 0
+    while len(traces) < no_traces:
+        if attempts >= no_traces and (not add_only_if_accepting or not traces):
+            # likely, no accepting marking is reachable in max_trace_length steps
+            break
+        attempts += 1
+        trace, accepting = playout_trace(semantics, initial_marking, rnd, max_trace_length, min_time_step,
+                                         max_time_step, weights=weights, default_weight=default_weight)
+        if accepting or not add_only_if_accepting:
+            traces.append(trace)
+    return traces
+
+
+def run_chunks(function, chunks, cores=1):
+    """
+    Runs the function on every chunk (tuple of arguments), in worker processes if more than one core is requested,
+    yielding the results in the order of the chunks
+    """
+    if cores > 1 and len(chunks) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=min(cores, len(chunks))) as executor:
+            yield from executor.map(function, *zip(*chunks))
+    else:
+        for chunk in chunks:
+            yield function(*chunk)
+
+
+def to_output(chunk_results, labels, case_id_key, activity_key, timestamp_key, initial_timestamp, initial_case_id,
+              case_arrival_time, return_dataframe=False, xes_output_path=None):
+    """
+    Collects the traces produced by the chunks, in the order they are produced, into:
+        - a XES file written trace by trace (if xes_output_path is provided; the path is returned)
+        - a dataframe (if return_dataframe is True; the case id is prefixed as in the conversion of a log)
+        - an EventLog otherwise
+    The i-th case starts at initial_timestamp + i * case_arrival_time
+    """
+    start = datetime.datetime.fromtimestamp(initial_timestamp)
+    if xes_output_path is not None:
+        return write_xes(chunk_results, labels, case_id_key, activity_key, timestamp_key, start, initial_case_id,
+                         case_arrival_time, xes_output_path)
+    if return_dataframe:
+        import pandas as pd
+        case_id_key = constants.CASE_ATTRIBUTE_PREFIX + case_id_key
+        columns = {case_id_key: [], activity_key: [], timestamp_key: []}
+        case_index = 0
+        for traces in chunk_results:
+            for trace in traces:
+                case_id = str(initial_case_id + case_index)
+                case_start = start + case_index * case_arrival_time
+                for event, elapsed in trace:
+                    columns[case_id_key].append(case_id)
+                    columns[activity_key].append(labels[event])
+                    columns[timestamp_key].append(case_start + elapsed)
+                case_index += 1
+        df = pd.DataFrame(columns)
+        df[timestamp_key] = pd.to_datetime(df[timestamp_key])
+        return df
+    log = log_instance.EventLog()
+    for trace in iter_traces(chunk_results, labels, case_id_key, activity_key, timestamp_key, start,
+                             initial_case_id, case_arrival_time):
+        log.append(trace)
+    return log
+
+
+def iter_traces(chunk_results, labels, case_id_key, activity_key, timestamp_key, start, initial_case_id,
+                case_arrival_time):
+    case_index = 0
+    for traces in chunk_results:
+        for trace in traces:
+            log_trace = log_instance.Trace()
+            log_trace.attributes[case_id_key] = str(initial_case_id + case_index)
+            case_start = start + case_index * case_arrival_time
+            for event, elapsed in trace:
+                log_trace.append(log_instance.Event({activity_key: labels[event], timestamp_key: case_start + elapsed}))
+            yield log_trace
+            case_index += 1
+
+
+def write_xes(chunk_results, labels, case_id_key, activity_key, timestamp_key, start, initial_case_id,
+              case_arrival_time, output_path, encoding=constants.DEFAULT_ENCODING):
+    """
+    Writes the traces to a XES file as soon as the chunks are produced (the log is never kept in memory)
+    """
+    f = gzip.open(output_path, mode="wb") if output_path.lower().endswith(".gz") else open(output_path, "wb")
+    f.write(("<?xml version=\"1.0\" encoding=\"" + encoding + "\" ?>\n").encode(encoding))
+    f.write(("<log " + xes_util.TAG_VERSION + "=\"" + xes_util.VALUE_XES_VERSION + "\" " + xes_util.TAG_FEATURES +
+             "=\"" + xes_util.VALUE_XES_FEATURES + "\" " + xes_util.TAG_XMLNS + "=\"" + xes_util.VALUE_XMLNS +
+             "\">\n").encode(encoding))
+    for trace in iter_traces(chunk_results, labels, case_id_key, activity_key, timestamp_key, start,
+                             initial_case_id, case_arrival_time):
+        export_trace_line_by_line(trace, f, encoding)
+    f.write("</log>\n".encode(encoding))
+    f.close()
+    return output_path
@@ -0,0 +1,129 @@
+'''
+    This file is part of PM4Py (More Info: https://pm4py.fit.fraunhofer.de).
+
+    PM4Py is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    PM4Py is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with PM4Py.  If not, see <https://www.gnu.org/licenses/>.
+'''
+from datetime import timedelta
+from enum import Enum
+from typing import Optional, Dict, Any, Union
+
+from pm4py.algo.simulation.playout.dcr import utils as playout_utils
+from pm4py.objects.log.obj import EventLog
+from pm4py.util import constants
+from pm4py.util import exec_utils
+from pm4py.util import xes_constants
+
+
+class Parameters(Enum):
+    ACTIVITY_KEY = constants.PARAMETER_CONSTANT_ACTIVITY_KEY
+    TIMESTAMP_KEY = constants.PARAMETER_CONSTANT_TIMESTAMP_KEY
+    CASE_ID_KEY = constants.PARAMETER_CONSTANT_CASEID_KEY
+    NO_TRACES = "noTraces"
+    MAX_TRACE_LENGTH = "maxTraceLength"
+    INITIAL_TIMESTAMP = "initial_timestamp"
+    INITIAL_CASE_ID = "initial_case_id"
+    CASE_ARRIVAL_TIME = "case_arrival_time"
+    MIN_TIME_STEP = "min_time_step"
+    MAX_TIME_STEP = "max_time_step"
+    ADD_ONLY_IF_ACCEPTING = "add_only_if_accepting"
+    RANDOM_SEED = "random_seed"
+    CORES = "cores"
+    CHUNK_SIZE = "chunk_size"
+    RETURN_DATAFRAME = "return_dataframe"
+    XES_OUTPUT_PATH = "xes_output_path"
+
+
+def get_chunks(dcr, no_traces, chunk_size, seed, max_trace_length, min_time_step, max_time_step,
+               add_only_if_accepting, weights=None, default_weight=1.0):
+    return [(dcr, first_case, min(chunk_size, no_traces - first_case), seed, max_trace_length, min_time_step,
+             max_time_step, add_only_if_accepting, weights, default_weight)
+            for first_case in range(0, no_traces, chunk_size)]
+
+
+def apply_playout(dcr, parameters=None, weights=None, default_weight=1.0):
+    """
+    Do the playout of a DCR graph, picking at every step one of the enabled events with probability proportional to
+    its weight (uniformly if no weights are provided)
+
+    Parameters
+    -----------
+    dcr
+        DCR graph
+    parameters
+        Parameters of the algorithm (see apply)
+    weights
+        (if provided) Weights of the events, of playout_utils.WAIT (letting time pass until the next delay expires)
+        and of playout_utils.STOP (ending an accepting trace)
+    default_weight
+        Weight of the choices that are not in the weights
+    """
+    if parameters is None:
+        parameters = {}
+
+    case_id_key = exec_utils.get_param_value(Parameters.CASE_ID_KEY, parameters, xes_constants.DEFAULT_TRACEID_KEY)
+    activity_key = exec_utils.get_param_value(Parameters.ACTIVITY_KEY, parameters, xes_constants.DEFAULT_NAME_KEY)
+    timestamp_key = exec_utils.get_param_value(Parameters.TIMESTAMP_KEY, parameters,
+                                               xes_constants.DEFAULT_TIMESTAMP_KEY)
+    no_traces = exec_utils.get_param_value(Parameters.NO_TRACES, parameters, 1000)
+    max_trace_length = exec_utils.get_param_value(Parameters.MAX_TRACE_LENGTH, parameters, 1000)
+    initial_timestamp = exec_utils.get_param_value(Parameters.INITIAL_TIMESTAMP, parameters, 10000000)
+    initial_case_id = exec_utils.get_param_value(Parameters.INITIAL_CASE_ID, parameters, 0)
+    case_arrival_time = exec_utils.get_param_value(Parameters.CASE_ARRIVAL_TIME, parameters, timedelta(minutes=1))
+    min_time_step = exec_utils.get_param_value(Parameters.MIN_TIME_STEP, parameters, timedelta(seconds=1))
+    max_time_step = exec_utils.get_param_value(Parameters.MAX_TIME_STEP, parameters, min_time_step)
+    add_only_if_accepting = exec_utils.get_param_value(Parameters.ADD_ONLY_IF_ACCEPTING, parameters, False)
+    seed = exec_utils.get_param_value(Parameters.RANDOM_SEED, parameters, None)
+    cores = exec_utils.get_param_value(Parameters.CORES, parameters, 1)
+    chunk_size = exec_utils.get_param_value(Parameters.CHUNK_SIZE, parameters, 1000)
+    return_dataframe = exec_utils.get_param_value(Parameters.RETURN_DATAFRAME, parameters, False)
+    xes_output_path = exec_utils.get_param_value(Parameters.XES_OUTPUT_PATH, parameters, None)
+
+    dcr = playout_utils.prepare_graph(dcr)
+    chunks = get_chunks(dcr, no_traces, chunk_size, seed, max_trace_length, min_time_step, max_time_step,
+                        add_only_if_accepting, weights=weights, default_weight=default_weight)
+    chunk_results = playout_utils.run_chunks(playout_utils.playout_chunk, chunks, cores=cores)
+
+    return playout_utils.to_output(chunk_results, playout_utils.get_event_labels(dcr), case_id_key, activity_key,
+                                   timestamp_key, initial_timestamp, initial_case_id, case_arrival_time,
+                                   return_dataframe=return_dataframe, xes_output_path=xes_output_path)
+
+
+def apply(dcr, parameters: Optional[Dict[Union[str, Parameters], Any]] = None) -> Union[EventLog, Any, str]:
+    """
+    Do the playout of a DCR graph generating a log: at every step, one between the enabled events, waiting for the
+    next delay to expire, and (in an accepting marking) ending the trace is picked uniformly at random.
+    Time never passes beyond a pending deadline.
+
+    Parameters
+    -----------
+    dcr
+        DCR graph
+    parameters
+        Parameters of the algorithm:
+            Parameters.NO_TRACES -> Number of traces of the log to generate
+            Parameters.MAX_TRACE_LENGTH -> Maximum trace length
+            Parameters.INITIAL_TIMESTAMP -> Timestamp (from 1970) of the start of the first case
+            Parameters.INITIAL_CASE_ID -> Case id of the first case
+            Parameters.CASE_ARRIVAL_TIME -> Time (timedelta) between the start of two consecutive cases
+            Parameters.MIN_TIME_STEP, Parameters.MAX_TIME_STEP -> Range of the (uniformly distributed) time
+            elapsing before the execution of every event (default: 1 second)
+            Parameters.ADD_ONLY_IF_ACCEPTING -> Keeps only the traces ending in an accepting marking
+            Parameters.RANDOM_SEED -> Seed making the playout reproducible
+            Parameters.CORES -> Number of worker processes generating the traces (default: 1)
+            Parameters.CHUNK_SIZE -> Number of traces generated by a worker at a time
+            Parameters.RETURN_DATAFRAME -> Returns a dataframe instead of an EventLog
+            Parameters.XES_OUTPUT_PATH -> Writes the traces to this XES file while they are generated
+            (and returns the path)
+    """
+    return apply_playout(dcr, parameters=parameters)
@@ -0,0 +1,164 @@
+'''
+    This file is part of PM4Py (More Info: https://pm4py.fit.fraunhofer.de).
+
+    PM4Py is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    PM4Py is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with PM4Py.  If not, see <https://www.gnu.org/licenses/>.
+'''
+import sys
+from datetime import timedelta
+from enum import Enum
+from typing import Optional, Dict, Any, Union
+
+from pm4py.algo.simulation.playout.dcr import utils as playout_utils
+from pm4py.objects.log.obj import EventLog
+from pm4py.util import constants
+from pm4py.util import exec_utils
+from pm4py.util import xes_constants
+
+
+class Parameters(Enum):
+    ACTIVITY_KEY = constants.PARAMETER_CONSTANT_ACTIVITY_KEY
+    TIMESTAMP_KEY = constants.PARAMETER_CONSTANT_TIMESTAMP_KEY
+    CASE_ID_KEY = constants.PARAMETER_CONSTANT_CASEID_KEY
+    NO_TRACES = "noTraces"
+    MAX_TRACE_LENGTH = "maxTraceLength"
+    INITIAL_TIMESTAMP = "initial_timestamp"
+    INITIAL_CASE_ID = "initial_case_id"
+    CASE_ARRIVAL_TIME = "case_arrival_time"
+    TIME_STEP = "time_step"
+    CORES = "cores"
+    RETURN_DATAFRAME = "return_dataframe"
+    XES_OUTPUT_PATH = "xes_output_path"
+
+
+def get_state(marking, trace):
+    return (frozenset(marking['executed']), frozenset(marking['included']), frozenset(marking['pending']),
+            frozenset(marking['executedTime'].items()), frozenset(marking['pendingDeadline'].items()),
+            tuple(e for e, _ in trace))
+
+
+def explore(dcr, prefix, max_trace_length, time_step, no_traces):
+    """
+    Depth-first search of the accepting runs of the graph starting with the prefix (list of choices, as returned
+    by playout_utils.get_choices), with at most max_trace_length events. Every run is kept once per sequence of
+    events, with the timing of the first run found.
+
+    Returns
+    ------------
+    traces
+        List of runs (lists of (event, time elapsed since the start of the case)), at most no_traces
+    """
+    semantics, initial_marking = playout_utils.get_semantics(dcr)
+    traces = []
+    found = set()
+    visited = set()
+    to_visit = [(initial_marking, (), timedelta(0), list(prefix))]
+
+    while to_visit and len(traces) < no_traces:
+        marking, trace, elapsed, forced = to_visit.pop()
+        playout_utils.reset(semantics, marking)
+        state = get_state(marking, trace)
+        if state in visited:
+            continue
+        visited.add(state)
+
+        choices, deadline, delay = playout_utils.get_choices(semantics)
+        if forced:
+            choices = [c for c in choices if c == forced[0]]
+        for choice in reversed(choices):
+            if choice is playout_utils.STOP:
+                activities = tuple(e for e, _ in trace)
+                if activities not in found:
+                    found.add(activities)
+                    traces.append(list(trace))
+                continue
+            playout_utils.reset(semantics, marking)
+            if choice == playout_utils.WAIT:
+                semantics.time_step(delay)
+                to_visit.append((semantics.dcr['marking'], trace, elapsed + delay, forced[1:]))
+                continue
+            if len(trace) >= max_trace_length:
+                continue
+            step = time_step if deadline is None or time_step <= deadline else deadline
+            if step > timedelta(0):
+                semantics.time_step(step)
+            semantics.execute(choice)
+            to_visit.append((semantics.dcr['marking'], trace + ((choice, elapsed + step),), elapsed + step,
+                             forced[1:]))
+    return traces[:no_traces]
+
+
+def apply(dcr, parameters: Optional[Dict[Union[str, Parameters], Any]] = None) -> Union[EventLog, Any, str]:
+    """
+    Do the playout of a DCR graph generating a log with all its accepting runs with at most a given number of events
+    (extensive search). Waiting for a delay to expire is explored as a move of the run; the events are executed
+    a fixed time step after the previous move (never beyond a pending deadline).
+    The subtrees of the first moves are explored in parallel if more than one core is requested.
+
+    Parameters
+    -----------
+    dcr
+        DCR graph
+    parameters
+        Parameters of the algorithm:
+            Parameters.MAX_TRACE_LENGTH -> Maximum trace length (default: 10)
+            Parameters.NO_TRACES -> Maximum number of traces to return
+            Parameters.TIME_STEP -> Time (timedelta) between two consecutive events (default: 1 second)
+            Parameters.INITIAL_TIMESTAMP -> Timestamp (from 1970) of the start of the first case
+            Parameters.INITIAL_CASE_ID -> Case id of the first case
+            Parameters.CASE_ARRIVAL_TIME -> Time (timedelta) between the start of two consecutive cases
+            Parameters.CORES -> Number of worker processes (default: 1)
+            Parameters.RETURN_DATAFRAME -> Returns a dataframe instead of an EventLog
+            Parameters.XES_OUTPUT_PATH -> Writes the traces to this XES file (and returns the path)
+    """
+    if parameters is None:
+        parameters = {}
+
+    case_id_key = exec_utils.get_param_value(Parameters.CASE_ID_KEY, parameters, xes_constants.DEFAULT_TRACEID_KEY)
+    activity_key = exec_utils.get_param_value(Parameters.ACTIVITY_KEY, parameters, xes_constants.DEFAULT_NAME_KEY)
+    timestamp_key = exec_utils.get_param_value(Parameters.TIMESTAMP_KEY, parameters,
+                                               xes_constants.DEFAULT_TIMESTAMP_KEY)
+    no_traces = exec_utils.get_param_value(Parameters.NO_TRACES, parameters, sys.maxsize)
+    max_trace_length = exec_utils.get_param_value(Parameters.MAX_TRACE_LENGTH, parameters, 10)
+    initial_timestamp = exec_utils.get_param_value(Parameters.INITIAL_TIMESTAMP, parameters, 10000000)
+    initial_case_id = exec_utils.get_param_value(Parameters.INITIAL_CASE_ID, parameters, 0)
+    case_arrival_time = exec_utils.get_param_value(Parameters.CASE_ARRIVAL_TIME, parameters, timedelta(minutes=1))
+    time_step = exec_utils.get_param_value(Parameters.TIME_STEP, parameters, timedelta(seconds=1))
+    cores = exec_utils.get_param_value(Parameters.CORES, parameters, 1)
+    return_dataframe = exec_utils.get_param_value(Parameters.RETURN_DATAFRAME, parameters, False)
+    xes_output_path = exec_utils.get_param_value(Parameters.XES_OUTPUT_PATH, parameters, None)
+
+    dcr = playout_utils.prepare_graph(dcr)
+    if cores > 1:
+        semantics, _ = playout_utils.get_semantics(dcr)
+        prefixes = [[choice] for choice in playout_utils.get_choices(semantics)[0]]
+    else:
+        prefixes = [[]]
+    chunks = [(dcr, prefix, max_trace_length, time_step, no_traces) for prefix in prefixes]
+
+    def limit(chunk_results):
+        # the subtrees of waiting and of the events may contain the same sequences of events
+        found = set()
+        for traces in chunk_results:
+            res = []
+            for trace in traces:
+                activities = tuple(e for e, _ in trace)
+                if activities not in found and len(found) < no_traces:
+                    found.add(activities)
+                    res.append(trace)
+            yield res
+
+    chunk_results = limit(playout_utils.run_chunks(explore, chunks, cores=cores))
+    return playout_utils.to_output(chunk_results, playout_utils.get_event_labels(dcr), case_id_key, activity_key,
+                                   timestamp_key, initial_timestamp, initial_case_id, case_arrival_time,
+                                   return_dataframe=return_dataframe, xes_output_path=xes_output_path)
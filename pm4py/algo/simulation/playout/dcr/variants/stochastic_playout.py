@@ -0,0 +1,110 @@
+'''
+    This file is part of PM4Py (More Info: https://pm4py.fit.fraunhofer.de).
+
+    PM4Py is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    PM4Py is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with PM4Py.  If not, see <https://www.gnu.org/licenses/>.
+'''
+from enum import Enum
+from typing import Optional, Dict, Any, Union
+
+from pm4py.algo.simulation.playout.dcr import utils as playout_utils
+from pm4py.algo.simulation.playout.dcr.variants import basic_playout
+from pm4py.objects.log.obj import EventLog
+from pm4py.util import constants
+from pm4py.util import exec_utils
+from pm4py.util import xes_constants
+
+
+class Parameters(Enum):
+    ACTIVITY_KEY = constants.PARAMETER_CONSTANT_ACTIVITY_KEY
+    TIMESTAMP_KEY = constants.PARAMETER_CONSTANT_TIMESTAMP_KEY
+    CASE_ID_KEY = constants.PARAMETER_CONSTANT_CASEID_KEY
+    NO_TRACES = "noTraces"
+    MAX_TRACE_LENGTH = "maxTraceLength"
+    INITIAL_TIMESTAMP = "initial_timestamp"
+    INITIAL_CASE_ID = "initial_case_id"
+    CASE_ARRIVAL_TIME = "case_arrival_time"
+    MIN_TIME_STEP = "min_time_step"
+    MAX_TIME_STEP = "max_time_step"
+    ADD_ONLY_IF_ACCEPTING = "add_only_if_accepting"
+    RANDOM_SEED = "random_seed"
+    CORES = "cores"
+    CHUNK_SIZE = "chunk_size"
+    RETURN_DATAFRAME = "return_dataframe"
+    XES_OUTPUT_PATH = "xes_output_path"
+    LOG = "log"
+    STOCHASTIC_MAP = "stochastic_map"
+
+
+def get_map_from_log(log, parameters=None):
+    """
+    Stochastic map of the playout from a log: every activity is weighted by its number of occurrences,
+    ending a trace (playout_utils.STOP) by the number of cases
+    """
+    if parameters is None:
+        parameters = {}
+
+    import pm4py
+    activity_key = exec_utils.get_param_value(Parameters.ACTIVITY_KEY, parameters, xes_constants.DEFAULT_NAME_KEY)
+    case_id_key = exec_utils.get_param_value(Parameters.CASE_ID_KEY, parameters, constants.CASE_CONCEPT_NAME)
+    smap = dict(pm4py.get_event_attribute_values(log, activity_key, case_id_key=case_id_key))
+    smap[playout_utils.STOP] = len(pm4py.project_on_event_attribute(log, activity_key, case_id_key=case_id_key))
+    return smap
+
+
+def get_event_weights(dcr, smap):
+    """
+    Weights of the events of the graph from a stochastic map on the events or on their labels
+    """
+    labels = playout_utils.get_event_labels(dcr)
+    weights = {}
+    for key, weight in smap.items():
+        if key in labels or key is playout_utils.STOP or key == playout_utils.WAIT:
+            weights[key] = weight
+    for event, label in labels.items():
+        if event not in weights and label in smap:
+            weights[event] = smap[label]
+    return weights
+
+
+def apply(dcr, parameters: Optional[Dict[Union[str, Parameters], Any]] = None) -> Union[EventLog, Any, str]:
+    """
+    Do the playout of a DCR graph generating a log, picking at every step one of the enabled events with probability
+    proportional to its weight in the stochastic map.
+    Waiting for a delay to expire (and ending the trace, if not in the map) is weighted as the average event.
+
+    Parameters
+    -----------
+    dcr
+        DCR graph
+    parameters
+        Parameters of the algorithm (see basic_playout.apply), and:
+            Parameters.STOCHASTIC_MAP -> Weights of the events (or of their labels), playout_utils.WAIT and
+            playout_utils.STOP
+            Parameters.LOG -> Log from which the stochastic map is computed, if not provided
+    """
+    if parameters is None:
+        parameters = {}
+
+    smap = exec_utils.get_param_value(Parameters.STOCHASTIC_MAP, parameters, None)
+    log = exec_utils.get_param_value(Parameters.LOG, parameters, None)
+    if smap is None:
+        if log is None:
+            raise Exception("please provide at least one between stochastic map and log")
+        smap = get_map_from_log(log, parameters=parameters)
+
+    weights = get_event_weights(dcr, smap)
+    event_weights = [w for k, w in weights.items() if k is not playout_utils.STOP and k != playout_utils.WAIT]
+    default_weight = sum(event_weights) / len(event_weights) if event_weights else 1.0
+
+    return basic_playout.apply_playout(dcr, parameters=parameters, weights=weights, default_weight=default_weight)
@@ -37,13 +37,28 @@ def apply(log: Union[EventLog, pd.DataFrame], parameters: Optional[Dict[Union[st
     else:
         variants = get_variants_log.get_variants(log, parameters=parameters)
 
-    variants = list(variants)
+    return build_trie(variants)
 
+
+def build_trie(variants) -> Trie:
+    """
+    Builds the prefix tree of the given variants (sequences of activities): the node reached by a variant is final
+
+    Parameters
+    --------------
+    variants
+        Iterable of variants
+
+    Returns
+    --------------
+    root
+        Root of the trie
+    """
     root = Trie()
 
     for variant in variants:
         trie = root
-        for i, activity in enumerate(variant):
+        for activity in variant:
             match = False
             for c in trie.children:
                 if c.label == activity:
@@ -55,6 +70,6 @@ def apply(log: Union[EventLog, pd.DataFrame], parameters: Optional[Dict[Union[st
             node = Trie(label=activity, parent=trie, depth=trie.depth + 1)
             trie.children.append(node)
             trie = node
-            if i == len(variant) - 1:
-                trie.final = True
+        # also a variant that is the prefix of another one ends in a final node
+        trie.final = True
     return root
@@ -18,7 +18,7 @@ __doc__ = """
 The ``pm4py.conformance`` module contains the conformance checking algorithms implemented in ``pm4py``
 """
 
-from typing import List, Dict, Any, Union, Optional, Tuple, Set
+from typing import List, Dict, Any, Union, Optional, Tuple, Set, TYPE_CHECKING
 
 from pm4py.objects.log.obj import EventLog, Trace, Event, EventStream
 from pm4py.objects.petri_net.obj import PetriNet, Marking
@@ -30,9 +30,12 @@ from pm4py.util.pandas_utils import check_is_pandas_dataframe, check_pandas_data
 import pandas as pd
 import deprecation
 
+if TYPE_CHECKING:
+    from pm4py.algo.conformance.alignments.petri_net.algorithm import AlignmentsPool
+
 
 def conformance_diagnostics_token_based_replay(log: Union[EventLog, pd.DataFrame], petri_net: PetriNet, initial_marking: Marking,
-                                               final_marking: Marking, activity_key: str = "concept:name", timestamp_key: str = "time:timestamp", case_id_key: str = "case:concept:name", return_diagnostics_dataframe: bool = constants.DEFAULT_RETURN_DIAGNOSTICS_DATAFRAME, opt_parameters: Optional[Dict[Any, Any]] = None) -> List[Dict[str, Any]]:
+                                               final_marking: Marking, activity_key: str = "concept:name", timestamp_key: str = "time:timestamp", case_id_key: str = "case:concept:name", return_diagnostics_dataframe: bool = constants.DEFAULT_RETURN_DIAGNOSTICS_DATAFRAME, opt_parameters: Optional[Dict[Any, Any]] = None, multi_processing: bool = constants.ENABLE_MULTIPROCESSING_DEFAULT) -> List[Dict[str, Any]]:
     """
     Apply token-based replay for conformance checking analysis.
     The methods return the full token-based-replay diagnostics.
@@ -71,6 +74,7 @@ def conformance_diagnostics_token_based_replay(log: Union[EventLog, pd.DataFrame
         * cleaning_token_flood: decides if a cleaning of the token flood shall be operated
         * disable_variants: disable variants grouping
         * return_object_names: decides whether names instead of object pointers shall be returned
+    :param multi_processing: boolean value that enables the replay of the variants in a pool of worker processes
     :rtype: ``List[Dict[str, Any]]``
 
     .. code-block:: python3
@@ -99,15 +103,21 @@ def conformance_diagnostics_token_based_replay(log: Union[EventLog, pd.DataFrame
         properties[k] = v
 
     from pm4py.algo.conformance.tokenreplay import algorithm as token_replay
-    result = token_replay.apply(log, petri_net, initial_marking, final_marking, parameters=properties)
+    from pm4py.util import exec_utils
+    # the compiled replay gives the results of the token replay, except for the caches of the reduction attempts
+    variant = token_replay.Variants.COMPILED_TOKEN_REPLAY
+    if exec_utils.get_param_value(token_replay.Variants.TOKEN_REPLAY.value.Parameters.IS_REDUCTION, properties, False):
+        variant = token_replay.Variants.TOKEN_REPLAY
+    properties[token_replay.Variants.COMPILED_TOKEN_REPLAY.value.Parameters.MULTIPROCESSING] = multi_processing
+    result = token_replay.apply(log, petri_net, initial_marking, final_marking, parameters=properties, variant=variant)
 
     if return_diagnostics_dataframe:
-        return token_replay.get_diagnostics_dataframe(log, result, parameters=properties)
+        return token_replay.get_diagnostics_dataframe(log, result, parameters=properties, variant=variant)
 
     return result
 
 
-def conformance_diagnostics_alignments(log: Union[EventLog, pd.DataFrame], *args, multi_processing: bool = constants.ENABLE_MULTIPROCESSING_DEFAULT, activity_key: str = "concept:name", timestamp_key: str = "time:timestamp", case_id_key: str = "case:concept:name", variant_str : Optional[str] = None, return_diagnostics_dataframe: bool = constants.DEFAULT_RETURN_DIAGNOSTICS_DATAFRAME) -> List[Dict[str, Any]]:
+def conformance_diagnostics_alignments(log: Union[EventLog, pd.DataFrame], *args, multi_processing: bool = constants.ENABLE_MULTIPROCESSING_DEFAULT, activity_key: str = "concept:name", timestamp_key: str = "time:timestamp", case_id_key: str = "case:concept:name", variant_str : Optional[str] = None, return_diagnostics_dataframe: bool = constants.DEFAULT_RETURN_DIAGNOSTICS_DATAFRAME, max_states_trace: Optional[int] = None, pool: Optional["AlignmentsPool"] = None) -> List[Dict[str, Any]]:
     """
     Apply the alignments algorithm between a log and a process model.
     The methods return the full alignment diagnostics.
@@ -134,6 +144,8 @@ def conformance_diagnostics_alignments(log: Union[EventLog, pd.DataFrame], *args
     :param case_id_key: attribute to be used as case identifier
     :param variant_str: variant specification (for Petri net alignments)
     :param return_diagnostics_dataframe: if possible, returns a dataframe with the diagnostics (instead of the usual output)
+    :param max_states_trace: (for Petri net alignments with the state equation A* variant) maximum number of states kept in memory by the search of a trace. When it is reached, the trace gets an approximate alignment (flagged with ``approximate``, and counted in a warning). The other variants ignore it, with a warning
+    :param pool: (for Petri net alignments) ``AlignmentsPool`` created on the same Petri net, whose worker processes align the log (the net is not sent again to them, so the pool can be reused across calls). The variant of the pool is used if ``variant_str`` is not provided
     :rtype: ``List[Dict[str, Any]]``
 
     .. code-block:: python3
@@ -162,7 +174,14 @@ def conformance_diagnostics_alignments(log: Union[EventLog, pd.DataFrame], *args
             variant = alignments.DEFAULT_VARIANT
             if variant_str is not None:
                 variant = variant_str
-            if multi_processing:
+            elif pool is not None:
+                variant = pool.variant
+            if max_states_trace is not None:
+                properties[alignments.Parameters.PARAM_MAX_STATES_TRACE] = max_states_trace
+            if pool is not None:
+                properties[alignments.Parameters.POOL] = pool
+                result = alignments.apply_multiprocessing(log, args[0], args[1], args[2], parameters=properties, variant=variant)
+            elif multi_processing:
                 result = alignments.apply_multiprocessing(log, args[0], args[1], args[2], parameters=properties, variant=variant)
             else:
                 result = alignments.apply(log, args[0], args[1], args[2], parameters=properties, variant=variant)
@@ -730,6 +749,51 @@ def conformance_declare(log: Union[EventLog, pd.DataFrame], declare_model: Dict[
     return result
 
 
+def conformance_dcr(log: Union[EventLog, pd.DataFrame], dcr_graph: Dict[str, Any], activity_key: str = "concept:name", timestamp_key: str = "time:timestamp", case_id_key: str = "case:concept:name", return_diagnostics_dataframe: bool = constants.DEFAULT_RETURN_DIAGNOSTICS_DATAFRAME) -> List[Dict[str, Any]]:
+    """
+    Applies rule-based conformance checking against a DCR graph.
+    For every case, all the violated relations (condition, milestone, exclusion, response, delay, deadline) are reported.
+
+    :param log: event log
+    :param dcr_graph: DCR graph
+    :param activity_key: attribute to be used for the activity
+    :param timestamp_key: attribute to be used for the timestamp
+    :param case_id_key: attribute to be used as case identifier
+    :param return_diagnostics_dataframe: if possible, returns a dataframe with the diagnostics (instead of the usual output)
+    :rtype: ``List[Dict[str, Any]]``
+
+    .. code-block:: python3
+
+        import pm4py
+        from pm4py.algo.discovery.dcr_discover import algorithm as dcr_discover
+
+        log = pm4py.read_xes("C:/receipt.xes")
+        dcr_graph, _ = dcr_discover.apply(log)
+        conf_result = pm4py.conformance_dcr(log, dcr_graph)
+    """
+    if type(log) not in [pd.DataFrame, EventLog, EventStream]: raise Exception(
+        "the method can be applied only to a traditional event log!")
+    __event_log_deprecation_warning(log)
+
+    if check_is_pandas_dataframe(log):
+        check_pandas_dataframe_columns(log, activity_key=activity_key, timestamp_key=timestamp_key,
+                                       case_id_key=case_id_key)
+
+    if return_diagnostics_dataframe:
+        log = convert_to_event_log(log, case_id_key=case_id_key)
+        case_id_key = None
+
+    properties = get_properties(log, activity_key=activity_key, timestamp_key=timestamp_key, case_id_key=case_id_key)
+
+    from pm4py.algo.conformance.dcr import algorithm as dcr_conformance
+    result = dcr_conformance.apply(log, dcr_graph, parameters=properties)
+
+    if return_diagnostics_dataframe:
+        return dcr_conformance.get_diagnostics_dataframe(log, result, parameters=properties)
+
+    return result
+
+
 def conformance_log_skeleton(log: Union[EventLog, pd.DataFrame], log_skeleton: Dict[str, Any], activity_key: str = "concept:name", timestamp_key: str = "time:timestamp", case_id_key: str = "case:concept:name", return_diagnostics_dataframe: bool = constants.DEFAULT_RETURN_DIAGNOSTICS_DATAFRAME) -> List[Set[Any]]:
     """
     Performs conformance checking using the log skeleton
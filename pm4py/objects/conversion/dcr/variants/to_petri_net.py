@@ -1,24 +1,34 @@
 import os
+import warnings
 
 from pm4py.objects.petri_net.obj import *
+from pm4py.objects.petri_net import properties
 from pm4py.objects.petri_net.utils import petri_utils as pn_utils
 from pm4py.objects.petri_net.exporter import exporter as pnml_exporter
+from pm4py.objects.dcr.obj import to_dcr_dict
 
 from pm4py.objects.conversion.dcr.variants.to_petri_net_submodules import exceptional_cases, single_relations, preoptimizer, utils
+from pm4py.objects.conversion.dcr.variants.to_petri_net_submodules import fragments as relation_fragments
 
 
 class Dcr2PetriNet(object):
 
-    def __init__(self, preoptimize=True, postoptimize=True, map_unexecutable_events=False, debug=False) -> None:
+    def __init__(self, preoptimize=True, postoptimize=True, map_unexecutable_events=False, debug=False,
+                 reachability_max_states=10000) -> None:
+        '''
+        reachability_max_states: maximum number of markings of the DCR graph explored for the pre and post
+        optimization (None for no limit); above it, the optimizations that need the full state space are skipped
+        '''
         self.in_t_types = ['event', 'init', 'initpend', 'pend']
         self.helper_struct = {}
         self.preoptimize = preoptimize
         self.postoptimize = postoptimize
         self.map_unexecutable_events = map_unexecutable_events
         self.preoptimizer = preoptimizer.Preoptimizer()
-        self.transitions = {}
         self.mapping_exceptions = None
         self.reachability_timeout = None
+        self.reachability_max_states = reachability_max_states
+        self.state_space = None
         self.print_steps = debug
         self.debug = debug
 
@@ -35,10 +45,6 @@ class Dcr2PetriNet(object):
             self.helper_struct[event]['trans_group_index'] = 0
             self.helper_struct[event]['t_types'] = self.in_t_types
 
-            self.transitions[event] = {}
-            for event_prime in G['events']:
-                self.transitions[event][event_prime] = []
-
     def create_event_pattern_places(self, event, G, tapn, m) -> (PetriNet, Marking):
         default_make_included = True
         default_make_pend = True
@@ -100,75 +106,81 @@ class Dcr2PetriNet(object):
         self.helper_struct[event]['transitions'].extend(ts)
         return tapn, m
 
+    def get_state_space(self, G):
+        '''
+        Reachable markings of the DCR graph, restricted to the relations that are mapped to the petri net
+        '''
+        if self.state_space is None:
+            from pm4py.objects.dcr.state_space import DcrStateSpace
+            max_elab_time = 2 * 60 * 60  # 2 hours
+            if self.reachability_timeout:
+                max_elab_time = self.reachability_timeout
+            G_mapped = dict(G)
+            if self.basic:
+                G_mapped['milestonesFor'] = {}
+                G_mapped['noResponseTo'] = {}
+            self.state_space = DcrStateSpace(G_mapped, max_states=self.reachability_max_states,
+                                             max_elab_time=max_elab_time)
+        return self.state_space
+
     def post_optimize_petri_net_reachability_graph(self, tapn, m, G=None) -> PetriNet:
-        from pm4py.objects.petri_net.utils import reachability_graph
-        # from pm4py.visualization.transition_system import visualizer as ts_visualizer
-        from pm4py.objects.petri_net.transport_invariant import semantics as tapn_semantics
-        max_elab_time = 2 * 60 * 60  # 2 hours
-        if self.reachability_timeout:
-            max_elab_time = self.reachability_timeout
-        trans_sys = reachability_graph.construct_reachability_graph(tapn, m, use_trans_name=True,
-                        parameters={
-                            'petri_semantics': tapn_semantics.TransportInvariantSemantics(),
-                            'max_elab_time': max_elab_time
-                        })
-
-        fired_transitions = set()
-
-        for transition in trans_sys.transitions:
-            fired_transitions.add(transition.name)
-
-        ts_to_remove = set()
+        '''
+        Removes the transitions that can never fire and the places that can never be marked.
+        Every place of the net is a predicate on the marking of an event of the DCR graph, so instead of building
+        the reachability graph of the net, the guards of the transitions (the input arcs, inhibitor arcs requiring
+        an empty place) are evaluated on the reachable markings of the DCR graph.
+        The net is left unchanged if the state space cannot be fully explored within the budget.
+        '''
+        state_space = self.get_state_space(G)
+        if not state_space.complete:
+            warnings.warn('the state space of the DCR graph was not fully explored within the reachability '
+                          'budget (reachability_max_states=%s), skipping the post optimization'
+                          % self.reachability_max_states)
+            return tapn
+        n = state_space.n
+        place_bit = {}
+        for event, event_id in state_space.graph.event_ids.items():
+            if event in self.helper_struct:
+                for offset, place_type in enumerate(['executed', 'included', 'pending', 'pending_excluded']):
+                    place = self.helper_struct[event]['places'][place_type]
+                    if place is not None:
+                        place_bit[place] = 1 << (event_id + offset * n)
+        if not tapn.places.issubset(place_bit):
+            warnings.warn('some places are not mapped to the DCR graph, skipping the post optimization')
+            return tapn
+
+        # guard of a transition: places that must be marked and places that must be empty
+        guards = {}
         for t in tapn.transitions:
-            if t.name not in fired_transitions:
-                ts_to_remove.add(t)
-        for t in ts_to_remove:
-            tapn = pn_utils.remove_transition(tapn, t)
-
-        changed_places = set()
-        for state_list in trans_sys.states:
-            for state in state_list.name:
-                changed_places.add(state)
-
-        parallel_places = set()
-        # places_to_rename = {}
-        ps_to_remove = tapn.places.difference(changed_places)
-        # if G:
-        #     for event in G['events']:
-        #         for type, event_place in self.helper_struct[event]['places'].items():
-        #             for type_prime, event_place_prime in self.helper_struct[event]['places'].items():
-        #                 if event_place and event_place_prime and event_place.name != event_place_prime.name and \
-        #                         event_place not in parallel_places:
-        #                     is_parallel = False
-        #                     ep_ins = event_place.in_arcs
-        #                     epp_ins = event_place_prime.in_arcs
-        #                     ep_outs = event_place.out_arcs
-        #                     epp_outs = event_place_prime.out_arcs
-        #                     if len(ep_ins) == len(epp_ins) and len(ep_outs) == len(epp_outs):
-        #                         ep_sources = set()
-        #                         epp_sources = set()
-        #                         for ep_in in ep_ins:
-        #                             ep_sources.add(ep_in.source)
-        #                         for epp_in in epp_ins:
-        #                             epp_sources.add(epp_in.source)
-        #                         ep_targets = set()
-        #                         epp_targets = set()
-        #                         for ep_out in ep_outs:
-        #                             ep_targets.add(ep_out.target)
-        #                         for epp_out in epp_outs:
-        #                             epp_targets.add(epp_out.target)
-        #                         if ep_sources == epp_sources and ep_targets == epp_targets:
-        #                             is_parallel = True
-        #                     if is_parallel and m[event_place] == m[event_place_prime]:
-        #                         parallel_places.add(event_place_prime)
-        #                         places_to_rename[event_place] = f'{type_prime}_{event_place.name}'
-        ps_to_remove = ps_to_remove.union(parallel_places)
+            marked = 0
+            empty = 0
+            for a in t.in_arcs:
+                if a.properties.get(properties.ARCTYPE) == properties.INHIBITOR_ARC:
+                    empty |= place_bit[a.source]
+                else:
+                    marked |= place_bit[a.source]
+            guards.setdefault((marked, empty), []).append(t)
+
+        reachable_markings = set(state_space.place_bits(state) for state in state_space.states)
+        changed_places = 0
+        for marking in reachable_markings:
+            changed_places |= marking
+        fired_guards = set()
+        for marked, empty in guards:
+            for marking in reachable_markings:
+                if marking & marked == marked and not marking & empty:
+                    fired_guards.add((marked, empty))
+                    break
+
+        for guard, ts in guards.items():
+            if guard not in fired_guards:
+                for t in ts:
+                    tapn = pn_utils.remove_transition(tapn, t)
+
+        ps_to_remove = set(p for p in tapn.places if not place_bit[p] & changed_places)
         for p in ps_to_remove:
             tapn = pn_utils.remove_place(tapn, p)
 
-        # for p, name in places_to_rename.items():
-        #     p.name = name
-
         return tapn
 
     def export_debug_net(self, tapn, m, path, step, pn_export_format):
@@ -176,35 +188,33 @@ class Dcr2PetriNet(object):
         debug_save_path = f'{path_without_extension}_{step}{extens}'
         pnml_exporter.apply(tapn, m, debug_save_path, variant=pn_export_format, parameters={'isTimed': self.timed})
 
-    def dcr2tapn(self, G, tapn_path) -> (PetriNet, Marking):
-        self.basic = True  # True (basic) = inc,ex,resp,cond | False = basic + no-resp,mil
-        self.timed = False  # False = untimed | True = timed cond (delay) and resp (deadline)
-        self.initialize_helper_struct(G)
-        self.mapping_exceptions = exceptional_cases.ExceptionalCases(self.helper_struct)
-        self.preoptimizer = preoptimizer.Preoptimizer()
+    def get_relations_by_event(self, G):
+        '''
+        The relations mapped from every event (the single relations, then the exceptional cases), in the order in which
+        the patterns are mapped by the stepwise mapping
+        '''
+        relations = {}
+        for event in G['events']:
+            relations[event] = []
+        mapped_relations = ['conditionsFor', 'includesTo', 'excludesTo', 'responseTo']
+        if not self.basic:
+            mapped_relations = ['conditionsFor', 'milestonesFor', 'includesTo', 'excludesTo', 'responseTo',
+                                'noResponseTo']
+        for relation in mapped_relations:
+            for event in G[relation]:
+                for event_prime in G[relation][event]:
+                    relations[event].append((relation, event_prime))
+        for exception, pairs in self.mapping_exceptions.exceptions.items():
+            for event, event_prime in pairs:
+                relations[event].append((exception, event_prime))
+        return relations
+
+    def map_relations_stepwise(self, G, tapn, m, tapn_path, pn_export_format) -> (PetriNet, Marking):
+        '''
+        Maps the relations one pattern at a time on the growing net (in debug mode the net is exported after every
+        step)
+        '''
         induction_step = 0
-        pn_export_format = pnml_exporter.TAPN
-        if tapn_path.endswith("pnml"):
-            pn_export_format = pnml_exporter.PNML
-
-        tapn = PetriNet("Dcr2Tapn")
-        m = Marking()
-        # pre-optimize mapping based on DCR graph behaviour
-        if self.preoptimize:
-            if self.print_steps:
-                print('[i] preoptimizing')
-            self.preoptimizer.pre_optimize_based_on_dcr_behaviour(G)
-            if not self.map_unexecutable_events:
-                G = self.preoptimizer.remove_un_executable_events_from_dcr(G)
-
-        # including the handling of exception cases from the induction step
-        G_old = deepcopy(G)
-        G = self.mapping_exceptions.filter_exceptional_cases(G)
-        if self.preoptimize:
-            if self.print_steps:
-                print('[i] finding exceptional behaviour')
-            self.preoptimizer.preoptimize_based_on_exceptional_cases(G, self.mapping_exceptions)
-
         # map events
         if self.print_steps:
             print('[i] mapping events')
@@ -272,6 +282,62 @@ class Dcr2PetriNet(object):
             self.export_debug_net(tapn, m, tapn_path, f'{induction_step}exceptions', pn_export_format)
             induction_step += 1
 
+        return tapn, m
+
+    def dcr2tapn(self, G, tapn_path) -> (PetriNet, Marking):
+        # the mapping modifies the graph (e.g. removing the events that cannot be executed)
+        G = to_dcr_dict(G)
+        self.basic = True  # True (basic) = inc,ex,resp,cond | False = basic + no-resp,mil
+        self.timed = False  # False = untimed | True = timed cond (delay) and resp (deadline)
+        self.initialize_helper_struct(G)
+        self.mapping_exceptions = exceptional_cases.ExceptionalCases(self.helper_struct)
+        self.preoptimizer = preoptimizer.Preoptimizer()
+        self.state_space = None
+        pn_export_format = pnml_exporter.TAPN
+        if tapn_path.endswith("pnml"):
+            pn_export_format = pnml_exporter.PNML
+
+        tapn = PetriNet("Dcr2Tapn")
+        m = Marking()
+        # pre-optimize mapping based on DCR graph behaviour
+        if self.preoptimize:
+            if self.print_steps:
+                print('[i] preoptimizing')
+            state_space = self.get_state_space(G)
+            if not state_space.complete:
+                warnings.warn('the state space of the DCR graph was not fully explored within the reachability '
+                              'budget (reachability_max_states=%s), skipping the removal of the events that are '
+                              'never included' % self.reachability_max_states)
+            self.preoptimizer.pre_optimize_based_on_dcr_behaviour(G, state_space)
+            if not self.map_unexecutable_events:
+                G = self.preoptimizer.remove_un_executable_events_from_dcr(G)
+
+        # the state space is explored on the graph before the exceptional cases are removed from it
+        if self.postoptimize:
+            self.get_state_space(G)
+        # including the handling of exception cases from the induction step
+        G = self.mapping_exceptions.filter_exceptional_cases(G)
+        if self.preoptimize:
+            if self.print_steps:
+                print('[i] finding exceptional behaviour')
+            self.preoptimizer.preoptimize_based_on_exceptional_cases(G, self.mapping_exceptions)
+
+        if self.debug:
+            tapn, m = self.map_relations_stepwise(G, tapn, m, tapn_path, pn_export_format)
+        else:
+            # map events
+            if self.print_steps:
+                print('[i] mapping events')
+            for event in G['events']:
+                tapn, m = self.create_event_pattern_places(event, G, tapn, m)
+            # map the relations (including the exceptional cases) of every event in a single pass
+            if self.print_steps:
+                print('[i] map relations')
+            fragments = relation_fragments.RelationFragments(self.helper_struct, self.mapping_exceptions)
+            relations = self.get_relations_by_event(G)
+            for event in G['events']:
+                tapn, _ = fragments.create_event_transitions(event, relations[event], tapn)
+
         # post-optimize based on the petri net reachability graph
         if self.postoptimize:
             if self.print_steps:
@@ -0,0 +1,130 @@
+from pm4py.objects.petri_net.obj import *
+from pm4py.objects.petri_net.utils import petri_utils as pn_utils
+from pm4py.objects.dcr.obj import Relations
+
+from pm4py.objects.conversion.dcr.variants.to_petri_net_submodules import exceptional_cases, single_relations, utils
+
+PLACE_TYPES = ['included', 'pending', 'pending_excluded', 'executed']
+
+SINGLE_RELATION_PATTERNS = {
+    Relations.C.value: 'create_condition_pattern',
+    Relations.M.value: 'create_milestone_pattern',
+    Relations.I.value: 'create_include_pattern',
+    Relations.E.value: 'create_exclude_pattern',
+    Relations.R.value: 'create_response_pattern',
+    Relations.N.value: 'create_no_response_pattern',
+}
+
+
+class RelationFragments(object):
+    '''
+    Pattern based mapping of the relations of an event.
+    A relation pattern between event and event_prime makes copies of the transitions of event (copy 0 being the
+    existing transitions) and gives every copy its own arcs to the places of event_prime. The transitions of an event
+    are therefore the product of the copies of the patterns of its relations, and a pattern is described by a fragment:
+    the list of its copies, each copy being the list of arcs (place type of event_prime, towards the place, arc type).
+    The arcs only depend on the relation and on the places of event_prime (its marking signature), so a fragment is
+    derived once per relation and signature by mapping the pattern on a probe net, and cached. The transitions of an
+    event are then created in a single pass, without copying the arcs of the existing transitions for every relation.
+    '''
+
+    def __init__(self, helper_struct, mapping_exceptions) -> None:
+        self.helper_struct = helper_struct
+        self.mapping_exceptions = mapping_exceptions
+        self.fragments = {}
+
+    @staticmethod
+    def get_signature(places):
+        return tuple(places[place_type] is not None for place_type in PLACE_TYPES)
+
+    def get_fragment(self, relation, event_prime):
+        '''
+        relation: name of a single relation or frozenset of relations (exceptional case)
+        '''
+        key = (relation, self.get_signature(self.helper_struct[event_prime]['places']))
+        if key not in self.fragments:
+            self.fragments[key] = self.create_fragment(relation, key[1])
+        return self.fragments[key]
+
+    @staticmethod
+    def create_fragment(relation, signature):
+        '''
+        Maps the pattern of the relation from an event without places (a single transition without arcs) to an event
+        with the places of the signature, the arcs of the resulting transitions are the copies of the fragment
+        '''
+        helper_struct = {}
+        for event in ['event', 'event_prime']:
+            helper_struct[event] = {}
+            helper_struct[event]['places'] = {}
+            for place_type in PLACE_TYPES:
+                helper_struct[event]['places'][place_type] = None
+            helper_struct[event]['transitions'] = []
+            helper_struct[event]['trans_group_index'] = 0
+            helper_struct[event]['t_types'] = ['event']
+        place_types = {}
+        for place_type, has_place in zip(PLACE_TYPES, signature):
+            if has_place:
+                place = PetriNet.Place(place_type)
+                helper_struct['event_prime']['places'][place_type] = place
+                place_types[place] = place_type
+
+        probe = PetriNet('probe')
+        mapping_exceptions = exceptional_cases.ExceptionalCases(helper_struct)
+        probe, ts = utils.create_event_pattern_transitions_and_arcs(probe, 'event', helper_struct, mapping_exceptions)
+        helper_struct['event']['transitions'].extend(ts)
+        if isinstance(relation, frozenset):
+            mapping_exceptions.exceptions[relation].add(('event', 'event_prime'))
+            probe = mapping_exceptions.apply_exceptions[relation](probe)
+        else:
+            sr = single_relations.SingleRelations(helper_struct, mapping_exceptions)
+            probe = getattr(sr, SINGLE_RELATION_PATTERNS[relation])('event', 'event_prime', probe)
+
+        fragment = []
+        for t in helper_struct['event']['transitions']:
+            arcs = []
+            for arc in t.in_arcs:
+                arcs.append((place_types[arc.source], False, arc.properties.get('arctype')))
+            for arc in t.out_arcs:
+                arcs.append((place_types[arc.target], True, arc.properties.get('arctype')))
+            fragment.append(arcs)
+        return fragment
+
+    def create_event_transitions(self, event, relations, tapn) -> (PetriNet, list):
+        '''
+        Creates all the transitions of an event and their arcs
+
+        Parameters
+        ----------
+        event
+            the event
+        relations
+            list of (relation, event_prime) in the order in which the patterns are mapped
+        tapn
+            the petri net, with the places of all the events
+
+        Returns
+        -------
+        the petri net and the transitions of the event
+        '''
+        fragments = []
+        for relation, event_prime in relations:
+            fragments.append((self.get_fragment(relation, event_prime), self.helper_struct[event_prime]['places']))
+        # a group of transitions (one for each transition type) for every combination of copies
+        groups = [()]
+        for fragment, _ in fragments:
+            groups = [group + (copy,) for copy in range(len(fragment)) for group in groups]
+
+        transitions = []
+        for group in groups:
+            tapn, ts = utils.create_event_pattern_transitions_and_arcs(tapn, event, self.helper_struct,
+                                                                       self.mapping_exceptions)
+            for t in ts:
+                for (fragment, places), copy in zip(fragments, group):
+                    for place_type, to_place, arc_type in fragment[copy]:
+                        if to_place:
+                            pn_utils.add_arc_from_to(t, places[place_type], tapn, type=arc_type)
+                        else:
+                            pn_utils.add_arc_from_to(places[place_type], t, tapn, type=arc_type)
+            transitions.extend(ts)
+        self.helper_struct[event]['transitions'].extend(transitions)
+        return tapn, transitions
@@ -7,7 +7,11 @@ class Preoptimizer(object):
     need_pending_excluded_place = set()
     un_executable_events = set()
 
-    def pre_optimize_based_on_dcr_behaviour(self, G):
+    def pre_optimize_based_on_dcr_behaviour(self, G, state_space=None):
+        '''
+        state_space: (optional) DcrStateSpace of G, if fully explored the events that are never included in
+        a reachable marking are also considered un-executable
+        '''
         need_pending_excluded_place = set()
 
         inclusion_events = set()
@@ -47,6 +51,8 @@ class Preoptimizer(object):
         self.need_executed_place = need_executed_place
         self.need_pending_place = need_pending_place
         self.need_pending_excluded_place = need_pending_excluded_place
+        if state_space is not None and state_space.complete:
+            unexecutable_events = unexecutable_events.union(state_space.never_included_events())
         self.un_executable_events = unexecutable_events
 
     def preoptimize_based_on_exceptional_cases(self,G, exceptional_cases):
@@ -5,11 +5,13 @@ import numpy as np
 from pm4py.objects.petri_net.obj import *
 from pm4py.objects.petri_net.utils import petri_utils as pn_utils
 from pm4py.objects.petri_net.exporter import exporter as pnml_exporter
+from pm4py.objects.dcr.obj import to_dcr_dict
 
 from pm4py.objects.conversion.dcr.variants.to_timed_arc_petri_net_submodules import (timed_exceptional_cases,
                                                                                      timed_single_relations,
                                                                                      timed_preoptimizer,
-                                                                                     timed_utils)
+                                                                                     timed_utils,
+                                                                                     timed_fragments)
 
 
 class Dcr2TimedArcPetri(object):
@@ -21,7 +23,6 @@ class Dcr2TimedArcPetri(object):
         self.postoptimize = postoptimize
         self.map_unexecutable_events = map_unexecutable_events
         self.preoptimizer = timed_preoptimizer.TimedPreoptimizer()
-        self.transitions = {}
         self.helper_struct['pend_matrix'] = {}
         self.helper_struct['pend_exc_matrix'] = {}
         self.mapping_exceptions = None
@@ -43,11 +44,9 @@ class Dcr2TimedArcPetri(object):
             self.helper_struct[event]['pending_pairs'] = {}
             self.helper_struct[event]['trans_group_index'] = 0
 
-            self.transitions[event] = {}
             self.helper_struct['pend_matrix'][event] = {}
             self.helper_struct['pend_exc_matrix'][event] = {}
             for event_prime in G['events']:
-                self.transitions[event][event_prime] = []
                 self.helper_struct['pend_matrix'][event][event_prime] = None
                 self.helper_struct['pend_exc_matrix'][event][event_prime] = None
 
@@ -251,35 +250,33 @@ class Dcr2TimedArcPetri(object):
         debug_save_path = f'{path_without_extension}_{step}{extens}'
         pnml_exporter.apply(tapn, m, debug_save_path, variant=pn_export_format, parameters={'isTimed': self.timed})
 
-    def dcr2tapn(self, G, tapn_path) -> (PetriNet, Marking):
-        self.basic = False  # True (basic) = inc,ex,resp,cond | False = basic + no-resp,mil
-        self.timed = True  # False = untimed | True = timed cond (delay) and resp (deadline)
-        self.transport_idx = 0
-        self.initialize_helper_struct(G)
-        self.mapping_exceptions = timed_exceptional_cases.TimedExceptionalCases(self.helper_struct)
-        self.preoptimizer = timed_preoptimizer.TimedPreoptimizer()
+    def get_relations_by_event(self, G):
+        '''
+        The relations mapped from every event (the single relations, then the exceptional cases), in the order in which
+        the patterns are mapped by the stepwise mapping
+        '''
+        relations = {}
+        for event in G['events']:
+            relations[event] = []
+        mapped_relations = ['conditionsFor', 'includesTo', 'excludesTo', 'responseTo']
+        if not self.basic:
+            mapped_relations = ['conditionsFor', 'milestonesFor', 'includesTo', 'excludesTo', 'responseTo',
+                                'noResponseTo']
+        for relation in mapped_relations:
+            for event in G[relation]:
+                for event_prime in G[relation][event]:
+                    relations[event].append((relation, event_prime))
+        for exception, pairs in self.mapping_exceptions.exceptions.items():
+            for event, event_prime in pairs:
+                relations[event].append((exception, event_prime))
+        return relations
+
+    def map_relations_stepwise(self, G, tapn, m, tapn_path, pn_export_format) -> (PetriNet, Marking):
+        '''
+        Maps the relations one pattern at a time on the growing net (in debug mode the net is exported after every
+        step)
+        '''
         induction_step = 0
-        pn_export_format = pnml_exporter.TAPN
-        if tapn_path.endswith("pnml"):
-            pn_export_format = pnml_exporter.PNML
-
-        tapn = PetriNet("Dcr2Tapn")
-        m = Marking()
-        # pre-optimize mapping based on DCR graph behaviour
-        if self.preoptimize:
-            if self.print_steps:
-                print('[i] preoptimizing')
-            self.preoptimizer.pre_optimize_based_on_dcr_behaviour(G)
-            if not self.map_unexecutable_events:
-                G = self.preoptimizer.remove_un_executable_events_from_dcr(G)
-
-        # including the handling of exception cases from the induction step
-        G = self.mapping_exceptions.filter_exceptional_cases(G)
-        if self.preoptimize:
-            if self.print_steps:
-                print('[i] finding exceptional behaviour')
-            self.preoptimizer.preoptimize_based_on_exceptional_cases(G, self.mapping_exceptions)
-
         # map events
         if self.print_steps:
             print('[i] mapping events')
@@ -345,6 +342,54 @@ class Dcr2TimedArcPetri(object):
             print('[i] handle all relation exceptions')
         tapn = self.mapping_exceptions.map_exceptional_cases_between_events(tapn, m)
 
+        return tapn, m
+
+    def dcr2tapn(self, G, tapn_path) -> (PetriNet, Marking):
+        # the mapping modifies the graph (e.g. removing the events that cannot be executed)
+        G = to_dcr_dict(G)
+        self.basic = False  # True (basic) = inc,ex,resp,cond | False = basic + no-resp,mil
+        self.timed = True  # False = untimed | True = timed cond (delay) and resp (deadline)
+        self.transport_idx = 0
+        self.initialize_helper_struct(G)
+        self.mapping_exceptions = timed_exceptional_cases.TimedExceptionalCases(self.helper_struct)
+        self.preoptimizer = timed_preoptimizer.TimedPreoptimizer()
+        pn_export_format = pnml_exporter.TAPN
+        if tapn_path.endswith("pnml"):
+            pn_export_format = pnml_exporter.PNML
+
+        tapn = PetriNet("Dcr2Tapn")
+        m = Marking()
+        # pre-optimize mapping based on DCR graph behaviour
+        if self.preoptimize:
+            if self.print_steps:
+                print('[i] preoptimizing')
+            self.preoptimizer.pre_optimize_based_on_dcr_behaviour(G)
+            if not self.map_unexecutable_events:
+                G = self.preoptimizer.remove_un_executable_events_from_dcr(G)
+
+        # including the handling of exception cases from the induction step
+        G = self.mapping_exceptions.filter_exceptional_cases(G)
+        if self.preoptimize:
+            if self.print_steps:
+                print('[i] finding exceptional behaviour')
+            self.preoptimizer.preoptimize_based_on_exceptional_cases(G, self.mapping_exceptions)
+
+        if self.debug:
+            tapn, m = self.map_relations_stepwise(G, tapn, m, tapn_path, pn_export_format)
+        else:
+            # map events
+            if self.print_steps:
+                print('[i] mapping events')
+            for event in G['events']:
+                tapn, m = self.create_event_pattern_places(event, G, tapn, m)
+            # map the relations (including the exceptional cases) of every event in a single pass
+            if self.print_steps:
+                print('[i] map relations')
+            fragments = timed_fragments.TimedRelationFragments(self.helper_struct, self.mapping_exceptions)
+            relations = self.get_relations_by_event(G)
+            for event in G['events']:
+                tapn, _ = fragments.create_event_transitions(event, relations[event], tapn)
+
         # post-optimize based on the petri net reachability graph
         if self.postoptimize:
             if self.print_steps:
@@ -87,8 +87,14 @@ class TimedExceptionalCases(object):
         self.apply_exceptions[frozenset([C, M])] = self.create_exception_condition_milestone_pattern
 
     def filter_exceptional_cases(self, G):
+        events = set(G['events'])
         for e in G['events']:
-            for e_prime in G['events']:
+            # only the pairs of events with at least one relation between them can be exceptional cases
+            related_events = set()
+            for rel in self.all_relations:
+                if e in G[rel]:
+                    related_events.update(G[rel][e])
+            for e_prime in related_events.intersection(events):
                 if e == e_prime:
                     # same event multiple self relations
                     if (e in G['responseTo'] and e_prime in G['responseTo'][e]) and (
@@ -0,0 +1,179 @@
+from pm4py.objects.petri_net.obj import *
+from pm4py.objects.petri_net.utils import petri_utils as pn_utils
+from pm4py.objects.dcr.obj import Relations
+
+from pm4py.objects.conversion.dcr.variants.to_timed_arc_petri_net_submodules import (timed_exceptional_cases,
+                                                                                     timed_single_relations,
+                                                                                     timed_utils)
+
+SINGLE_RELATION_PATTERNS = {
+    Relations.C.value: 'create_condition_pattern',
+    Relations.M.value: 'create_milestone_pattern',
+    Relations.I.value: 'create_include_pattern',
+    Relations.E.value: 'create_exclude_pattern',
+    Relations.R.value: 'create_response_pattern',
+    Relations.N.value: 'create_no_response_pattern',
+}
+
+
+class TimedRelationFragments(object):
+    '''
+    Pattern based mapping of the relations of an event to a timed arc petri net.
+    As in the untimed mapping, the transitions of an event are the product of the copies of the fragments of its
+    relations, a fragment being the list of copies of a relation pattern with the arcs each copy adds.
+    In the timed mapping the arcs also depend on the pending places of event_prime (one for each event it is a
+    response to), on the pending places owned by the event and on the delay of the condition, so the fragments are
+    cached by relation, event_prime, owned pending places and delay. A fragment is derived by mapping the pattern from
+    a probe event without places, the arcs to the places of event_prime are removed from the places afterwards.
+    Transport arcs get a fresh transport index for every transition they are added to.
+    The transitions of an event can only be assembled when every group of transitions has one transition per
+    transition type (the event has at most one pending place), the relations of the other events are mapped one
+    pattern at a time.
+    '''
+
+    def __init__(self, helper_struct, mapping_exceptions) -> None:
+        self.helper_struct = helper_struct
+        self.mapping_exceptions = mapping_exceptions
+        self.fragments = {}
+
+    def get_delay(self, event, event_prime):
+        G = self.mapping_exceptions.G
+        if event in G['conditionsForDelays'] and event_prime in G['conditionsForDelays'][event]:
+            return G['conditionsForDelays'][event][event_prime]
+        return None
+
+    def get_fragment(self, relation, event, event_prime):
+        '''
+        relation: name of a single relation or frozenset of relations (exceptional case)
+        '''
+        key = (relation, event_prime, self.helper_struct['pend_matrix'][event_prime][event],
+               self.helper_struct['pend_exc_matrix'][event_prime][event], self.get_delay(event, event_prime))
+        if key not in self.fragments:
+            self.fragments[key] = self.create_fragment(relation, event, event_prime, key[-1])
+        return self.fragments[key]
+
+    def create_fragment(self, relation, event, event_prime, delay):
+        helper_struct = {}
+        helper_struct[event] = {}
+        helper_struct[event]['places'] = {}
+        helper_struct[event]['places']['included'] = None
+        helper_struct[event]['places']['pending'] = set()
+        helper_struct[event]['places']['pending_excluded'] = set()
+        helper_struct[event]['places']['executed'] = None
+        helper_struct[event]['transitions'] = []
+        helper_struct[event]['t_types'] = ['event']
+        helper_struct[event]['pending_pairs'] = {}
+        helper_struct[event]['trans_group_index'] = 0
+        helper_struct[event_prime] = self.helper_struct[event_prime]
+        helper_struct['pend_matrix'] = self.helper_struct['pend_matrix']
+        helper_struct['pend_exc_matrix'] = self.helper_struct['pend_exc_matrix']
+        helper_struct['transport_index'] = 0
+
+        probe = PetriNet('probe')
+        mapping_exceptions = timed_exceptional_cases.TimedExceptionalCases(helper_struct)
+        mapping_exceptions.G = self.mapping_exceptions.G
+        probe, ts = timed_utils.create_event_pattern_transitions_and_arcs(probe, event, helper_struct,
+                                                                          mapping_exceptions)
+        helper_struct[event]['transitions'].extend(ts)
+        if isinstance(relation, frozenset):
+            mapping_exceptions.exceptions[relation].add((event, event_prime))
+            probe = mapping_exceptions.apply_exceptions[relation](probe)
+        else:
+            sr = timed_single_relations.TimedSingleRelations(helper_struct, mapping_exceptions)
+            if relation == Relations.C.value:
+                probe = sr.create_condition_pattern(event, event_prime, probe, delay=delay)
+            else:
+                probe = getattr(sr, SINGLE_RELATION_PATTERNS[relation])(event, event_prime, probe)
+
+        fragment = []
+        for t in helper_struct[event]['transitions']:
+            arcs = []
+            for arc in t.in_arcs:
+                arcs.append((arc.source, False, arc.properties.get('arctype'), arc.properties.get('transportindex'),
+                             arc.properties.get('agemin')))
+            for arc in t.out_arcs:
+                arcs.append((arc.target, True, arc.properties.get('arctype'), arc.properties.get('transportindex'),
+                             arc.properties.get('agemin')))
+            fragment.append(arcs)
+        # the places of event_prime are shared with the net being mapped
+        for arc in probe.arcs:
+            arc.source.out_arcs.discard(arc)
+            arc.target.in_arcs.discard(arc)
+        return fragment
+
+    def can_assemble(self, event):
+        event_places = self.helper_struct[event]['places']
+        t_types = self.helper_struct[event]['t_types']
+        group_size = len(set(t_types).intersection({'event', 'init'}))
+        group_size += len(set(t_types).intersection({'initpend', 'pend'})) * len(event_places['pending'])
+        return group_size == len(t_types)
+
+    def map_relations_stepwise(self, event, relations, tapn) -> (PetriNet, list):
+        '''
+        Creates the transitions of an event mapping its relations one pattern at a time on the growing net
+        '''
+        tapn, ts = timed_utils.create_event_pattern_transitions_and_arcs(tapn, event, self.helper_struct,
+                                                                         self.mapping_exceptions)
+        self.helper_struct[event]['transitions'].extend(ts)
+        sr = timed_single_relations.TimedSingleRelations(self.helper_struct, self.mapping_exceptions)
+        for relation, event_prime in relations:
+            if isinstance(relation, frozenset):
+                pair_exceptions = timed_exceptional_cases.TimedExceptionalCases(self.helper_struct)
+                pair_exceptions.G = self.mapping_exceptions.G
+                pair_exceptions.self_exceptions = self.mapping_exceptions.self_exceptions
+                pair_exceptions.exceptions[relation].add((event, event_prime))
+                tapn = pair_exceptions.apply_exceptions[relation](tapn)
+            elif relation == Relations.C.value:
+                tapn = sr.create_condition_pattern(event, event_prime, tapn, delay=self.get_delay(event, event_prime))
+            else:
+                tapn = getattr(sr, SINGLE_RELATION_PATTERNS[relation])(event, event_prime, tapn)
+        return tapn, self.helper_struct[event]['transitions']
+
+    def create_event_transitions(self, event, relations, tapn) -> (PetriNet, list):
+        '''
+        Creates all the transitions of an event and their arcs
+
+        Parameters
+        ----------
+        event
+            the event
+        relations
+            list of (relation, event_prime) in the order in which the patterns are mapped
+        tapn
+            the timed arc petri net, with the places of all the events
+
+        Returns
+        -------
+        the petri net and the transitions of the event
+        '''
+        if not self.can_assemble(event):
+            return self.map_relations_stepwise(event, relations, tapn)
+        fragments = []
+        for relation, event_prime in relations:
+            fragments.append(self.get_fragment(relation, event, event_prime))
+        groups = [()]
+        for fragment in fragments:
+            groups = [group + (copy,) for copy in range(len(fragment)) for group in groups]
+
+        transitions = []
+        for group in groups:
+            tapn, ts = timed_utils.create_event_pattern_transitions_and_arcs(tapn, event, self.helper_struct,
+                                                                             self.mapping_exceptions)
+            for t in ts:
+                for fragment, copy in zip(fragments, group):
+                    transport_indexes = {}
+                    for place, to_place, arc_type, transport_index, age_min in fragment[copy]:
+                        if to_place:
+                            arc = pn_utils.add_arc_from_to(t, place, tapn, type=arc_type)
+                        else:
+                            arc = pn_utils.add_arc_from_to(place, t, tapn, type=arc_type)
+                        if transport_index is not None:
+                            if transport_index not in transport_indexes:
+                                transport_indexes[transport_index] = self.helper_struct['transport_index']
+                                self.helper_struct['transport_index'] = self.helper_struct['transport_index'] + 1
+                            arc.properties['transportindex'] = transport_indexes[transport_index]
+                        if age_min is not None:
+                            arc.properties['agemin'] = age_min
+            transitions.extend(ts)
+        self.helper_struct[event]['transitions'].extend(transitions)
+        return tapn, transitions
@@ -0,0 +1,414 @@
+from collections import namedtuple
+from collections.abc import Mapping
+from datetime import timedelta
+
+from pm4py.objects.dcr.obj import Relations
+from pm4py.util import xes_constants, constants
+
+
+# immutable marking of a CompiledDcrSemantics: bitsets plus the (usually empty) timing information
+CompiledDcrMarking = namedtuple('CompiledDcrMarking',
+                                ['executed', 'included', 'pending', 'executed_time', 'pending_deadline', 'enabled'])
+
+
+def iter_bits(mask):
+    '''
+    Yields the positions of the bits set in a python int used as a bitset
+    '''
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def to_timedelta(value):
+    '''
+    Delays and deadlines are stored either as (pandas) timedeltas or as a number of days
+    '''
+    if isinstance(value, timedelta):
+        return value
+    return timedelta(value)
+
+
+def iter_timed_relation(timed_relation):
+    '''
+    conditionsForDelays and responseToDeadlines are either a set of (event, time) tuples
+    (portal importer) or a dict event -> time (timed discovery)
+    '''
+    if isinstance(timed_relation, Mapping):
+        return timed_relation.items()
+    return timed_relation
+
+
+def flatten_nestings(dcr):
+    '''
+    Returns the events, marking and relations of a dcr graph with all nestings pushed down to the atomic events.
+    The input graph is not modified.
+    Parameters
+    ----------
+    dcr: the dcr graph (dict)
+    Returns
+    -------
+    atomic events, marking (dict of sets), relations (dict relation -> dict of sets)
+    '''
+    nestings = dcr.get('nestings', {})
+    parent = {}
+    for nest, nested_events in nestings.items():
+        for nested_event in nested_events:
+            parent[nested_event] = nest
+
+    atomic_cache = {}
+
+    def atomic(e):
+        if e not in atomic_cache:
+            if e in nestings and len(nestings[e]) > 0:
+                res = set()
+                for nested_event in nestings[e]:
+                    res |= atomic(nested_event)
+                atomic_cache[e] = res
+            else:
+                atomic_cache[e] = {e}
+        return atomic_cache[e]
+
+    def ancestors_or_self(e):
+        res = [e]
+        while e in parent:
+            e = parent[e]
+            res.append(e)
+        return res
+
+    events = set()
+    for e in dcr['events']:
+        events |= atomic(e)
+
+    relations = {}
+    for r in Relations:
+        rel = dcr.get(r.value, {})
+        flat_rel = {}
+        for e in events:
+            targets = set()
+            for x in ancestors_or_self(e):
+                for t in rel.get(x, ()):
+                    targets |= atomic(t)
+            if targets:
+                flat_rel[e] = targets
+        relations[r.value] = flat_rel
+
+    included = dcr['marking']['included']
+    marking = {
+        'executed': set(e for e in dcr['marking']['executed'] if e in events),
+        'pending': set(e for e in dcr['marking']['pending'] if e in events),
+        'included': set(e for e in events if all(x in included for x in ancestors_or_self(e)))
+    }
+    return events, marking, relations
+
+
+class CompiledDcrGraph(object):
+    '''
+    Static part of a DCR graph compiled for fast replay.
+    Events are interned to integer ids (sorted by name) and every relation is stored per event as a bitset
+    (a python int where bit j is set if event j is in the relation).
+    The compiled graph is never modified, so it can be shared by any number of semantics objects.
+    '''
+
+    def __init__(self, dcr, flatten=False) -> None:
+        if flatten and len(dcr.get('nestings', {})) > 0:
+            events, marking, relations = flatten_nestings(dcr)
+        else:
+            events = dcr['events']
+            marking = dcr['marking']
+            relations = {r.value: dcr.get(r.value, {}) for r in Relations}
+
+        self.events = sorted(events)
+        self.event_ids = {e: i for i, e in enumerate(self.events)}
+        n = len(self.events)
+        self.n_events = n
+        self.all_mask = (1 << n) - 1
+
+        self.conditions = self.__compile_relation(relations[Relations.C.value])
+        self.milestones = self.__compile_relation(relations[Relations.M.value])
+        self.responses = self.__compile_relation(relations[Relations.R.value])
+        self.includes = self.__compile_relation(relations[Relations.I.value])
+        self.excludes = self.__compile_relation(relations[Relations.E.value])
+
+        # delays are kept next to the condition bitsets, deadlines next to the response bitsets
+        self.delays = [[] for _ in range(n)]
+        self.deadlines = [[] for _ in range(n)]
+        self.max_executed_time = [timedelta(0)] * n
+        self.timed_mask = 0
+        for e, timed in dcr.get('conditionsForDelays', {}).items():
+            if e not in self.event_ids:
+                continue
+            i = self.event_ids[e]
+            for (e_prime, k) in iter_timed_relation(timed):
+                if e_prime not in self.event_ids:
+                    continue
+                j = self.event_ids[e_prime]
+                k = to_timedelta(k)
+                self.delays[i].append((j, k))
+                self.timed_mask |= 1 << i
+                if k > self.max_executed_time[j]:
+                    self.max_executed_time[j] = k
+        for e, timed in dcr.get('responseToDeadlines', {}).items():
+            if e not in self.event_ids:
+                continue
+            i = self.event_ids[e]
+            for (e_prime, k) in iter_timed_relation(timed):
+                if e_prime in self.event_ids:
+                    self.deadlines[i].append((self.event_ids[e_prime], to_timedelta(k)))
+
+        # dependents[j]: events whose enabledness can change when the marking of j changes
+        dependents = [1 << j for j in range(n)]
+        for i in range(n):
+            guards = self.conditions[i] | self.milestones[i]
+            for (j, _) in self.delays[i]:
+                guards |= 1 << j
+            for j in iter_bits(guards):
+                dependents[j] |= 1 << i
+        # the set of events whose marking changes when i is executed is static,
+        # hence also the set of events whose enabledness must be recomputed
+        self.affected = []
+        for i in range(n):
+            changed = (1 << i) | self.responses[i] | self.includes[i] | self.excludes[i]
+            for (j, _) in self.deadlines[i]:
+                changed |= 1 << j
+            affected = 0
+            for j in iter_bits(changed):
+                affected |= dependents[j]
+            self.affected.append(affected)
+
+        self.initial_executed = self.encode(marking['executed'])
+        self.initial_included = self.encode(marking['included'])
+        self.initial_pending = self.encode(marking['pending'])
+
+    def __compile_relation(self, relation):
+        compiled = [0] * self.n_events
+        for e, targets in relation.items():
+            if e not in self.event_ids:
+                continue
+            mask = 0
+            for e_prime in targets:
+                if e_prime in self.event_ids:
+                    mask |= 1 << self.event_ids[e_prime]
+            compiled[self.event_ids[e]] = mask
+        return compiled
+
+    def encode(self, events):
+        mask = 0
+        for e in events:
+            if e in self.event_ids:
+                mask |= 1 << self.event_ids[e]
+        return mask
+
+    def decode(self, mask):
+        return set(self.events[i] for i in iter_bits(mask))
+
+
+class CompiledDcrSemantics(object):
+    '''
+    Drop-in replacement of DcrSemantics working on a CompiledDcrGraph.
+    The marking is stored as three bitsets (executed, included, pending) and the set of enabled events
+    is kept up to date incrementally: executing an event only re-evaluates the events whose guards
+    reference an event whose marking was changed.
+    '''
+
+    def __init__(self, dcr, cmd_print=True, marking=None) -> None:
+        self.cmd_print = cmd_print
+        if isinstance(dcr, CompiledDcrGraph):
+            self.graph = dcr
+            self.__source = None
+        else:
+            self.graph = CompiledDcrGraph(dcr)
+            self.__source = dcr
+        if marking is None:
+            self.__reset()
+        else:
+            self.restore(marking)
+
+    def __reset(self):
+        self.executed = self.graph.initial_executed
+        self.included = self.graph.initial_included
+        self.pending = self.graph.initial_pending
+        self.executed_time = {}
+        self.pending_deadline = {}
+        self.enabled_mask = 0
+        self.__refresh(self.graph.all_mask)
+
+    def snapshot(self):
+        '''
+        Returns an immutable copy of the current marking, that can be given back to restore()
+        '''
+        return CompiledDcrMarking(self.executed, self.included, self.pending,
+                                  tuple(self.executed_time.items()) if self.executed_time else (),
+                                  tuple(self.pending_deadline.items()) if self.pending_deadline else (),
+                                  self.enabled_mask)
+
+    def restore(self, marking):
+        '''
+        Sets the marking to a snapshot taken on a semantics object of the same compiled graph
+        '''
+        self.executed = marking.executed
+        self.included = marking.included
+        self.pending = marking.pending
+        self.executed_time = dict(marking.executed_time)
+        self.pending_deadline = dict(marking.pending_deadline)
+        self.enabled_mask = marking.enabled
+
+    def __is_enabled_id(self, i):
+        g = self.graph
+        if not (self.included >> i) & 1:
+            return False
+        if g.conditions[i] & self.included & ~self.executed:
+            return False
+        if g.milestones[i] & self.included & self.pending:
+            return False
+        for (j, k) in g.delays[i]:
+            if (self.included >> j) & 1:
+                if not (self.executed >> j) & 1 or self.executed_time[j] < k:
+                    return False
+        return True
+
+    def __refresh(self, mask):
+        enabled = self.enabled_mask & ~mask
+        for i in iter_bits(mask):
+            if self.__is_enabled_id(i):
+                enabled |= 1 << i
+        self.enabled_mask = enabled
+
+    def flatten_dcr_nestings(self):
+        '''
+        Kept for compatibility with DcrSemantics: recompiles the graph with all nestings pushed down to the atomic
+        events and resets the marking. Prefer compiling once with CompiledDcrGraph(dcr, flatten=True).
+        '''
+        if self.__source is not None:
+            self.graph = CompiledDcrGraph(self.__source, flatten=True)
+            self.__reset()
+        return self.graph
+
+    def is_accepting(self):
+        pend_incl = self.pending & self.included
+        res = pend_incl == 0
+        if not res and self.cmd_print:
+            print(f'[!] Not accepting there are pending included events {self.graph.decode(pend_incl)}')
+        return res
+
+    def is_enabled(self, e):
+        i = self.graph.event_ids.get(e)
+        return i is not None and bool((self.enabled_mask >> i) & 1)
+
+    def enabled(self):
+        return self.graph.decode(self.enabled_mask)
+
+    def execute(self, e):
+        if isinstance(e, timedelta):
+            return self.time_step(e)
+        elif isinstance(e, int):
+            return self.time_step(timedelta(e))
+        i = self.graph.event_ids.get(e)
+        if i is None:
+            print(f'[!] Event {e} does not exist!') if self.cmd_print else None
+            return False, timedelta(0)
+        if not (self.enabled_mask >> i) & 1:
+            print(f'[!] Event {e} not enabled!') if self.cmd_print else None
+            return False, timedelta(0)
+        self.__weak_execute(i)
+        return True, timedelta(0)
+
+    def __weak_execute(self, i):
+        g = self.graph
+        bit = 1 << i
+        self.pending &= ~bit
+        self.executed |= bit
+        self.executed_time[i] = timedelta(0)
+        self.pending_deadline.pop(i, None)
+        self.included = (self.included & ~g.excludes[i]) | g.includes[i]
+        self.pending |= g.responses[i]
+        for (j, k) in g.deadlines[i]:
+            self.pending_deadline[j] = k
+            self.pending |= 1 << j
+        self.__refresh(g.affected[i])
+
+    def find_next_deadline(self):
+        next_deadline = None
+        for j, deadline in self.pending_deadline.items():
+            if (self.included >> j) & 1 and (next_deadline is None or deadline < next_deadline):
+                next_deadline = deadline
+        return next_deadline
+
+    def find_next_delay(self):
+        next_delay = None
+        for i in range(self.graph.n_events):
+            for (j, k) in self.graph.delays[i]:
+                if (self.executed >> j) & 1 and (self.included >> j) & 1:
+                    delay = k - self.executed_time[j]
+                    if delay > timedelta(0) and (next_delay is None or delay < next_delay):
+                        next_delay = delay
+        return next_delay
+
+    def time_step(self, time):
+        deadline = self.find_next_deadline()
+        if deadline is None or deadline - time >= timedelta(0):
+            for j in self.pending_deadline:
+                self.pending_deadline[j] = max(self.pending_deadline[j] - time, timedelta(0))
+            for j in self.executed_time:
+                self.executed_time[j] = min(self.executed_time[j] + time, self.graph.max_executed_time[j])
+            if self.graph.timed_mask:
+                self.__refresh(self.graph.timed_mask)
+            return True, time
+        else:
+            print(f'[!] The time step is not allowed, you are gonna miss a deadline in {deadline}') if self.cmd_print else None
+            return False, time
+
+    def get_marking(self):
+        '''
+        Returns the current marking in the dict-of-sets format of the dcr template
+        '''
+        g = self.graph
+        return {'executed': g.decode(self.executed),
+                'included': g.decode(self.included),
+                'pending': g.decode(self.pending),
+                'executedTime': {g.events[j]: t for j, t in self.executed_time.items()},
+                'pendingDeadline': {g.events[j]: t for j, t in self.pending_deadline.items()}}
+
+
+def replay_traces(dcr, traces):
+    '''
+    Replays a list of traces (lists of activities) on a DCR graph.
+    The graph is compiled (and flattened) once, every trace starts from a restored snapshot of the initial marking.
+    Parameters
+    ----------
+    dcr: a dcr graph (dict) or a CompiledDcrGraph
+    traces: list of lists of activities
+    Returns
+    -------
+    a list with for every trace a dict with:
+        - accepted => True if all the events were enabled and the final marking is accepting
+        - first_violation => index of the first event that was not enabled, len(trace) if all events were
+          executed but the final marking is not accepting, None if the trace is accepted
+    '''
+    graph = dcr if isinstance(dcr, CompiledDcrGraph) else CompiledDcrGraph(dcr, flatten=True)
+    semantics = CompiledDcrSemantics(graph, cmd_print=False)
+    initial_marking = semantics.snapshot()
+    res = []
+    for trace in traces:
+        semantics.restore(initial_marking)
+        first_violation = None
+        for index, activity in enumerate(trace):
+            executed, _ = semantics.execute(activity)
+            if not executed:
+                first_violation = index
+                break
+        if first_violation is None and not semantics.is_accepting():
+            first_violation = len(trace)
+        res.append({'accepted': first_violation is None, 'first_violation': first_violation})
+    return res
+
+
+def replay_log(dcr, log, activity_key=xes_constants.DEFAULT_NAME_KEY, case_id_key=constants.CASE_CONCEPT_NAME):
+    '''
+    Replays an event log (EventLog or dataframe) on a DCR graph, see replay_traces for the output format
+    '''
+    import pm4py
+
+    traces = pm4py.project_on_event_attribute(log, activity_key, case_id_key=case_id_key)
+    return replay_traces(dcr, traces)
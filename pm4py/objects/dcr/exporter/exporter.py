@@ -1,16 +1,22 @@
 from enum import Enum
-from pm4py.objects.dcr.exporter.variants import xml_simple, xml_dcr_portal
+from pm4py.objects.dcr.exporter.variants import xml_simple, xml_simple_stream, xml_dcr_portal, xml_dcr_portal_stream, binary
 
 
 class Variants(Enum):
     XML_SIMPLE = xml_simple
     XML_DCR_PORTAL = xml_dcr_portal
+    XML_SIMPLE_STREAM = xml_simple_stream
+    XML_DCR_PORTAL_STREAM = xml_dcr_portal_stream
+    BINARY = binary
 
 
 XML_SIMPLE = Variants.XML_SIMPLE
 XML_DCR_PORTAL = Variants.XML_DCR_PORTAL
+XML_SIMPLE_STREAM = Variants.XML_SIMPLE_STREAM
+XML_DCR_PORTAL_STREAM = Variants.XML_DCR_PORTAL_STREAM
+BINARY = Variants.BINARY
 
-VERSIONS = {XML_SIMPLE, XML_DCR_PORTAL}
+VERSIONS = {XML_SIMPLE, XML_DCR_PORTAL, XML_SIMPLE_STREAM, XML_DCR_PORTAL_STREAM, BINARY}
 
 
 def apply(dcr_graph, path, variant=XML_SIMPLE, **parameters):
@@ -33,4 +39,10 @@ def apply(dcr_graph, path, variant=XML_SIMPLE, **parameters):
     if variant is Variants.XML_DCR_PORTAL:
         xml_dcr_portal.export_dcr_xml(dcr_graph, output_file_name=path, **parameters)
     elif variant is Variants.XML_SIMPLE:
-        xml_simple.export_dcr_xml(dcr_graph, output_file_name=path, **parameters)
\ No newline at end of file
+        xml_simple.export_dcr_xml(dcr_graph, output_file_name=path, **parameters)
+    elif variant is Variants.XML_DCR_PORTAL_STREAM:
+        xml_dcr_portal_stream.export_dcr_xml(dcr_graph, output_file_name=path, **parameters)
+    elif variant is Variants.XML_SIMPLE_STREAM:
+        xml_simple_stream.export_dcr_xml(dcr_graph, output_file_name=path, **parameters)
+    elif variant is Variants.BINARY:
+        binary.export_dcr_binary(dcr_graph, output_file_name=path, **parameters)
\ No newline at end of file
@@ -1 +1 @@
-from pm4py.objects.dcr.exporter.variants import xml_simple, xml_dcr_portal, text
\ No newline at end of file
+from pm4py.objects.dcr.exporter.variants import xml_simple, xml_simple_stream, xml_dcr_portal, xml_dcr_portal_stream, text, binary
\ No newline at end of file
@@ -0,0 +1,17 @@
+from pm4py.objects.dcr.utils import binary_format
+
+
+def export_dcr_binary(dcr, output_file_name, **parameters):
+    '''
+    Exports the graph (dict or CompactDcrGraph) in the binary format (see pm4py.objects.dcr.utils.binary_format),
+    that can be imported with the binary importer without parsing
+
+    dcr : the dcr graph
+    output_file_name: path of the file
+    '''
+    with open(output_file_name, "wb") as f:
+        f.write(binary_format.dump(dcr))
+
+
+def export_to_bytes(dcr, **parameters):
+    return binary_format.dump(dcr)
@@ -0,0 +1,80 @@
+from lxml import etree
+
+
+def write_element(xf, tag, level, attributes):
+    xml_element = etree.Element(tag)
+    for key, value in attributes:
+        xml_element.set(key, value)
+    xf.write('\n' + '  ' * level, xml_element)
+
+
+def write_relation(xf, dcr, relation, tag, level, reverse=False):
+    '''
+    Writes the relation as a list of elements from the sourceId to the targetId
+    (for the conditions the key of the relation is the target)
+    '''
+    events = dcr['events']
+    for event in events:
+        for event_prime in dcr[relation].get(event, ()):
+            if event_prime in events:
+                source, target = (event_prime, event) if reverse else (event, event_prime)
+                write_element(xf, tag, level, [("sourceId", source), ("targetId", target)])
+
+
+def export_dcr_xml(dcr, output_file_name, dcr_title):
+    '''
+    Exports the graph in the same format as the xml_dcr_portal variant, writing every element to the file as soon as
+    it is created instead of building the whole tree in memory (every section is written with a pass over the events)
+
+    dcr : the mined graph
+    output_file_name: dcrxml file name without extension
+    '''
+    with etree.xmlfile(output_file_name) as xf:
+        with xf.element("dcrgraph", {"title": dcr_title} if dcr_title else {}):
+            xf.write('\n  ')
+            with xf.element("specification"):
+                xf.write('\n    ')
+                with xf.element("resources"):
+                    xf.write('\n      ')
+                    with xf.element("events"):
+                        for event in dcr['events']:
+                            write_element(xf, "event", 4, [("id", event)])
+                        xf.write('\n      ')
+                    xf.write('\n      ')
+                    with xf.element("labels"):
+                        for event in dcr['events']:
+                            write_element(xf, "label", 4, [("id", event)])
+                        xf.write('\n      ')
+                    xf.write('\n      ')
+                    with xf.element("labelMappings"):
+                        for event in dcr['events']:
+                            write_element(xf, "labelMapping", 4, [("eventId", event), ("labelId", event)])
+                        xf.write('\n      ')
+                    xf.write('\n    ')
+                xf.write('\n    ')
+                with xf.element("constraints"):
+                    for relation, container, tag, reverse in [("conditionsFor", "conditions", "condition", True),
+                                                              ("responseTo", "responses", "response", False),
+                                                              ("excludesTo", "excludes", "exclude", False),
+                                                              ("includesTo", "includes", "include", False)]:
+                        xf.write('\n      ')
+                        with xf.element(container):
+                            write_relation(xf, dcr, relation, tag, 4, reverse=reverse)
+                            xf.write('\n      ')
+                    xf.write('\n    ')
+                xf.write('\n  ')
+            xf.write('\n  ')
+            with xf.element("runtime"):
+                xf.write('\n    ')
+                with xf.element("marking"):
+                    for marking, container in [('executed', 'executed'), ('included', 'included'),
+                                               ('pending', 'pendingResponses')]:
+                        xf.write('\n      ')
+                        with xf.element(container):
+                            for event in dcr['events']:
+                                if event in dcr['marking'][marking]:
+                                    write_element(xf, "event", 4, [("id", event)])
+                            xf.write('\n      ')
+                    xf.write('\n    ')
+                xf.write('\n  ')
+            xf.write('\n')
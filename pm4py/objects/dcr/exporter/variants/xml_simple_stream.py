@@ -0,0 +1,115 @@
+from lxml import etree
+
+
+def write_element(xf, element, level=1):
+    etree.indent(element, level=level)
+    xf.write('\n' + '  ' * level, element)
+
+
+def event_element(event, replace_whitespace='', event_type=None, parent=None):
+    if replace_whitespace is not None:
+        event = event.replace(' ', replace_whitespace)
+    xml_event = etree.Element("events")
+    xml_event_id = etree.SubElement(xml_event, "id")
+    xml_event_id.text = event
+    xml_event_label = etree.SubElement(xml_event, "label")
+    xml_event_label.text = event
+    if event_type:
+        xml_event_type = etree.SubElement(xml_event, "type")
+        xml_event_type.text = event_type
+    if parent:
+        xml_event_parent = etree.SubElement(xml_event, "parent")
+        xml_event_parent.text = parent.replace(' ', replace_whitespace)
+    return xml_event
+
+
+def rule_element(rule_type, source, target, replace_whitespace='', time=None):
+    xml_rule = etree.Element("rules")
+    xml_type = etree.SubElement(xml_rule, "type")
+    xml_type.text = rule_type
+    xml_source = etree.SubElement(xml_rule, "source")
+    xml_source.text = source.replace(' ', replace_whitespace)
+    xml_target = etree.SubElement(xml_rule, "target")
+    xml_target.text = target.replace(' ', replace_whitespace)
+    if time is not None and time.floor(freq='S').to_numpy() > 0:
+        xml_duration = etree.SubElement(xml_rule, "duration")
+        xml_duration.text = time.floor(freq='S').isoformat()
+    return xml_rule
+
+
+def export_dcr_graph(dcr, xf, parents_dict=None, replace_whitespace=''):
+    '''
+    Writes the events of the graph, each followed by the rules of which it is the key of the relation
+    (the target of the conditions and milestones, the source of the other relations)
+    '''
+    events = dcr['events']
+    conditions_delays = dcr['conditionsForDelays'] if 'conditionsForDelays' in dcr else {}
+    responses_deadlines = dcr['responseToDeadlines'] if 'responseToDeadlines' in dcr else {}
+    for event in events:
+        parent = parents_dict[event] if parents_dict and event in parents_dict else None
+        write_element(xf, event_element(event, replace_whitespace=replace_whitespace, parent=parent))
+
+        for event_prime in dcr['conditionsFor'].get(event, ()):
+            if event_prime in events:
+                time = None
+                if event in conditions_delays and event_prime in conditions_delays[event]:
+                    time = conditions_delays[event][event_prime]
+                write_element(xf, rule_element('condition', event_prime, event, replace_whitespace, time=time))
+        for event_prime in dcr['responseTo'].get(event, ()):
+            if event_prime in events:
+                time = None
+                if event in responses_deadlines and event_prime in responses_deadlines[event]:
+                    time = responses_deadlines[event][event_prime]
+                write_element(xf, rule_element('response', event, event_prime, replace_whitespace, time=time))
+        for relation, rule_type in [('includesTo', 'include'), ('excludesTo', 'exclude'),
+                                    ('milestonesFor', 'milestone'), ('noResponseTo', 'coresponse')]:
+            if relation in dcr:
+                for event_prime in dcr[relation].get(event, ()):
+                    if event_prime in events:
+                        write_element(xf, rule_element(rule_type, event, event_prime, replace_whitespace))
+
+
+def export_dcr_xml(dcr, output_file_name, dcr_title='DCR from pm4py', dcr_description=None, replace_whitespace=''):
+    '''
+    Exports the graph in the same format as the xml_simple variant, writing every element to the file as soon as it
+    is created instead of building the whole tree in memory
+
+    dcr : the mined graph
+    output_file_name: dcrxml file name without extension
+    '''
+    with etree.xmlfile(output_file_name) as xf:
+        with xf.element("DCRModel"):
+            if dcr_title:
+                title = etree.Element("title")
+                title.text = dcr_title
+                write_element(xf, title)
+            if dcr_description:
+                desc = etree.Element("description")
+                desc.text = dcr_description
+                write_element(xf, desc)
+            graph_type = etree.Element("graphType")
+            graph_type.text = "DCRModel"
+            write_element(xf, graph_type)
+            # this needs to exist so it can be imported inside dcr graphs with the app
+            role = etree.Element("roles")
+            role_title = etree.SubElement(role, "title")
+            role_title.text = "User"
+            role_description = etree.SubElement(role, "description")
+            role_description.text = "Dummy user"
+            write_element(xf, role)
+            parents_dict = {}
+            if 'subprocesses' in dcr:
+                for sp_name, sp_events in dcr['subprocesses'].items():
+                    write_element(xf, event_element(sp_name, replace_whitespace=None, event_type="subprocess"))
+                    for sp_event in sp_events:
+                        parents_dict[sp_event] = sp_name
+            if 'nestings' in dcr:
+                for n_name, n_events in dcr['nestings'].items():
+                    write_element(xf, event_element(n_name, replace_whitespace=None, event_type="nesting"))
+                    for n_event in n_events:
+                        parents_dict[n_event] = n_name
+            if len(parents_dict) > 0:
+                export_dcr_graph(dcr, xf, parents_dict, replace_whitespace=replace_whitespace)
+            else:
+                export_dcr_graph(dcr, xf, None, replace_whitespace=replace_whitespace)
+            xf.write('\n')
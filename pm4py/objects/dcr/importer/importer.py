@@ -1,11 +1,15 @@
 from enum import Enum
 
-from pm4py.objects.dcr.importer.variants import xml_dcr_portal
+from pm4py.objects.dcr.importer.variants import xml_dcr_portal, xml_dcr_portal_iterparse, xml_simple, xml_simple_iterparse, binary
 from pm4py.util import exec_utils
 
 
 class Variants(Enum):
     XML_DCR_PORTAL = xml_dcr_portal
+    XML_DCR_PORTAL_ITERPARSE = xml_dcr_portal_iterparse
+    XML_SIMPLE = xml_simple
+    XML_SIMPLE_ITERPARSE = xml_simple_iterparse
+    BINARY = binary
 
 
 DEFAULT_VARIANT = Variants.XML_DCR_PORTAL
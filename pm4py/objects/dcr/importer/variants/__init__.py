@@ -1 +1 @@
-from pm4py.objects.dcr.importer.variants import xml_dcr_portal, text
+from pm4py.objects.dcr.importer.variants import xml_dcr_portal, xml_dcr_portal_iterparse, xml_simple, xml_simple_iterparse, text, binary
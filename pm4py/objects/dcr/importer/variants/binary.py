@@ -0,0 +1,44 @@
+import mmap
+from enum import Enum
+
+from pm4py.objects.dcr.utils import binary_format
+from pm4py.util import exec_utils
+
+
+class Parameters(Enum):
+    USE_MMAP = "use_mmap"
+
+
+def apply(path, parameters=None):
+    '''
+    Imports a DCR graph stored in the binary format (see pm4py.objects.dcr.utils.binary_format) as a read-only
+    CompactDcrGraph.
+
+    Parameters
+    -------------
+    path
+        path of the file
+    parameters
+        - Parameters.USE_MMAP => memory-maps the file (default: True): the relations are read in place from the
+          mapped pages, which are shared by the processes loading the same file (e.g. forked workers)
+    '''
+    if parameters is None:
+        parameters = {}
+
+    use_mmap = exec_utils.get_param_value(Parameters.USE_MMAP, parameters, True)
+
+    with open(path, "rb") as f:
+        if use_mmap:
+            # the mapping stays open as long as the graph refers to it
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            buffer = f.read()
+
+    return binary_format.load(buffer)
+
+
+def import_from_string(dcr_string, parameters=None):
+    if parameters is None:
+        parameters = {}
+
+    return binary_format.load(dcr_string)
@@ -3,7 +3,6 @@ import copy
 import isodate
 
 from pm4py.util import constants
-from copy import deepcopy
 from pm4py.objects.dcr.obj import Relations, dcr_template
 
 I = Relations.I.value
@@ -13,7 +12,12 @@ N = Relations.N.value
 C = Relations.C.value
 M = Relations.M.value
 
-def parse_element(curr_el, parent, dcr):
+def parse_single_element(curr_el, parent, dcr, roles=None, read_roles=None):
+    '''
+    Adds the element to the dcr graph, without visiting its children.
+    roles and read_roles are the texts of the role and readRole elements below an event element (searched among the
+    descendants of the element if not given)
+    '''
     tag = curr_el.tag.lower()
     match tag:
         case 'event':
@@ -23,17 +27,20 @@ def parse_element(curr_el, parent, dcr):
                 event_type = curr_el.get('type')
                 match event_type:
                     case 'subprocess':
-                        dcr['subprocesses'][id] = set()
+                        if id not in dcr['subprocesses']:
+                            dcr['subprocesses'][id] = set()
                     case 'nesting':
-                        dcr['nestings'][id] = set()
+                        if id not in dcr['nestings']:
+                            dcr['nestings'][id] = set()
                         pass
                     case _:
                         pass
+                # the parent event may be added after its children (streaming import)
                 match parent.get('type'):
                     case 'subprocess':
-                        dcr['subprocesses'][parent.get('id')].add(id)
+                        dcr['subprocesses'].setdefault(parent.get('id'), set()).add(id)
                     case 'nesting':
-                        dcr['nestings'][parent.get('id')].add(id)
+                        dcr['nestings'].setdefault(parent.get('id'), set()).add(id)
                         pass
                     case _:
                         pass
@@ -44,18 +51,22 @@ def parse_element(curr_el, parent, dcr):
                         dcr['marking']['pending'].add(id)
                     case _:
                         pass
-                for role in curr_el.findall('.//role'):
-                    if role.text:
-                        if role.text not in dcr['roleAssignments']:
-                            dcr['roleAssignments'][role.text] = set([id])
+                if roles is None:
+                    roles = [role.text for role in curr_el.findall('.//role')]
+                if read_roles is None:
+                    read_roles = [role.text for role in curr_el.findall('.//readRole')]
+                for role in roles:
+                    if role:
+                        if role not in dcr['roleAssignments']:
+                            dcr['roleAssignments'][role] = set([id])
                         else:
-                            dcr['roleAssignments'][role.text].add(id)
-                for role in curr_el.findall('.//readRole'):
-                    if role.text:
-                        if role.text not in dcr['readRoleAssignments']:
-                            dcr['readRoleAssignments'][role.text] = set([id])
+                            dcr['roleAssignments'][role].add(id)
+                for role in read_roles:
+                    if role:
+                        if role not in dcr['readRoleAssignments']:
+                            dcr['readRoleAssignments'][role] = set([id])
                         else:
-                            dcr['readRoleAssignments'][role.text].add(id)
+                            dcr['readRoleAssignments'][role].add(id)
         case 'label':
             id = curr_el.get('id')
             dcr['labels'].add(id)
@@ -158,6 +169,11 @@ def parse_element(curr_el, parent, dcr):
             dcr[f'{tag}sFor'][event_prime].add(event)
         case _:
             pass
+    return dcr
+
+
+def parse_element(curr_el, parent, dcr):
+    dcr = parse_single_element(curr_el, parent, dcr)
     for child in curr_el:
         dcr = parse_element(child, curr_el, dcr)
 
@@ -174,7 +190,8 @@ def clean_input(dcr, white_space_replacement=None):
     if white_space_replacement is None:
         white_space_replacement = ' '
     # remove all space characters and put conditions and milestones in the correct order (according to the actual arrows)
-    for k, v in deepcopy(dcr).items():
+    # the values are replaced, not modified in place
+    for k, v in list(dcr.items()):
         if k in [I, E, C, R, M, N]:
             v_new = {}
             for k2, v2 in v.items():
@@ -0,0 +1,59 @@
+import copy
+from io import BytesIO
+
+from pm4py.util import constants
+from pm4py.objects.dcr.obj import dcr_template
+from pm4py.objects.dcr.importer.variants.xml_dcr_portal import parse_single_element, clean_input
+
+
+def import_xml_iterparse(source):
+    '''
+    Imports a DCR graph in the XML format of the DCR portal reading the document incrementally (same graph as the
+    xml_dcr_portal variant).
+    Every element is added to the graph when its end tag is read, then it is cleared and removed from the tree together
+    with the siblings already processed, so the whole document is never kept in memory.
+    '''
+    from lxml import etree
+
+    dcr = copy.deepcopy(dcr_template)
+    # roles and read roles of the event elements being read (an event gets the roles of all its descendants)
+    event_roles = []
+    for tree_event, elem in etree.iterparse(source, events=('start', 'end'), remove_comments=True):
+        tag = elem.tag.lower()
+        if tree_event == 'start':
+            if tag == 'event':
+                event_roles.append(([], []))
+            continue
+        if tag == 'event':
+            roles, read_roles = event_roles.pop()
+            dcr = parse_single_element(elem, elem.getparent(), dcr, roles=roles, read_roles=read_roles)
+        else:
+            if elem.tag == 'role':
+                for roles, _ in event_roles:
+                    roles.append(elem.text)
+            elif elem.tag == 'readRole':
+                for _, read_roles in event_roles:
+                    read_roles.append(elem.text)
+            dcr = parse_single_element(elem, elem.getparent(), dcr)
+        elem.clear()
+        while elem.getprevious() is not None:
+            del elem.getparent()[0]
+
+    return clean_input(dcr, white_space_replacement='')
+
+
+def apply(path, parameters=None):
+    if parameters is None:
+        parameters = {}
+
+    return import_xml_iterparse(path)
+
+
+def import_from_string(dcr_string, parameters=None):
+    if parameters is None:
+        parameters = {}
+
+    if type(dcr_string) is str:
+        dcr_string = dcr_string.encode(constants.DEFAULT_ENCODING)
+
+    return import_xml_iterparse(BytesIO(dcr_string))
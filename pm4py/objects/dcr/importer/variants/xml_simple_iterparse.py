@@ -0,0 +1,37 @@
+from io import BytesIO
+
+from pm4py.util import constants
+from pm4py.objects.dcr.importer.variants.xml_simple import get_template, parse_event, parse_rule
+
+
+def import_xml_iterparse(source, replace_whitespace=''):
+    '''
+    Imports a DCR graph in the simple XML format reading the document incrementally (same graph as the xml_simple
+    variant).
+    Every events and rules element is added to the graph when its end tag is read, then it is cleared and removed from
+    the tree together with the siblings already processed, so the whole document is never kept in memory.
+    '''
+    from lxml import etree
+
+    dcr_template = get_template()
+    for _, elem in etree.iterparse(source, events=('end',), tag=('events', 'rules'), remove_comments=True):
+        if elem.tag == 'events':
+            dcr_template = parse_event(elem, dcr_template, replace_whitespace=replace_whitespace)
+        else:
+            dcr_template = parse_rule(elem, dcr_template, replace_whitespace=replace_whitespace)
+        elem.clear()
+        while elem.getprevious() is not None:
+            del elem.getparent()[0]
+
+    return dcr_template
+
+
+def apply(xml_file, replace_whitespace='', **kwargs):
+    return import_xml_iterparse(xml_file, replace_whitespace=replace_whitespace)
+
+
+def import_from_string(dcr_string, replace_whitespace='', **kwargs):
+    if type(dcr_string) is str:
+        dcr_string = dcr_string.encode(constants.DEFAULT_ENCODING)
+
+    return import_xml_iterparse(BytesIO(dcr_string), replace_whitespace=replace_whitespace)
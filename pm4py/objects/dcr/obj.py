@@ -1,5 +1,9 @@
+from array import array
+from bisect import bisect_left
 from enum import Enum
 from collections import Counter
+from collections.abc import Mapping, Set
+from types import MappingProxyType
 
 
 class Relations(Enum):
@@ -38,6 +42,349 @@ dcr_template = {
 }
 
 
+TIMED_RELATIONS = ['conditionsForDelays', 'responseToDeadlines']
+MARKING_SETS = ['executed', 'included', 'pending']
+
+
+def freeze(value):
+    """
+    Read-only version of a value of the legacy dict (dicts and sets, also nested)
+    """
+    if isinstance(value, Mapping):
+        return MappingProxyType({k: freeze(v) for k, v in value.items()})
+    if isinstance(value, (set, frozenset)):
+        return frozenset(value)
+    return value
+
+
+def thaw(value):
+    """
+    Mutable copy of a value frozen by freeze()
+    """
+    if isinstance(value, Mapping):
+        return {k: thaw(v) for k, v in value.items()}
+    if isinstance(value, frozenset):
+        return set(value)
+    return value
+
+
+class CsrRow(Set):
+    """
+    Read-only set view of the targets of a node in a CsrRelation, membership is a binary search on the sorted ids
+    """
+    __slots__ = ['relation', 'start', 'end']
+
+    def __init__(self, relation, start, end):
+        self.relation = relation
+        self.start = start
+        self.end = end
+
+    @classmethod
+    def _from_iterable(cls, it):
+        return frozenset(it)
+
+    def __contains__(self, e):
+        j = self.relation.node_ids.get(e)
+        if j is None:
+            return False
+        x = bisect_left(self.relation.targets, j, self.start, self.end)
+        return x < self.end and self.relation.targets[x] == j
+
+    def __iter__(self):
+        nodes = self.relation.nodes
+        for x in range(self.start, self.end):
+            yield nodes[self.relation.targets[x]]
+
+    def __len__(self):
+        return self.end - self.start
+
+    def __repr__(self):
+        return repr(set(self))
+
+    def union(self, *others):
+        return frozenset(self).union(*others)
+
+    def intersection(self, *others):
+        return frozenset(self).intersection(*others)
+
+    def difference(self, *others):
+        return frozenset(self).difference(*others)
+
+    def issubset(self, other):
+        return frozenset(self).issubset(other)
+
+    def issuperset(self, other):
+        return frozenset(self).issuperset(other)
+
+    def copy(self):
+        return set(self)
+
+
+class CsrRelation(Mapping):
+    """
+    Relation of a CompactDcrGraph in compressed sparse row format: the targets of the node with id i are
+    targets[offsets[i]:offsets[i + 1]] (sorted ids). For the timed relations, values holds the delay / deadline
+    of every arc, aligned with targets.
+
+    The object is also a read-only view of the relation in the format of the legacy dict (event -> set of events,
+    or the timed formats event -> set of (event, time) / event -> dict event -> time).
+    """
+    __slots__ = ['nodes', 'node_ids', 'sources', 'source_mask', 'offsets', 'targets', 'values', 'as_dict']
+
+    def __init__(self, nodes, node_ids, relation, timed=False):
+        self.nodes = nodes
+        self.node_ids = node_ids
+        # keys of the legacy dict, in their order (they may also have no targets)
+        self.sources = array('l', [node_ids[e] for e in relation])
+        self.source_mask = 0
+        for i in self.sources:
+            self.source_mask |= 1 << i
+        rows = {}
+        self.as_dict = False
+        for e, row in relation.items():
+            if timed:
+                if isinstance(row, Mapping):
+                    self.as_dict = True
+                    row = row.items()
+                rows[node_ids[e]] = sorted(((node_ids[e_prime], k) for (e_prime, k) in row), key=lambda x: x[0])
+            else:
+                rows[node_ids[e]] = sorted(node_ids[e_prime] for e_prime in row)
+        self.offsets = array('l', [0] * (len(nodes) + 1))
+        self.targets = array('l')
+        self.values = [] if timed else None
+        for i in range(len(nodes)):
+            row = rows.get(i, ())
+            if timed:
+                self.targets.extend(j for (j, _) in row)
+                self.values.extend(k for (_, k) in row)
+            else:
+                self.targets.extend(row)
+            self.offsets[i + 1] = len(self.targets)
+
+    @classmethod
+    def from_arrays(cls, nodes, node_ids, sources, offsets, targets, values=None, as_dict=False):
+        """
+        Relation from its CSR arrays (any sequence of ints, e.g. memoryviews of a memory-mapped file), without copies
+        """
+        relation = cls.__new__(cls)
+        relation.nodes = nodes
+        relation.node_ids = node_ids
+        relation.sources = sources
+        relation.source_mask = 0
+        for i in sources:
+            relation.source_mask |= 1 << i
+        relation.offsets = offsets
+        relation.targets = targets
+        relation.values = values
+        relation.as_dict = as_dict
+        return relation
+
+    def row(self, i):
+        """
+        Ids of the targets of the node with id i
+        """
+        return self.targets[self.offsets[i]:self.offsets[i + 1]]
+
+    def __getitem__(self, e):
+        i = self.node_ids.get(e)
+        if i is None or not (self.source_mask >> i) & 1:
+            raise KeyError(e)
+        start, end = self.offsets[i], self.offsets[i + 1]
+        if self.values is None:
+            return CsrRow(self, start, end)
+        arcs = [(self.nodes[self.targets[x]], self.values[x]) for x in range(start, end)]
+        return MappingProxyType(dict(arcs)) if self.as_dict else frozenset(arcs)
+
+    def __contains__(self, e):
+        i = self.node_ids.get(e)
+        return i is not None and (self.source_mask >> i) & 1 == 1
+
+    def __iter__(self):
+        for i in self.sources:
+            yield self.nodes[i]
+
+    def __len__(self):
+        return len(self.sources)
+
+    def to_dict(self):
+        res = {}
+        for i in self.sources:
+            start, end = self.offsets[i], self.offsets[i + 1]
+            if self.values is None:
+                res[self.nodes[i]] = set(self.nodes[j] for j in self.targets[start:end])
+            elif self.as_dict:
+                res[self.nodes[i]] = {self.nodes[self.targets[x]]: self.values[x] for x in range(start, end)}
+            else:
+                res[self.nodes[i]] = set((self.nodes[self.targets[x]], self.values[x]) for x in range(start, end))
+        return res
+
+
+class CompactDcrGraph(Mapping):
+    """
+    Immutable DCR graph with interned event ids: every event (and every other node of the graph, e.g. nestings and
+    subprocesses) has an integer id, the relations are stored in CSR format (CsrRelation) and the marking as
+    bitsets (python ints, bit i set if the node with id i is in the set).
+
+    The object is a read-only Mapping with the same keys as the legacy dict (dcr_template), so it can be passed
+    without any conversion to the code reading DCR graphs (exporters, CompiledDcrGraph, conformance checking);
+    the code modifying the graph converts it with to_dict(). Since it is immutable, copying it is free.
+    """
+    __slots__ = ['nodes', 'node_ids', 'n_events', 'relations', 'executed', 'included', 'pending', 'attributes',
+                 'keys_order', '_events', '_marking']
+
+    def __init__(self, dcr):
+        """
+        Builds the compact graph from a legacy dict (or from another CompactDcrGraph)
+
+        Parameters
+        -------------
+        dcr
+            DCR graph (dict with the keys of dcr_template)
+        """
+        marking = dcr.get('marking', {})
+        names = set()
+        for r in Relations:
+            for e, targets in dcr.get(r.value, {}).items():
+                names.add(e)
+                names.update(targets)
+        for key in TIMED_RELATIONS:
+            for e, row in dcr.get(key, {}).items():
+                names.add(e)
+                names.update(row if isinstance(row, Mapping) else (e_prime for (e_prime, _) in row))
+        for key in MARKING_SETS:
+            names.update(marking.get(key, ()))
+        for key in ['nestings', 'subprocesses']:
+            names.update(dcr.get(key, {}))
+        events = sorted(dcr['events'], key=str)
+        others = sorted(names.difference(dcr['events']), key=str)
+        # the events come first, the ids from n_events on are the other nodes
+        self.nodes = tuple(events + others)
+        self.node_ids = {e: i for i, e in enumerate(self.nodes)}
+        self.n_events = len(events)
+        self.keys_order = tuple(dcr.keys())
+        self.relations = {}
+        for r in Relations:
+            if r.value in dcr:
+                self.relations[r.value] = CsrRelation(self.nodes, self.node_ids, dcr[r.value])
+        for key in TIMED_RELATIONS:
+            if key in dcr:
+                self.relations[key] = CsrRelation(self.nodes, self.node_ids, dcr[key], timed=True)
+        self.executed = self.encode(marking.get('executed', ()))
+        self.included = self.encode(marking.get('included', ()))
+        self.pending = self.encode(marking.get('pending', ()))
+        # the other keys (nestings, subprocesses, labels, roles, timing of the marking...) are small
+        # and kept in their legacy format, made read-only
+        self.attributes = {}
+        for key in dcr.keys():
+            if key != 'events' and key != 'marking' and key not in self.relations:
+                self.attributes[key] = freeze(dcr[key])
+        self.attributes['marking'] = freeze({k: v for k, v in marking.items() if k not in MARKING_SETS})
+        self._events = None
+        self._marking = None
+
+    @classmethod
+    def from_dict(cls, dcr):
+        return dcr if isinstance(dcr, CompactDcrGraph) else cls(dcr)
+
+    @classmethod
+    def from_parts(cls, nodes, node_ids, n_events, keys_order, relations, executed, included, pending, attributes):
+        """
+        Graph from its compacted parts (e.g. read from a binary file): the relations are CsrRelation objects on the
+        same nodes and node ids, and the attributes are already read-only (see freeze)
+        """
+        graph = cls.__new__(cls)
+        graph.nodes = nodes
+        graph.node_ids = node_ids
+        graph.n_events = n_events
+        graph.keys_order = tuple(keys_order)
+        graph.relations = relations
+        graph.executed = executed
+        graph.included = included
+        graph.pending = pending
+        graph.attributes = attributes
+        graph._events = None
+        graph._marking = None
+        return graph
+
+    def encode(self, events):
+        mask = 0
+        for e in events:
+            mask |= 1 << self.node_ids[e]
+        return mask
+
+    def decode(self, mask):
+        res = []
+        while mask:
+            low = mask & -mask
+            res.append(self.nodes[low.bit_length() - 1])
+            mask ^= low
+        return frozenset(res)
+
+    def __getitem__(self, key):
+        if key not in self.keys_order:
+            raise KeyError(key)
+        if key == 'events':
+            if self._events is None:
+                self._events = frozenset(self.nodes[:self.n_events])
+            return self._events
+        if key == 'marking':
+            if self._marking is None:
+                marking = dict(self.attributes['marking'])
+                marking['executed'] = self.decode(self.executed)
+                marking['included'] = self.decode(self.included)
+                marking['pending'] = self.decode(self.pending)
+                self._marking = MappingProxyType(marking)
+            return self._marking
+        if key in self.relations:
+            return self.relations[key]
+        return self.attributes[key]
+
+    def __contains__(self, key):
+        return key in self.keys_order
+
+    def __iter__(self):
+        return iter(self.keys_order)
+
+    def __len__(self):
+        return len(self.keys_order)
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        # the read-only views cannot be pickled, the graph is sent as a dict and compacted again
+        return self.__class__, (self.to_dict(),)
+
+    def to_dict(self):
+        """
+        Converts the graph to a new (mutable) legacy dict
+        """
+        res = {}
+        for key in self.keys_order:
+            if key == 'events':
+                res[key] = set(self.nodes[:self.n_events])
+            elif key == 'marking':
+                res[key] = thaw(self.attributes['marking'])
+                res[key]['executed'] = set(self.decode(self.executed))
+                res[key]['included'] = set(self.decode(self.included))
+                res[key]['pending'] = set(self.decode(self.pending))
+            elif key in self.relations:
+                res[key] = self.relations[key].to_dict()
+            else:
+                res[key] = thaw(self.attributes[key])
+        return res
+
+
+def to_dcr_dict(dcr):
+    """
+    Returns a legacy dict that can be modified: a CompactDcrGraph is converted, a dict is returned as it is
+    """
+    return dcr.to_dict() if isinstance(dcr, CompactDcrGraph) else dcr
+
+
 class Marking(object):
     """
     This is a per Event marking not a per graph marking
@@ -231,7 +578,7 @@ class Event(object):
             return super().__eq__(o)
 
     def __hash__(self) -> int:
-        return self.__id.hash()
+        return hash(self.__id)
 
 class DataEvent(Event):
 
@@ -1,13 +1,14 @@
 from copy import deepcopy
 from datetime import timedelta
 
-from pm4py.objects.dcr.obj import Relations
+from pm4py.objects.dcr.obj import Relations, CompactDcrGraph
 
 
 class DcrSemantics(object):
 
     def __init__(self, dcr, cmd_print=True) -> None:
-        self.dcr = deepcopy(dcr)
+        # the semantics modifies the marking of its own copy of the graph
+        self.dcr = dcr.to_dict() if isinstance(dcr, CompactDcrGraph) else deepcopy(dcr)
         self.dict_exe = self.__create_max_executed_time_dict()
         self.parents_dict = {}
         self.cmd_print = cmd_print
@@ -177,7 +178,8 @@ class DcrSemantics(object):
 
     def enabled(self):
         res = deepcopy(self.dcr['marking']['included'])
-        for e in set(self.dcr['conditionsFor'].keys()).difference(set(self.dcr['conditionsForDelays'].keys())).intersection(res):
+        # the plain conditions hold for every event, the delays of the conditions are checked below
+        for e in set(self.dcr['conditionsFor'].keys()).intersection(res):
             if len(self.dcr['conditionsFor'][e].intersection(self.dcr['marking']['included']).difference(self.dcr['marking']['executed'])) > 0:
                 res.discard(e)
                 # if e in self.dcr['subprocesses'].keys():
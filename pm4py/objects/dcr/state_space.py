@@ -0,0 +1,207 @@
+import time
+from collections import deque
+
+from pm4py.objects.dcr.compiled_semantics import CompiledDcrGraph, iter_bits
+
+
+class DcrStateSpace(object):
+    '''
+    Reachable markings of a DCR graph (untimed semantics: delays and deadlines are not considered).
+    A marking is packed in a single python int: the executed events are the bits [0, n), the included events
+    the bits [n, 2n) and the pending events the bits [2n, 3n), where n is the number of events of the
+    CompiledDcrGraph. The reached markings are kept in a dict (hash set) and the enabled events and the successors
+    of every marking are memoized when queried, so the state space can be queried many times after the exploration.
+    '''
+
+    def __init__(self, dcr, max_states=None, max_depth=None, max_elab_time=None, explore=True) -> None:
+        '''
+        Parameters
+        ----------
+        dcr: dcr graph (dict, CompactDcrGraph or CompiledDcrGraph, the nestings are flattened)
+        max_states: maximum number of markings to reach (default: no limit)
+        max_depth: maximum number of executions from the initial marking (default: no limit)
+        max_elab_time: maximum time (in seconds) of the exploration (default: no limit)
+        explore: explores the state space immediately
+        '''
+        self.graph = dcr if isinstance(dcr, CompiledDcrGraph) else CompiledDcrGraph(dcr, flatten=True)
+        self.n = self.graph.n_events
+        self.max_states = max_states
+        self.max_depth = max_depth
+        self.max_elab_time = max_elab_time
+        self.initial_state = self.pack(self.graph.initial_executed, self.graph.initial_included,
+                                       self.graph.initial_pending)
+        # marking -> depth at which it was reached first
+        self.states = {self.initial_state: 0}
+        self.__enabled = {}
+        self.__successors = {}
+        # False if a budget stopped the exploration before all the markings were reached
+        self.complete = False
+        self.explored = False
+        # union over the reached markings, as event bitsets
+        self.ever_executed = 0
+        self.ever_included = 0
+        self.ever_pending_included = 0
+        self.ever_pending_excluded = 0
+        self.ever_enabled = 0
+        if explore:
+            self.explore()
+
+    def pack(self, executed, included, pending):
+        n = self.n
+        return executed | (included << n) | (pending << (2 * n))
+
+    def unpack(self, state):
+        mask = self.graph.all_mask
+        n = self.n
+        return state & mask, (state >> n) & mask, (state >> (2 * n)) & mask
+
+    def decode(self, state):
+        '''
+        Returns the marking as a dict of sets of events (executed, included, pending)
+        '''
+        executed, included, pending = self.unpack(state)
+        return {'executed': self.graph.decode(executed), 'included': self.graph.decode(included),
+                'pending': self.graph.decode(pending)}
+
+    def enabled(self, state):
+        '''
+        Bitset of the events enabled in the marking
+        '''
+        if state not in self.__enabled:
+            g = self.graph
+            executed, included, pending = self.unpack(state)
+            blocking_conditions = included & ~executed
+            blocking_milestones = included & pending
+            enabled = 0
+            for i in iter_bits(included):
+                if not g.conditions[i] & blocking_conditions and not g.milestones[i] & blocking_milestones:
+                    enabled |= 1 << i
+            self.__enabled[state] = enabled
+        return self.__enabled[state]
+
+    def execute(self, state, i):
+        '''
+        Marking reached by executing the event with id i (assumed enabled)
+        '''
+        g = self.graph
+        executed, included, pending = self.unpack(state)
+        bit = 1 << i
+        executed |= bit
+        pending = (pending & ~bit) | g.responses[i]
+        included = (included & ~g.excludes[i]) | g.includes[i]
+        return self.pack(executed, included, pending)
+
+    def successors(self, state):
+        '''
+        List of (event id, marking) reached from the marking with one execution
+        '''
+        if state not in self.__successors:
+            self.__successors[state] = [(i, self.execute(state, i)) for i in iter_bits(self.enabled(state))]
+        return self.__successors[state]
+
+    def is_accepting(self, state):
+        _, included, pending = self.unpack(state)
+        return included & pending == 0
+
+    def place_bits(self, state):
+        '''
+        Marking expressed with the places of the Petri net mapping of DCR graphs, packed in a python int:
+        executed [0, n), included [n, 2n), pending and included [2n, 3n), pending and excluded [3n, 4n)
+        '''
+        executed, included, pending = self.unpack(state)
+        n = self.n
+        return executed | (included << n) | ((pending & included) << (2 * n)) | ((pending & ~included) << (3 * n))
+
+    def explore(self):
+        '''
+        Breadth-first exploration of the markings, within the budgets
+        '''
+        self.complete = True
+        start_time = time.time()
+        queue = deque(self.states)
+        while queue:
+            if self.max_elab_time is not None and time.time() - start_time > self.max_elab_time:
+                self.complete = False
+                break
+            state = queue.popleft()
+            depth = self.states[state]
+            if self.max_depth is not None and depth >= self.max_depth:
+                if self.enabled(state):
+                    self.complete = False
+                continue
+            # the successors are not memoized during the exploration (they are recomputed on demand by the queries)
+            for i in iter_bits(self.enabled(state)):
+                next_state = self.execute(state, i)
+                if next_state not in self.states:
+                    if self.max_states is not None and len(self.states) >= self.max_states:
+                        self.complete = False
+                        continue
+                    self.states[next_state] = depth + 1
+                    queue.append(next_state)
+        for state in self.states:
+            executed, included, pending = self.unpack(state)
+            self.ever_executed |= executed
+            self.ever_included |= included
+            self.ever_pending_included |= pending & included
+            self.ever_pending_excluded |= pending & ~included
+            self.ever_enabled |= self.enabled(state)
+        self.explored = True
+        return self
+
+    def __predecessors(self):
+        predecessors = {state: [] for state in self.states}
+        for state in self.states:
+            for _, next_state in self.successors(state):
+                if next_state in predecessors:
+                    predecessors[next_state].append(state)
+        return predecessors
+
+    def __backward_closure(self, targets, predecessors):
+        reached = set(targets)
+        queue = deque(targets)
+        while queue:
+            state = queue.popleft()
+            for prev in predecessors[state]:
+                if prev not in reached:
+                    reached.add(prev)
+                    queue.append(prev)
+        return reached
+
+    def dead_events(self):
+        '''
+        Events that are not enabled in any reached marking (dead if the exploration is complete)
+        '''
+        return self.graph.decode(self.graph.all_mask & ~self.ever_enabled)
+
+    def never_included_events(self):
+        '''
+        Events that are excluded in all the reached markings
+        '''
+        return self.graph.decode(self.graph.all_mask & ~self.ever_included)
+
+    def deadlocks(self):
+        '''
+        Reached markings without enabled events that are not accepting (there are included pending events)
+        '''
+        return [self.decode(state) for state in self.states
+                if self.enabled(state) == 0 and not self.is_accepting(state)]
+
+    def is_live(self):
+        '''
+        True if from every reached marking an accepting marking can be reached (only meaningful if the exploration
+        is complete)
+        '''
+        accepting = [state for state in self.states if self.is_accepting(state)]
+        return len(self.__backward_closure(accepting, self.__predecessors())) == len(self.states)
+
+    def live_events(self):
+        '''
+        Events that can be executed again from every reached marking (only meaningful if the exploration is complete)
+        '''
+        predecessors = self.__predecessors()
+        live = set()
+        for i in iter_bits(self.ever_enabled):
+            enabling = [state for state in self.states if (self.enabled(state) >> i) & 1]
+            if len(self.__backward_closure(enabling, predecessors)) == len(self.states):
+                live.add(self.graph.events[i])
+        return live
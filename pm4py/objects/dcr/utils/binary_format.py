@@ -0,0 +1,257 @@
+'''
+Binary format of DCR graphs, the serialization of a CompactDcrGraph.
+
+The file starts with MAGIC and is a sequence of chunks, each one prefixed by its length (int64) and padded to
+8 bytes, so that the int64 arrays can be used in place from a memory-mapped file:
+
+    header              int64 [version, number of nodes, number of events, number of relations]
+    keys                int64 string ids of the keys of the graph (in their order)
+    executed            bitset of the executed nodes (little endian, bit i for the node with id i)
+    included            bitset of the included nodes
+    pending             bitset of the pending nodes
+    for every relation:
+        relation        int64 [string id of the relation, timed, timed relation stored as a dict]
+        sources         int64 ids of the keys of the relation
+        offsets         int64 CSR offsets (number of nodes + 1)
+        targets         int64 CSR targets
+        values          encoded list of the delays / deadlines of the targets (empty for untimed relations)
+    attributes          encoded dict with the other keys of the graph (and the timing of the marking)
+    string offsets      int64 offsets of the strings in the string table
+    string table        UTF-8 strings, the first ones are the names of the nodes (node i is string i)
+
+Integers are little endian. The delays, deadlines and attributes are encoded with a one byte tag per value
+(see encode_value).
+'''
+
+import struct
+import sys
+from array import array
+from collections.abc import Mapping
+from datetime import datetime, timedelta
+
+from pm4py.objects.dcr.obj import CompactDcrGraph, CsrRelation, freeze
+
+MAGIC = b'PM4PYDCR'
+VERSION = 1
+
+
+class StringTable(object):
+    '''
+    Interned strings of the file
+    '''
+
+    def __init__(self, strings=()):
+        self.strings = []
+        self.ids = {}
+        for s in strings:
+            self.add(s)
+
+    def add(self, s):
+        if s not in self.ids:
+            self.ids[s] = len(self.strings)
+            self.strings.append(s)
+        return self.ids[s]
+
+
+def int_array_to_bytes(values):
+    values = array('q', values)
+    if sys.byteorder != 'little':
+        values.byteswap()
+    return values.tobytes()
+
+
+def int_array_from_buffer(buffer):
+    '''
+    int64 array on the buffer (a memoryview on the data, without copies, on little endian machines)
+    '''
+    if sys.byteorder == 'little':
+        return buffer.cast('q')
+    values = array('q')
+    values.frombytes(buffer)
+    values.byteswap()
+    return values
+
+
+def encode_value(value, strings, out):
+    '''
+    Appends the encoding of a value of a DCR graph (None, bools, numbers, strings, durations, dates and
+    sets, lists, tuples, dicts of them) to the bytearray out
+    '''
+    import pandas as pd
+    if value is None:
+        out += b'N'
+    elif value is True:
+        out += b'T'
+    elif value is False:
+        out += b'F'
+    elif isinstance(value, int):
+        out += b'i' + struct.pack('<q', value)
+    elif isinstance(value, float):
+        out += b'f' + struct.pack('<d', value)
+    elif isinstance(value, str):
+        out += b's' + struct.pack('<q', strings.add(value))
+    elif isinstance(value, pd.Timedelta):
+        out += b'p' + struct.pack('<q', value.value)
+    elif isinstance(value, timedelta):
+        out += b'd' + struct.pack('<qqq', value.days, value.seconds, value.microseconds)
+    elif isinstance(value, pd.Timestamp):
+        out += b'P' + struct.pack('<q', strings.add(value.isoformat()))
+    elif isinstance(value, datetime):
+        out += b't' + struct.pack('<q', strings.add(value.isoformat()))
+    elif isinstance(value, (set, frozenset)):
+        out += b'S' + struct.pack('<q', len(value))
+        for v in value:
+            encode_value(v, strings, out)
+    elif isinstance(value, (list, tuple)):
+        out += (b'L' if isinstance(value, list) else b'U') + struct.pack('<q', len(value))
+        for v in value:
+            encode_value(v, strings, out)
+    elif isinstance(value, Mapping):
+        out += b'M' + struct.pack('<q', len(value))
+        for k, v in value.items():
+            encode_value(k, strings, out)
+            encode_value(v, strings, out)
+    else:
+        import isodate
+        if isinstance(value, isodate.Duration):
+            out += b'D' + struct.pack('<q', strings.add(isodate.duration_isoformat(value)))
+        else:
+            raise TypeError(f'cannot store a value of type {type(value).__name__} in a binary DCR graph')
+    return out
+
+
+def decode_value(buffer, pos, strings):
+    '''
+    Value encoded by encode_value at the position, and the position after it
+    '''
+    tag = buffer[pos:pos + 1].tobytes()
+    pos += 1
+    if tag == b'N':
+        return None, pos
+    if tag == b'T':
+        return True, pos
+    if tag == b'F':
+        return False, pos
+    if tag in (b'i', b'f', b's', b'p', b'P', b't', b'D'):
+        (x,) = struct.unpack_from('<d' if tag == b'f' else '<q', buffer, pos)
+        pos += 8
+        if tag == b'i' or tag == b'f':
+            return x, pos
+        if tag == b's':
+            return strings[x], pos
+        import pandas as pd
+        if tag == b'p':
+            return pd.Timedelta(x), pos
+        if tag == b'P':
+            return pd.Timestamp(strings[x]), pos
+        if tag == b't':
+            return datetime.fromisoformat(strings[x]), pos
+        import isodate
+        return isodate.parse_duration(strings[x]), pos
+    if tag == b'd':
+        days, seconds, microseconds = struct.unpack_from('<qqq', buffer, pos)
+        return timedelta(days=days, seconds=seconds, microseconds=microseconds), pos + 24
+    if tag in (b'S', b'L', b'U', b'M'):
+        (length,) = struct.unpack_from('<q', buffer, pos)
+        pos += 8
+        if tag == b'M':
+            res = {}
+            for _ in range(length):
+                k, pos = decode_value(buffer, pos, strings)
+                res[k], pos = decode_value(buffer, pos, strings)
+            return res, pos
+        values = []
+        for _ in range(length):
+            v, pos = decode_value(buffer, pos, strings)
+            values.append(v)
+        if tag == b'S':
+            return set(values), pos
+        return (values if tag == b'L' else tuple(values)), pos
+    raise ValueError(f'unknown tag {tag!r} in a binary DCR graph')
+
+
+def append_chunk(out, data):
+    out += struct.pack('<q', len(data))
+    out += data
+    out += b'\0' * (-len(data) % 8)
+
+
+def dump(dcr):
+    '''
+    Serializes the DCR graph (dict or CompactDcrGraph) to bytes
+    '''
+    graph = CompactDcrGraph.from_dict(dcr)
+    for node in graph.nodes:
+        if not isinstance(node, str):
+            raise TypeError('only DCR graphs with string event ids can be stored in the binary format')
+    n_nodes = len(graph.nodes)
+    n_bytes = (n_nodes + 7) // 8
+    strings = StringTable(graph.nodes)
+
+    out = bytearray(MAGIC)
+    append_chunk(out, int_array_to_bytes([VERSION, n_nodes, graph.n_events, len(graph.relations)]))
+    append_chunk(out, int_array_to_bytes(strings.add(key) for key in graph.keys_order))
+    for mask in [graph.executed, graph.included, graph.pending]:
+        append_chunk(out, mask.to_bytes(n_bytes, 'little'))
+    for key, relation in graph.relations.items():
+        timed = relation.values is not None
+        append_chunk(out, int_array_to_bytes([strings.add(key), int(timed), int(relation.as_dict)]))
+        append_chunk(out, int_array_to_bytes(relation.sources))
+        append_chunk(out, int_array_to_bytes(relation.offsets))
+        append_chunk(out, int_array_to_bytes(relation.targets))
+        append_chunk(out, encode_value(relation.values, strings, bytearray()) if timed else b'')
+    append_chunk(out, encode_value(graph.attributes, strings, bytearray()))
+
+    encoded = [s.encode('utf-8') for s in strings.strings]
+    offsets = [0]
+    for s in encoded:
+        offsets.append(offsets[-1] + len(s))
+    append_chunk(out, int_array_to_bytes(offsets))
+    append_chunk(out, b''.join(encoded))
+    return bytes(out)
+
+
+def load(buffer):
+    '''
+    Reads a DCR graph (CompactDcrGraph) from a buffer (bytes, mmap...). The CSR arrays of the relations are views on
+    the buffer, so the buffer is kept alive by the graph and a memory-mapped file is not read into memory
+    '''
+    view = memoryview(buffer)
+    if view[:len(MAGIC)].tobytes() != MAGIC:
+        raise ValueError('not a binary DCR graph')
+    chunks = []
+    pos = len(MAGIC)
+    while pos < len(view):
+        (length,) = struct.unpack_from('<q', view, pos)
+        pos += 8
+        chunks.append(view[pos:pos + length])
+        pos += length + (-length % 8)
+
+    version, n_nodes, n_events, n_relations = int_array_from_buffer(chunks[0])
+    if version != VERSION:
+        raise ValueError(f'unsupported version {version} of the binary DCR graph')
+    string_offsets = int_array_from_buffer(chunks[-2])
+    string_table = chunks[-1]
+    strings = [str(string_table[string_offsets[i]:string_offsets[i + 1]], 'utf-8')
+               for i in range(len(string_offsets) - 1)]
+    nodes = tuple(strings[:n_nodes])
+    node_ids = {e: i for i, e in enumerate(nodes)}
+
+    keys_order = [strings[i] for i in int_array_from_buffer(chunks[1])]
+    executed, included, pending = [int.from_bytes(chunks[x], 'little') for x in range(2, 5)]
+    relations = {}
+    for r in range(n_relations):
+        meta, sources, offsets, targets, values = chunks[5 + 5 * r:10 + 5 * r]
+        key, timed, as_dict = int_array_from_buffer(meta)
+        if timed:
+            values, _ = decode_value(values, 0, strings)
+        else:
+            values = None
+        relations[strings[key]] = CsrRelation.from_arrays(nodes, node_ids, int_array_from_buffer(sources),
+                                                          int_array_from_buffer(offsets),
+                                                          int_array_from_buffer(targets), values=values,
+                                                          as_dict=bool(as_dict))
+    attributes, _ = decode_value(chunks[5 + 5 * n_relations], 0, strings)
+    attributes = {k: freeze(v) for k, v in attributes.items()}
+    return CompactDcrGraph.from_parts(nodes, node_ids, n_events, keys_order, relations, executed, included, pending,
+                                      attributes)
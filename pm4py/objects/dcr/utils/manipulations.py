@@ -1,4 +1,4 @@
-from pm4py.objects.dcr.obj import Relations
+from pm4py.objects.dcr.obj import Relations, to_dcr_dict
 
 def flatten_dcr_hierarchies(dcr):
     '''
@@ -10,6 +10,7 @@ def flatten_dcr_hierarchies(dcr):
     Returns: the flat dcr with no nestings
     -------
     '''
+    dcr = to_dcr_dict(dcr)
     for groups in ['nestings', 'subprocesses']:
         for nesting_event, events_nested in dcr[groups].items():
             for rel in Relations:
@@ -173,9 +173,14 @@
 '''
 import re
 
+import numpy as np
 from numpy import sort
 
 from pm4py.objects import petri_net
+from pm4py.objects.petri_net import properties
+from pm4py.objects.petri_net.obj import Marking, InhibitorNet, ResetNet
+from pm4py.objects.petri_net.inhibitor_reset.semantics import InhibitorResetSemantics
+from pm4py.objects.petri_net.transport_invariant.semantics import TransportInvariantSemantics
 from pm4py.objects.petri_net.utils import align_utils
 from pm4py.objects.transition_system import obj as ts
 from pm4py.objects.transition_system import utils
@@ -225,6 +230,13 @@ def marking_flow_petri(net, im, return_eventually_enabled=False, parameters=None
     max_exec_time = exec_utils.get_param_value(Parameters.MAX_ELAB_TIME, parameters, 86400)
     semantics = exec_utils.get_param_value(Parameters.PETRI_SEMANTICS, parameters, petri_net.semantics.ClassicSemantics())
     # print(f'[i] exec: {max_exec_time} semantics: {semantics}')
+
+    # the index of the net pays off only if the exploration goes beyond the initial marking
+    if semantics.enabled_transitions(net, im) and IndexedNet.supports(net, im, semantics):
+        return indexed_marking_flow_petri(IndexedNet(net, im, semantics),
+                                          return_eventually_enabled=return_eventually_enabled,
+                                          max_exec_time=max_exec_time)
+
     start_time = time.time()
 
     incoming_transitions = {im: set()}
@@ -259,6 +271,229 @@ def marking_flow_petri(net, im, return_eventually_enabled=False, parameters=None
     return incoming_transitions, outgoing_transitions, eventually_enabled
 
 
+class IndexedNet(object):
+    """
+    Petri net compiled for the exploration of its markings: the places are indexed and the markings are NumPy
+    vectors of token counts.
+    The enabling of a transition is a set of constraints on the tokens of its input places (at least the weight
+    of the arcs, none for inhibitor arcs); the constraints are grouped by place, so that after a firing only the
+    constraints on the places whose tokens changed are evaluated. Every transition has the vectors of the tokens
+    it consumes, of the places it resets and of the tokens it produces.
+    Supports the classic, the inhibitor/reset and the transport-invariant semantics, with the same enabling and
+    firing rules as their implementation in pm4py.objects.petri_net.
+    """
+
+    def __init__(self, net, im, semantics):
+        self.net = net
+        self.places = list(net.places)
+        self.place_ids = {p: i for i, p in enumerate(self.places)}
+        self.transitions = list(net.transitions)
+        n_places = len(self.places)
+        self.consume_idx = []
+        self.consume_val = []
+        self.reset_idx = []
+        self.produce_idx = []
+        self.produce_val = []
+        self.touched_idx = []
+        # sparse change of the marking of the transitions that cannot reset or empty a place below the weights
+        self.delta_idx = []
+        self.delta_val = []
+        # constraints (transition, place, min tokens, max tokens), one for every input place of a transition
+        constraints = {}
+        for i, t in enumerate(self.transitions):
+            consume = {}
+            reset = set()
+            produce = {}
+            for a in t.in_arcs:
+                p = self.place_ids[a.source]
+                min_tokens, max_tokens = constraints.get((p, i), (0, -1))
+                arc_type = self.get_arc_type(a, semantics)
+                if arc_type == properties.INHIBITOR_ARC:
+                    max_tokens = 0
+                    if isinstance(semantics, TransportInvariantSemantics):
+                        # the transport-invariant semantics checks the weight of the inhibitor arcs too
+                        min_tokens = max(min_tokens, a.weight)
+                elif arc_type == properties.RESET_ARC:
+                    reset.add(p)
+                else:
+                    min_tokens = max(min_tokens, a.weight)
+                    consume[p] = consume.get(p, 0) + a.weight
+                if min_tokens > 0 or max_tokens == 0:
+                    constraints[(p, i)] = (min_tokens, max_tokens)
+            for a in t.out_arcs:
+                p = self.place_ids[a.target]
+                produce[p] = produce.get(p, 0) + a.weight
+            self.consume_idx.append(np.array(list(consume.keys()), dtype=np.int64))
+            self.consume_val.append(np.array(list(consume.values()), dtype=np.int64))
+            self.reset_idx.append(np.array(sorted(reset), dtype=np.int64))
+            self.produce_idx.append(np.array(list(produce.keys()), dtype=np.int64))
+            self.produce_val.append(np.array(list(produce.values()), dtype=np.int64))
+            self.touched_idx.append(np.array(sorted(set(consume).union(reset).union(produce)), dtype=np.int64))
+            if not reset and all(consume[p] <= constraints[(p, i)][0] for p in consume):
+                delta = {p: produce.get(p, 0) - consume.get(p, 0) for p in set(consume).union(produce)}
+                delta = {p: v for p, v in delta.items() if v != 0}
+                self.delta_idx.append(np.array(sorted(delta), dtype=np.int64))
+                self.delta_val.append(np.array([delta[p] for p in sorted(delta)], dtype=np.int64))
+            else:
+                self.delta_idx.append(None)
+                self.delta_val.append(None)
+        keys = sorted(constraints)
+        self.c_place = np.array([k[0] for k in keys], dtype=np.int64)
+        self.c_trans = np.array([k[1] for k in keys], dtype=np.int64)
+        self.c_min = np.array([constraints[k][0] for k in keys], dtype=np.int64)
+        # -1 stands for no maximum
+        max_tokens = np.array([constraints[k][1] for k in keys], dtype=np.int64)
+        self.c_max = np.where(max_tokens < 0, np.iinfo(np.int64).max, max_tokens)
+        # constraints on every place
+        bounds = np.searchsorted(self.c_place, np.arange(n_places + 1))
+        self.place_constraints = [np.arange(bounds[p], bounds[p + 1]) for p in range(n_places)]
+        self.initial_marking = np.zeros(n_places, dtype=np.int64)
+        for p, tokens in im.items():
+            self.initial_marking[self.place_ids[p]] = tokens
+
+    @staticmethod
+    def supports(net, im, semantics):
+        """
+        Checks if the markings of the net can be explored on the indexed net
+        (known semantics, initial marking on the places of the net, positive weights)
+        """
+        if type(semantics) not in [petri_net.semantics.ClassicSemantics, InhibitorResetSemantics,
+                                   TransportInvariantSemantics]:
+            return False
+        if any(p not in net.places or tokens <= 0 for p, tokens in im.items()):
+            return False
+        return all(a.weight > 0 for a in net.arcs)
+
+    @staticmethod
+    def get_arc_type(a, semantics):
+        if isinstance(semantics, InhibitorResetSemantics):
+            if isinstance(a, InhibitorNet.InhibitorArc):
+                return properties.INHIBITOR_ARC
+            elif isinstance(a, ResetNet.ResetArc):
+                return properties.RESET_ARC
+        elif isinstance(semantics, TransportInvariantSemantics):
+            if a.properties.get(properties.ARCTYPE) in [properties.INHIBITOR_ARC, "tapnInhibitor"]:
+                return properties.INHIBITOR_ARC
+        return None
+
+    def violations(self, m, idx=None):
+        """
+        Evaluates the constraints (all, or the ones with the given indexes) on a marking, 1 if violated
+        """
+        if idx is None:
+            tokens = m[self.c_place]
+            return ((tokens < self.c_min) | (tokens > self.c_max)).astype(np.int64)
+        tokens = m[self.c_place[idx]]
+        return ((tokens < self.c_min[idx]) | (tokens > self.c_max[idx])).astype(np.int64)
+
+    def count_violations(self, m):
+        """
+        Number of violated constraints of every transition in the marking (enabled if 0)
+        """
+        return np.bincount(self.c_trans, weights=self.violations(m), minlength=len(self.transitions)).astype(np.int64)
+
+    def update_violations(self, counts, changed, m, m_out):
+        """
+        Updates the number of violated constraints of every transition evaluating only the constraints on the
+        places whose tokens changed
+        """
+        if len(changed) == 0:
+            return counts
+        idx = np.concatenate([self.place_constraints[p] for p in changed])
+        delta = self.violations(m_out, idx) - self.violations(m, idx)
+        nonzero = np.flatnonzero(delta)
+        if len(nonzero) == 0:
+            return counts
+        counts_out = counts.copy()
+        np.add.at(counts_out, self.c_trans[idx[nonzero]], delta[nonzero])
+        return counts_out
+
+    def fire(self, i, m):
+        m_out = m.copy()
+        if self.delta_idx[i] is not None:
+            m_out[self.delta_idx[i]] += self.delta_val[i]
+            return m_out
+        idx = self.consume_idx[i]
+        m_out[idx] = np.maximum(m_out[idx] - self.consume_val[i], 0)
+        m_out[self.reset_idx[i]] = 0
+        m_out[self.produce_idx[i]] += self.produce_val[i]
+        return m_out
+
+    def changed_places(self, i, m, m_out):
+        if self.delta_idx[i] is not None:
+            return self.delta_idx[i]
+        idx = self.touched_idx[i]
+        return idx[m[idx] != m_out[idx]]
+
+    def to_marking(self, m):
+        marking = Marking()
+        for p in np.flatnonzero(m):
+            marking[self.places[p]] = int(m[p])
+        return marking
+
+
+def indexed_marking_flow_petri(indexed_net, return_eventually_enabled=False, max_exec_time=86400):
+    """
+    Construct the marking flow of a Petri net compiled in an IndexedNet.
+    The markings are looked up by the bytes of their vectors. Every marking of the frontier carries the number of
+    violated enabling constraints of every transition, updated from the marking it is reached from on the places
+    whose tokens changed.
+
+    Parameters
+    -----------------
+    indexed_net
+        Indexed Petri net (with its initial marking)
+    return_eventually_enabled
+        Return the eventually enabled (visible) transitions
+    max_exec_time
+        Maximum execution time (in seconds), checked before the firing of every transition
+
+    Returns
+    -----------------
+    incoming_transitions, outgoing_transitions, eventually_enabled
+        The marking flow, as in marking_flow_petri
+    """
+    start_time = time.time()
+    transitions = indexed_net.transitions
+
+    im = indexed_net.initial_marking
+    # the markings are found by the bytes of their vectors, and hashed only once when they are added to the flow
+    markings = {im.tobytes(): indexed_net.to_marking(im)}
+    incoming = {im.tobytes(): set()}
+    incoming_transitions = {markings[im.tobytes()]: incoming[im.tobytes()]}
+    outgoing_transitions = {}
+    eventually_enabled = {}
+
+    active = [(im, indexed_net.count_violations(im))]
+    while active:
+        if (time.time() - start_time) >= max_exec_time:
+            # interrupt the execution
+            break
+        m, counts = active.pop()
+        marking = markings[m.tobytes()]
+        if return_eventually_enabled:
+            eventually_enabled[marking] = align_utils.get_visible_transitions_eventually_enabled_by_marking(
+                indexed_net.net, marking)
+        outgoing = {}
+        outgoing_transitions[marking] = outgoing
+        for i in np.nonzero(counts == 0)[0].tolist():
+            if (time.time() - start_time) >= max_exec_time:
+                # a marking can have many successors, the execution is interrupted also in the middle of them
+                break
+            m_out = indexed_net.fire(i, m)
+            key = m_out.tobytes()
+            if key not in markings:
+                markings[key] = indexed_net.to_marking(m_out)
+                incoming[key] = set()
+                incoming_transitions[markings[key]] = incoming[key]
+                changed = indexed_net.changed_places(i, m, m_out)
+                active.append((m_out, indexed_net.update_violations(counts, changed, m, m_out)))
+            outgoing[transitions[i]] = markings[key]
+            incoming[key].add(transitions[i])
+
+    return incoming_transitions, outgoing_transitions, eventually_enabled
+
+
 def construct_reachability_graph_from_flow(incoming_transitions, outgoing_transitions,
                                            use_trans_name=False, parameters=None):
     """
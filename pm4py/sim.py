@@ -30,9 +30,9 @@ def play_out(*args: Union[Tuple[PetriNet, Marking, Marking], dict, Counter, Proc
     """
     Performs the playout of the provided model,
     i.e., gets a set of traces from the model.
-    The function either takes a petri net, initial and final marking, or, a process tree as an input.
+    The function either takes a petri net, initial and final marking, a process tree, or, a DCR graph as an input.
 
-    :param args: model (Petri net with initial and final marking, or process tree)
+    :param args: model (Petri net with initial and final marking, process tree, or DCR graph)
     :param kwargs: optional parameters of the method, including:
         - parameters: dictionary containing the parameters of the playout, including:
             - smap: (if provided) stochastic map to be used to stochastically choose the transition
@@ -83,6 +83,16 @@ def play_out(*args: Union[Tuple[PetriNet, Marking, Marking], dict, Counter, Proc
         if type(args[0]) is ProcessTree:
             from pm4py.algo.simulation.playout.process_tree import algorithm
             return algorithm.apply(args[0], **kwargs)
+        from collections.abc import Mapping
+        if isinstance(args[0], Mapping) and "events" in args[0] and "marking" in args[0]:
+            from pm4py.algo.simulation.playout.dcr import algorithm
+            parameters = kwargs["parameters"] if "parameters" in kwargs else None
+            if parameters is None:
+                parameters = {}
+            variant = algorithm.Variants.BASIC_PLAYOUT
+            if "log" in parameters or "stochastic_map" in parameters:
+                variant = algorithm.Variants.STOCHASTIC_PLAYOUT
+            return algorithm.apply(args[0], variant=variant, parameters=parameters)
     raise Exception("unsupported model for playout")
 
 
@@ -0,0 +1,46 @@
+'''
+    This file is part of PM4Py (More Info: https://pm4py.fit.fraunhofer.de).
+
+    PM4Py is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    PM4Py is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with PM4Py.  If not, see <https://www.gnu.org/licenses/>.
+'''
+from pm4py.streaming.algo.discovery.dcr.variants import discover
+from enum import Enum
+from pm4py.util import exec_utils
+
+
+class Variants(Enum):
+    DISCOVER = discover
+
+
+DEFAULT_VARIANT = Variants.DISCOVER
+
+
+def apply(variant=DEFAULT_VARIANT, parameters=None):
+    """
+    Discovers a DCR graph (DisCoveR) from an event stream
+
+    Parameters
+    --------------
+    variant
+        Variant of the algorithm (default: Variants.DISCOVER)
+
+    Returns
+    --------------
+    stream_dcr_obj
+        Streaming DCR discovery object
+    """
+    if parameters is None:
+        parameters = {}
+
+    return exec_utils.get_variant(variant).apply(parameters=parameters)
@@ -0,0 +1,307 @@
+'''
+    This file is part of PM4Py (More Info: https://pm4py.fit.fraunhofer.de).
+
+    PM4Py is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    PM4Py is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with PM4Py.  If not, see <https://www.gnu.org/licenses/>.
+'''
+from collections import OrderedDict
+from enum import Enum
+import logging
+
+from pm4py.algo.discovery.dcr_discover.variants.dcr_discover import Discover
+from pm4py.streaming.algo.interface import StreamingAlgorithm
+from pm4py.util import exec_utils, constants, xes_constants
+
+
+class Parameters(Enum):
+    ACTIVITY_KEY = constants.PARAMETER_CONSTANT_ACTIVITY_KEY
+    CASE_ID_KEY = constants.PARAMETER_CONSTANT_CASEID_KEY
+    END_ACTIVITIES = "end_activities"
+    MAX_OPEN_CASES = "max_open_cases"
+    EVICTION_POLICY = "eviction_policy"
+    FOLD_EVICTED_CASES = "fold_evicted_cases"
+    FIND_ADDITIONAL_CONDITIONS = "findAdditionalConditions"
+    MAX_VARIANTS = "max_variants"
+
+
+# default maximum number of completed variants kept for the additional conditions
+DEFAULT_MAX_VARIANTS = 10000
+
+
+class EvictionPolicy(Enum):
+    # evicts the case that received an event least recently
+    LRU = "lru"
+    # evicts the case that started first
+    FIFO = "fifo"
+
+
+class OpenCase(object):
+    """
+    Partial state of a case that is still running
+    """
+    __slots__ = ["trace", "seen"]
+
+    def __init__(self):
+        # activities of the case, in order
+        self.trace = []
+        # activity -> position of its last occurrence in the case
+        self.seen = {}
+
+
+class StreamingDcrDiscovery(StreamingAlgorithm):
+    def __init__(self, parameters=None):
+        """
+        Initialize the StreamingDcrDiscovery object.
+
+        The log abstraction of DisCoveR is kept up to date as the events arrive: the relations that only depend
+        on the prefix of a case (atMostOnce, precedence, chain precedence, predecessors) are updated by every event,
+        while the responses are folded into the abstraction when the case is completed.
+        The DCR graph is mined from the abstraction only when it is requested (get()).
+        Since the abstraction depends on the order of the events of a case, a LiveEventStream delivering
+        to this object should use a single thread (thread_pool_size = 1).
+
+        Parameters
+        ---------------
+        parameters of the algorithm, including:
+         - Parameters.ACTIVITY_KEY: the key of the event to use as activity
+         - Parameters.CASE_ID_KEY: the key of the event to use as case identifier
+         - Parameters.END_ACTIVITIES: activities completing a case (cases can also be completed with terminate())
+         - Parameters.MAX_OPEN_CASES: maximum number of running cases kept in memory (default: no limit)
+         - Parameters.EVICTION_POLICY: case to evict when the limit is reached (EvictionPolicy.LRU or
+            EvictionPolicy.FIFO, default: LRU)
+         - Parameters.FOLD_EVICTED_CASES: folds the evicted cases into the abstraction as if they were completed
+            (default: False, the evicted cases only contribute with their prefix)
+         - Parameters.FIND_ADDITIONAL_CONDITIONS: applies the last step of DisCoveR when mining the graph (the
+            completed variants are kept only in this case)
+         - Parameters.MAX_VARIANTS: maximum number of completed variants kept for the additional conditions
+            (default: DEFAULT_MAX_VARIANTS, the variant completed least recently is evicted first; None for no limit)
+        """
+        if parameters is None:
+            parameters = {}
+
+        self.parameters = parameters
+        self.activity_key = exec_utils.get_param_value(Parameters.ACTIVITY_KEY, parameters,
+                                                       xes_constants.DEFAULT_NAME_KEY)
+        self.case_id_key = exec_utils.get_param_value(Parameters.CASE_ID_KEY, parameters,
+                                                      constants.CASE_CONCEPT_NAME)
+        self.end_activities = set(exec_utils.get_param_value(Parameters.END_ACTIVITIES, parameters, set()))
+        self.max_open_cases = exec_utils.get_param_value(Parameters.MAX_OPEN_CASES, parameters, None)
+        self.eviction_policy = EvictionPolicy(
+            exec_utils.get_param_value(Parameters.EVICTION_POLICY, parameters, EvictionPolicy.LRU))
+        self.fold_evicted_cases = exec_utils.get_param_value(Parameters.FOLD_EVICTED_CASES, parameters, False)
+        self.find_additional_conditions = exec_utils.get_param_value(Parameters.FIND_ADDITIONAL_CONDITIONS,
+                                                                     parameters, True)
+        self.max_variants = exec_utils.get_param_value(Parameters.MAX_VARIANTS, parameters, DEFAULT_MAX_VARIANTS)
+
+        self.open_cases = OrderedDict()
+        self.events = set()
+        self.at_most_once = set()
+        # a missing key means that the relation was never observed for the activity (it starts from all the events)
+        self.precedence_for = {}
+        self.chain_precedence_for = {}
+        self.response_to = {}
+        self.predecessor = {}
+        # completed variants (by order of last completion), needed by the additional conditions of DisCoveR
+        self.variants = OrderedDict()
+        self.evicted_cases = 0
+        self.evicted_variants = 0
+        StreamingAlgorithm.__init__(self)
+
+    def event_without_activity_or_case(self, event):
+        """
+        Print an error message when an event is without the
+        activity or the case identifier
+
+        Parameters
+        ----------------
+        event
+            Event
+        """
+        logging.warning("event without activity or case: " + str(event))
+
+    def _process(self, event):
+        """
+        Receives an event from the live event stream,
+        and updates the log abstraction
+
+        Parameters
+        ---------------
+        event
+            Event
+        """
+        if self.case_id_key in event and self.activity_key in event:
+            case = event[self.case_id_key]
+            activity = event[self.activity_key]
+            if case in self.open_cases:
+                state = self.open_cases[case]
+                if self.eviction_policy == EvictionPolicy.LRU:
+                    self.open_cases.move_to_end(case)
+            else:
+                self.__evict()
+                state = OpenCase()
+                self.open_cases[case] = state
+            self.__add_event(state, activity)
+            if activity in self.end_activities:
+                self.__complete(self.open_cases.pop(case))
+        else:
+            self.event_without_activity_or_case(event)
+
+    def __add_event(self, state, activity):
+        if activity not in self.events:
+            self.events.add(activity)
+            self.at_most_once.add(activity)
+            self.predecessor[activity] = set()
+        seen = state.seen
+        # all the activities seen before in the case are predecessors
+        if seen:
+            self.predecessor[activity].update(seen)
+        if activity in seen:
+            self.at_most_once.discard(activity)
+        else:
+            # precedence is decided by the first occurrence in the case
+            before = set(seen)
+            if activity in self.precedence_for:
+                self.precedence_for[activity] &= before
+            else:
+                self.precedence_for[activity] = before
+        if state.trace:
+            last = state.trace[-1]
+            chain = set([last]) if last != activity else set()
+        else:
+            chain = set()
+        if activity in self.chain_precedence_for:
+            self.chain_precedence_for[activity] &= chain
+        else:
+            self.chain_precedence_for[activity] = chain
+        seen[activity] = len(state.trace)
+        state.trace.append(activity)
+
+    def __complete(self, state):
+        # the activities seen after the last occurrence of an activity are its possible responses
+        by_last = sorted(state.seen, key=state.seen.get)
+        after = set()
+        for activity in reversed(by_last):
+            if activity in self.response_to:
+                self.response_to[activity] &= after
+            else:
+                self.response_to[activity] = set(after)
+            after.add(activity)
+        if self.find_additional_conditions:
+            variant = tuple(state.trace)
+            if variant in self.variants:
+                self.variants[variant] += 1
+                self.variants.move_to_end(variant)
+            else:
+                if self.max_variants is not None:
+                    while self.variants and len(self.variants) >= self.max_variants:
+                        self.variants.popitem(last=False)
+                        self.evicted_variants += 1
+                self.variants[variant] = 1
+
+    def __evict(self):
+        # makes room for a new case
+        if self.max_open_cases is not None:
+            while self.open_cases and len(self.open_cases) >= self.max_open_cases:
+                case, state = self.open_cases.popitem(last=False)
+                self.evicted_cases += 1
+                if self.fold_evicted_cases:
+                    self.__complete(state)
+
+    def terminate(self, case):
+        """
+        Completes a case, folding its responses into the log abstraction
+
+        Parameters
+        ----------------
+        case
+            Case ID
+        """
+        self._lock.acquire()
+        try:
+            if case in self.open_cases:
+                self.__complete(self.open_cases.pop(case))
+        finally:
+            self._lock.release()
+
+    def terminate_all(self):
+        """
+        Completes all the open cases
+        """
+        self._lock.acquire()
+        try:
+            cases = list(self.open_cases.keys())
+        finally:
+            self._lock.release()
+        for case in cases:
+            self.terminate(case)
+
+    def get_log_abstraction(self):
+        """
+        Gets the current log abstraction, in the same format as the one of the (batch) DisCoveR algorithm
+
+        Returns
+        ----------------
+        log_abstraction
+            Log abstraction
+        """
+        events = set(self.events)
+        abstraction = {
+            'events': events,
+            'traces': [list(v) for v in self.variants],
+            'atMostOnce': set(self.at_most_once),
+            'chainPrecedenceFor': {},
+            'precedenceFor': {},
+            'predecessor': {},
+            'responseTo': {},
+            'successor': {},
+            'variants': dict(self.variants)
+        }
+        for event in events:
+            abstraction['chainPrecedenceFor'][event] = set(self.chain_precedence_for.get(event, set()))
+            abstraction['precedenceFor'][event] = set(self.precedence_for.get(event, set()))
+            abstraction['predecessor'][event] = set(self.predecessor[event])
+            abstraction['responseTo'][event] = set(self.response_to.get(event, set()))
+            abstraction['successor'][event] = set()
+        for i in abstraction['predecessor']:
+            for j in abstraction['predecessor'][i]:
+                abstraction['successor'][j].add(i)
+        return abstraction
+
+    def _current_result(self):
+        """
+        Mines the DCR graph from the current log abstraction
+
+        Returns
+        ----------------
+        dcr
+            DCR graph
+        """
+        disc = Discover()
+        disc.logAbstraction = self.get_log_abstraction()
+        disc.mineFromAbstraction(findAdditionalConditions=self.find_additional_conditions)
+        return disc.graph
+
+
+def apply(parameters=None):
+    """
+    Creates a StreamingDcrDiscovery object
+
+    Parameters
+    --------------
+    parameters
+        Parameters of the algorithm
+    """
+    if parameters is None:
+        parameters = {}
+
+    return StreamingDcrDiscovery(parameters=parameters)
@@ -15,4 +15,4 @@
     along with PM4Py.  If not, see <https://www.gnu.org/licenses/>.
 '''
 from pm4py.util import variants_util, lp, constants, points_subset, business_hours, xes_constants, vis_utils, \
-    dt_parsing, colors, exec_utils, pandas_utils, typing, compression
+    dt_parsing, colors, exec_utils, pandas_utils, typing, compression, chunking
@@ -0,0 +1,59 @@
+'''
+    This file is part of PM4Py (More Info: https://pm4py.fit.fraunhofer.de).
+
+    PM4Py is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    PM4Py is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with PM4Py.  If not, see <https://www.gnu.org/licenses/>.
+'''
+# number of chunks per worker in which the items are dispatched
+CHUNKS_PER_WORKER = 4
+
+
+def get_longest_first_chunks(items, cores, chunks_per_worker=CHUNKS_PER_WORKER):
+    """
+    Chunks of indexes of the items (e.g. traces or variants) dispatched to a pool of worker processes: the longest
+    items first, every chunk holding about 1 / chunks_per_worker of the work left per worker, so that the chunks
+    shrink as the remaining work decreases and the workers finish at about the same time (the work of an item is
+    estimated by its length)
+
+    Parameters
+    ------------
+    items
+        List of items (having a length)
+    cores
+        Number of worker processes
+    chunks_per_worker
+        Number of chunks per worker
+
+    Returns
+    ------------
+    chunks
+        List of chunks, every chunk being a list of indexes of the items
+    """
+    order = sorted(range(len(items)), key=lambda i: len(items[i]), reverse=True)
+    remaining_work = sum(len(item) + 1 for item in items)
+    chunks = []
+    chunk = []
+    chunk_work = 0
+    target = remaining_work / (cores * chunks_per_worker)
+    for i in order:
+        chunk.append(i)
+        chunk_work += len(items[i]) + 1
+        if chunk_work >= target:
+            chunks.append(chunk)
+            remaining_work -= chunk_work
+            chunk = []
+            chunk_work = 0
+            target = remaining_work / (cores * chunks_per_worker)
+    if chunk:
+        chunks.append(chunk)
+    return chunks
@@ -100,6 +100,150 @@ class AlignmentTest(unittest.TestCase):
         net, im, fm = pm4py.discover_petri_net_inductive(log)
         align_alg.apply(log, net, im, fm, variant=align_alg.Variants.VERSION_TWEAKED_STATE_EQUATION_A_STAR)
 
+    def test_variant_trie_dijkstra(self):
+        import pm4py
+        from pm4py.objects.log.obj import EventLog, Trace, Event
+        log = pm4py.read_xes("input_data/running-example.xes")
+        net, im, fm = pm4py.discover_petri_net_inductive(log, noise_threshold=0.2)
+        expected = align_alg.apply(log, net, im, fm, variant=align_alg.Variants.VERSION_DIJKSTRA_NO_HEURISTICS)
+        aligned = align_alg.apply(log, net, im, fm, variant=align_alg.Variants.VERSION_TRIE_DIJKSTRA)
+        self.assertEqual([al["cost"] for al in aligned], [al["cost"] for al in expected])
+        self.assertEqual([al["fitness"] for al in aligned], [al["fitness"] for al in expected])
+        # the time limit of the traces applies to the shared search
+        aligned = align_alg.apply(log, net, im, fm, variant=align_alg.Variants.VERSION_TRIE_DIJKSTRA,
+                                  parameters={align_alg.Parameters.PARAM_MAX_ALIGN_TIME_TRACE: 0})
+        self.assertEqual(aligned, [None] * len(expected))
+        # a variant that is the prefix of another one, and the empty trace
+        traces = [["register request", "examine casually", "check ticket", "decide", "reject request"],
+                  ["register request", "examine casually"], []]
+        log = EventLog([Trace([Event({"concept:name": a}) for a in trace]) for trace in traces])
+        expected = align_alg.apply(log, net, im, fm, variant=align_alg.Variants.VERSION_DIJKSTRA_NO_HEURISTICS)
+        aligned = align_alg.apply(log, net, im, fm, variant=align_alg.Variants.VERSION_TRIE_DIJKSTRA)
+        self.assertEqual([al["cost"] for al in aligned], [al["cost"] for al in expected])
+        for al, trace in zip(aligned, traces):
+            self.assertEqual([move[0] for move in al["alignment"] if move[0] != ">>"], trace)
+
+    def test_alignments_pool(self):
+        import pm4py
+        from pm4py.objects.log.obj import EventLog, Trace, Event
+        log = pm4py.read_xes("input_data/running-example.xes")
+        net, im, fm = pm4py.discover_petri_net_inductive(log, noise_threshold=0.2)
+        expected = [al["cost"] for al in align_alg.apply(log, net, im, fm)]
+        parameters = {align_alg.Parameters.CORES: 2, align_alg.Parameters.SHOW_PROGRESS_BAR: False}
+        aligned = align_alg.apply_multiprocessing(log, net, im, fm, parameters=parameters)
+        self.assertEqual([al["cost"] for al in aligned], expected)
+        with align_alg.AlignmentsPool(net, im, fm, parameters=parameters) as pool:
+            # the pool passed as parameter is reused by the calls against the same model
+            for i in range(2):
+                aligned = align_alg.apply_multiprocessing(log, net, im, fm,
+                                                          parameters={align_alg.Parameters.POOL: pool})
+                self.assertEqual([al["cost"] for al in aligned], expected)
+            # the simplified interface reuses the workers of the pool
+            workers = set(pool.executor._processes)
+            self.assertTrue(len(workers) > 0)
+            for i in range(2):
+                aligned = pm4py.conformance_diagnostics_alignments(log, net, im, fm, pool=pool)
+                self.assertEqual([al["cost"] for al in aligned], expected)
+                self.assertEqual(set(pool.executor._processes), workers)
+        # custom costs of the model: the ones of the pool are used, different ones in the call are refused
+        log = EventLog([Trace([Event({"concept:name": a}) for a in trace]) for trace in
+                        [["register request", "decide"], ["register request", "decide", "pay compensation"]]])
+        model_cost_function = {t: 50000 if t.label is not None else 0 for t in net.transitions}
+        sync_cost_function = {t: 0 for t in net.transitions if t.label is not None}
+        cost_parameters = {align_alg.Parameters.PARAM_MODEL_COST_FUNCTION: model_cost_function,
+                           align_alg.Parameters.PARAM_SYNC_COST_FUNCTION: sync_cost_function}
+        expected = [al["cost"] for al in align_alg.apply(log, net, im, fm, parameters=cost_parameters)]
+        self.assertNotEqual(expected, [al["cost"] for al in align_alg.apply(log, net, im, fm)])
+        with align_alg.AlignmentsPool(net, im, fm, parameters={**parameters, **cost_parameters}) as pool:
+            aligned = align_alg.apply_multiprocessing(log, net, im, fm,
+                                                      parameters={**cost_parameters, align_alg.Parameters.POOL: pool})
+            self.assertEqual([al["cost"] for al in aligned], expected)
+        with align_alg.AlignmentsPool(net, im, fm, parameters=parameters) as pool:
+            with self.assertRaises(Exception):
+                align_alg.apply_multiprocessing(log, net, im, fm,
+                                                parameters={**cost_parameters, align_alg.Parameters.POOL: pool})
+
+    def test_state_equation_heuristics_cache(self):
+        import pm4py
+        from pm4py.algo.conformance.alignments.petri_net.variants import state_equation_a_star
+        from pm4py.objects.petri_net.utils.petri_utils import construct_trace_net
+        log = pm4py.read_xes("input_data/running-example.xes", return_legacy_log_object=True)
+        net, im, fm = pm4py.discover_petri_net_inductive(log, noise_threshold=0.2)
+        expected = align_alg.apply(log, net, im, fm, variant=align_alg.Variants.VERSION_DIJKSTRA_NO_HEURISTICS)
+        aligned = align_alg.apply(log, net, im, fm, variant=align_alg.Variants.VERSION_STATE_EQUATION_A_STAR)
+        self.assertEqual([al["cost"] for al in aligned], [al["cost"] for al in expected])
+        self.assertEqual([al["fitness"] for al in aligned], [al["fitness"] for al in expected])
+        # the synchronous product assembled by the cache is the one of the trace net
+        parameters = {state_equation_a_star.Parameters.PARAM_ALIGNMENT_RESULT_IS_SYNC_PROD_AWARE: True}
+        compiled = state_equation_a_star.apply(log[0], net, im, fm, parameters=dict(parameters))
+        trace_net, trace_im, trace_fm = construct_trace_net(log[0])
+        from_trace_net = state_equation_a_star.apply_trace_net(net, im, fm, trace_net, trace_im, trace_fm,
+                                                               parameters=dict(parameters))
+        self.assertEqual(compiled["cost"], from_trace_net["cost"])
+        self.assertEqual(sorted(compiled["alignment"]), sorted(from_trace_net["alignment"]))
+        # the heuristics are memoized across the traces
+        model_cost_function = {t: 10000 if t.label is not None else 1 for t in net.transitions}
+        sync_cost_function = {t: 0 for t in net.transitions if t.label is not None}
+        cache = state_equation_a_star.HeuristicsCache(net, im, fm, model_cost_function, sync_cost_function)
+        parameters = {state_equation_a_star.Parameters.HEURISTICS_CACHE: cache,
+                      state_equation_a_star.Parameters.PARAM_MODEL_COST_FUNCTION: model_cost_function,
+                      state_equation_a_star.Parameters.PARAM_SYNC_COST_FUNCTION: sync_cost_function,
+                      state_equation_a_star.Parameters.RETURN_SEARCH_COUNTERS: True}
+        first = state_equation_a_star.apply_traces(log, net, im, fm, parameters=parameters)
+        lp_solved = cache.counters["lp_solved"]
+        second = state_equation_a_star.apply_traces(log, net, im, fm, parameters=parameters)
+        self.assertEqual([al["cost"] for al in second], [al["cost"] for al in first])
+        self.assertEqual(cache.counters["lp_solved"], lp_solved)
+        self.assertTrue(all(al["lp_solved"] == 0 and al["heuristics_memo_hits"] > 0 for al in second))
+        self.assertGreater(cache.counters["lp_time"], 0)
+        # the counters of the search are not in the alignments by default
+        self.assertEqual(set(aligned[0]), set(expected[0]) | {"lp_solved"})
+        # the memo of the heuristics is bounded
+        cache = state_equation_a_star.HeuristicsCache(net, im, fm, model_cost_function, sync_cost_function,
+                                                      max_solutions=5)
+        parameters[state_equation_a_star.Parameters.HEURISTICS_CACHE] = cache
+        bounded = state_equation_a_star.apply_traces(log, net, im, fm, parameters=parameters)
+        self.assertEqual([al["cost"] for al in bounded], [al["cost"] for al in first])
+        self.assertLessEqual(len(cache.solutions), 5)
+
+    def test_state_equation_state_budget(self):
+        import pm4py
+        from pm4py.objects.petri_net import semantics
+        log = pm4py.read_xes("input_data/reviewing.xes", return_legacy_log_object=True)
+        net, im, fm = pm4py.discover_petri_net_inductive(log, noise_threshold=0.2)
+        exact = pm4py.conformance_diagnostics_alignments(log, net, im, fm, multi_processing=False)
+        self.assertFalse(any(al.get("approximate", False) for al in exact))
+        with self.assertWarns(UserWarning):
+            bounded = pm4py.conformance_diagnostics_alignments(log, net, im, fm, multi_processing=False,
+                                                               max_states_trace=100)
+        self.assertTrue(any(al.get("approximate", False) for al in bounded))
+        for trace, al, ex in zip(log, bounded, exact):
+            self.assertTrue(al["cost"] >= ex["cost"] if al.get("approximate", False) else al["cost"] == ex["cost"])
+            # the approximate alignments are alignments of the trace
+            self.assertEqual([move[0] for move in al["alignment"] if move[0] != ">>"],
+                             [event["concept:name"] for event in trace])
+            markings = [im]
+            for move in al["alignment"]:
+                if move[1] != ">>":
+                    markings = [semantics.execute(t, net, m) for m in markings
+                                for t in semantics.enabled_transitions(net, m) if t.label == move[1]]
+            self.assertIn(fm, markings)
+        # the memo of the heuristics shared by the traces stays within the budget
+        from pm4py.algo.conformance.alignments.petri_net.variants import state_equation_a_star
+        model_cost_function = {t: 10000 if t.label is not None else 1 for t in net.transitions}
+        sync_cost_function = {t: 0 for t in net.transitions if t.label is not None}
+        cache = state_equation_a_star.HeuristicsCache(net, im, fm, model_cost_function, sync_cost_function)
+        parameters = {state_equation_a_star.Parameters.PARAM_MAX_STATES_TRACE: 100}
+        state_equation_a_star.apply_traces(log, net, im, fm, parameters={
+            **parameters, state_equation_a_star.Parameters.HEURISTICS_CACHE: cache,
+            state_equation_a_star.Parameters.PARAM_MODEL_COST_FUNCTION: model_cost_function,
+            state_equation_a_star.Parameters.PARAM_SYNC_COST_FUNCTION: sync_cost_function})
+        self.assertLessEqual(len(cache.solutions), 100)
+        # the other variants ignore the budget
+        with self.assertWarns(UserWarning):
+            align_alg.apply(log, net, im, fm, parameters=parameters,
+                            variant=align_alg.Variants.VERSION_DIJKSTRA_LESS_MEMORY)
+
 
 
 if __name__ == "__main__":
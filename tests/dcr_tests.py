@@ -1,11 +1,14 @@
 import os
 import unittest
 
+import numpy as np
+
 import pm4py
 from pm4py.algo.discovery.dcr_discover import algorithm as alg
 from pm4py.objects.dcr.importer import importer as dcr_importer
 from pm4py.objects.dcr.exporter import exporter as dcr_exporter
 from pm4py.objects.dcr.semantics import DcrSemantics
+from pm4py.objects.dcr.compiled_semantics import CompiledDcrGraph, CompiledDcrSemantics, replay_log, replay_traces
 from pm4py.objects.conversion.dcr import *
 
 class TestDcr(unittest.TestCase):
@@ -22,5 +25,490 @@ class TestDcr(unittest.TestCase):
     def test_execution_semantics(self):
         pass
 
+    def test_compiled_semantics_same_as_dict_semantics(self):
+        log = pm4py.read_xes(os.path.join(os.path.dirname(__file__), "input_data", "running-example.xes"),
+                             return_legacy_log_object=True)
+        dcr, _ = alg.apply(log)
+        dcr['excludesTo']['decide'] = dcr['excludesTo']['decide'].union({'pay compensation'})
+        graph = CompiledDcrGraph(dcr)
+        for trace in log:
+            dict_sem = DcrSemantics(dcr, cmd_print=False)
+            compiled_sem = CompiledDcrSemantics(graph, cmd_print=False)
+            for event in trace:
+                self.assertEqual(dict_sem.enabled(), compiled_sem.enabled())
+                self.assertEqual(dict_sem.execute(event['concept:name']),
+                                 compiled_sem.execute(event['concept:name']))
+            self.assertEqual(dict_sem.is_accepting(), compiled_sem.is_accepting())
+
+    def test_compiled_semantics_flattens_nestings(self):
+        dcr = {
+            'events': {'A', 'B', 'C', 'N'},
+            'conditionsFor': {'C': {'N'}},
+            'milestonesFor': {},
+            'responseTo': {'C': {'N'}},
+            'noResponseTo': {},
+            'includesTo': {},
+            'excludesTo': {'N': {'N'}},
+            'marking': {'executed': set(), 'included': {'A', 'B', 'C', 'N'}, 'pending': set()},
+            'nestings': {'N': {'A', 'B'}}
+        }
+        graph = CompiledDcrGraph(dcr, flatten=True)
+        self.assertEqual(set(graph.events), {'A', 'B', 'C'})
+        sem = CompiledDcrSemantics(graph, cmd_print=False)
+        self.assertEqual(sem.enabled(), {'A', 'B'})
+        self.assertTrue(sem.execute('A')[0])
+        # A excludes the whole nesting, so the condition on C is satisfied and B is no longer enabled
+        self.assertEqual(sem.enabled(), {'C'})
+        self.assertTrue(sem.execute('C')[0])
+        self.assertTrue(sem.is_accepting())
+
+    def test_compiled_semantics_snapshot_restore(self):
+        dcr = {
+            'events': {'A', 'B'},
+            'conditionsFor': {'B': {'A'}},
+            'milestonesFor': {},
+            'responseTo': {'A': {'B'}},
+            'noResponseTo': {},
+            'includesTo': {},
+            'excludesTo': {'B': {'B'}},
+            'marking': {'executed': set(), 'included': {'A', 'B'}, 'pending': set()}
+        }
+        sem = CompiledDcrSemantics(dcr, cmd_print=False)
+        initial_marking = sem.snapshot()
+        sem.execute('A')
+        after_a = sem.snapshot()
+        self.assertFalse(sem.is_accepting())
+        sem.execute('B')
+        self.assertEqual(sem.enabled(), {'A'})
+        sem.restore(after_a)
+        self.assertEqual(sem.enabled(), {'A', 'B'})
+        sem.restore(initial_marking)
+        self.assertEqual(sem.enabled(), {'A'})
+        self.assertTrue(sem.is_accepting())
+
+    def test_replay_log(self):
+        log = pm4py.read_xes(os.path.join(os.path.dirname(__file__), "input_data", "running-example.xes"))
+        dcr, _ = alg.apply(log)
+        res = replay_log(dcr, log)
+        self.assertEqual(len(res), 6)
+        self.assertTrue(all(r['accepted'] and r['first_violation'] is None for r in res))
+        dcr['conditionsFor']['register request'] = {'decide'}
+        res = replay_log(dcr, log)
+        self.assertTrue(all(not r['accepted'] and r['first_violation'] == 0 for r in res))
+
+    def test_conformance_dcr(self):
+        log = pm4py.read_xes(os.path.join(os.path.dirname(__file__), "input_data", "running-example.xes"))
+        dcr, _ = alg.apply(log)
+        res = pm4py.conformance_dcr(log, dcr)
+        self.assertEqual(len(res), 6)
+        self.assertTrue(all(r['is_fit'] and r['no_dev_total'] == 0 for r in res))
+        dcr['conditionsFor']['register request'] = {'decide'}
+        dcr['excludesTo']['register request'] = set()
+        dcr['responseTo']['register request'] = {'register request'}
+        res = pm4py.conformance_dcr(log, dcr)
+        for r in res:
+            self.assertFalse(r['is_fit'])
+            self.assertIn(['conditionsFor', ('decide', 'register request')], r['deviations'])
+            self.assertIn(['responseTo', ('register request', 'register request')], r['deviations'])
+        diagn = pm4py.conformance_dcr(log, dcr, return_diagnostics_dataframe=True)
+        self.assertEqual(len(diagn), 6)
+
+    def test_dataframe_log_abstraction(self):
+        from pm4py.algo.discovery.dcr_discover.variants import dcr_discover
+        df = pm4py.read_xes(os.path.join(os.path.dirname(__file__), "input_data", "running-example.xes"))
+        traces = pm4py.project_on_event_attribute(df, "concept:name")
+        # reference abstraction: parseTrace applied to every trace
+        disc_ref = dcr_discover.Discover()
+        la = disc_ref.logAbstraction
+        events = set(a for trace in traces for a in trace)
+        la['events'] = events.copy()
+        la['atMostOnce'] = events.copy()
+        for event in events:
+            la['chainPrecedenceFor'][event] = events - {event}
+            la['precedenceFor'][event] = events - {event}
+            la['predecessor'][event] = set()
+            la['responseTo'][event] = events - {event}
+            la['successor'][event] = set()
+        for trace in traces:
+            disc_ref.parseTrace(trace)
+        for i in la['predecessor']:
+            for j in la['predecessor'][i]:
+                la['successor'][j].add(i)
+        disc_df = dcr_discover.Discover()
+        disc_df.createLogAbstractionFromDataframe(df)
+        disc_var = dcr_discover.Discover()
+        disc_var.createLogAbstractionFromVariants(pm4py.get_variants(df))
+        for k in ['events', 'atMostOnce', 'chainPrecedenceFor', 'precedenceFor', 'predecessor', 'responseTo',
+                  'successor']:
+            self.assertEqual(disc_df.logAbstraction[k], la[k])
+            self.assertEqual(disc_var.logAbstraction[k], la[k])
+        self.assertEqual(disc_df.logAbstraction['frequencies'], disc_var.logAbstraction['frequencies'])
+        self.assertEqual(disc_df.logAbstraction['frequencies']['cases'], 6)
+        self.assertEqual(disc_df.logAbstraction['frequencies']['events']['register request'], 6)
+
+    def test_streaming_discovery(self):
+        from pm4py.algo.discovery.dcr_discover.variants import dcr_discover
+        from pm4py.streaming.algo.discovery.dcr import algorithm as dcr_stream
+        df = pm4py.read_xes(os.path.join(os.path.dirname(__file__), "input_data", "running-example.xes"))
+        stream_disc = dcr_stream.apply(parameters={"end_activities": {"pay compensation", "reject request"}})
+        for event in pm4py.convert_to_event_stream(df):
+            stream_disc.receive(event)
+        self.assertEqual(len(stream_disc.open_cases), 0)
+        _, la = dcr_discover.Discover().mine(df)
+        la_stream = stream_disc.get_log_abstraction()
+        for k in ['events', 'atMostOnce', 'chainPrecedenceFor', 'precedenceFor', 'predecessor', 'responseTo',
+                  'successor', 'variants']:
+            self.assertEqual(la_stream[k], la[k])
+        self.assertEqual(stream_disc.get()['events'], la['events'])
+        bounded_disc = dcr_stream.apply(parameters={"max_open_cases": 2})
+        for event in pm4py.convert_to_event_stream(df):
+            bounded_disc.receive(event)
+        self.assertLessEqual(len(bounded_disc.open_cases), 2)
+        # the completed variants kept for the additional conditions are bounded on an unbounded stream
+        bounded_disc = dcr_stream.apply(parameters={"end_activities": {"end"}, "max_variants": 50})
+        no_conditions_disc = dcr_stream.apply(parameters={"end_activities": {"end"},
+                                                          "findAdditionalConditions": False})
+        for case in range(2000):
+            # every case has a distinct variant
+            for activity in [str(case % 7)] * (case // 7 + 1) + ["end"]:
+                event = {"case:concept:name": str(case), "concept:name": activity}
+                bounded_disc.receive(event)
+                no_conditions_disc.receive(event)
+        self.assertEqual(len(bounded_disc.variants), 50)
+        self.assertEqual(bounded_disc.evicted_variants, 2000 - 50)
+        self.assertEqual(len(no_conditions_disc.variants), 0)
+        self.assertEqual(bounded_disc.get()['events'], no_conditions_disc.get()['events'])
+
+    def test_transitive_reduction(self):
+        from pm4py.algo.discovery.dcr_discover.variants import dcr_discover
+        disc = dcr_discover.Discover()
+        # acyclic and transitively closed: same as optimizeRelation
+        relation = {'A': {'B', 'C', 'D'}, 'B': {'C', 'D'}, 'C': {'D'}, 'D': set()}
+        self.assertEqual(disc.optimizeRelationTransitiveReduction(relation),
+                         {'A': {'B'}, 'B': {'C'}, 'C': {'D'}, 'D': set()})
+        # longer paths are also removed
+        relation = {'A': {'B', 'D'}, 'B': {'C'}, 'C': {'D'}}
+        self.assertEqual(disc.optimizeRelationTransitiveReduction(relation)['A'], {'B'})
+        # the arcs inside a cycle are kept, the ones leaving it are reduced
+        relation = {'A': {'B', 'C'}, 'B': {'A', 'C'}, 'C': {'D'}, 'D': set(), 'E': {'A', 'D'}}
+        reduced = disc.optimizeRelationTransitiveReduction(relation)
+        self.assertEqual(reduced['A'], {'B', 'C'})
+        self.assertEqual(reduced['B'], {'A', 'C'})
+        self.assertEqual(reduced['E'], {'A'})
+
+    def test_nesting_shared_relations(self):
+        from copy import deepcopy
+        from pm4py.objects.dcr.obj import dcr_template
+        from pm4py.algo.discovery.dcr_discover.extenstions import nesting
+        dcr = deepcopy(dcr_template)
+        dcr['events'] = {'A', 'B', 'C', 'D', 'E'}
+        # A, B and C share the condition from D and the exclusion of E
+        dcr['conditionsFor'] = {'A': {'D'}, 'B': {'D'}, 'C': {'D'}}
+        dcr['excludesTo'] = {'A': {'E'}, 'B': {'E'}, 'C': {'E'}}
+        dcr['responseTo'] = {'D': {'E'}}
+        nested = nesting.apply_nesting(dcr)
+        self.assertEqual(len(nested['nestings']), 1)
+        group = list(nested['nestings'])[0]
+        self.assertEqual(nested['nestings'][group], {'A', 'B', 'C'})
+        self.assertEqual(nested['conditionsFor'][group], {'D'})
+        self.assertEqual(nested['excludesTo'][group], {'E'})
+        self.assertEqual(nested['responseTo']['D'], {'E'})
+
+    def test_timing_extraction(self):
+        import pandas as pd
+        from pm4py.algo.discovery.dcr_discover.extenstions import time_constraints
+        df = pd.DataFrame({'case:concept:name': ['1', '1', '1', '1', '2', '2', '3'],
+                           'concept:name': ['A', 'A', 'C', 'B', 'A', 'B', 'B'],
+                           'time:timestamp': pd.to_datetime(['2023-01-01 00:00', '2023-01-01 01:00',
+                                                             '2023-01-01 02:00', '2023-01-01 04:00',
+                                                             '2023-01-02 00:00', '2023-01-02 00:30',
+                                                             '2023-01-03 00:00'])})
+        dcr = {'events': {'A', 'B', 'C'}, 'responseTo': {'A': {'B'}}, 'conditionsFor': {'B': {'A'}},
+               'subprocesses': {}}
+        timings = time_constraints.get_timing_values(dcr, df, None)
+        # the repetition of A is part of the deadline, C is not considered between A and B
+        self.assertEqual(timings[('RESPONSE', 'A', 'B')],
+                         [pd.Timedelta(hours=1), pd.Timedelta(hours=3), pd.Timedelta(minutes=30)])
+        self.assertEqual(timings[('CONDITION', 'A', 'B')], [pd.Timedelta(hours=3), pd.Timedelta(minutes=30)])
+        aggregated = time_constraints.apply(dcr, df, method='standard')
+        self.assertEqual(aggregated[('RESPONSE', 'A', 'B')], pd.Timedelta(hours=3))
+        self.assertEqual(aggregated[('CONDITION', 'A', 'B')], pd.Timedelta(minutes=30))
+        aggregated = time_constraints.apply(dcr, df, method=time_constraints.AggregationMethod.MEDIAN)
+        self.assertEqual(aggregated[('CONDITION', 'A', 'B')], pd.Timedelta(minutes=105))
+        # the events of a case having the same timestamp are taken in the order of the log
+        tied = pd.DataFrame({'case:concept:name': ['1', '1', '1'], 'concept:name': ['A', 'B', 'A'],
+                             'time:timestamp': pd.to_datetime(['2023-01-01 00:00', '2023-01-01 01:00',
+                                                               '2023-01-01 01:00'])})
+        self.assertEqual(time_constraints.get_timing_values(dcr, tied, None)[('CONDITION', 'A', 'B')],
+                         [pd.Timedelta(hours=1)])
+        tied = tied.iloc[[0, 2, 1]]
+        self.assertEqual(time_constraints.get_timing_values(dcr, tied, None)[('CONDITION', 'A', 'B')],
+                         [pd.Timedelta(0)])
+        # timed discovery with nestings on a dataframe (the log of the subprocesses is a dataframe)
+        path = os.path.join(os.path.dirname(__file__), "input_data", "reviewing.xes")
+        dcr_df, _ = alg.apply(pm4py.read_xes(path), variant=alg.DCR_N, timed=True)
+        dcr_log, _ = alg.apply(pm4py.read_xes(path, return_legacy_log_object=True), variant=alg.DCR_N, timed=True)
+        self.assertTrue(len(dcr_df['conditionsForDelays']) > 0)
+        self.assertEqual(dcr_df['conditionsForDelays'], dcr_log['conditionsForDelays'])
+        self.assertEqual(dcr_df['responseToDeadlines'], dcr_log['responseToDeadlines'])
+
+    def test_compact_dcr_graph(self):
+        import copy
+        import pickle
+        from pm4py.objects.dcr.obj import CompactDcrGraph
+        log = pm4py.read_xes(os.path.join(os.path.dirname(__file__), "input_data", "running-example.xes"),
+                             return_legacy_log_object=True)
+        dcr, _ = alg.apply(log)
+        compact = CompactDcrGraph(dcr)
+        self.assertEqual(compact, dcr)
+        self.assertEqual(compact.to_dict(), dcr)
+        self.assertEqual(pickle.loads(pickle.dumps(compact)), dcr)
+        self.assertIs(copy.deepcopy(compact), compact)
+        self.assertTrue('check ticket' in compact['conditionsFor']['decide'])
+        with self.assertRaises(TypeError):
+            compact['conditionsFor']['decide'] = set()
+        # the graph is accepted wherever the dict is read
+        trace = ['register request', 'examine casually', 'check ticket', 'decide', 'pay compensation']
+        semantics = DcrSemantics(compact, cmd_print=False)
+        for activity in trace:
+            executed, _ = semantics.execute(activity)
+            self.assertTrue(executed)
+        graph = CompiledDcrGraph(compact)
+        self.assertEqual(graph.conditions, CompiledDcrGraph(dcr).conditions)
+
+    def test_state_space(self):
+        from pm4py.objects.dcr.state_space import DcrStateSpace
+        # A is a condition for B, B excludes A and itself, C is never included, D waits for a pending excluded E
+        dcr = {'events': {'A', 'B', 'C', 'D', 'E'}, 'conditionsFor': {'B': {'A'}}, 'milestonesFor': {},
+               'responseTo': {}, 'noResponseTo': {}, 'includesTo': {'D': {'E'}},
+               'excludesTo': {'B': {'A', 'B'}, 'E': {'D'}}, 'conditionsForDelays': {}, 'responseToDeadlines': {},
+               'marking': {'executed': set(), 'included': {'A', 'B', 'D'}, 'pending': {'B', 'E'}}}
+        state_space = DcrStateSpace(dcr)
+        self.assertTrue(state_space.complete)
+        self.assertEqual(state_space.dead_events(), {'C'})
+        self.assertEqual(state_space.never_included_events(), {'C'})
+        # from any marking the graph can be completed, but B is executed at most once
+        self.assertTrue(state_space.is_live())
+        self.assertEqual(state_space.deadlocks(), [])
+        self.assertNotIn('B', state_space.live_events())
+        self.assertFalse(DcrStateSpace(dcr, max_depth=1).complete)
+        self.assertFalse(DcrStateSpace(dcr, max_states=2).complete)
+        # A and B are conditions for each other, and B is pending
+        dcr = {'events': {'A', 'B'}, 'conditionsFor': {'A': {'B'}, 'B': {'A'}}, 'milestonesFor': {},
+               'responseTo': {}, 'noResponseTo': {}, 'includesTo': {}, 'excludesTo': {},
+               'conditionsForDelays': {}, 'responseToDeadlines': {},
+               'marking': {'executed': set(), 'included': {'A', 'B'}, 'pending': {'B'}}}
+        state_space = DcrStateSpace(dcr)
+        self.assertEqual(state_space.deadlocks(), [{'executed': set(), 'included': {'A', 'B'}, 'pending': {'B'}}])
+        self.assertFalse(state_space.is_live())
+        self.assertEqual(state_space.dead_events(), {'A', 'B'})
+        # the post optimization of the petri net mapping keeps only what is reachable in the dcr graph
+        log = pm4py.read_xes(os.path.join(os.path.dirname(__file__), "input_data", "running-example.xes"),
+                             return_legacy_log_object=True)
+        dcr, _ = alg.apply(log)
+        from pm4py.objects.conversion.dcr.variants.to_petri_net import Dcr2PetriNet
+        tapn_path = os.path.join(os.path.dirname(__file__), "test_output_data", "dcr_state_space.tapn")
+        tapn, _ = Dcr2PetriNet(preoptimize=True, postoptimize=True).dcr2tapn(dcr, tapn_path)
+        os.remove(tapn_path)
+        self.assertEqual(len(tapn.places), 16)
+        self.assertEqual(len(tapn.transitions), 42)
+        # above the reachability budget the optimizations relying on the state space are skipped with a warning
+        with self.assertWarns(UserWarning):
+            tapn, _ = Dcr2PetriNet(preoptimize=True, postoptimize=True,
+                                   reachability_max_states=2).dcr2tapn(dcr, tapn_path)
+        os.remove(tapn_path)
+        self.assertGreater(len(tapn.transitions), 42)
+
+    def test_relation_fragments(self):
+        from pm4py.objects.conversion.dcr.variants.to_petri_net import Dcr2PetriNet
+        log = pm4py.read_xes(os.path.join(os.path.dirname(__file__), "input_data", "running-example.xes"),
+                             return_legacy_log_object=True)
+        dcr, _ = alg.apply(log)
+        tapn_path = os.path.join(os.path.dirname(__file__), "test_output_data", "dcr_fragments.tapn")
+        tapn, _ = Dcr2PetriNet(preoptimize=False, postoptimize=False).dcr2tapn(dcr, tapn_path)
+        os.remove(tapn_path)
+        # same net as mapping the relation patterns one at a time
+        self.assertEqual(len(tapn.places), 32)
+        self.assertEqual(len(tapn.transitions), 912)
+        self.assertEqual(len(tapn.arcs), 12100)
+
+    def test_xml_streaming_impexp(self):
+        log = pm4py.read_xes(os.path.join(os.path.dirname(__file__), "input_data", "running-example.xes"),
+                             return_legacy_log_object=True)
+        dcr, _ = alg.apply(log)
+        dcr['marking']['pending'].add('decide')
+        tree_path = os.path.join(os.path.dirname(__file__), "test_output_data", "dcr_tree.xml")
+        stream_path = os.path.join(os.path.dirname(__file__), "test_output_data", "dcr_stream.xml")
+        for export_variant, stream_variant, import_variant, iterparse_variant in [
+            (dcr_exporter.XML_SIMPLE, dcr_exporter.XML_SIMPLE_STREAM, dcr_importer.Variants.XML_SIMPLE,
+             dcr_importer.Variants.XML_SIMPLE_ITERPARSE),
+            (dcr_exporter.XML_DCR_PORTAL, dcr_exporter.XML_DCR_PORTAL_STREAM, dcr_importer.Variants.XML_DCR_PORTAL,
+             dcr_importer.Variants.XML_DCR_PORTAL_ITERPARSE)]:
+            dcr_exporter.apply(dcr, tree_path, variant=export_variant, dcr_title='running example')
+            dcr_exporter.apply(dcr, stream_path, variant=stream_variant, dcr_title='running example')
+            imported = dcr_importer.apply(tree_path, variant=import_variant)
+            self.assertEqual(imported, dcr_importer.apply(stream_path, variant=import_variant))
+            self.assertEqual(imported, dcr_importer.apply(stream_path, variant=iterparse_variant))
+            with open(stream_path) as f:
+                self.assertEqual(imported, dcr_importer.deserialize(f.read(), variant=iterparse_variant))
+            # the importers remove the spaces from the ids of the events
+            self.assertEqual(imported['events'], {event.replace(' ', '') for event in dcr['events']})
+            os.remove(tree_path)
+            os.remove(stream_path)
+
+    def test_binary_impexp(self):
+        from pm4py.objects.dcr.obj import CompactDcrGraph
+        log = pm4py.read_xes(os.path.join(os.path.dirname(__file__), "input_data", "running-example.xes"),
+                             return_legacy_log_object=True)
+        dcr, _ = alg.apply(log, timed=True)
+        dcr['marking']['pending'].add('decide')
+        dcr['roleAssignments']['clerk'] = {'decide', 'register request'}
+        path = os.path.join(os.path.dirname(__file__), "test_output_data", "dcr.bin")
+        dcr_exporter.apply(dcr, path, variant=dcr_exporter.BINARY)
+        for use_mmap in [True, False]:
+            imported = dcr_importer.apply(path, variant=dcr_importer.Variants.BINARY,
+                                          parameters={"use_mmap": use_mmap})
+            self.assertIsInstance(imported, CompactDcrGraph)
+            self.assertEqual(imported.to_dict(), dcr)
+            self.assertEqual(imported['conditionsFor']['decide'], dcr['conditionsFor']['decide'])
+            self.assertEqual(CompiledDcrGraph(imported).responses, CompiledDcrGraph(dcr).responses)
+        with open(path, "rb") as f:
+            self.assertEqual(dcr_importer.deserialize(f.read(), variant=dcr_importer.Variants.BINARY).to_dict(), dcr)
+        del imported
+        os.remove(path)
+
+    def test_dcr_playout(self):
+        from datetime import timedelta
+        from pm4py.algo.simulation.playout.dcr import algorithm as dcr_playout
+        log = pm4py.read_xes(os.path.join(os.path.dirname(__file__), "input_data", "running-example.xes"),
+                             return_legacy_log_object=True)
+        dcr, _ = alg.apply(log)
+        parameters = {"noTraces": 60, "random_seed": 0, "add_only_if_accepting": True, "chunk_size": 20}
+        simulated = dcr_playout.apply(dcr, parameters=parameters)
+        self.assertEqual(len(simulated), 60)
+        self.assertTrue(all(r['accepted'] for r in replay_log(dcr, simulated)))
+        # the traces do not depend on the number of worker processes (the empty traces have no rows in a dataframe)
+        df = dcr_playout.apply(dcr, parameters={**parameters, "cores": 2, "return_dataframe": True})
+        self.assertEqual(sorted(pm4py.project_on_event_attribute(df, "concept:name")),
+                         sorted(t for t in pm4py.project_on_event_attribute(simulated, "concept:name") if t))
+        extensive = dcr_playout.apply(dcr, variant=dcr_playout.Variants.EXTENSIVE,
+                                      parameters={"maxTraceLength": 5})
+        self.assertTrue(all(r['accepted'] for r in replay_log(dcr, extensive)))
+        self.assertIn(['register request', 'check ticket', 'examine casually', 'decide', 'reject request'],
+                      pm4py.project_on_event_attribute(extensive, "concept:name"))
+
+        timed = {'events': {'A', 'B', 'C'}, 'conditionsFor': {'B': {'A'}}, 'responseTo': {'A': {'C'}},
+                 'includesTo': {}, 'excludesTo': {}, 'milestonesFor': {}, 'noResponseTo': {},
+                 'conditionsForDelays': {'B': {'A': timedelta(days=2)}},
+                 'responseToDeadlines': {'A': {'C': timedelta(days=1)}},
+                 'marking': {'executed': set(), 'included': {'A', 'B', 'C'}, 'pending': set()}}
+        simulated = dcr_playout.apply(timed, variant=dcr_playout.Variants.STOCHASTIC_PLAYOUT,
+                                      parameters={"noTraces": 50, "random_seed": 0,
+                                                  "stochastic_map": {'A': 1, 'B': 5, 'C': 1}})
+        for trace in simulated:
+            activities = [event['concept:name'] for event in trace]
+            if 'A' in activities:
+                first_a = trace[activities.index('A')]['time:timestamp']
+                for event in trace:
+                    if event['concept:name'] == 'B':
+                        self.assertGreaterEqual(event['time:timestamp'] - first_a, timedelta(days=2))
+            elif 'B' in activities:
+                self.fail('B executed without A')
+        # the playout of a timed model with nestings respects the plain conditions of the events having delays
+        log = pm4py.read_xes(os.path.join(os.path.dirname(__file__), "input_data", "reviewing.xes"),
+                             return_legacy_log_object=True)
+        dcr, _ = alg.apply(log, variant=alg.DCR_N, timed=True)
+        simulated = dcr_playout.apply(dcr, parameters={"noTraces": 100, "random_seed": 0})
+        self.assertTrue(all(r['dev_fitness'] == 1 for r in pm4py.conformance_dcr(simulated, dcr)))
+
+    def test_language_inclusion(self):
+        from copy import deepcopy
+        from pm4py.algo.evaluation.dcr.language_inclusion import check_inclusion, check_equivalence, \
+            DcrLanguageComparator
+        log = pm4py.read_xes(os.path.join(os.path.dirname(__file__), "input_data", "running-example.xes"),
+                             return_legacy_log_object=True)
+        dcr, _ = alg.apply(log)
+        self.assertTrue(check_equivalence(dcr, deepcopy(dcr))['equivalent'])
+        restricted = deepcopy(dcr)
+        restricted['excludesTo']['decide'] = restricted['excludesTo']['decide'].union({'pay compensation'})
+        self.assertTrue(check_inclusion(restricted, dcr)['included'])
+        res = check_inclusion(dcr, restricted)
+        self.assertFalse(res['included'])
+        self.assertEqual(replay_traces(dcr, [res['counterexample']])[0]['accepted'], True)
+        self.assertEqual(replay_traces(restricted, [res['counterexample']])[0]['accepted'], False)
+        res = check_equivalence(restricted, dcr)
+        self.assertEqual((res['equivalent'], res['accepted_by']), (False, 2))
+        # the bounded checks resume the exploration, the shortest counterexample has 5 events
+        comparator = DcrLanguageComparator(dcr, restricted)
+        self.assertEqual(comparator.check_inclusion(0, max_depth=4)['included'], None)
+        self.assertEqual(comparator.check_inclusion(0, max_depth=4)['depth'], 4)
+        self.assertEqual(len(comparator.check_inclusion(0, max_depth=5)['counterexample']), 5)
+
+    def test_structural_metrics(self):
+        from pm4py.algo.evaluation.dcr import algorithm as dcr_evaluation
+        from pm4py.algo.evaluation.dcr.metrics import compute_metrics
+        dcr = {'events': {'A', 'B', 'C', 'D', 'E'}, 'conditionsFor': {'B': {'A'}}, 'responseTo': {'A': {'B', 'C'}},
+               'includesTo': {}, 'excludesTo': {'C': {'C'}}, 'milestonesFor': {}, 'noResponseTo': {'D': {'E'}},
+               'subprocesses': {}}
+        metrics = compute_metrics(dcr)
+        # components {A, B, C} (4 constraints) and {D, E} (1 constraint)
+        self.assertEqual(metrics['size'], 10)
+        self.assertAlmostEqual(metrics['density'], 4 / 3)
+        self.assertAlmostEqual(metrics['separability'], 2 / 10)
+        self.assertEqual(metrics['relations'], 4)
+        self.assertAlmostEqual(metrics['constraint_variability'],
+                               -(0.25 * np.emath.logn(3, 0.25) * 2 + 0.5 * np.emath.logn(3, 0.5)))
+        self.assertEqual(dcr_evaluation.run_all_dcr_metrics(dcr)['density'], metrics['density'])
+        self.assertEqual(dcr_evaluation.dcr_constraint_variablity_metric(dcr), metrics['constraint_variability'])
+
+    def test_benchmark_harness(self):
+        import shutil
+        import tempfile
+        from pm4py.algo.evaluation.dcr import benchmark
+        tmp = tempfile.mkdtemp()
+        try:
+            log_path = os.path.join("input_data", "running-example.xes")
+            results_path = os.path.join(tmp, "results.csv")
+            configs = [{'alg_name': 'plain'}, {'alg_name': 'no_additional', 'findAdditionalConditions': False}]
+            variants = ['DCR_BASIC', 'DCR_N']
+            results = benchmark.run_benchmark({'running-example': log_path}, configs, results_path,
+                                              variants=variants, test_fraction=0.5)
+            self.assertEqual(len(results), 4)
+            self.assertTrue(all(results['error'].isna()))
+            # the stages match the discovery
+            cache_path = benchmark.cache_log('running-example', log_path, os.path.join(tmp, 'dcr_benchmark_cache'))
+            row = benchmark.run_job(cache_path, 'running-example', {}, 'DCR_BASIC')
+            dcr, _ = alg.apply(pm4py.read_xes(log_path))
+            self.assertEqual(row['activities'], len(dcr['events']))
+            self.assertEqual(row['training_fitness'], 1.0)
+            # a job interrupted before writing its row is the only one run again
+            with open(results_path) as f:
+                lines = f.read().splitlines()
+            with open(results_path, 'w') as f:
+                f.write('\n'.join(lines[:-1]) + '\n')
+            results = benchmark.run_benchmark({'running-example': log_path}, configs, results_path,
+                                              variants=variants, test_fraction=0.5)
+            self.assertEqual(sorted(zip(results['config'], results['variant'])),
+                             sorted((c['alg_name'], v) for c in configs for v in variants))
+            self.assertEqual(len(set(results['train_cases'])), 1)
+        finally:
+            shutil.rmtree(tmp)
+
+    def test_mutual_exclusion_groups(self):
+        from pm4py.algo.discovery.dcr_discover.extenstions import mutual_exclusion
+        # A, B, C, D mutually exclude each other (C and E too), F does not exclude itself
+        events = {'A', 'B', 'C', 'D', 'E', 'F', 'G'}
+        excludes = {e: {e} for e in events - {'F'}}
+        for group in [{'A', 'B', 'C', 'D'}, {'C', 'E'}, {'F', 'G'}]:
+            for e in group:
+                excludes.setdefault(e, set()).update(group - {e})
+        dcr = {'events': events, 'excludesTo': excludes}
+        groups = mutual_exclusion.get_mutual_exclusions(dcr)
+        self.assertEqual(groups, {'Choice1': frozenset({'A', 'B', 'C', 'D'})})
+        self.assertEqual(set(mutual_exclusion.get_mutually_excluding_graph(dcr).edges(['E'])), {('E', 'C')})
+        # the greedy cover (no time left for the search) still groups disjoint cliques
+        groups = mutual_exclusion.get_mutual_exclusions(dcr, max_elab_time=0)
+        self.assertEqual(groups, {'Choice1': frozenset({'A', 'B', 'C', 'D'})})
+
     def write_more_tests(self):
         pass
\ No newline at end of file
@@ -22,6 +22,20 @@ class DiagnDfConfChecking(unittest.TestCase):
         replayed_traces = token_based_replay.apply(log, net, im, fm, variant=token_based_replay.Variants.BACKWARDS)
         diagn_df = token_based_replay.get_diagnostics_dataframe(log, replayed_traces, variant=token_based_replay.Variants.BACKWARDS)
 
+    def test_tbr_compiled(self):
+        log = xes_importer.apply("input_data/running-example.xes")
+        net, im, fm = pm4py.discover_petri_net_inductive(log, noise_threshold=0.2)
+        expected = token_based_replay.apply(log, net, im, fm)
+        replayed_traces = token_based_replay.apply(log, net, im, fm, variant=token_based_replay.Variants.COMPILED_TOKEN_REPLAY)
+        self.assertEqual(replayed_traces, expected)
+        parameters = {"multiprocessing": True, "cores": 2, "enable_pltr_fitness": True}
+        replayed_traces, place_fitness, transition_fitness, _ = token_based_replay.apply(log, net, im, fm, parameters=parameters, variant=token_based_replay.Variants.COMPILED_TOKEN_REPLAY)
+        expected, expected_place_fitness, _, _ = token_based_replay.apply(log, net, im, fm, parameters={"enable_pltr_fitness": True})
+        self.assertEqual(replayed_traces, expected)
+        self.assertEqual({p: (v["m"], v["r"], v["c"], v["p"]) for p, v in place_fitness.items()},
+                         {p: (v["m"], v["r"], v["c"], v["p"]) for p, v in expected_place_fitness.items()})
+        diagn_df = token_based_replay.get_diagnostics_dataframe(log, replayed_traces, variant=token_based_replay.Variants.COMPILED_TOKEN_REPLAY)
+
     def test_align(self):
         log = xes_importer.apply("input_data/running-example.xes")
         net, im, fm = pm4py.discover_petri_net_inductive(log, noise_threshold=0.2)
@@ -331,6 +331,69 @@ class OtherPartsTests(unittest.TestCase):
         log = pm4py.read_xes("input_data/running-example.xes")
         next_activity_target, next_activities = log_to_target.apply(log, variant=log_to_target.Variants.NEXT_ACTIVITY)
 
+    def test_reachability_graph_inhibitor_reset(self):
+        from pm4py.objects.petri_net.obj import PetriNet, ResetInhibitorNet, InhibitorNet, ResetNet, Marking
+        from pm4py.objects.petri_net.inhibitor_reset.semantics import InhibitorResetSemantics
+        from pm4py.objects.petri_net.utils import reachability_graph
+        net = ResetInhibitorNet("net")
+        p1, p2, p3 = PetriNet.Place("p1"), PetriNet.Place("p2"), PetriNet.Place("p3")
+        t1, t2, t3 = PetriNet.Transition("t1", "a"), PetriNet.Transition("t2", "b"), PetriNet.Transition("t3", "c")
+        net.places.update([p1, p2, p3])
+        net.transitions.update([t1, t2, t3])
+        # t1 moves a token from p1 to p2, t2 (inhibited by p1) moves the tokens of p2 to p3, t3 resets p3
+        arcs = [PetriNet.Arc(p1, t1), PetriNet.Arc(t1, p2), InhibitorNet.InhibitorArc(p1, t2),
+                PetriNet.Arc(p2, t2), PetriNet.Arc(t2, p3), PetriNet.Arc(p3, t3), ResetNet.ResetArc(p3, t3)]
+        for a in arcs:
+            net.arcs.add(a)
+            a.source.out_arcs.add(a)
+            a.target.in_arcs.add(a)
+        im = Marking({p1: 2})
+        incoming, outgoing, _ = reachability_graph.marking_flow_petri(
+            net, im, parameters={"petri_semantics": InhibitorResetSemantics()})
+        self.assertEqual(set(incoming), {Marking({p1: 2}), Marking({p1: 1, p2: 1}), Marking({p2: 2}),
+                                         Marking({p2: 1, p3: 1}), Marking({p3: 2}), Marking({p2: 1}), Marking({p3: 1}),
+                                         Marking()})
+        self.assertEqual(set(outgoing[Marking({p2: 1, p3: 1})].values()), {Marking({p3: 2}), Marking({p2: 1})})
+
+    def test_reachability_graph_classic_nets(self):
+        import pm4py
+        from pm4py.objects.petri_net.semantics import ClassicSemantics
+        from pm4py.objects.petri_net.utils import reachability_graph
+
+        class LegacySemantics(ClassicSemantics):
+            # not compiled in an IndexedNet, explored as in the previous versions
+            pass
+
+        log = pm4py.read_xes("input_data/running-example.xes")
+        for net, im, fm in [pm4py.discover_petri_net_inductive(log), pm4py.discover_petri_net_alpha(log)]:
+            incoming, outgoing, _ = reachability_graph.marking_flow_petri(net, im)
+            legacy_incoming, legacy_outgoing, _ = reachability_graph.marking_flow_petri(
+                net, im, parameters={"petri_semantics": LegacySemantics()})
+            self.assertEqual(incoming, legacy_incoming)
+            self.assertEqual(outgoing, legacy_outgoing)
+
+    def test_reachability_graph_max_elab_time(self):
+        import time
+        from pm4py.objects.petri_net.obj import PetriNet, Marking
+        from pm4py.objects.petri_net.utils import reachability_graph
+        from pm4py.objects.petri_net.utils.petri_utils import add_arc_from_to
+        # unbounded net: t1 keeps adding tokens to p2
+        net = PetriNet("net")
+        p1, p2 = PetriNet.Place("p1"), PetriNet.Place("p2")
+        t1, t2 = PetriNet.Transition("t1", "a"), PetriNet.Transition("t2", "b")
+        net.places.update([p1, p2])
+        net.transitions.update([t1, t2])
+        add_arc_from_to(p1, t1, net)
+        add_arc_from_to(t1, p1, net)
+        add_arc_from_to(t1, p2, net)
+        add_arc_from_to(p2, t2, net)
+        start_time = time.time()
+        incoming, outgoing, _ = reachability_graph.marking_flow_petri(net, Marking({p1: 1}),
+                                                                      parameters={"max_elab_time": 1})
+        self.assertLess(time.time() - start_time, 3)
+        self.assertGreater(len(incoming), 1)
+        self.assertTrue(set(outgoing).issubset(incoming))
+
 
 if __name__ == "__main__":
     unittest.main()